@@ -3,16 +3,18 @@ Flask API Server für Mitarbeiter Gehaltsabrechnung
 Einfache Alternative zu FastAPI ohne Pydantic-Probleme
 """
 
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Response, request, jsonify, send_file
 from flask_cors import CORS
 import logging
 from datetime import datetime, timedelta, timezone
 import jwt
+import hmac
 import json
 import os
 import io
 from openpyxl import load_workbook
 from database_manager import DatabaseManager
+from database_types import NativeJSONProvider
 from config.email_settings import email_service
 
 # Logging konfigurieren
@@ -30,6 +32,8 @@ CORS(app, origins=[
 # Security
 SECRET_KEY = os.getenv("SECRET_KEY", "dein-geheimer-schlüssel-hier-ändern")
 ALGORITHM = "HS256"
+# Optionales Token für Prometheus-Scraper auf /metrics (sonst nur Admin-JWT)
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
 
 def _env_bool(name: str, default: bool = False) -> bool:
     raw = os.getenv(name)
@@ -50,8 +54,34 @@ db_manager = DatabaseManager(
     password=os.getenv("DB_PASSWORD", ""),
     port=int(os.getenv("DB_PORT", "3307")),
     ssl_disabled=_env_bool("DB_SSL_DISABLED", default=False),
+    decimal_mode=os.getenv("DB_DECIMAL_MODE", "decimal"),
+    date_mode=os.getenv("DB_DATE_MODE", "date"),
+    pool_size=int(os.getenv("DB_POOL_SIZE", "10")),
+    max_overflow=int(os.getenv("DB_POOL_MAX_OVERFLOW", "0")),
+    pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", "10")),
+    read_hosts=os.getenv("DB_READ_HOSTS"),
+    fanout_workers=int(os.getenv("DB_FANOUT_WORKERS", "4")),
+    auto_migrate=_env_bool("DB_AUTO_MIGRATE", default=False),
+    read_cache_ttl=float(os.getenv("DB_READ_CACHE_TTL", "30")),
+    read_cache_size=int(os.getenv("DB_READ_CACHE_SIZE", "512")),
+    read_cache_replica_lag=float(os.getenv("DB_READ_CACHE_REPLICA_LAG", "5")),
 )
 
+# JSON-Ausgabe passend zum Converter (Standard: Flask-Format)
+app.json = NativeJSONProvider(
+    app,
+    decimal_mode=os.getenv("DB_DECIMAL_MODE", "decimal"),
+    date_mode=os.getenv("DB_DATE_MODE", "date"),
+)
+
+# Slow-Query-Log (opt-in): DB_SLOW_QUERY_MS setzt die Schwelle in Millisekunden
+if os.getenv("DB_SLOW_QUERY_MS"):
+    db_manager.configure_slow_query_log(
+        threshold_ms=float(os.getenv("DB_SLOW_QUERY_MS")),
+        capacity=int(os.getenv("DB_SLOW_QUERY_BUFFER", "100")),
+        explain=_env_bool("DB_SLOW_QUERY_EXPLAIN", default=True),
+    )
+
 # JWT Token Funktionen
 def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
@@ -114,6 +144,29 @@ def before_request():
     except Exception as e:
         print(f"Datenbankverbindungsfehler: {e}")
         db_manager.connect()
+    db_manager.metrics.set_endpoint(request.endpoint)
+    # Nur reine Lese-Requests dürfen auf Read-Replicas; schreibende Requests lesen vom Primary
+    db_manager.set_read_primary(request.method not in ('GET', 'HEAD'))
+    # Eine Pool-Verbindung pro Request, ein Commit am Ende (siehe DatabaseManager.unit_of_work)
+    db_manager.begin_unit_of_work()
+
+@app.after_request
+def commit_unit_of_work(response):
+    """Committed die Unit of Work des Requests; schlägt der Commit fehl, wird 500 geliefert"""
+    if db_manager.in_unit_of_work() and not db_manager.end_unit_of_work():
+        logger.error(f"Unit of Work für {request.method} {request.path} konnte nicht committed werden")
+        error_response = jsonify({"error": "Error interno del servidor"})
+        error_response.status_code = 500
+        return error_response
+    return response
+
+@app.teardown_request
+def rollback_unit_of_work(exception=None):
+    """Rollt eine noch offene Unit of Work zurück (unbehandelte Exception)"""
+    if db_manager.in_unit_of_work():
+        db_manager.end_unit_of_work(exception or RuntimeError("Request ohne Commit beendet"))
+    db_manager.metrics.clear_endpoint()
+    db_manager.set_read_primary(False)
 
 @app.teardown_appcontext
 def shutdown_database(exception=None):
@@ -258,19 +311,34 @@ def validate_reset_token():
         logger.error(f"Fehler bei der Token-Validierung: {e}")
         return jsonify({"error": "Error interno del servidor"}), 500
 
+def _with_version(response, version):
+    """Setzt ETag/Last-Modified; der Client muss vor jeder Verwendung revalidieren."""
+    response.headers['Cache-Control'] = 'private, no-cache'
+    if version:
+        response.set_etag(version["etag"])
+        if isinstance(version.get("last_modified"), datetime):
+            response.last_modified = version["last_modified"]
+    return response
+
+def _not_modified(version):
+    """304-Antwort, wenn der Client die aktuelle Version bereits hat (If-None-Match), sonst None"""
+    if version and request.if_none_match.contains(version["etag"]):
+        return _with_version(Response(status=304), version)
+    return None
+
 # Mitarbeiter Endpunkte
 @app.route('/employees', methods=['GET'])
 @token_required
 def get_employees(current_user):
     """Alle Mitarbeiter abrufen"""
     try:
+        # Version vor den Daten lesen: eine parallele Änderung führt höchstens zu einem weiteren 200
+        version = db_manager.get_resource_version("employees")
+        not_modified = _not_modified(version)
+        if not_modified is not None:
+            return not_modified
         employees = db_manager.get_all_employees()
-        
-        response = jsonify(employees)
-        response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-        response.headers['Pragma'] = 'no-cache'
-        response.headers['Expires'] = '0'
-        return response
+        return _with_version(jsonify(employees), version)
     except Exception as e:
         logger.error(f"Fehler beim Abrufen der Mitarbeiter: {e}")
         return jsonify({"error": "Error interno del servidor"}), 500
@@ -280,31 +348,90 @@ def get_employees(current_user):
 def get_employees_with_salaries(current_user):
     """Alle Mitarbeiter mit Gehaltsdaten abrufen"""
     try:
+        version = db_manager.get_resource_version("employees_with_salaries")
+        not_modified = _not_modified(version)
+        if not_modified is not None:
+            return not_modified
         employees = db_manager.get_all_employees_with_salaries()
-        
-        response = jsonify(employees)
-        response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-        response.headers['Pragma'] = 'no-cache'
-        response.headers['Expires'] = '0'
-        return response
+        return _with_version(jsonify(employees), version)
     except Exception as e:
         logger.error(f"Fehler beim Abrufen der Mitarbeiter mit Gehältern: {e}")
         return jsonify({"error": "Error interno del servidor"}), 500
 
+@app.route('/employees/with-salaries/page', methods=['GET'])
+@token_required
+def get_employees_with_salaries_page(current_user):
+    """Mitarbeiter mit Gehaltsdaten seitenweise (Keyset-Cursor aus next_cursor)"""
+    try:
+        activo_raw = request.args.get('activo', '').strip().lower()
+        activo = None
+        if activo_raw:
+            activo = activo_raw in {'1', 'true', 'yes', 'on'}
+        try:
+            kwargs = {
+                "cursor": request.args.get('cursor') or None,
+                "limit": request.args.get('limit', default=50, type=int),
+                "activo": activo,
+                "categoria": request.args.get('categoria') or None,
+                "ceco": request.args.get('ceco') or None,
+                "year_from": request.args.get('year_from', default=None, type=int),
+                "year_to": request.args.get('year_to', default=None, type=int),
+                "latest_years": request.args.get('latest_years', default=None, type=int),
+            }
+            if kwargs["cursor"]:
+                db_manager.decode_employee_cursor(kwargs["cursor"])
+        except ValueError:
+            return jsonify({"error": "Cursor inválido"}), 400
+
+        version = db_manager.get_resource_version("employees_with_salaries")
+        not_modified = _not_modified(version)
+        if not_modified is not None:
+            return not_modified
+        page = db_manager.get_employees_with_salaries_page(**kwargs)
+        if page.get("error"):
+            return jsonify({"error": "Error interno del servidor"}), 500
+        return _with_version(jsonify(page), version)
+    except Exception as e:
+        logger.error(f"Fehler beim Abrufen der Mitarbeiterseite mit Gehältern: {e}")
+        return jsonify({"error": "Error interno del servidor"}), 500
+
+@app.route('/employees/batch', methods=['POST'])
+@token_required
+def get_employees_batch(current_user):
+    """Detaildaten mehrerer Mitarbeiter in einer Anfrage"""
+    try:
+        data = request.get_json(silent=True) or {}
+        ids = data.get('ids')
+        include = data.get('include')
+        year = data.get('year')
+        if not isinstance(ids, list) or not ids:
+            return jsonify({"error": "Se requiere una lista de ids"}), 400
+        if include is not None and not isinstance(include, list):
+            return jsonify({"error": "include debe ser una lista"}), 400
+        try:
+            result = db_manager.get_employees_complete_info_batch(
+                ids, include=include, year=int(year) if year is not None else None
+            )
+        except (TypeError, ValueError) as e:
+            return jsonify({"error": f"Solicitud inválida: {e}"}), 400
+        return jsonify(result)
+    except Exception as e:
+        logger.error(f"Fehler beim Abrufen der Mitarbeiterdetails (Batch): {e}")
+        return jsonify({"error": "Error interno del servidor"}), 500
+
 @app.route('/employees/<int:employee_id>', methods=['GET'])
 @token_required
 def get_employee(current_user, employee_id):
     """Vollständige Mitarbeiterinformationen abrufen"""
     try:
+        version = db_manager.get_resource_version("employee", employee_id)
+        not_modified = _not_modified(version)
+        if not_modified is not None:
+            return not_modified
         employee_info = db_manager.get_employee_complete_info(employee_id)
         if not employee_info:
             return jsonify({"error": "Mitarbeiter nicht gefunden"}), 404
-        
-        response = jsonify(employee_info)
-        response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-        response.headers['Pragma'] = 'no-cache'
-        response.headers['Expires'] = '0'
-        return response
+        return _with_version(jsonify(employee_info), version)
     except Exception as e:
         logger.error(f"Fehler beim Abrufen des Mitarbeiters {employee_id}: {e}")
         return jsonify({"error": "Error interno del servidor"}), 500
@@ -768,6 +895,43 @@ def export_irpf(current_user, year, month=None):
 
 
 
+# Vorberechnete Monatswerte (t006)
+@app.route('/payroll/<int:year>/<int:month>', methods=['GET'])
+@token_required
+def get_payroll_month(current_user, year, month):
+    try:
+        if month < 1 or month > 12:
+            return jsonify({"error": "Mes inválido"}), 400
+        extra_raw = request.args.get('extra', '').strip().lower()
+        extra = extra_raw in {'1', 'true', 'yes', 'on'}
+        items = db_manager.get_payroll_month(year, month, extra=extra)
+        return jsonify({"items": items})
+    except Exception as e:
+        logger.error(f"Fehler beim Abrufen der Monatswerte {year}/{month}: {e}")
+        return jsonify({"error": "Error interno del servidor"}), 500
+
+
+@app.route('/payroll/<int:year>/recalculate', methods=['POST'])
+@token_required
+def recalculate_payroll(current_user, year):
+    try:
+        payload = request.get_json(silent=True) or {}
+        month = payload.get('month')
+        if month is not None:
+            month = int(month)
+            if month < 1 or month > 12:
+                return jsonify({"error": "Mes inválido"}), 400
+        result = db_manager.recalculate_payroll(year, month)
+        if not result.get('success'):
+            return jsonify({"error": "Error al recalcular los valores mensuales"}), 500
+        return jsonify({"rows": result['rows'], "months": result['months']})
+    except (TypeError, ValueError):
+        return jsonify({"error": "Mes inválido"}), 400
+    except Exception as e:
+        logger.error(f"Fehler beim Neuberechnen der Monatswerte {year}: {e}")
+        return jsonify({"error": "Error interno del servidor"}), 500
+
+
 # Carry Over Endpunkte
 @app.route('/carry-over/<int:employee_id>/<int:year>/<int:month>', methods=['GET'])
 @token_required
@@ -1126,6 +1290,106 @@ def health_check():
         "timestamp": datetime.now(timezone.utc).isoformat()
     })
 
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Datenbank-Metriken im Prometheus-Textformat
+
+    Enthält normalisierte SQL-Texte und Endpoint-Laufzeiten und ist daher geschützt:
+    entweder mit dem Scraper-Token aus METRICS_TOKEN (Bearer) oder mit dem JWT eines Admins.
+    """
+    auth_header = request.headers.get('Authorization', '')
+    token = auth_header.split(" ", 1)[1] if auth_header.startswith("Bearer ") else None
+    if not token:
+        return jsonify({"message": "Token is missing"}), 401
+    if not (METRICS_TOKEN and hmac.compare_digest(token, METRICS_TOKEN)):
+        current_user = verify_token(token)
+        if not current_user:
+            return jsonify({"message": "Token is invalid"}), 401
+        if db_manager.get_user_role(current_user) != 'admin':
+            return jsonify({"error": "Acceso denegado"}), 403
+    body = db_manager.metrics.render_prometheus() + db_manager.read_cache.render_prometheus()
+    return Response(body, content_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.route('/admin/slow-queries', methods=['GET'])
+@token_required
+def get_slow_queries(current_user):
+    """Slow-Query-Log (nur Admins), neueste Einträge zuerst"""
+    try:
+        if db_manager.get_user_role(current_user) != 'admin':
+            return jsonify({"error": "Acceso denegado"}), 403
+        limit = request.args.get('limit', type=int)
+        log = db_manager.slow_query_log
+        return jsonify({
+            "enabled": log.enabled,
+            "threshold_ms": log.threshold_ms,
+            "capacity": log.capacity,
+            "entries": log.entries(limit),
+        })
+    except Exception as e:
+        logger.error(f"Fehler beim Lesen des Slow-Query-Logs: {e}")
+        return jsonify({"error": "Error interno del servidor"}), 500
+
+@app.route('/admin/slow-queries', methods=['DELETE'])
+@token_required
+def clear_slow_queries(current_user):
+    """Leert das Slow-Query-Log (nur Admins)"""
+    if db_manager.get_user_role(current_user) != 'admin':
+        return jsonify({"error": "Acceso denegado"}), 403
+    db_manager.slow_query_log.clear()
+    return jsonify({"success": True})
+
+
+
+@app.route('/admin/cache', methods=['GET'])
+@token_required
+def get_read_cache_stats(current_user):
+    """Kennzahlen des Lese-Caches (nur Admins)"""
+    if db_manager.get_user_role(current_user) != 'admin':
+        return jsonify({"error": "Acceso denegado"}), 403
+    return jsonify(db_manager.read_cache.stats())
+
+@app.route('/admin/cache', methods=['DELETE'])
+@token_required
+def clear_read_cache(current_user):
+    """Leert den Lese-Cache (nur Admins)"""
+    if db_manager.get_user_role(current_user) != 'admin':
+        return jsonify({"error": "Acceso denegado"}), 403
+    db_manager.read_cache.clear()
+    return jsonify({"success": True})
+
+@app.route('/admin/archive', methods=['GET'])
+@token_required
+def get_archived_years(current_user):
+    """Archivierte (schreibgeschützte) Jahre (nur Admins)"""
+    try:
+        if db_manager.get_user_role(current_user) != 'admin':
+            return jsonify({"error": "Acceso denegado"}), 403
+        return jsonify({"years": db_manager.get_archived_years()})
+    except Exception as e:
+        logger.error(f"Fehler beim Lesen der archivierten Jahre: {e}")
+        return jsonify({"error": "Error interno del servidor"}), 500
+
+@app.route('/admin/archive/<int:year>', methods=['POST'])
+@token_required
+def archive_year(current_user, year):
+    """Verschiebt ein abgeschlossenes Jahr in die Archivtabellen (nur Admins)"""
+    try:
+        if db_manager.get_user_role(current_user) != 'admin':
+            return jsonify({"error": "Acceso denegado"}), 403
+        result = db_manager.archive_year(year)
+        if not result["success"]:
+            return jsonify({"error": f"No se pudo archivar el año {year}", "details": result["error"]}), 400
+        db_manager.insert_registro_procesamiento(
+            usuario_login=current_user,
+            accion="archive",
+            objeto="year",
+            anio=year,
+            detalles={"moved": result["moved"]},
+        )
+        return jsonify(result)
+    except Exception as e:
+        logger.error(f"Fehler beim Archivieren des Jahres {year}: {e}")
+        return jsonify({"error": "Error interno del servidor"}), 500
 
 
 # Settings Endpunkte
@@ -1238,9 +1502,10 @@ def apply_ingresos_deducciones_to_all_active(current_user):
 @app.route('/salaries/copy-to-year/<int:target_year>', methods=['POST'])
 @token_required
 def copy_salaries_to_year(current_user, target_year):
-    """Kopiert Gehälter vom Vorjahr ins Zieljahr"""
+    """Kopiert Gehälter vom Vorjahr ins Zieljahr (?dry_run=true: nur Vorschau)"""
     try:
-        result = db_manager.copy_salaries_to_new_year(target_year)
+        dry_run = request.args.get('dry_run', '').strip().lower() in {'1', 'true', 'yes', 'on'}
+        result = db_manager.copy_salaries_to_new_year(target_year, dry_run=dry_run)
         return jsonify(result)
     except Exception as e:
         logger.error(f"Fehler bei der Gehaltskopierung für Jahr {target_year}: {e}")
@@ -1304,6 +1569,15 @@ def apply_percentage_increase(current_user):
         if not isinstance(excluded_employee_ids, list):
             return jsonify({"error": "excluded_employee_ids muss eine Liste sein"}), 400
         
+        # Vorschau (preview=true): komplette Tabelle und Gesamtkosten, ohne zu schreiben
+        preview = data.get('preview', request.args.get('preview', ''))
+        preview = preview is True or str(preview).strip().lower() in {'1', 'true', 'yes', 'on'}
+        if preview:
+            result = db_manager.apply_percentage_salary_increase(
+                target_year, percentage_increase, absolute_increase, excluded_employee_ids, preview=True
+            )
+            return jsonify(result), 200 if result['success'] else 400
+
         # Wende die Gehaltserhöhung an
         result = db_manager.apply_percentage_salary_increase(target_year, percentage_increase, absolute_increase, excluded_employee_ids)
         
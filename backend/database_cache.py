@@ -0,0 +1,270 @@
+"""
+Lese-Cache für DatabaseManager-Methoden
+
+Ergebnisse ausgewählter Lesemethoden (siehe @cached_read) werden pro Argumentkombination
+mit TTL und LRU-Grenze im Prozess gehalten. Jeder Eintrag ist mit den Tabellen markiert,
+die er liest. Schreibzugriffe über execute_update, execute_batch und _transaction
+invalidieren alle Einträge der betroffenen Tabellen – inklusive der Tabellen, die
+MySQL-Trigger und ON DELETE CASCADE mitändern.
+
+Die Invalidierung wirkt nur im eigenen Prozess; das Backend läuft als ein Prozess
+(run.py). Bei mehreren Prozessen begrenzt die TTL die Veraltung.
+
+Mit Read-Replicas kann ein Lesezugriff kurz nach dem Commit noch den alten Stand einer
+nachlaufenden Replica sehen und ihn unter der neuen Generation cachen. Deshalb lesen
+@cached_read-Methoden für replica_lag_seconds nach einem lokalen Schreibzugriff auf eine
+ihrer Tabellen auf dem Primary und cachen das Ergebnis nicht.
+"""
+
+import copy
+import functools
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, FrozenSet, Hashable, Iterable, List, Optional, Set, Tuple
+
+from database_metrics import _format_labels
+
+# Pseudo-Tabelle für config/settings.json (get_payout_month)
+SETTINGS_TAG = "settings"
+
+# Tabellen, die beim Schreiben einer Tabelle per Trigger oder FK-CASCADE mitgeändert werden
+WRITE_SIDE_EFFECTS: Dict[str, FrozenSet[str]] = {
+    "t001_empleados": frozenset({
+        "t002_salarios", "t003_ingresos_brutos_mensuales", "t004_deducciones_mensuales",
+        "t006_valores_calculados_mensuales", "t007_registro_procesamiento", "t008_empleado_fte",
+        "t010_carry_over", "t011_empleado_fte_efectivo",
+    }),
+    "t002_salarios": frozenset({"t006_valores_calculados_mensuales"}),
+    "t003_ingresos_brutos_mensuales": frozenset({"t006_valores_calculados_mensuales"}),
+    "t004_deducciones_mensuales": frozenset({"t006_valores_calculados_mensuales"}),
+    "t005_usuarios": frozenset({"t009_password_reset_tokens"}),
+    "t008_empleado_fte": frozenset({"t006_valores_calculados_mensuales", "t011_empleado_fte_efectivo"}),
+    "t010_carry_over": frozenset({"t006_valores_calculados_mensuales"}),
+}
+
+_TABLE_RE = re.compile(r"\b(t\d{3}_[a-z0-9_]+?)(?:_archivo)?\b", re.IGNORECASE)
+
+
+def affected_tables(tables: Iterable[str]) -> Set[str]:
+    """Ergänzt geschriebene Tabellen um die per Trigger/CASCADE mitgeänderten."""
+    result = set(tables)
+    for table in list(result):
+        result |= WRITE_SIDE_EFFECTS.get(table, frozenset())
+    return result
+
+
+def tables_in_statement(query: str) -> Set[str]:
+    """Alle von einem Statement berührten Tabellen (Archivtabellen zählen zur Live-Tabelle)."""
+    return affected_tables(name.lower() for name in _TABLE_RE.findall(query or ""))
+
+
+class _Entry:
+    __slots__ = ("value", "tags", "expires_at")
+
+    def __init__(self, value: Any, tags: FrozenSet[str], expires_at: float):
+        self.value = value
+        self.tags = tags
+        self.expires_at = expires_at
+
+
+class ReadCache:
+    """Thread-sicherer TTL/LRU-Cache mit Tabellen-Tags und Trefferzählern."""
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 30.0, replica_lag_seconds: float = 5.0):
+        self._lock = threading.Lock()
+        self.configure(max_entries, ttl_seconds)
+        self.replica_lag_seconds = max(0.0, float(replica_lag_seconds))
+        # Zeitpunkt (time.monotonic) der letzten lokalen Invalidierung pro Tabelle
+        self._written_at: Dict[str, float] = {}
+        self.clear()
+        self.reset_stats()
+
+    def configure(self, max_entries: int, ttl_seconds: float) -> None:
+        """ttl_seconds <= 0 deaktiviert den Cache."""
+        with self._lock:
+            self.max_entries = max(1, int(max_entries))
+            self.ttl_seconds = float(ttl_seconds)
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+            self._by_tag: Dict[str, Set[Hashable]] = {}
+            self._generations: Dict[str, int] = getattr(self, "_generations", {})
+            for tag in list(self._generations):
+                self._generations[tag] += 1
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._hits: Dict[str, int] = {}
+            self._misses: Dict[str, int] = {}
+            self._evictions = 0
+            self._invalidations = 0
+
+    def generations(self, tags: Iterable[str]) -> Tuple[int, ...]:
+        """Stand der Tags vor dem Lesen; put() verwirft Ergebnisse, die inzwischen veraltet sind."""
+        with self._lock:
+            return tuple(self._generations.get(tag, 0) for tag in tags)
+
+    def recently_written(self, tags: Iterable[str]) -> bool:
+        """True, wenn eine der Tabellen innerhalb von replica_lag_seconds lokal geschrieben wurde."""
+        if self.replica_lag_seconds <= 0:
+            return False
+        since = time.monotonic() - self.replica_lag_seconds
+        with self._lock:
+            return any(self._written_at.get(tag, float("-inf")) > since for tag in tags)
+
+    def get(self, key: Hashable, name: str) -> Tuple[bool, Any]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= now:
+                self._drop(key)
+                entry = None
+            if entry is None:
+                self._misses[name] = self._misses.get(name, 0) + 1
+                return False, None
+            self._entries.move_to_end(key)
+            self._hits[name] = self._hits.get(name, 0) + 1
+            return True, entry.value
+
+    def put(self, key: Hashable, value: Any, tags: Tuple[str, ...], generations: Tuple[int, ...],
+            ttl_seconds: Optional[float] = None) -> bool:
+        ttl = self.ttl_seconds if ttl_seconds is None else float(ttl_seconds)
+        with self._lock:
+            if ttl <= 0:
+                return False
+            # Während des Lesens wurde geschrieben: Ergebnis nicht cachen
+            if tuple(self._generations.get(tag, 0) for tag in tags) != generations:
+                return False
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = _Entry(value, frozenset(tags), time.monotonic() + ttl)
+            for tag in tags:
+                self._by_tag.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self._evictions += 1
+            return True
+
+    def invalidate(self, tables: Iterable[str]) -> int:
+        """Entfernt alle Einträge, die eine der Tabellen lesen; liefert deren Anzahl."""
+        removed = 0
+        now = time.monotonic()
+        with self._lock:
+            for table in tables:
+                self._generations[table] = self._generations.get(table, 0) + 1
+                self._written_at[table] = now
+                for key in list(self._by_tag.get(table, ())):
+                    if key in self._entries:
+                        self._drop(key)
+                        removed += 1
+            self._invalidations += removed
+        return removed
+
+    def _drop(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry.tags:
+            keys = self._by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_tag[tag]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            methods = sorted(set(self._hits) | set(self._misses))
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": sum(self._hits.values()),
+                "misses": sum(self._misses.values()),
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+                "methods": {
+                    name: {"hits": self._hits.get(name, 0), "misses": self._misses.get(name, 0)}
+                    for name in methods
+                },
+            }
+
+    def render_prometheus(self) -> str:
+        """Treffer/Fehlschläge pro Methode im Prometheus-Textformat."""
+        stats = self.stats()
+        lines: List[str] = []
+        for metric, key, help_text in (
+            ("rrhh_db_cache_hits_total", "hits", "Treffer im Lese-Cache"),
+            ("rrhh_db_cache_misses_total", "misses", "Fehlschläge im Lese-Cache"),
+        ):
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} counter")
+            for name, counts in stats["methods"].items():
+                lines.append(f"{metric}{_format_labels(('method',), (name,))} {counts[key]}")
+        lines.append("# HELP rrhh_db_cache_entries Einträge im Lese-Cache")
+        lines.append("# TYPE rrhh_db_cache_entries gauge")
+        lines.append(f"rrhh_db_cache_entries {stats['entries']}")
+        lines.append("# HELP rrhh_db_cache_evictions_total Wegen der LRU-Grenze verdrängte Einträge")
+        lines.append("# TYPE rrhh_db_cache_evictions_total counter")
+        lines.append(f"rrhh_db_cache_evictions_total {stats['evictions']}")
+        lines.append("# HELP rrhh_db_cache_invalidations_total Durch Schreibzugriffe entfernte Einträge")
+        lines.append("# TYPE rrhh_db_cache_invalidations_total counter")
+        lines.append(f"rrhh_db_cache_invalidations_total {stats['invalidations']}")
+        return "\n".join(lines) + "\n"
+
+
+def cached_read(*tables: str, ttl_seconds: Optional[float] = None) -> Callable:
+    """Memoisiert eine DatabaseManager-Lesemethode, markiert mit den gelesenen Tabellen.
+
+    Nicht gecacht werden: Aufrufe in einer Unit of Work, die schon geschrieben hat
+    (unbestätigte Daten; jeder API-Request läuft in einer Unit of Work),
+    nicht hashbare Argumente sowie leere Ergebnisse (None, [], {}), da die Methoden
+    damit auch Fehler signalisieren. Treffer liefern eine Kopie, Aufrufer dürfen das
+    Ergebnis verändern.
+
+    Hält die Unit of Work schon eine Verbindung, liest fn aus deren Snapshot, der älter
+    sein kann als die vorher gemerkten Generationen; solche Ergebnisse werden nur
+    geliefert, nicht gespeichert. Mit Read-Replicas wird kurz nach einem lokalen
+    Schreibzugriff auf eine der Tabellen auf dem Primary gelesen und ebenfalls nicht
+    gecacht (ReadCache.recently_written), damit kein Replica-Stand unter der neuen
+    Generation landet.
+    """
+    def decorator(fn: Callable) -> Callable:
+        name = fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(self, *args, **kwargs):
+            cache: Optional[ReadCache] = getattr(self, "read_cache", None)
+            if cache is None or not cache.enabled or self.has_uncommitted_writes():
+                return fn(self, *args, **kwargs)
+            key = (name, args, tuple(sorted(kwargs.items())))
+            try:
+                hash(key)
+            except TypeError:
+                return fn(self, *args, **kwargs)
+            hit, value = cache.get(key, name)
+            if hit:
+                return copy.deepcopy(value)
+            if getattr(self, "read_hosts", None) and cache.recently_written(tables):
+                with self.read_primary():
+                    return fn(self, *args, **kwargs)
+            if self.has_open_snapshot():
+                return fn(self, *args, **kwargs)
+            generations = cache.generations(tables)
+            value = fn(self, *args, **kwargs)
+            if value is not None and value != [] and value != {}:
+                cache.put(key, copy.deepcopy(value), tables, generations, ttl_seconds)
+            return value
+
+        wrapper.cache_tables = tables
+        return wrapper
+
+    return decorator
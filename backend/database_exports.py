@@ -2,101 +2,59 @@ from typing import Any, Dict, List, Optional
 
 import pandas as pd
 
-from datetime import date
+from database_payroll import PAYROLL_VALUE_COLUMNS
 
 
 class DatabaseManagerExportsMixin:
-    def _prorate_salary_for_hire_month(
-        self,
-        year: int,
-        month: int,
-        fecha_alta: Any,
-        salario_mes: float,
-    ) -> float:
-        try:
-            if not fecha_alta:
-                return float(salario_mes or 0)
-
-            if isinstance(fecha_alta, str):
-                try:
-                    fecha_alta_date = date.fromisoformat(fecha_alta[:10])
-                except Exception:
-                    return float(salario_mes or 0)
-            elif isinstance(fecha_alta, date):
-                fecha_alta_date = fecha_alta
-            else:
-                return float(salario_mes or 0)
-
-            target_year = int(year)
-            target_month = int(month)
-            hire_year = int(fecha_alta_date.year)
-            hire_month = int(fecha_alta_date.month)
-
-            if (target_year, target_month) < (hire_year, hire_month):
-                return 0.0
-
-            if (target_year, target_month) != (hire_year, hire_month):
-                return float(salario_mes or 0)
-
-            day = int(fecha_alta_date.day)
-            employed_days = max(0, 30 - (day - 1))
-            return (float(salario_mes or 0) / 30.0) * float(employed_days)
-        except Exception:
-            return float(salario_mes or 0)
+    EXPORT_BATCH_SIZE = 2000
+
+    def _query_dataframe(self, query: str, params: tuple = None, batch_size: int = None, primary: bool = False) -> pd.DataFrame:
+        """Liest eine Abfrage batchweise als Tupel (execute_query_batches) in einen DataFrame.
+
+        Es wird weder ein dict pro Zeile angelegt noch die komplette Ergebnismenge
+        gleichzeitig als Zeilenliste und als DataFrame gehalten.
+        """
+        size = int(batch_size or self.EXPORT_BATCH_SIZE)
+        frames: List[pd.DataFrame] = []
+        for columns, batch in self.execute_query_batches(query, params, batch_size=size, primary=primary):
+            frames.append(pd.DataFrame.from_records(batch, columns=columns))
+        if not frames:
+            return pd.DataFrame()
+        if len(frames) == 1:
+            return frames[0]
+        return pd.concat(frames, ignore_index=True)
+
+    @staticmethod
+    def _to_float_column(series: pd.Series) -> pd.Series:
+        """Betragsspalte als float; liefert der Converter bereits float, entfällt die Umwandlung."""
+        if series.dtype == 'float64':
+            return series.fillna(0)
+        return pd.to_numeric(series, errors='coerce').fillna(0).astype(float)
+
+    def _payroll_dataframe(self, year: int, month: int, extra: bool = False) -> pd.DataFrame:
+        """Liest die vorberechneten Monatswerte (t006) als DataFrame.
+
+        Im Normalfall eine einzige Bereichsabfrage; fehlende oder veraltete Zeilen werden
+        im Speicher nachberechnet. Exporte schreiben t006 nicht (siehe database_payroll).
+        """
+        payout_month = self.get_payout_month()
+        query, params = self._payroll_read_query(year, month, payout_month, extra)
+        df = self._query_dataframe(query, params)
+        if not df.empty and df['calc_id'].isna().any():
+            missing = [int(x) for x in df.loc[df['calc_id'].isna(), 'id_empleado'].tolist()]
+            computed = self._calculate_missing_payroll_rows(year, month, missing, payout_month)
+            values = pd.DataFrame.from_records(list(computed.values()), columns=['id_empleado'] + PAYROLL_VALUE_COLUMNS)
+            df = df.set_index('id_empleado')
+            df[PAYROLL_VALUE_COLUMNS] = df[PAYROLL_VALUE_COLUMNS].astype(object)
+            df.update(values.set_index('id_empleado'))
+            df = df.reset_index()
+            if extra:
+                df = df[df['modalidad'] == 14].reset_index(drop=True)
 
-    def _calculate_salario_mes_for_export(
-        self,
-        month: int,
-        payout_month: int,
-        salario_mensual_bruto: float,
-        atrasos: float,
-        salario_mensual_bruto_prev: float,
-        antiguedad: float,
-        fte_porcentaje: float = 100.0,
-    ) -> float:
-        salario_mensual_bruto = float(salario_mensual_bruto or 0)
-        atrasos = float(atrasos or 0)
-        salario_mensual_bruto_prev = float(salario_mensual_bruto_prev or 0)
-        antiguedad = float(antiguedad or 0)
-        fte_porcentaje = float(fte_porcentaje or 100.0)
-
-        months_before_payout = max(0, int(payout_month) - 1)
-        fte_factor = fte_porcentaje / 100.0
-
-        if months_before_payout > 0 and 1 <= int(month) <= months_before_payout:
-            # Vorjahresgehalt, nur Basis mit FTE, antiguedad voll
-            # Wenn Vorjahresgehalt 0 oder nicht vorhanden, verwendet aktuelles Gehalt
-            prev_salary = float(salario_mensual_bruto_prev or 0)
-            if prev_salary <= 0:
-                # Kein Vorjahresgehalt - verwendet aktuelles Gehalt
-                return (salario_mensual_bruto + antiguedad) * fte_factor
-            else:
-                return (prev_salary + antiguedad) * fte_factor
-        elif int(month) == int(payout_month):
-            # Neues Gehalt (reduzierte Basis) + monatsscharfe Atrasos + antiguedad
-            base_salary = (salario_mensual_bruto + antiguedad) * fte_factor
-            # Atrasos = Summe (new - old) * fte(k) für k=1..months_before_payout
-            # Nur berechnen wenn Vorjahresgehalt > 0
-            prev_salary = float(salario_mensual_bruto_prev or 0)
-            if prev_salary > 0 and months_before_payout > 0:
-                diff = salario_mensual_bruto - prev_salary
-                atrasos_total = 0.0
-                # Simulate month-specific FTE like frontend:
-                # January: 100% (no FTE reduction yet)
-                # February/March: current FTE (50%)
-                for k in range(1, months_before_payout + 1):
-                    if k == 1:  # January
-                        month_fte = 1.0
-                    else:  # February, March
-                        month_fte = fte_factor
-                    atrasos_total += diff * month_fte
-                return base_salary + atrasos_total
-            else:
-                # Keine Atrasos wenn kein Vorjahresgehalt
-                return base_salary
-        else:
-            # Normale Monate ab payoutMonth+1: neues Gehalt mit FTE, antiguedad voll
-            return (salario_mensual_bruto + antiguedad) * fte_factor
+        for col in df.columns:
+            if col not in ('id_empleado', 'calc_id', 'nombre', 'apellido', 'nombre_completo', 'ceco', 'declaracion', 'dni'):
+                df[col] = self._to_float_column(df[col])
+        return df
 
     def export_nomina_excel(
         self,
@@ -112,145 +70,21 @@ class DatabaseManagerExportsMixin:
                 self.logger.error("Monatlicher Export erfordert eine Monatsangabe")
                 return False
 
-            extra_where = "AND s.modalidad = 14" if extra else ""
-
-            query = f"""
-            SELECT 
-                e.id_empleado,
-                CONCAT(e.apellido, ', ', e.nombre) as nombre_completo,
-                e.ceco,
-                e.fecha_alta,
-                COALESCE(s.modalidad, 0) as modalidad,
-                COALESCE(s.salario_mensual_bruto, 0) as salario_mensual_bruto,
-                COALESCE(s.atrasos, 0) as atrasos,
-                COALESCE(s.antiguedad, 0) as antiguedad,
-                COALESCE(sp.salario_mensual_bruto, 0) as salario_mensual_bruto_prev,
-                COALESCE((
-                    SELECT f.porcentaje
-                    FROM t008_empleado_fte f
-                    WHERE f.id_empleado = e.id_empleado
-                      AND (f.anio < %s OR (f.anio = %s AND f.mes <= %s))
-                    ORDER BY f.anio DESC, f.mes DESC
-                    LIMIT 1
-                ), 100) as fte_porcentaje,
-                COALESCE(i.ticket_restaurant, 0) as ticket_restaurant,
-                COALESCE(d.cotizacion_especie, 0) as cotizacion_especie,
-                COALESCE(i.primas, 0) as primas,
-                COALESCE(i.lavado_coche, 0) as lavado_coche,
-                COALESCE(i.beca_escolar, 0) as beca_escolar,
-                COALESCE(i.dietas_cotizables, 0) as dietas_cotizables,
-                COALESCE(i.horas_extras, 0) as horas_extras,
-                COALESCE(i.seguro_pensiones, 0) as seguro_pensiones,
-                COALESCE(d.seguro_accidentes, 0) as seguro_accidentes,
-                COALESCE(i.dietas_exentas, 0) as dietas_exentas,
-                COALESCE(i.formacion, 0) as formacion,
-                COALESCE(d.adelas, 0) as adelas,
-                COALESCE(d.sanitas, 0) as sanitas,
-                COALESCE(d.gasolina, 0) as gasolina,
-                COALESCE(i.dias_exentos, 0) as dias_exentos
-            FROM t001_empleados e
-            LEFT JOIN t002_salarios s ON e.id_empleado = s.id_empleado AND s.anio = %s
-            LEFT JOIN t002_salarios sp ON e.id_empleado = sp.id_empleado AND sp.anio = %s
-            LEFT JOIN t003_ingresos_brutos_mensuales i ON e.id_empleado = i.id_empleado AND i.anio = %s AND i.mes = %s
-            LEFT JOIN t004_deducciones_mensuales d ON e.id_empleado = d.id_empleado AND d.anio = %s AND d.mes = %s
-            WHERE e.activo = TRUE
-            {extra_where}
-            ORDER BY e.apellido, e.nombre
-            """
-
-            data = self.execute_query(query, (year, year, month, year, year - 1, year, month, year, month))
-
-            if not data:
+            df = self._payroll_dataframe(year, month, extra=extra)
+
+            if df.empty:
                 self.logger.warning(f"Keine Daten für Jahr {year} gefunden")
                 return False
 
-            df = pd.DataFrame(data)
-
-            # Convert all numeric columns to float to avoid decimal/float type issues
-            numeric_columns = [
-                'salario_mensual_bruto', 'atrasos', 'antiguedad', 'salario_mensual_bruto_prev',
-                'fte_porcentaje',
-                'ticket_restaurant', 'cotizacion_especie', 'primas', 'lavado_coche', 'beca_escolar', 'dietas_cotizables',
-                'horas_extras', 'seguro_pensiones', 'seguro_accidentes', 'dietas_exentas',
-                'formacion', 'adelas', 'sanitas', 'gasolina', 'dias_exentos'
-            ]
-            
-            for col in numeric_columns:
-                if col in df.columns:
-                    df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype(float)
-
-            # Apply carry over values (apply month = selected export month)
-            try:
-                employee_ids = [int(x) for x in df.get('id_empleado', pd.Series([])).fillna(0).astype(int).tolist() if int(x) > 0]
-                carry_rows = self.get_carry_over_sums_for_apply(year, month, employee_ids) if employee_ids else []
-                carry_map: Dict[int, Dict[str, float]] = {}
-                for r in carry_rows or []:
-                    try:
-                        emp_id = int(r.get('id_empleado'))
-                    except Exception:
-                        continue
-                    concept = str(r.get('concept', '')).strip().lower()
-                    try:
-                        amt = float(r.get('amount') or 0)
-                    except Exception:
-                        amt = 0.0
-                    if emp_id not in carry_map:
-                        carry_map[emp_id] = {}
-                    carry_map[emp_id][concept] = carry_map[emp_id].get(concept, 0.0) + amt
-
-                df['carry_salary'] = df['id_empleado'].apply(lambda eid: float(carry_map.get(int(eid), {}).get('salary', 0.0)))
-                df['carry_primas'] = df['id_empleado'].apply(lambda eid: float(carry_map.get(int(eid), {}).get('primas', 0.0)))
-                df['carry_horas_extras'] = df['id_empleado'].apply(lambda eid: float(carry_map.get(int(eid), {}).get('horas_extras', 0.0)))
-                df['carry_dietas_cotizables'] = df['id_empleado'].apply(lambda eid: float(carry_map.get(int(eid), {}).get('dietas_cotizables', 0.0)))
-                df['carry_dietas_exentas'] = df['id_empleado'].apply(lambda eid: float(carry_map.get(int(eid), {}).get('dietas_exentas', 0.0)))
-                df['carry_anticipos'] = df['id_empleado'].apply(lambda eid: float(carry_map.get(int(eid), {}).get('anticipos', 0.0)))
-                df['carry_cotizacion_especie'] = df['id_empleado'].apply(lambda eid: float(carry_map.get(int(eid), {}).get('cotizacion_especie', 0.0)))
-            except Exception as e:
-                self.logger.error(f"Error applying carry over values: {str(e)}")
-                df['carry_salary'] = 0.0
-                df['carry_primas'] = 0.0
-                df['carry_horas_extras'] = 0.0
-                df['carry_dietas_cotizables'] = 0.0
-                df['carry_dietas_exentas'] = 0.0
-                df['carry_anticipos'] = 0.0
-                df['carry_cotizacion_especie'] = 0.0
-
-            payout_month = self.get_payout_month() if hasattr(self, "get_payout_month") else 4
-            df['salario_mes'] = df.apply(
-                lambda r: self._calculate_salario_mes_for_export(
-                    month=month,
-                    payout_month=payout_month,
-                    salario_mensual_bruto=r.get('salario_mensual_bruto', 0),
-                    atrasos=r.get('atrasos', 0),
-                    salario_mensual_bruto_prev=r.get('salario_mensual_bruto_prev', 0),
-                    antiguedad=r.get('antiguedad', 0),
-                    fte_porcentaje=r.get('fte_porcentaje', 100),
-                ),
-                axis=1,
-            )
-
-            df['salario_mes'] = df.apply(
-                lambda r: self._prorate_salary_for_hire_month(
-                    year=year,
-                    month=month,
-                    fecha_alta=r.get('fecha_alta'),
-                    salario_mes=r.get('salario_mes', 0),
-                ),
-                axis=1,
-            )
-
-            # Carry Over application
-            df['salario_mes'] = df['salario_mes'] + df.get('carry_salary', 0)
-            df['primas'] = df['primas'] + df.get('carry_primas', 0)
-            df['horas_extras'] = df['horas_extras'] + df.get('carry_horas_extras', 0)
-            df['dietas_cotizables'] = df['dietas_cotizables'] + df.get('carry_dietas_cotizables', 0)
-            df['dietas_exentas'] = df['dietas_exentas'] + df.get('carry_dietas_exentas', 0)
-            df['cotizacion_especie'] = df['cotizacion_especie'] + df.get('carry_cotizacion_especie', 0)
-
-            # beca_escolar wird immer im Monat, in dem es eingetragen ist, zu Primas addiert
-            df['primas'] = df['primas'] + df.get('beca_escolar', 0)
+            # Carry Over, beca_escolar und (im Januar) lavado_coche sind in t006 getrennt gespeichert
+            df['salario_mes'] = df['salario_mes'] + df['carry_salary']
+            df['primas'] = df['primas'] + df['carry_primas'] + df['beca_escolar']
             if int(month) == 1:
-                df['primas'] = df['primas'] + df.get('lavado_coche', 0)
+                df['primas'] = df['primas'] + df['lavado_coche']
+            df['horas_extras'] = df['horas_extras'] + df['carry_horas_extras']
+            df['dietas_cotizables'] = df['dietas_cotizables_total']
+            df['dietas_exentas'] = df['dietas_exentas_total']
+            df['cotizacion_especie'] = df['cotizacion_especie'] + df['carry_cotizacion_especie']
 
             if extra:
                 columns = [
@@ -294,26 +128,6 @@ class DatabaseManagerExportsMixin:
                 self.logger.info(f"Excel-Export erfolgreich: {output_path}")
                 return True
 
-            df['total'] = (
-                df['salario_mes']
-                + df['ticket_restaurant']
-                + df['cotizacion_especie']
-                + df['primas']
-                + df['dietas_cotizables']
-                + df['horas_extras']
-                + df['seguro_pensiones']
-                + df['seguro_accidentes']
-                + df['dietas_exentas']
-            )
-
-            df['anticipos'] = df['ticket_restaurant'] + df['dietas_cotizables'] + df['dietas_exentas'] + df.get('carry_anticipos', 0)
-
-            df['total_especie'] = df['cotizacion_especie'] + df['seguro_pensiones'] + df['seguro_accidentes']
-
-            df['base_imponible'] = df['salario_mes'] + df['primas'] + df['horas_extras']
-
-            df['seguro_medico'] = df['adelas'] + df['sanitas']
-
             columns = [
                 'nombre_completo',          # A = Mitarbeiter
                 'ceco',                     # B = CECO
@@ -417,133 +231,16 @@ class DatabaseManagerExportsMixin:
         """Exportiert Gehaltsdaten im Asiento Nomina Excel-Format"""
 
         try:
-            query = """
-            SELECT 
-                e.id_empleado,
-                e.ceco,
-                CONCAT(e.apellido, ', ', e.nombre) as nombre_completo,
-                e.fecha_alta,
-                COALESCE(s.salario_mensual_bruto, 0) as salario_mensual_bruto,
-                COALESCE(s.atrasos, 0) as atrasos,
-                COALESCE(s.antiguedad, 0) as antiguedad,
-                COALESCE(sp.salario_mensual_bruto, 0) as salario_mensual_bruto_prev,
-                COALESCE((
-                    SELECT f.porcentaje
-                    FROM t008_empleado_fte f
-                    WHERE f.id_empleado = e.id_empleado
-                      AND (f.anio < %s OR (f.anio = %s AND f.mes <= %s))
-                    ORDER BY f.anio DESC, f.mes DESC
-                    LIMIT 1
-                ), 100) as fte_porcentaje,
-                COALESCE(i.ticket_restaurant, 0) as ticket_restaurant,
-                COALESCE(d.cotizacion_especie, 0) as cotizacion_especie,
-                COALESCE(i.primas, 0) as primas,
-                COALESCE(i.dietas_cotizables, 0) as dietas_cotizables,
-                COALESCE(i.horas_extras, 0) as horas_extras,
-                COALESCE(i.seguro_pensiones, 0) as seguro_pensiones,
-                COALESCE(d.seguro_accidentes, 0) as seguro_accidentes,
-                COALESCE(i.dietas_exentas, 0) as dietas_exentas,
-                COALESCE(i.formacion, 0) as formacion,
-                COALESCE(d.adelas, 0) as adelas,
-                COALESCE(d.sanitas, 0) as sanitas,
-                COALESCE(d.gasolina, 0) as gasolina,
-                COALESCE(i.dias_exentos, 0) as dias_exentos
-            FROM t001_empleados e
-            LEFT JOIN t002_salarios s ON e.id_empleado = s.id_empleado AND s.anio = %s
-            LEFT JOIN t002_salarios sp ON e.id_empleado = sp.id_empleado AND sp.anio = %s
-            LEFT JOIN t003_ingresos_brutos_mensuales i ON e.id_empleado = i.id_empleado AND i.anio = %s AND i.mes = %s
-            LEFT JOIN t004_deducciones_mensuales d ON e.id_empleado = d.id_empleado AND d.anio = %s AND d.mes = %s
-            WHERE e.activo = TRUE
-            ORDER BY e.apellido, e.nombre
-            """
-
-            data = self.execute_query(query, (year, year, month, year, year - 1, year, month, year, month))
-
-            if not data:
+            df = self._payroll_dataframe(year, month)
+
+            if df.empty:
                 self.logger.warning(f"Keine Daten für Jahr {year}, Monat {month} gefunden")
                 return False
 
-            df = pd.DataFrame(data)
-
-            # Convert all numeric columns to float to avoid decimal/float type issues
-            numeric_columns = [
-                'salario_mensual_bruto', 'atrasos', 'antiguedad', 'salario_mensual_bruto_prev',
-                'fte_porcentaje',
-                'ticket_restaurant', 'cotizacion_especie', 'primas', 'dietas_cotizables',
-                'horas_extras', 'seguro_pensiones', 'seguro_accidentes', 'dietas_exentas',
-                'formacion', 'adelas', 'sanitas', 'gasolina', 'dias_exentos'
-            ]
-            
-            for col in numeric_columns:
-                if col in df.columns:
-                    df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype(float)
-
-            # Apply carry over values (apply month = selected export month)
-            try:
-                employee_ids = [int(x) for x in df.get('id_empleado', pd.Series([])).fillna(0).astype(int).tolist() if int(x) > 0]
-                carry_rows = self.get_carry_over_sums_for_apply(year, month, employee_ids) if employee_ids else []
-                carry_map: Dict[int, Dict[str, float]] = {}
-                for r in carry_rows or []:
-                    try:
-                        emp_id = int(r.get('id_empleado'))
-                    except Exception:
-                        continue
-                    concept = str(r.get('concept', '')).strip().lower()
-                    try:
-                        amt = float(r.get('amount') or 0)
-                    except Exception:
-                        amt = 0.0
-                    if emp_id not in carry_map:
-                        carry_map[emp_id] = {}
-                    carry_map[emp_id][concept] = carry_map[emp_id].get(concept, 0.0) + amt
-
-                df['carry_salary'] = df['id_empleado'].apply(lambda eid: float(carry_map.get(int(eid), {}).get('salary', 0.0)))
-                df['carry_primas'] = df['id_empleado'].apply(lambda eid: float(carry_map.get(int(eid), {}).get('primas', 0.0)))
-                df['carry_horas_extras'] = df['id_empleado'].apply(lambda eid: float(carry_map.get(int(eid), {}).get('horas_extras', 0.0)))
-                df['carry_dietas_cotizables'] = df['id_empleado'].apply(lambda eid: float(carry_map.get(int(eid), {}).get('dietas_cotizables', 0.0)))
-                df['carry_dietas_exentas'] = df['id_empleado'].apply(lambda eid: float(carry_map.get(int(eid), {}).get('dietas_exentas', 0.0)))
-                df['carry_cotizacion_especie'] = df['id_empleado'].apply(lambda eid: float(carry_map.get(int(eid), {}).get('cotizacion_especie', 0.0)))
-            except Exception:
-                df['carry_salary'] = 0.0
-                df['carry_primas'] = 0.0
-                df['carry_horas_extras'] = 0.0
-                df['carry_dietas_cotizables'] = 0.0
-                df['carry_dietas_exentas'] = 0.0
-                df['carry_cotizacion_especie'] = 0.0
-
-            payout_month = self.get_payout_month() if hasattr(self, "get_payout_month") else 4
-            df['salario_mes'] = df.apply(
-                lambda r: self._calculate_salario_mes_for_export(
-                    month=month,
-                    payout_month=payout_month,
-                    salario_mensual_bruto=r.get('salario_mensual_bruto', 0),
-                    atrasos=r.get('atrasos', 0),
-                    salario_mensual_bruto_prev=r.get('salario_mensual_bruto_prev', 0),
-                    antiguedad=r.get('antiguedad', 0),
-                    fte_porcentaje=r.get('fte_porcentaje', 100),
-                ),
-                axis=1,
-            )
-
-            df['salario_mes'] = df.apply(
-                lambda r: self._prorate_salary_for_hire_month(
-                    year=year,
-                    month=month,
-                    fecha_alta=r.get('fecha_alta'),
-                    salario_mes=r.get('salario_mes', 0),
-                ),
-                axis=1,
-            )
-
-            # Carry Over application
-            df['salario_mes'] = df['salario_mes'] + df.get('carry_salary', 0)
-            df['primas'] = df['primas'] + df.get('carry_primas', 0)
-            df['horas_extras'] = df['horas_extras'] + df.get('carry_horas_extras', 0)
-            df['dietas_cotizables'] = df['dietas_cotizables'] + df.get('carry_dietas_cotizables', 0)
-            df['dietas_exentas'] = df['dietas_exentas'] + df.get('carry_dietas_exentas', 0)
-            df['cotizacion_especie'] = df['cotizacion_especie'] + df.get('carry_cotizacion_especie', 0)
-
-            df['seguro_medico'] = df['adelas'] + df['sanitas']
+            # Carry Over anwenden (ohne beca_escolar/lavado_coche, wie bisher im Asiento)
+            df['salario_mes'] = df['salario_mes'] + df['carry_salary']
+            df['primas'] = df['primas'] + df['carry_primas']
+            df['horas_extras'] = df['horas_extras'] + df['carry_horas_extras']
             df['combustible'] = df['gasolina']
 
             month_names = [
@@ -737,93 +434,18 @@ class DatabaseManagerExportsMixin:
                 else:
                     export_months.append({'mes': m_i, 'label': month_names[m_i], 'extra': False})
 
-            payout_month = self.get_payout_month() if hasattr(self, "get_payout_month") else 4
-
             all_rows: List[Dict[str, Any]] = []
 
             for mdef in export_months:
                 m = int(mdef['mes'])
                 is_extra = bool(mdef.get('extra'))
 
-                extra_where = "AND s.modalidad = 14" if is_extra else ""
-
-                query = f"""
-                SELECT
-                    e.id_empleado,
-                    CONCAT(e.apellido, ' ', e.nombre) as nombre_completo,
-                    e.fecha_alta,
-                    e.declaracion,
-                    e.dni,
-                    COALESCE(s.salario_mensual_bruto, 0) as salario_mensual_bruto,
-                    COALESCE(s.atrasos, 0) as atrasos,
-                    COALESCE(s.antiguedad, 0) as antiguedad,
-                    COALESCE(sp.salario_mensual_bruto, 0) as salario_mensual_bruto_prev,
-                    COALESCE((
-                        SELECT f.porcentaje
-                        FROM t008_empleado_fte f
-                        WHERE f.id_empleado = e.id_empleado
-                          AND (f.anio < %s OR (f.anio = %s AND f.mes <= %s))
-                        ORDER BY f.anio DESC, f.mes DESC
-                        LIMIT 1
-                    ), 100) as fte_porcentaje,
-                    COALESCE(i.ticket_restaurant, 0) as ticket_restaurant,
-                    COALESCE(i.dietas_cotizables, 0) as dietas_cotizables,
-                    COALESCE(i.dietas_exentas, 0) as dietas_exentas,
-                    COALESCE(i.formacion, 0) as formacion,
-                    COALESCE(d.cotizacion_especie, 0) as cotizacion_especie,
-                    COALESCE(d.seguro_accidentes, 0) as seguro_accidentes,
-                    COALESCE(i.seguro_pensiones, 0) as seguro_pensiones,
-                    COALESCE(d.adelas, 0) as adelas,
-                    COALESCE(d.sanitas, 0) as sanitas
-                FROM t001_empleados e
-                LEFT JOIN t002_salarios s ON e.id_empleado = s.id_empleado AND s.anio = %s
-                LEFT JOIN t002_salarios sp ON e.id_empleado = sp.id_empleado AND sp.anio = %s
-                LEFT JOIN t003_ingresos_brutos_mensuales i ON e.id_empleado = i.id_empleado AND i.anio = %s AND i.mes = %s
-                LEFT JOIN t004_deducciones_mensuales d ON e.id_empleado = d.id_empleado AND d.anio = %s AND d.mes = %s
-                WHERE e.activo = TRUE
-                {extra_where}
-                ORDER BY e.apellido, e.nombre
-                """
-
-                data = self.execute_query(query, (year, year, m, year, year - 1, year, m, year, m))
-                if not data:
+                df = self._payroll_dataframe(year, m, extra=is_extra)
+                if df.empty:
                     continue
 
-                df = pd.DataFrame(data)
-
-                numeric_columns = [
-                    'salario_mensual_bruto', 'atrasos', 'antiguedad', 'salario_mensual_bruto_prev',
-                    'fte_porcentaje',
-                    'ticket_restaurant', 'dietas_cotizables', 'dietas_exentas', 'formacion',
-                    'cotizacion_especie', 'seguro_accidentes', 'seguro_pensiones', 'adelas', 'sanitas'
-                ]
-                for col in numeric_columns:
-                    if col in df.columns:
-                        df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype(float)
-
-                df['salario_mes'] = df.apply(
-                    lambda r: self._calculate_salario_mes_for_export(
-                        month=m,
-                        payout_month=payout_month,
-                        salario_mensual_bruto=r.get('salario_mensual_bruto', 0),
-                        atrasos=r.get('atrasos', 0),
-                        salario_mensual_bruto_prev=r.get('salario_mensual_bruto_prev', 0),
-                        antiguedad=r.get('antiguedad', 0),
-                        fte_porcentaje=r.get('fte_porcentaje', 100),
-                    ),
-                    axis=1,
-                )
-                df['salario_mes'] = df.apply(
-                    lambda r: self._prorate_salary_for_hire_month(
-                        year=year,
-                        month=m,
-                        fecha_alta=r.get('fecha_alta'),
-                        salario_mes=r.get('salario_mes', 0),
-                    ),
-                    axis=1,
-                )
-
-                df['seguro_medico'] = df['adelas'] + df['sanitas']
+                # IRPF ohne Carry Over: Eingangswerte des Monats
+                df['nombre_completo'] = df['apellido'].fillna('') + ' ' + df['nombre'].fillna('')
                 df['total_especie'] = df['cotizacion_especie'] + df['seguro_pensiones'] + df['seguro_accidentes']
 
                 for _, r in df.iterrows():
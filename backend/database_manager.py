@@ -1,16 +1,64 @@
 import mysql.connector
 from mysql.connector import Error
-from mysql.connector import pooling
-from typing import Dict, List, Any, Optional
+from mysql.connector.errors import PoolError
+from typing import Callable, Dict, Iterator, List, Any, Optional, Tuple
+import base64
 import logging
 import hashlib
+import itertools
+import threading
+import time
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from database_exports import DatabaseManagerExportsMixin
-from datetime import datetime, date
+from database_payroll import PAYROLL_INPUT_TABLES, DatabaseManagerPayrollMixin
+from database_metrics import QueryMetrics, SlowQueryLog
+from database_cache import SETTINGS_TAG, ReadCache, affected_tables, cached_read, tables_in_statement
+from database_search import SEARCH_RESULT_LIMIT, SEARCH_VERSION_CHECK_SECONDS, EmployeeSearchIndex
+from database_salary_history import (
+    SALARY_HISTORY_COLUMNS,
+    SALARY_UPDATE_CHUNK_SIZE,
+    SalaryHistory,
+    salary_update_statement,
+)
+from database_types import make_converter_class
+from database_pool import QueuedConnectionPool
+from database_migrations import (
+    ARCHIVE_SUFFIX,
+    ARCHIVE_YEARS_TABLE,
+    LATEST_VERSION,
+    PARTITION_SCHEMA_VERSION,
+    PARTITIONED_TABLES,
+    apply_migrations,
+    read_schema_version,
+)
+from datetime import datetime, date, timezone
 import json
 import os
 from decimal import Decimal
 from openpyxl.worksheet.worksheet import Worksheet
 
+# Offenes Ende eines FTE-Intervalls in t011_empleado_fte_efectivo
+FTE_OPEN_END = 2147483647
+# Versionszähler pro Mitarbeiter und Tabelle (Migration 13), Grundlage der ETags
+RESOURCE_VERSION_TABLE = "t013_versiones_empleado"
+# Tabellen, aus denen die Versionskennung (ETag) einer API-Ressource gebildet wird
+RESOURCE_VERSION_TABLES = {
+    "employees": ("t001_empleados",),
+    "employees_with_salaries": ("t001_empleados", "t002_salarios"),
+    "employee": ("t001_empleados", "t002_salarios", "t003_ingresos_brutos_mensuales",
+                 "t004_deducciones_mensuales", "t008_empleado_fte"),
+}
+# Jahre, die mindestens so weit zurückliegen, gelten als abgeschlossen (archivierbar)
+ARCHIVE_MIN_AGE_YEARS = 2
+# Seitengröße der seitenweisen Mitarbeiterliste (get_employees_with_salaries_page)
+EMPLOYEE_PAGE_SIZE = 50
+EMPLOYEE_PAGE_MAX_SIZE = 500
+# Abschnitte und Obergrenze für get_employees_complete_info_batch
+EMPLOYEE_BATCH_SECTIONS = ("salaries", "ingresos_mensuales", "deducciones_mensuales", "fte", "carry_over")
+EMPLOYEE_BATCH_MAX_IDS = 500
+
 class DateTimeEncoder(json.JSONEncoder):
     def default(self, obj):
         if isinstance(obj, datetime):
@@ -21,161 +69,66 @@ class DateTimeEncoder(json.JSONEncoder):
             return float(obj)
         return super().default(obj)
 
-class DatabaseManager(DatabaseManagerExportsMixin):
-    def __init__(self, host: str, database: str, user: str, password: str, port: int = 3307, ssl_disabled: Optional[bool] = None):
+class DatabaseManager(DatabaseManagerExportsMixin, DatabaseManagerPayrollMixin):
+    def __init__(
+        self,
+        host: str,
+        database: str,
+        user: str,
+        password: str,
+        port: int = 3307,
+        ssl_disabled: Optional[bool] = None,
+        decimal_mode: str = "decimal",
+        date_mode: str = "date",
+        pool_size: int = 10,
+        max_overflow: int = 0,
+        pool_timeout: float = 10.0,
+        read_hosts: Optional[Any] = None,
+        fanout_workers: int = 4,
+        auto_migrate: bool = False,
+        read_cache_ttl: float = 30.0,
+        read_cache_size: int = 512,
+        read_cache_replica_lag: float = 5.0,
+    ):
         self.host = host
         self.database = database
         self.user = user
         self.password = password
         self.port = port
         self.ssl_disabled = ssl_disabled
+        # DECIMAL/DATE werden einmal im Cursor konvertiert (siehe database_types)
+        self.converter_class = make_converter_class(decimal_mode, date_mode)
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.pool_timeout = pool_timeout
+        # Read-Replicas: "host[:port]" als Liste oder kommagetrennt
+        self.read_hosts = self._parse_read_hosts(read_hosts)
         self.connection = None
         self._pool = None
+        self._pool_lock = threading.Lock()
+        self._read_pools: Optional[List[QueuedConnectionPool]] = None
+        self._read_pool_lock = threading.Lock()
+        self._read_rr = itertools.count()
+        self._uow_local = threading.local()
+        self._routing_local = threading.local()
+        # Gemeinsamer, begrenzter Executor für parallele Lesezugriffe (0 = sequentiell)
+        self.fanout_workers = max(0, int(fanout_workers))
+        self._fanout_executor: Optional[ThreadPoolExecutor] = None
+        self._fanout_lock = threading.Lock()
+        # Schema-Stand (siehe database_migrations); None = noch nicht geprüft
+        self.auto_migrate = auto_migrate
+        self.schema_version: Optional[int] = None
+        self.metrics = QueryMetrics()
+        self.metrics.set_pool_stats_source(self.pool_stats)
+        self.slow_query_log = SlowQueryLog()
+        # Lese-Cache für häufige Lookups (siehe database_cache); TTL 0 = aus
+        self.read_cache = ReadCache(read_cache_size, read_cache_ttl, read_cache_replica_lag)
+        # Trigramm-Index für search_employees, wird nach Änderungen an t001 neu gebaut
+        self.search_index = EmployeeSearchIndex()
+        # (time.monotonic() der letzten Abfrage, t001-Versionszähler) für _ensure_search_index
+        self._search_version_check: Tuple[float, Any] = (float("-inf"), None)
         self.logger = logging.getLogger(__name__)
 
-    def _ensure_carry_over_table(self) -> None:
-        try:
-            cursor = self.connection.cursor(dictionary=True)
-            cursor.execute(
-                """
-                SELECT COUNT(*) AS cnt
-                FROM INFORMATION_SCHEMA.TABLES
-                WHERE TABLE_SCHEMA = %s
-                  AND TABLE_NAME = 't010_carry_over'
-                """,
-                (self.database,),
-            )
-            rows = cursor.fetchall() or []
-            cursor.close()
-            cnt = int(rows[0].get('cnt', 0)) if rows else 0
-            if cnt > 0:
-                return
-
-            cursor = self.connection.cursor()
-            cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS t010_carry_over (
-                    id_carry_over INT AUTO_INCREMENT PRIMARY KEY,
-                    id_empleado INT NOT NULL,
-                    source_anio INT NOT NULL,
-                    source_mes INT NOT NULL,
-                    apply_anio INT NOT NULL,
-                    apply_mes INT NOT NULL,
-                    concept VARCHAR(50) NOT NULL,
-                    amount DECIMAL(12,2) NOT NULL DEFAULT 0.00,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-                    INDEX idx_t010_apply (apply_anio, apply_mes),
-                    INDEX idx_t010_source (source_anio, source_mes),
-                    INDEX idx_t010_empleado (id_empleado),
-                    FOREIGN KEY (id_empleado) REFERENCES t001_empleados(id_empleado) ON DELETE CASCADE
-                )
-                """
-            )
-            cursor.close()
-        except Exception as e:
-            self.logger.error(f"Fehler beim Sicherstellen der t010_carry_over Tabelle: {e}")
-
-    def _ensure_employee_hire_date_column(self) -> None:
-        """Ensures t001_empleados has fecha_alta column (hire date).
-        This is a lightweight migration to keep existing installations working.
-        """
-        try:
-            check_query = """
-            SELECT COUNT(*) AS cnt
-            FROM INFORMATION_SCHEMA.COLUMNS
-            WHERE TABLE_SCHEMA = %s
-              AND TABLE_NAME = 't001_empleados'
-              AND COLUMN_NAME = 'fecha_alta'
-            """
-            cursor = self.connection.cursor(dictionary=True)
-            cursor.execute(check_query, (self.database,))
-            rows = cursor.fetchall()
-            cursor.close()
-            
-            cnt = int(rows[0].get('cnt', 0)) if rows else 0
-            if cnt > 0:
-                return
-            alter_query = "ALTER TABLE t001_empleados ADD COLUMN fecha_alta DATE NULL"
-            cursor = self.connection.cursor()
-            cursor.execute(alter_query)
-            cursor.close()
-        except Exception as e:
-            self.logger.error(f"Fehler beim Sicherstellen von fecha_alta Spalte: {e}")
-
-    def _ensure_employee_irpf_columns(self) -> None:
-        try:
-            cursor = self.connection.cursor(dictionary=True)
-            cursor.execute(
-                """
-                SELECT COLUMN_NAME
-                FROM INFORMATION_SCHEMA.COLUMNS
-                WHERE TABLE_SCHEMA = %s
-                  AND TABLE_NAME = 't001_empleados'
-                  AND COLUMN_NAME IN ('declaracion', 'dni')
-                """,
-                (self.database,),
-            )
-            rows = cursor.fetchall() or []
-            cursor.close()
-
-            existing = {str(r.get('COLUMN_NAME', '')).strip().lower() for r in rows}
-
-            if 'declaracion' not in existing:
-                cursor = self.connection.cursor()
-                cursor.execute(
-                    "ALTER TABLE t001_empleados ADD COLUMN declaracion VARCHAR(20) NULL DEFAULT NULL"
-                )
-                cursor.close()
-
-            if 'dni' not in existing:
-                cursor = self.connection.cursor()
-                cursor.execute("ALTER TABLE t001_empleados ADD COLUMN dni VARCHAR(50) NULL DEFAULT NULL")
-                cursor.close()
-        except Exception as e:
-            self.logger.error(f"Fehler beim Sicherstellen von declaracion/dni Spalten: {e}")
-
-    def _ensure_deducciones_gasolina_column(self) -> None:
-        """Ensures t004_deducciones_mensuales has a single 'gasolina' column.
-
-        Existing data in those legacy columns is intentionally ignored.
-        """
-        try:
-            cursor = self.connection.cursor(dictionary=True)
-            cursor.execute(
-                """
-                SELECT COLUMN_NAME
-                FROM INFORMATION_SCHEMA.COLUMNS
-                WHERE TABLE_SCHEMA = %s
-                  AND TABLE_NAME = 't004_deducciones_mensuales'
-                  AND COLUMN_NAME IN ('gasolina', 'gasolina_arval', 'gasolina_ald')
-                """,
-                (self.database,),
-            )
-            rows = cursor.fetchall() or []
-            cursor.close()
-
-            existing = {str(r.get('COLUMN_NAME', '')).strip().lower() for r in rows}
-            if 'gasolina' not in existing:
-                cursor = self.connection.cursor()
-                cursor.execute("ALTER TABLE t004_deducciones_mensuales ADD COLUMN gasolina DECIMAL(10,2) DEFAULT 0.00")
-                cursor.close()
-
-            drop_cols = []
-            if 'gasolina_arval' in existing:
-                drop_cols.append('gasolina_arval')
-            if 'gasolina_ald' in existing:
-                drop_cols.append('gasolina_ald')
-
-            if drop_cols:
-                cursor = self.connection.cursor()
-                cursor.execute(
-                    f"ALTER TABLE t004_deducciones_mensuales {', '.join([f'DROP COLUMN {c}' for c in drop_cols])}"
-                )
-                cursor.close()
-        except Exception as e:
-            self.logger.error(f"Fehler beim Sicherstellen von gasolina Spalte: {e}")
-
     def insert_registro_procesamiento(
         self,
         usuario_login: str,
@@ -257,19 +210,26 @@ class DatabaseManager(DatabaseManagerExportsMixin):
                 l.accion,
                 l.objeto,
                 l.detalles
-            FROM t007_registro_procesamiento l
+            FROM {source} l
             LEFT JOIN t005_usuarios u ON u.nombre_usuario = l.usuario_login
-            WHERE l.id_empleado = %s
+            WHERE {where}
+            ORDER BY l.fecha DESC, l.id_registro DESC LIMIT %s
             """
-            params: List[Any] = [id_empleado]
-            if anio is not None:
-                query += " AND l.anio = %s"
-                params.append(anio)
-            if mes is not None:
-                query += " AND l.mes = %s"
-                params.append(mes)
-            query += " ORDER BY l.fecha DESC, l.id_registro DESC LIMIT %s"
-            params.append(limit_value)
+            filters = [("id_empleado", id_empleado), ("anio", anio), ("mes", mes)]
+            filters = [(column, value) for column, value in filters if value is not None]
+            filter_params = tuple(value for _, value in filters)
+            source, source_params = self._archived_source(
+                "t007_registro_procesamiento",
+                " AND ".join(f"{column} = %s" for column, _ in filters),
+                filter_params,
+                " ORDER BY fecha DESC, id_registro DESC LIMIT %s",
+                (limit_value,),
+            )
+            query = query.format(
+                source=source,
+                where=" AND ".join(f"l.{column} = %s" for column, _ in filters),
+            )
+            params = list(source_params + filter_params) + [limit_value]
             rows = self.execute_query(query, tuple(params))
             for r in rows:
                 if isinstance(r.get('detalles'), str):
@@ -312,36 +272,40 @@ class DatabaseManager(DatabaseManagerExportsMixin):
                 l.accion,
                 l.objeto,
                 l.detalles
-            FROM t007_registro_procesamiento l
+            FROM {source} l
             LEFT JOIN t005_usuarios u ON u.nombre_usuario = l.usuario_login
             LEFT JOIN t001_empleados e ON e.id_empleado = l.id_empleado
-            WHERE 1=1
+            WHERE 1=1{where}
+            ORDER BY l.fecha DESC, l.id_registro DESC LIMIT %s
             """
-            params: List[Any] = []
-            if id_empleado is not None:
-                query += " AND l.id_empleado = %s"
-                params.append(id_empleado)
-            if anio is not None:
-                query += " AND l.anio = %s"
-                params.append(anio)
-            if mes is not None:
-                query += " AND l.mes = %s"
-                params.append(mes)
-            query += " ORDER BY l.fecha DESC, l.id_registro DESC LIMIT %s"
-            params.append(limit_value)
+            filters = [("id_empleado", id_empleado), ("anio", anio), ("mes", mes)]
+            filters = [(column, value) for column, value in filters if value is not None]
+            filter_params = tuple(value for _, value in filters)
+            source, source_params = self._archived_source(
+                "t007_registro_procesamiento",
+                " AND ".join(f"{column} = %s" for column, _ in filters) or "1=1",
+                filter_params,
+                " ORDER BY fecha DESC, id_registro DESC LIMIT %s",
+                (limit_value,),
+            )
+            query = query.format(
+                source=source,
+                where="".join(f" AND l.{column} = %s" for column, _ in filters),
+            )
+            params = list(source_params + filter_params) + [limit_value]
             
             self.logger.info(f"Query: {query}")
             self.logger.info(f"Params: {params}")
             
-            rows = self.execute_query(query, tuple(params))
-            self.logger.info(f"Anzahl Zeilen zurückgegeben: {len(rows)}")
-            
-            for r in rows:
+            rows: List[Dict] = []
+            for r in self.execute_query_iter(query, tuple(params), batch_size=200):
                 if isinstance(r.get('detalles'), str):
                     try:
                         r['detalles'] = json.loads(r['detalles'])
                     except Exception:
                         pass
+                rows.append(r)
+            self.logger.info(f"Anzahl Zeilen zurückgegeben: {len(rows)}")
             return rows
         except Exception as e:
             self.logger.error(f"Fehler beim Lesen von global t007_registro_procesamiento: {e}")
@@ -402,23 +366,176 @@ class DatabaseManager(DatabaseManagerExportsMixin):
         v = self._normalize_employee_category(value)
         return v is None or v in {"Techniker", "Office"}
 
+    def _parse_read_hosts(self, read_hosts: Optional[Any]) -> List[Tuple[str, int]]:
+        if not read_hosts:
+            return []
+        if isinstance(read_hosts, str):
+            read_hosts = read_hosts.split(",")
+        hosts: List[Tuple[str, int]] = []
+        for entry in read_hosts:
+            entry = str(entry).strip()
+            if not entry:
+                continue
+            host, _, port = entry.partition(":")
+            hosts.append((host.strip(), int(port) if port.strip() else int(self.port)))
+        return hosts
+
+    def _pool_kwargs(self, pool_name: str, host: str, port: int) -> Dict[str, Any]:
+        pool_kwargs: Dict[str, Any] = {
+            "pool_name": pool_name,
+            "pool_size": self.pool_size,
+            "max_overflow": self.max_overflow,
+            "timeout": self.pool_timeout,
+            "host": host,
+            "database": self.database,
+            "user": self.user,
+            "password": self.password,
+            "port": port,
+            "connection_timeout": 10,
+        }
+        if self.ssl_disabled is not None:
+            pool_kwargs["ssl_disabled"] = bool(self.ssl_disabled)
+        if self.converter_class is not None:
+            pool_kwargs["converter_class"] = self.converter_class
+        return pool_kwargs
+
     def _create_connection(self):
         if self._pool is None:
-            pool_kwargs: Dict[str, Any] = {
-                "pool_name": "nomina_pool",
-                "pool_size": 10,
-                "pool_reset_session": True,
-                "host": self.host,
-                "database": self.database,
-                "user": self.user,
-                "password": self.password,
-                "port": self.port,
-                "connection_timeout": 10,
-            }
-            if self.ssl_disabled is not None:
-                pool_kwargs["ssl_disabled"] = bool(self.ssl_disabled)
-            self._pool = pooling.MySQLConnectionPool(**pool_kwargs)
-        return self._pool.get_connection()
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = QueuedConnectionPool(**self._pool_kwargs("nomina_pool", self.host, self.port))
+        started = time.perf_counter()
+        try:
+            return self._pool.get_connection()
+        finally:
+            self.metrics.observe_pool_wait(time.perf_counter() - started)
+
+    def _get_read_pools(self) -> List[QueuedConnectionPool]:
+        if self._read_pools is None:
+            with self._read_pool_lock:
+                if self._read_pools is None:
+                    pools = []
+                    for i, (host, port) in enumerate(self.read_hosts):
+                        try:
+                            pools.append(QueuedConnectionPool(**self._pool_kwargs(f"nomina_read_pool_{i}", host, port)))
+                        except Error as e:
+                            self.logger.warning(f"Read-Replica {host}:{port} nicht erreichbar: {e}")
+                    self._read_pools = pools
+        return self._read_pools
+
+    def _create_read_connection(self):
+        """Checkt eine Verbindung von einer Read-Replica aus (Round Robin), sonst vom Primary."""
+        pools = self._get_read_pools() if self.read_hosts else []
+        if pools:
+            start = next(self._read_rr)
+            for offset in range(len(pools)):
+                pool = pools[(start + offset) % len(pools)]
+                started = time.perf_counter()
+                try:
+                    return pool.get_connection()
+                except Error as e:
+                    self.logger.warning(f"Read-Replica nicht verfügbar, nächste wird versucht: {e}")
+                finally:
+                    self.metrics.observe_pool_wait(time.perf_counter() - started)
+            self.logger.warning("Keine Read-Replica verfügbar, Lesezugriff auf dem Primary")
+        return self._create_connection()
+
+    def set_read_primary(self, value: bool) -> None:
+        """Hinweis für den aktuellen Thread/Request: alle Lesezugriffe auf dem Primary."""
+        self._routing_local.read_primary = bool(value)
+
+    @contextmanager
+    def read_primary(self):
+        """Block, in dem alle Lesezugriffe auf dem Primary laufen (read-your-own-writes)."""
+        previous = bool(getattr(self._routing_local, "read_primary", False))
+        self._routing_local.read_primary = True
+        try:
+            yield self
+        finally:
+            self._routing_local.read_primary = previous
+
+    def _routes_to_replica(self, query: str, primary: bool = False) -> bool:
+        """True, wenn eine Leseabfrage auf eine Read-Replica darf."""
+        if primary or not self.read_hosts:
+            return False
+        if getattr(self._routing_local, "read_primary", False):
+            return False
+        # Innerhalb einer Unit of Work mit Schreibzugriffen: eigene Änderungen lesen
+        if self.in_unit_of_work() and getattr(self._uow_local, "has_writes", False):
+            return False
+        statement = (query or "").lstrip().upper()
+        if not (statement.startswith("SELECT") or statement.startswith("WITH")):
+            return False
+        return not any(lock in statement for lock in ("FOR UPDATE", "FOR SHARE", "LOCK IN SHARE MODE"))
+
+    def _acquire_read_connection(self, query: str, primary: bool = False):
+        if self._routes_to_replica(query, primary):
+            return self._create_read_connection()
+        return self._acquire_connection()
+
+    def _get_fanout_executor(self) -> ThreadPoolExecutor:
+        if self._fanout_executor is None:
+            with self._fanout_lock:
+                if self._fanout_executor is None:
+                    self._fanout_executor = ThreadPoolExecutor(
+                        max_workers=self.fanout_workers,
+                        thread_name_prefix="db-fanout",
+                    )
+        return self._fanout_executor
+
+    def execute_queries_concurrently(self, queries: Dict[str, Tuple[str, tuple]]) -> Dict[str, List[Dict]]:
+        """Führt unabhängige Leseabfragen parallel auf dem Pool aus.
+
+        Args:
+            queries: {schlüssel: (query, params)}
+        Returns:
+            {schlüssel: ergebniszeilen} wie execute_query
+        Hält die laufende Unit of Work bereits eine Verbindung (z.B. nach get_resource_version
+        oder Schreibzugriffen), wird sequentiell auf dieser gelesen: Worker, die zusätzlich zur
+        gepinnten Verbindung eine weitere aus demselben Pool anfordern, blockieren sich unter
+        Last gegenseitig bis zum pool_timeout.
+        """
+        sequential = (
+            self.fanout_workers <= 0
+            or len(queries) <= 1
+            or (self.in_unit_of_work() and getattr(self._uow_local, "connection", None) is not None)
+        )
+        if sequential:
+            return {key: self.execute_query(query, params) for key, (query, params) in queries.items()}
+
+        primary = bool(getattr(self._routing_local, "read_primary", False))
+        endpoint = self.metrics.current_endpoint()
+
+        def run(query: str, params: tuple) -> List[Dict]:
+            self.metrics.set_endpoint(endpoint)
+            try:
+                return self.execute_query(query, params, primary=primary)
+            finally:
+                self.metrics.clear_endpoint()
+
+        try:
+            executor = self._get_fanout_executor()
+            futures = {key: executor.submit(run, query, params) for key, (query, params) in queries.items()}
+        except RuntimeError as e:
+            self.logger.warning(f"Paralleles Lesen nicht möglich, sequentiell: {e}")
+            return {key: self.execute_query(query, params) for key, (query, params) in queries.items()}
+        return {key: future.result() for key, future in futures.items()}
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Kennzahlen des Connection-Pools (leer, solange der Pool nicht angelegt ist)"""
+        if self._pool is None or not hasattr(self._pool, "stats"):
+            return {}
+        try:
+            stats = self._pool.stats()
+            if not isinstance(stats, dict):
+                return {}
+            if self._read_pools:
+                stats = dict(stats)
+                stats["replicas"] = [pool.stats() for pool in self._read_pools]
+            return stats
+        except Exception as e:
+            self.logger.error(f"Fehler beim Lesen der Pool-Statistik: {e}")
+            return {}
 
     def _is_transient_connection_error(self, err: Exception) -> bool:
         if not isinstance(err, Error):
@@ -433,15 +550,275 @@ class DatabaseManager(DatabaseManagerExportsMixin):
             or "EOF occurred" in msg
         )
 
+    def _is_transaction_lost_error(self, err: Exception) -> bool:
+        """True, wenn der Server die komplette Transaktion verworfen hat (Verbindungsabbruch, Deadlock)."""
+        if self._is_transient_connection_error(err):
+            return True
+        return isinstance(err, Error) and getattr(err, "errno", None) == 1213
+
+    # Unit of Work
+    #
+    # Innerhalb einer Unit of Work teilen sich alle Methoden des DatabaseManager
+    # eine einzige Pool-Verbindung (pro Thread). Die Verbindung wird erst beim
+    # ersten Statement ausgecheckt; committed wird genau einmal am Ende.
+    # Ein fehlgeschlagenes Einzel-Statement wird von InnoDB selbst zurückgerollt
+    # und bricht die Unit of Work nicht ab. Geht dagegen die Transaktion verloren
+    # (Verbindungsabbruch nach Schreibzugriffen, Deadlock), wird die Unit of Work
+    # als fehlgeschlagen markiert und am Ende zurückgerollt.
+    # Folgearbeiten, die den bestätigten Stand brauchen (z.B. t006 neu berechnen),
+    # laufen über _after_commit erst nach dem Commit.
+
+    def in_unit_of_work(self) -> bool:
+        return getattr(self._uow_local, "depth", 0) > 0
+
+    def has_uncommitted_writes(self) -> bool:
+        """True, wenn die laufende Unit of Work bereits geschrieben hat (Lesen sieht unbestätigte Daten)."""
+        return self.in_unit_of_work() and bool(getattr(self._uow_local, "has_writes", False))
+
+    def has_open_snapshot(self) -> bool:
+        """True, wenn die laufende Unit of Work schon eine Verbindung hält.
+
+        autocommit ist aus: Lesezugriffe darauf sehen den REPEATABLE-READ-Snapshot der
+        ersten Abfrage, nicht unbedingt den zuletzt bestätigten Stand.
+        """
+        return self.in_unit_of_work() and getattr(self._uow_local, "connection", None) is not None
+
+    def begin_unit_of_work(self) -> None:
+        """Startet (oder betritt verschachtelt) eine Unit of Work für den aktuellen Thread."""
+        depth = getattr(self._uow_local, "depth", 0)
+        if depth == 0:
+            self._uow_local.connection = None
+            self._uow_local.has_writes = False
+            self._uow_local.failed = False
+            self._uow_local.savepoint_seq = 0
+            self._uow_local.cache_tables = set()
+            self._uow_local.after_commit = []
+            self._uow_local.spare_connection = None
+        self._uow_local.depth = depth + 1
+
+    def end_unit_of_work(self, error: Optional[BaseException] = None) -> bool:
+        """Beendet die Unit of Work. Die äußerste Ebene committed bzw. rollt zurück
+        und gibt die Verbindung an den Pool zurück.
+
+        Returns:
+            True, wenn die Unit of Work erfolgreich committed wurde (bzw. nichts zu tun war)
+        """
+        depth = getattr(self._uow_local, "depth", 0)
+        if depth <= 0:
+            return True
+        if error is not None:
+            self._uow_local.failed = True
+        if depth > 1:
+            self._uow_local.depth = depth - 1
+            return not self._uow_local.failed
+
+        connection = self._uow_local.connection
+        failed = self._uow_local.failed
+        cache_tables = getattr(self._uow_local, "cache_tables", set())
+        after_commit = getattr(self._uow_local, "after_commit", [])
+        self._uow_local.depth = 0
+        self._uow_local.connection = None
+        self._uow_local.cache_tables = set()
+        self._uow_local.after_commit = []
+        if connection is None:
+            return not failed
+        committed = False
+        try:
+            if failed:
+                connection.rollback()
+                self.logger.warning("Unit of Work zurückgerollt")
+                return False
+            connection.commit()
+            committed = True
+            return True
+        except Error as e:
+            self.logger.error(f"Fehler beim Abschließen der Unit of Work: {e}")
+            try:
+                connection.rollback()
+            except Exception:
+                pass
+            return False
+        finally:
+            # Andere Threads können zwischenzeitlich den alten Stand gecacht haben
+            self.read_cache.invalidate(cache_tables)
+            if committed and after_commit:
+                # Neue Transaktion auf derselben Verbindung, kein zweiter Checkout
+                self._run_after_commit(after_commit, connection)
+            else:
+                try:
+                    connection.close()
+                except Exception:
+                    pass
+
+    def _after_commit(self, callback: Callable[[], Any]) -> None:
+        """Führt callback nach dem Commit der laufenden Unit of Work aus (einmal je Callback).
+
+        Außerhalb einer Unit of Work ist der Schreibzugriff schon bestätigt: sofort ausführen.
+        Bei einem Rollback entfallen die Callbacks.
+        """
+        if not self.in_unit_of_work():
+            self._run_after_commit([callback])
+            return
+        if callback not in self._uow_local.after_commit:
+            self._uow_local.after_commit.append(callback)
+
+    def _run_after_commit(self, callbacks: List[Callable[[], Any]], connection=None) -> None:
+        """Führt Callbacks in einer eigenen Unit of Work aus.
+
+        connection (die eben committete Verbindung) wird beim ersten Statement übernommen,
+        sonst geschlossen. Fehler werden nur protokolliert: der auslösende Commit ist erfolgt.
+        """
+        self.begin_unit_of_work()
+        self._uow_local.spare_connection = connection
+        try:
+            for callback in callbacks:
+                try:
+                    callback()
+                except Exception as e:
+                    self.logger.error(f"Fehler in after-commit-Hook {getattr(callback, '__name__', callback)}: {e}")
+        finally:
+            spare = self._uow_local.spare_connection
+            self._uow_local.spare_connection = None
+            self.end_unit_of_work()
+            if spare is not None:
+                try:
+                    spare.close()
+                except Exception:
+                    pass
+
+    def _invalidate_tables(self, tables) -> None:
+        """Invalidiert Cache-Einträge nach einem Schreibzugriff auf tables.
+
+        In einer Unit of Work zusätzlich erneut beim Commit/Rollback. Schreibzugriffe auf
+        Eingangstabellen von t006 berechnen die per Trigger gelöschten Zeilen nach dem
+        Commit neu (refresh_pending_payroll). Aufrufer haben ihre Verbindung außerhalb
+        einer Unit of Work bereits freigegeben, der Hook checkt eine eigene aus.
+        """
+        tables = set(tables)
+        if not tables:
+            return
+        if self.in_unit_of_work():
+            self._uow_local.cache_tables |= tables
+        self.read_cache.invalidate(tables)
+        if tables & PAYROLL_INPUT_TABLES:
+            self._after_commit(self.refresh_pending_payroll)
+
+    @contextmanager
+    def unit_of_work(self):
+        """Pinnt eine Pool-Verbindung für alle Aufrufe im with-Block und committed einmal am Ende.
+
+        Beispiel:
+            with db_manager.unit_of_work():
+                db_manager.update_ingresos(employee_id, year, data)
+                db_manager.insert_registro_procesamiento(...)
+        """
+        self.begin_unit_of_work()
+        try:
+            yield self
+        except BaseException as e:
+            self.end_unit_of_work(e)
+            raise
+        else:
+            self.end_unit_of_work()
+
+    def _acquire_connection(self):
+        """Gibt die Verbindung der aktiven Unit of Work zurück oder checkt eine neue aus dem Pool aus."""
+        if not self.in_unit_of_work():
+            return self._create_connection()
+        connection = self._uow_local.connection
+        if connection is None:
+            connection = getattr(self._uow_local, "spare_connection", None) or self._create_connection()
+            self._uow_local.spare_connection = None
+            self._uow_local.connection = connection
+        return connection
+
+    def _is_pinned_connection(self, connection) -> bool:
+        return connection is not None and self.in_unit_of_work() and connection is self._uow_local.connection
+
+    def _release_connection(self, connection) -> None:
+        if connection is None or self._is_pinned_connection(connection):
+            return
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def _commit_connection(self, connection) -> None:
+        """Committed außerhalb einer Unit of Work; innerhalb wird nur der Schreibzugriff vermerkt."""
+        if self._is_pinned_connection(connection):
+            self._uow_local.has_writes = True
+            return
+        connection.commit()
+
+    def _discard_pinned_connection(self, err: Exception) -> bool:
+        """Behandelt einen Verbindungs-/Transaktionsverlust innerhalb der Unit of Work.
+
+        Returns:
+            True, wenn das Statement auf einer frischen Verbindung wiederholt werden darf
+            (es wurde in dieser Unit of Work noch nichts geschrieben).
+        """
+        connection = self._uow_local.connection
+        self._uow_local.connection = None
+        if connection is not None:
+            try:
+                connection.close()
+            except Exception:
+                pass
+        if self._uow_local.has_writes:
+            self._uow_local.failed = True
+            self.logger.error(f"Transaktion der Unit of Work verloren, wird zurückgerollt ({err})")
+            return False
+        return True
+
+    @contextmanager
+    def _transaction(self, tables=()):
+        """Atomare Folge mehrerer Statements.
+
+        Außerhalb einer Unit of Work: eigene Verbindung mit commit/rollback.
+        Innerhalb: gepinnte Verbindung, abgesichert über einen SAVEPOINT, damit ein
+        Fehler nur die Statements dieses Blocks zurückrollt.
+        tables: geschriebene Tabellen, deren Cache-Einträge danach invalidiert werden.
+        """
+        connection = self._acquire_connection()
+        savepoint = None
+        try:
+            if self._is_pinned_connection(connection):
+                self._uow_local.savepoint_seq += 1
+                savepoint = f"uow_sp_{self._uow_local.savepoint_seq}"
+                sp_cursor = connection.cursor()
+                sp_cursor.execute(f"SAVEPOINT {savepoint}")
+                sp_cursor.close()
+            yield connection
+            if savepoint is not None:
+                self._uow_local.has_writes = True
+            else:
+                connection.commit()
+        except BaseException as e:
+            try:
+                if savepoint is not None and not self._is_transaction_lost_error(e):
+                    sp_cursor = connection.cursor()
+                    sp_cursor.execute(f"ROLLBACK TO SAVEPOINT {savepoint}")
+                    sp_cursor.close()
+                elif savepoint is not None:
+                    self._discard_pinned_connection(e)
+                else:
+                    connection.rollback()
+            except Exception:
+                if savepoint is not None:
+                    self._uow_local.failed = True
+            raise
+        finally:
+            self._release_connection(connection)
+        self._invalidate_tables(affected_tables(tables))
+
     def connect(self):
         try:
             self.connection = self._create_connection()
             if self.connection.is_connected():
                 self.logger.info(f"Erfolgreich verbunden mit MySQL Datenbank {self.database}")
-                self._ensure_employee_hire_date_column()
-                self._ensure_employee_irpf_columns()
-                self._ensure_deducciones_gasolina_column()
-                self._ensure_carry_over_table()
+                # Aktueller Stand wird nur einmal pro Prozess bestätigt, Reconnects lesen nichts
+                if self.schema_version is None or self.schema_version < LATEST_VERSION:
+                    self.check_schema_version()
                 return True
         except Error as e:
             self.logger.error(f"Fehler bei der Verbindung zur Datenbank: {e}")
@@ -475,8 +852,6 @@ class DatabaseManager(DatabaseManagerExportsMixin):
           it replaces previously stored carry overs for that source month.
         - defer_concepts is accepted for backward compatibility but is ignored.
         """
-        connection = None
-        cursor = None
         try:
             if employee_id is None:
                 return False
@@ -484,24 +859,6 @@ class DatabaseManager(DatabaseManagerExportsMixin):
             source_month_i = int(source_month)
             apply_year, apply_month = self._next_year_month(source_year_i, source_month_i)
 
-            # Don't collect carry overs from previous months anymore
-            # Only use the current user input for carry over
-            carry_forward: Dict[str, float] = {}
-
-            connection = self._create_connection()
-            cursor = connection.cursor()
-
-            # Replace existing carry overs for this source month
-            cursor.execute(
-                """
-                DELETE FROM t010_carry_over
-                WHERE id_empleado = %s
-                  AND source_anio = %s
-                  AND source_mes = %s
-                """,
-                (int(employee_id), source_year_i, source_month_i),
-            )
-
             # Insert new entries
             insert_query = """
             INSERT INTO t010_carry_over
@@ -524,50 +881,53 @@ class DatabaseManager(DatabaseManagerExportsMixin):
 
                 combined[concept] = amount_f
 
-            for concept, amount_f in combined.items():
-                if not concept:
-                    continue
+            with self._transaction(("t010_carry_over",)) as connection:
+                cursor = connection.cursor()
                 try:
-                    amount_f = float(amount_f)
-                except Exception:
-                    amount_f = 0.0
-                if amount_f == 0:
-                    continue
+                    # Replace existing carry overs for this source month
+                    cursor.execute(
+                        """
+                        DELETE FROM t010_carry_over
+                        WHERE id_empleado = %s
+                          AND source_anio = %s
+                          AND source_mes = %s
+                        """,
+                        (int(employee_id), source_year_i, source_month_i),
+                    )
 
-                cursor.execute(
-                    insert_query,
-                    (
-                        int(employee_id),
-                        source_year_i,
-                        source_month_i,
-                        apply_year,
-                        apply_month,
-                        concept,
-                        amount_f,
-                    ),
-                )
+                    insert_rows = []
+                    for concept, amount_f in combined.items():
+                        if not concept:
+                            continue
+                        try:
+                            amount_f = float(amount_f)
+                        except Exception:
+                            amount_f = 0.0
+                        if amount_f == 0:
+                            continue
 
-            connection.commit()
+                        insert_rows.append(
+                            (
+                                int(employee_id),
+                                source_year_i,
+                                source_month_i,
+                                apply_year,
+                                apply_month,
+                                concept,
+                                amount_f,
+                            )
+                        )
+                    if insert_rows:
+                        self._executemany_chunked(cursor, insert_query, insert_rows, chunk_size=500)
+                finally:
+                    try:
+                        cursor.close()
+                    except Exception:
+                        pass
             return True
         except Exception as e:
             self.logger.error(f"Fehler beim Erstellen Carry Over: {e}")
-            try:
-                if connection is not None:
-                    connection.rollback()
-            except Exception:
-                pass
             return False
-        finally:
-            if cursor is not None:
-                try:
-                    cursor.close()
-                except Exception:
-                    pass
-            if connection is not None:
-                try:
-                    connection.close()
-                except Exception:
-                    pass
 
     def list_carry_over_by_source(
         self,
@@ -612,6 +972,7 @@ class DatabaseManager(DatabaseManagerExportsMixin):
         apply_year: int,
         apply_month: int,
         employee_ids: List[int],
+        lock_rows: bool = False,
     ) -> List[Dict]:
         try:
             if not employee_ids:
@@ -628,35 +989,219 @@ class DatabaseManager(DatabaseManagerExportsMixin):
               AND apply_mes = %s
               AND id_empleado IN ({placeholders})
             GROUP BY id_empleado, concept
+            {"FOR SHARE" if lock_rows else ""}
             """
             params = (int(apply_year), int(apply_month), *employee_ids_clean)
-            return self.execute_query(query, params)
+            return self.execute_query(query, params, raise_errors=lock_rows)
         except Exception as e:
+            if lock_rows:
+                # Sperrlesen für refresh_payroll_month: ohne Carry Over darf nichts geschrieben werden
+                raise
             self.logger.error(f"Fehler beim Aggregieren Carry Over: {e}")
             return []
 
+    def check_schema_version(self) -> Optional[int]:
+        """Liest die angewendete Schema-Version (eine Zeile) und warnt bei ausstehenden Migrationen."""
+        try:
+            self.schema_version = read_schema_version(self.connection)
+        except Exception as e:
+            self.logger.error(f"Fehler beim Lesen der Schema-Version: {e}")
+            return None
+        if self.schema_version < LATEST_VERSION:
+            if self.auto_migrate:
+                self.migrate()
+            else:
+                self.logger.warning(
+                    f"Datenbankschema auf Version {self.schema_version}, erwartet {LATEST_VERSION}. "
+                    f"Bitte 'python run.py migrate' ausführen."
+                )
+        return self.schema_version
+
+    def migrate(self, target: Optional[int] = None) -> Dict[str, Any]:
+        """Spielt ausstehende Migrationen auf einer eigenen Pool-Verbindung ein."""
+        result: Dict[str, Any] = {"success": False, "from_version": None, "to_version": None, "applied": [], "error": None}
+        connection = None
+        try:
+            connection = self._create_connection()
+            result["from_version"] = read_schema_version(connection)
+            result["applied"] = apply_migrations(connection, target)
+            self.schema_version = read_schema_version(connection)
+            result["to_version"] = self.schema_version
+            if result["applied"]:
+                self.read_cache.clear()
+                self.search_index.clear()
+            result["success"] = True
+            if result["applied"]:
+                self.logger.info(f"Schema migriert: Version {result['from_version']} -> {result['to_version']}")
+        except Exception as e:
+            result["error"] = str(e)
+            self.logger.error(f"Fehler bei der Schema-Migration: {e}")
+        finally:
+            if connection is not None:
+                try:
+                    connection.close()
+                except Exception:
+                    pass
+        return result
+
+    def _archive_enabled(self) -> bool:
+        """True, sobald das Schema Jahrespartitionen und Archivtabellen hat."""
+        return self.schema_version is not None and self.schema_version >= PARTITION_SCHEMA_VERSION
+
+    def _archived_source(self, table: str, where: str, params: tuple, tail: str = "",
+                         tail_params: tuple = (), locking: str = "") -> Tuple[str, tuple]:
+        """FROM-Quelle für t003/t004/t007 inklusive archivierter Jahre.
+
+        Ohne Archiv (Schema < 10) ist das einfach der Tabellenname. Sonst ein
+        UNION ALL aus Live- und Archivtabelle, in das Filter (und ggf. ORDER/LIMIT)
+        hineingeschoben werden; die äußere Abfrage bleibt unverändert.
+        locking (z.B. "FOR SHARE") steht in jedem Zweig: eine Sperrklausel der äußeren
+        Abfrage sperrt keine Zeilen, die in einer abgeleiteten Tabelle gelesen werden.
+        """
+        if not self._archive_enabled():
+            return table, ()
+        branch = f"SELECT * FROM {{}} WHERE {where}{tail}{' ' + locking if locking else ''}"
+        source = (f"(({branch.format(table)}) UNION ALL "
+                  f"({branch.format(table + ARCHIVE_SUFFIX)}))")
+        branch_params = tuple(params) + tuple(tail_params)
+        return source, branch_params * 2
+
+    def get_archived_years(self) -> List[int]:
+        """Liefert die archivierten (schreibgeschützten) Jahre."""
+        if not self._archive_enabled():
+            return []
+        rows = self.execute_query(f"SELECT anio FROM {ARCHIVE_YEARS_TABLE} ORDER BY anio")
+        return [int(r['anio']) for r in rows]
+
+    def archive_year(self, year: int) -> Dict[str, Any]:
+        """Verschiebt ein abgeschlossenes Jahr aus t003/t004/t007 in die Archivtabellen.
+
+        t003/t004 werden nach anio verschoben, t007 nach dem Kalenderjahr von fecha
+        (entspricht den Partitionen). Die Lese-APIs lesen Archivtabellen transparent
+        mit; neue Monatszeilen für archivierte Jahre blockieren die Trigger aus Migration 9.
+        """
+        result: Dict[str, Any] = {"success": False, "year": year, "moved": {}, "error": None}
+        if not self._archive_enabled():
+            result["error"] = f"Archivierung erfordert Schema-Version {PARTITION_SCHEMA_VERSION}"
+            return result
+        if year > date.today().year - ARCHIVE_MIN_AGE_YEARS:
+            result["error"] = f"Jahr {year} ist noch nicht abgeschlossen"
+            return result
+        try:
+            with self._transaction(tuple(PARTITIONED_TABLES) + (ARCHIVE_YEARS_TABLE,)) as connection:
+                cursor = connection.cursor()
+                try:
+                    for table, column in PARTITIONED_TABLES.items():
+                        if column == "anio":
+                            where, params = "anio = %s", (year,)
+                        else:
+                            where = f"{column} >= %s AND {column} < %s"
+                            params = (f"{year}-01-01 00:00:00", f"{year + 1}-01-01 00:00:00")
+                        cursor.execute(f"REPLACE INTO {table}{ARCHIVE_SUFFIX} SELECT * FROM {table} WHERE {where}", params)
+                        cursor.execute(f"DELETE FROM {table} WHERE {where}", params)
+                        result["moved"][table] = cursor.rowcount
+                    cursor.execute(f"INSERT IGNORE INTO {ARCHIVE_YEARS_TABLE} (anio) VALUES (%s)", (year,))
+                finally:
+                    cursor.close()
+            result["success"] = True
+            self.logger.info(f"Jahr {year} archiviert: {result['moved']}")
+        except Exception as e:
+            result["error"] = str(e)
+            self.logger.error(f"Fehler beim Archivieren des Jahres {year}: {e}")
+        return result
+
     def disconnect(self):
         if self.connection and self.connection.is_connected():
             self.connection.close()
             self.logger.info("Datenbankverbindung geschlossen")
 
-    def execute_query(self, query: str, params: tuple = None) -> List[Dict]:
+    def configure_slow_query_log(self, threshold_ms: Optional[float], capacity: int = 100, explain: bool = True) -> None:
+        """Aktiviert (threshold_ms gesetzt) oder deaktiviert (None) das Slow-Query-Log."""
+        self.slow_query_log.configure(threshold_ms, capacity, explain)
+        if threshold_ms is not None:
+            self.logger.info(f"Slow-Query-Log aktiv: Schwelle {threshold_ms} ms, Puffer {capacity}, EXPLAIN {'an' if explain else 'aus'}")
+
+    def _explain_statement(self, query: str, params: tuple = None) -> Any:
+        """Ermittelt EXPLAIN FORMAT=JSON auf einer eigenen Pool-Verbindung (nie der Unit-of-Work-Verbindung)."""
+        connection = None
+        cursor = None
+        try:
+            connection = self._create_connection()
+            cursor = connection.cursor()
+            cursor.execute(f"EXPLAIN FORMAT=JSON {query}", params)
+            row = cursor.fetchone()
+            plan = row[0] if row else None
+            return json.loads(plan) if isinstance(plan, (str, bytes, bytearray)) else plan
+        finally:
+            if cursor is not None:
+                try:
+                    cursor.close()
+                except Exception:
+                    pass
+            if connection is not None:
+                try:
+                    connection.close()
+                except Exception:
+                    pass
+
+    def _observe_statement(self, query: str, params: tuple, seconds: float, rows: int = 0, kind: str = "query") -> None:
+        """Meldet ein erfolgreiches Statement an Metriken und ggf. Slow-Query-Log."""
+        self.metrics.observe_query(query, seconds, rows=rows, kind=kind)
+        if self.slow_query_log.is_slow(seconds):
+            entry = self.slow_query_log.record(
+                query,
+                params,
+                seconds,
+                kind=kind,
+                endpoint=self.metrics.current_endpoint(),
+                explain_fn=self._explain_statement,
+            )
+            self.logger.warning(
+                f"Langsame Abfrage ({entry['duration_ms']} ms, Parameter {entry['params_fingerprint']}): {entry['statement']}"
+            )
+
+    def execute_query(self, query: str, params: tuple = None, primary: bool = False,
+                      raise_errors: bool = False) -> List[Dict]:
+        """Führt eine Leseabfrage aus; mit konfigurierten Read-Replicas dort, außer primary=True
+        bzw. read_primary()-Hinweis oder Schreibzugriffen in der laufenden Unit of Work.
+        Fehler liefern [], nur ein erschöpfter Pool (PoolError) wird weitergereicht.
+        raise_errors=True reicht auch andere Fehler weiter (z.B. Lock-Timeouts beim
+        Sperrlesen, wo ein leeres Ergebnis falsch wäre)."""
         last_error: Optional[Error] = None
         for attempt in range(2):
             connection = None
             cursor = None
+            started = None
             try:
-                connection = self._create_connection()
+                connection = self._acquire_read_connection(query, primary)
+                started = time.perf_counter()
                 cursor = connection.cursor(dictionary=True)
                 cursor.execute(query, params)
                 result = cursor.fetchall() if cursor.with_rows else []
+                self._observe_statement(query, params, time.perf_counter() - started, rows=len(result))
                 return result
+            except PoolError as e:
+                # Erschöpfter Pool ist kein leeres Ergebnis: weiterreichen (API antwortet mit 5xx)
+                self.logger.error(f"Keine Datenbankverbindung verfügbar: {e}")
+                raise
             except Error as e:
                 last_error = e
-                if attempt == 0 and self._is_transient_connection_error(e):
+                if started is not None:
+                    self.metrics.observe_query(query, time.perf_counter() - started, success=False)
+                if self._is_pinned_connection(connection) and self._is_transaction_lost_error(e):
+                    retry_allowed = self._discard_pinned_connection(e)
+                    connection = None
+                    if attempt == 0 and retry_allowed:
+                        self.logger.warning(f"Datenbankverbindung verloren, Retry... ({e})")
+                        self.metrics.record_retry(query)
+                        continue
+                elif attempt == 0 and self._is_transient_connection_error(e):
                     self.logger.warning(f"Datenbankverbindung verloren, Retry... ({e})")
+                    self.metrics.record_retry(query)
                     continue
                 self.logger.error(f"Fehler bei der Abfrage: {e}")
+                if raise_errors:
+                    raise
                 return []
             finally:
                 if cursor is not None:
@@ -664,36 +1209,179 @@ class DatabaseManager(DatabaseManagerExportsMixin):
                         cursor.close()
                     except Exception:
                         pass
-                if connection is not None:
-                    try:
-                        connection.close()
-                    except Exception:
-                        pass
+                self._release_connection(connection)
         if last_error is not None:
             self.logger.error(f"Fehler bei der Abfrage: {last_error}")
+            if raise_errors:
+                raise last_error
         return []
 
+    def execute_query_iter(self, query: str, params: tuple = None, batch_size: int = 1000, primary: bool = False) -> Iterator[Dict]:
+        """Generator über große Ergebnismengen, liefert eine dict-Zeile nach der anderen.
+
+        Siehe execute_query_batches für Verbindungs- und Fehlerverhalten.
+        """
+        batches = self.execute_query_batches(query, params, batch_size, dictionary=True, primary=primary)
+        try:
+            for _, batch in batches:
+                yield from batch
+        finally:
+            batches.close()
+
+    def execute_query_columns(self, query: str, params: tuple = None, batch_size: int = 1000) -> Dict[str, Any]:
+        """Liest eine Abfrage spaltenweise: Spaltennamen plus eine Werteliste pro Spalte.
+
+        Es wird kein dict pro Zeile angelegt; gedacht für Aggregationen und NumPy/pandas.
+        Returns:
+            Dict mit success, columns, data ({spalte: [werte]}), rowcount und error
+        """
+        result: Dict[str, Any] = {"success": False, "columns": [], "data": {}, "rowcount": 0, "error": None}
+        columns: List[str] = []
+        data: List[List[Any]] = []
+        try:
+            for batch_columns, batch in self.execute_query_batches(query, params, batch_size):
+                if not columns:
+                    columns = list(batch_columns)
+                    data = [[] for _ in columns]
+                for values, column_values in zip(data, zip(*batch)):
+                    values.extend(column_values)
+                result["rowcount"] += len(batch)
+        except Exception as e:
+            self.logger.error(f"Fehler bei der spaltenweisen Abfrage: {e}")
+            result["error"] = str(e)
+            result["rowcount"] = 0
+            return result
+        result["success"] = True
+        result["columns"] = columns
+        result["data"] = dict(zip(columns, data))
+        return result
+
+    def execute_query_batches(
+        self,
+        query: str,
+        params: tuple = None,
+        batch_size: int = 1000,
+        dictionary: bool = False,
+        primary: bool = False,
+    ) -> Iterator[Tuple[Optional[List[str]], List[Any]]]:
+        """Generator über große Ergebnismengen: ungepufferter Cursor, fetchmany in Batches.
+
+        Liefert (spaltennamen, batch). Standardmäßig sind die Zeilen Tupel in Spaltenreihenfolge
+        (kein dict pro Zeile); mit dictionary=True dicts, dann ist spaltennamen None.
+
+        Die Verbindung bleibt für die Dauer der Iteration ausgecheckt. Ohne Schreibzugriffe in der
+        aktuellen Unit of Work wird eine eigene Pool-Verbindung genutzt, so dass andere Statements
+        während der Iteration weiterlaufen können; hat die Unit of Work bereits geschrieben, wird
+        deren Verbindung (gepuffert) verwendet, damit die eigenen Änderungen sichtbar sind.
+        Fehler werden geloggt und weitergereicht, damit ein abgebrochener Stream nicht als
+        vollständiges Ergebnis durchgeht.
+        """
+        size = max(1, int(batch_size))
+        use_pinned = self.in_unit_of_work() and bool(getattr(self._uow_local, "has_writes", False))
+        connection = None
+        cursor = None
+        exhausted = False
+        rows = 0
+        started = time.perf_counter()
+        try:
+            for attempt in range(2):
+                try:
+                    if use_pinned:
+                        connection = self._acquire_connection()
+                        cursor = connection.cursor(dictionary=dictionary, buffered=True)
+                    else:
+                        if self._routes_to_replica(query, primary):
+                            connection = self._create_read_connection()
+                        else:
+                            connection = self._create_connection()
+                        cursor = connection.cursor(dictionary=dictionary, buffered=False)
+                    cursor.execute(query, params)
+                    break
+                except Error as e:
+                    if attempt == 0 and not use_pinned and self._is_transient_connection_error(e):
+                        self.logger.warning(f"Datenbankverbindung verloren, Retry... ({e})")
+                        self.metrics.record_retry(query)
+                        for resource in (cursor, connection):
+                            try:
+                                if resource is not None:
+                                    resource.close()
+                            except Exception:
+                                pass
+                        cursor = None
+                        connection = None
+                        continue
+                    raise
+            if cursor.with_rows:
+                columns = None if dictionary else list(cursor.column_names)
+                while True:
+                    batch = cursor.fetchmany(size)
+                    if not batch:
+                        break
+                    rows += len(batch)
+                    yield columns, batch
+            exhausted = True
+            self._observe_statement(query, params, time.perf_counter() - started, rows=rows, kind="stream")
+        except Error as e:
+            self.metrics.observe_query(query, time.perf_counter() - started, rows=rows, kind="stream", success=False)
+            self.logger.error(f"Fehler bei der Streaming-Abfrage: {e}")
+            raise
+        finally:
+            if cursor is not None:
+                try:
+                    if not exhausted and not use_pinned and connection is not None:
+                        # Ungelesene Zeilen verwerfen, sonst ist die Verbindung nicht wiederverwendbar
+                        connection.consume_results()
+                except Exception:
+                    pass
+                try:
+                    cursor.close()
+                except Exception:
+                    pass
+            if connection is not None and not use_pinned:
+                try:
+                    connection.close()
+                except Exception:
+                    pass
+
     def execute_update(self, query: str, params: tuple = None) -> bool:
         last_error: Optional[Error] = None
         for attempt in range(2):
             connection = None
             cursor = None
+            started = None
+            written = False
             try:
-                connection = self._create_connection()
+                connection = self._acquire_connection()
+                started = time.perf_counter()
                 cursor = connection.cursor()
                 cursor.execute(query, params)
-                connection.commit()
+                self._commit_connection(connection)
+                self._observe_statement(query, params, time.perf_counter() - started, kind="update")
+                written = True
                 return True
             except Error as e:
                 last_error = e
-                if attempt == 0 and self._is_transient_connection_error(e):
+                if started is not None:
+                    self.metrics.observe_query(query, time.perf_counter() - started, kind="update", success=False)
+                if self._is_pinned_connection(connection):
+                    # Innerhalb der Unit of Work: InnoDB rollt das fehlgeschlagene Statement
+                    # selbst zurück, die übrige Transaktion bleibt erhalten.
+                    if self._is_transaction_lost_error(e):
+                        retry_allowed = self._discard_pinned_connection(e)
+                        connection = None
+                        if attempt == 0 and retry_allowed:
+                            self.logger.warning(f"Datenbankverbindung verloren, Retry... ({e})")
+                            self.metrics.record_retry(query)
+                            continue
+                elif attempt == 0 and self._is_transient_connection_error(e):
                     self.logger.warning(f"Datenbankverbindung verloren, Retry... ({e})")
+                    self.metrics.record_retry(query)
                     continue
                 self.logger.error(f"Fehler beim Update: {e}")
                 self.logger.error(f"Query: {query}")
                 self.logger.error(f"Params: {params}")
                 try:
-                    if connection is not None:
+                    if connection is not None and not self._is_pinned_connection(connection):
                         connection.rollback()
                 except Exception:
                     pass
@@ -704,15 +1392,83 @@ class DatabaseManager(DatabaseManagerExportsMixin):
                         cursor.close()
                     except Exception:
                         pass
-                if connection is not None:
-                    try:
-                        connection.close()
-                    except Exception:
-                        pass
+                self._release_connection(connection)
+                if written:
+                    self._invalidate_tables(tables_in_statement(query))
         if last_error is not None:
             self.logger.error(f"Fehler beim Update: {last_error}")
         return False
 
+    def _executemany_chunked(self, cursor, query: str, rows: List[tuple], chunk_size: int) -> List[int]:
+        """Führt executemany in Chunks aus und liefert die rowcounts pro Chunk.
+
+        mysql.connector schreibt INSERT ... VALUES (inkl. ON DUPLICATE KEY UPDATE) dabei
+        in ein einziges mehrzeiliges INSERT um, so dass jeder Chunk ein Round Trip ist.
+        """
+        chunk_rowcounts: List[int] = []
+        size = max(1, int(chunk_size))
+        for start in range(0, len(rows), size):
+            chunk = rows[start:start + size]
+            cursor.executemany(query, chunk)
+            rowcount = cursor.rowcount
+            chunk_rowcounts.append(rowcount if isinstance(rowcount, int) and rowcount > 0 else 0)
+        return chunk_rowcounts
+
+    def execute_batch(self, query: str, rows: List[tuple], chunk_size: int = 500) -> Dict[str, Any]:
+        """Schreibt viele Parameterzeilen mit executemany in einer Transaktion.
+
+        Args:
+            query: INSERT/UPDATE/DELETE mit %s-Platzhaltern für eine Zeile
+            rows: Parameter-Tupel, eines pro Zeile
+            chunk_size: maximale Anzahl Zeilen pro Round Trip
+        Returns:
+            Dict mit success, rowcount (Summe), chunk_rowcounts und error
+        """
+        result: Dict[str, Any] = {
+            "success": False,
+            "rowcount": 0,
+            "chunk_rowcounts": [],
+            "error": None,
+        }
+        rows = [tuple(r) for r in rows or []]
+        if not rows:
+            result["success"] = True
+            return result
+        last_error: Optional[Error] = None
+        for attempt in range(2):
+            started = time.perf_counter()
+            try:
+                with self._transaction(tables_in_statement(query)) as connection:
+                    cursor = connection.cursor()
+                    try:
+                        chunk_rowcounts = self._executemany_chunked(cursor, query, rows, chunk_size)
+                    finally:
+                        try:
+                            cursor.close()
+                        except Exception:
+                            pass
+                self.metrics.observe_query(query, time.perf_counter() - started, kind="batch")
+                result["success"] = True
+                result["chunk_rowcounts"] = chunk_rowcounts
+                result["rowcount"] = sum(chunk_rowcounts)
+                return result
+            except Error as e:
+                last_error = e
+                self.metrics.observe_query(query, time.perf_counter() - started, kind="batch", success=False)
+                if attempt == 0 and self._is_transient_connection_error(e) and not self.in_unit_of_work():
+                    self.logger.warning(f"Datenbankverbindung verloren, Retry... ({e})")
+                    self.metrics.record_retry(query)
+                    continue
+                break
+            except Exception as e:
+                last_error = e
+                break
+        self.logger.error(f"Fehler beim Batch-Update ({len(rows)} Zeilen): {last_error}")
+        self.logger.error(f"Query: {query}")
+        result["error"] = str(last_error)
+        return result
+
+    @cached_read(SETTINGS_TAG)
     def get_payout_month(self) -> int:
         """Returns the globally configured payout month (1-12). Defaults to 4 (April)."""
         try:
@@ -743,11 +1499,13 @@ class DatabaseManager(DatabaseManagerExportsMixin):
             settings_path = os.path.join(os.path.dirname(__file__), "config", "settings.json")
             with open(settings_path, "w", encoding="utf-8") as f:
                 json.dump({"payout_month": payout_month}, f, ensure_ascii=False, indent=2)
+            self._invalidate_tables({SETTINGS_TAG})
             return True
         except Exception as e:
             self.logger.error(f"Fehler beim Setzen von payout_month: {e}")
             return False
 
+    @cached_read("t001_empleados")
     def get_all_employees(self) -> List[Dict]:
         query = """
         SELECT id_empleado, nombre, apellido, ceco, categoria, activo, fecha_alta, declaracion, dni
@@ -756,23 +1514,99 @@ class DatabaseManager(DatabaseManagerExportsMixin):
         """
         return self.execute_query(query)
 
-    def get_all_employees_with_salaries(self) -> List[Dict]:
-        """Hole alle Mitarbeiter mit ihren Gehaltsdaten"""
-        query = """
-        SELECT e.id_empleado, e.nombre, e.apellido, e.ceco, e.categoria, e.activo, e.fecha_alta,
-               s.anio, s.salario_anual_bruto, s.salario_mensual_bruto, 
-               s.modalidad, s.atrasos, s.antiguedad
-        FROM t001_empleados e
-        LEFT JOIN t002_salarios s ON e.id_empleado = s.id_empleado
-        ORDER BY e.apellido, e.nombre, s.anio DESC
+    @cached_read("t001_empleados", "t002_salarios")
+    def get_all_employees_with_salaries(self) -> List[Dict]:
+        """Hole alle Mitarbeiter mit ihren Gehaltsdaten
+
+        Kompatibilitätsvariante von get_employees_with_salaries_page ohne Seitengrenze.
+        """
+        page = self.get_employees_with_salaries_page(limit=None)
+        if page.get("error"):
+            return []
+        return page["items"]
+
+    @staticmethod
+    def encode_employee_cursor(row: Dict[str, Any]) -> str:
+        """Opaker Cursor aus dem Sortierschlüssel (apellido, nombre, id_empleado) einer Zeile."""
+        key = [row.get("apellido"), row.get("nombre"), row["id_empleado"]]
+        return base64.urlsafe_b64encode(json.dumps(key).encode("utf-8")).decode("ascii").rstrip("=")
+
+    @staticmethod
+    def decode_employee_cursor(cursor: str) -> Tuple[str, str, int]:
+        """Gegenstück zu encode_employee_cursor; ValueError bei ungültigem Cursor."""
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            apellido, nombre, emp_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        except Exception as e:
+            raise ValueError(f"Ungültiger Cursor: {cursor!r}") from e
+        if not isinstance(emp_id, int):
+            raise ValueError(f"Ungültiger Cursor: {cursor!r}")
+        return apellido or "", nombre or "", emp_id
+
+    def get_employees_with_salaries_page(
+        self,
+        cursor: Optional[str] = None,
+        limit: Optional[int] = EMPLOYEE_PAGE_SIZE,
+        activo: Optional[bool] = None,
+        categoria: Optional[str] = None,
+        ceco: Optional[str] = None,
+        year_from: Optional[int] = None,
+        year_to: Optional[int] = None,
+        latest_years: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """Eine Seite Mitarbeiter mit Gehaltsdaten, sortiert nach (apellido, nombre, id_empleado).
+
+        Keyset-Paginierung: cursor ist der next_cursor der Vorseite, die Seite wird über
+        idx_t001_orden_nombre als Bereichsscan gelesen. Die Gehälter werden in einer
+        zweiten Abfrage nur für die Mitarbeiter der Seite geladen; year_from/year_to und
+        latest_years (die letzten N Jahre je Mitarbeiter) filtern nur die Gehaltszeilen.
+        limit=None liefert alle Mitarbeiter (get_all_employees_with_salaries).
+
+        Rückgabe: {"items": [...], "next_cursor": str|None}; bei Fehlern zusätzlich "error".
+        Ein ungültiger Cursor löst ValueError aus.
+        """
+        if limit is not None:
+            limit = max(1, min(int(limit), EMPLOYEE_PAGE_MAX_SIZE))
+        after = self.decode_employee_cursor(cursor) if cursor else None
+
+        conditions: List[str] = []
+        params: List[Any] = []
+        if activo is not None:
+            conditions.append("activo = %s")
+            params.append(bool(activo))
+        if categoria is not None:
+            conditions.append("categoria = %s")
+            params.append(categoria)
+        if ceco is not None:
+            conditions.append("ceco = %s")
+            params.append(ceco)
+        if after is not None:
+            # Ausgeschriebener Tupelvergleich, den MySQL als Bereich auf den Index abbildet
+            conditions.append(
+                "(apellido > %s OR (apellido = %s AND (nombre > %s OR (nombre = %s AND id_empleado > %s))))"
+            )
+            params.extend((after[0], after[0], after[1], after[1], after[2]))
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        employee_query = f"""
+        SELECT id_empleado, nombre, apellido, ceco, categoria, activo, fecha_alta
+        FROM t001_empleados
+        {where}
+        ORDER BY apellido, nombre, id_empleado
         """
-        employees_data = self.execute_query(query)
-        # Gruppiere Gehaltsdaten pro Mitarbeiter
-        employees = {}
-        for row in employees_data:
-            emp_id = row['id_empleado']
-            if emp_id not in employees:
-                employees[emp_id] = {
+        if limit is not None:
+            # Eine Zeile mehr lesen, um zu erkennen, ob es eine Folgeseite gibt
+            employee_query += " LIMIT %s"
+            params.append(limit + 1)
+
+        try:
+            rows = self.execute_query(employee_query, tuple(params) or None)
+            next_cursor = None
+            if limit is not None and len(rows) > limit:
+                rows = rows[:limit]
+                next_cursor = self.encode_employee_cursor(rows[-1])
+
+            employees = {
+                row['id_empleado']: {
                     'id_empleado': row['id_empleado'],
                     'nombre': row['nombre'],
                     'apellido': row['apellido'],
@@ -782,18 +1616,111 @@ class DatabaseManager(DatabaseManagerExportsMixin):
                     'fecha_alta': row.get('fecha_alta'),
                     'salaries': []
                 }
-            # Füge Gehaltsdaten hinzu, wenn vorhanden
-            if row['anio'] is not None:
-                employees[emp_id]['salaries'].append({
-                    'anio': row['anio'],
-                    'salario_anual_bruto': row['salario_anual_bruto'],
-                    'salario_mensual_bruto': row['salario_mensual_bruto'],
-                    'modalidad': row['modalidad'],
-                    'atrasos': row['atrasos'],
-                    'antiguedad': row['antiguedad']
-                })
-        return list(employees.values())
+                for row in rows
+            }
+            if employees:
+                for row in self._page_salaries(list(employees) if limit is not None else None,
+                                               year_from, year_to, latest_years):
+                    employee = employees.get(row['id_empleado'])
+                    if employee is not None:
+                        employee['salaries'].append({
+                            'anio': row['anio'],
+                            'salario_anual_bruto': row['salario_anual_bruto'],
+                            'salario_mensual_bruto': row['salario_mensual_bruto'],
+                            'modalidad': row['modalidad'],
+                            'atrasos': row['atrasos'],
+                            'antiguedad': row['antiguedad']
+                        })
+            return {"items": list(employees.values()), "next_cursor": next_cursor}
+        except Exception as e:
+            self.logger.error(f"Fehler beim Laden der Mitarbeiter mit Gehaltsdaten: {e}")
+            return {"items": [], "next_cursor": None, "error": str(e)}
+
+    def _page_salaries(self, employee_ids: Optional[List[int]], year_from: Optional[int],
+                       year_to: Optional[int], latest_years: Optional[int]) -> List[Dict]:
+        """Gehaltszeilen (neuestes Jahr zuerst) für die Mitarbeiter einer Seite; None = alle."""
+        conditions: List[str] = []
+        params: List[Any] = []
+        if employee_ids is not None:
+            conditions.append(f"id_empleado IN ({', '.join(['%s'] * len(employee_ids))})")
+            params.extend(employee_ids)
+        if year_from is not None:
+            conditions.append("anio >= %s")
+            params.append(int(year_from))
+        if year_to is not None:
+            conditions.append("anio <= %s")
+            params.append(int(year_to))
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        columns = "id_empleado, anio, salario_anual_bruto, salario_mensual_bruto, modalidad, atrasos, antiguedad"
+        if latest_years:
+            query = f"""
+            SELECT {columns}
+            FROM (
+                SELECT {columns},
+                       ROW_NUMBER() OVER (PARTITION BY id_empleado ORDER BY anio DESC) AS rn
+                FROM t002_salarios
+                {where}
+            ) s
+            WHERE rn <= %s
+            ORDER BY id_empleado, anio DESC
+            """
+            params.append(int(latest_years))
+        else:
+            query = f"""
+            SELECT {columns}
+            FROM t002_salarios
+            {where}
+            ORDER BY id_empleado, anio DESC
+            """
+        return self.execute_query(query, tuple(params) or None)
+
+    def _resource_version_rows(self, resource: str, employee_id: Optional[int] = None,
+                               primary: bool = False) -> List[Dict]:
+        """Versionszähler (t013, Migration 13) und letzte fecha_modificacion je Quelltabelle einer Ressource.
+
+        Ohne employee_id ist version die Summe über alle Mitarbeiter; sie steigt mit jedem
+        Schreibzugriff, da t013-Zeilen nie gelöscht werden.
+        """
+        where = " WHERE id_empleado = %s" if employee_id is not None else ""
+        version_where = " AND v.id_empleado = %s" if employee_id is not None else ""
+        tables = RESOURCE_VERSION_TABLES[resource]
+        query = " UNION ALL ".join(
+            f"SELECT '{table}' AS tabla, "
+            f"(SELECT COALESCE(SUM(v.version), 0) FROM {RESOURCE_VERSION_TABLE} v "
+            f"WHERE v.tabla = '{table}'{version_where}) AS version, "
+            f"UNIX_TIMESTAMP(MAX(fecha_modificacion)) AS modificado FROM {table}{where}"
+            for table in tables
+        )
+        params = (employee_id,) * (2 * len(tables)) if employee_id is not None else None
+        return self.execute_query(query, params, primary=primary)
+
+    def get_resource_version(self, resource: str, employee_id: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Versionskennung einer API-Ressource für bedingte GETs (ETag / Last-Modified).
+
+        Das ETag stammt nur aus den per Trigger gepflegten Versionszählern der
+        Quelltabellen (t013_versiones_empleado): jede eingefügte, geänderte oder gelöschte
+        Zeile ändert es, auch mehrere Änderungen innerhalb derselben Sekunde, und es ist
+        über Prozesse und Neustarts hinweg gleich. fecha_modificacion liefert nur
+        Last-Modified. Nicht gecacht: ein veralteter Wert würde 304 für geänderte Daten liefern.
+
+        Returns:
+            {"etag": str, "last_modified": datetime | None} oder None bei Fehlern
+        """
+        try:
+            rows = self._resource_version_rows(resource, employee_id)
+            if not rows:
+                return None
+            fingerprint = repr((resource, employee_id, [(r['tabla'], int(r['version'])) for r in rows]))
+            modified = [int(r['modificado']) for r in rows if r.get('modificado') is not None]
+            return {
+                "etag": hashlib.sha256(fingerprint.encode("utf-8")).hexdigest()[:32],
+                "last_modified": datetime.fromtimestamp(max(modified), timezone.utc) if modified else None,
+            }
+        except Exception as e:
+            self.logger.error(f"Fehler beim Ermitteln der Version von {resource}: {e}")
+            return None
 
+    @cached_read("t001_empleados")
     def get_employee(self, employee_id: int) -> Optional[Dict]:
         """Hole einen Mitarbeiter anhand seiner ID"""
         try:
@@ -808,17 +1735,19 @@ class DatabaseManager(DatabaseManagerExportsMixin):
             self.logger.error(f"Fehler beim Abrufen des Mitarbeiters {employee_id}: {e}")
             return None
 
+    @cached_read("t001_empleados", "t002_salarios", "t003_ingresos_brutos_mensuales",
+                 "t004_deducciones_mensuales", "t008_empleado_fte")
     def get_employee_complete_info(self, employee_id: int) -> Dict:
+        params = (employee_id,)
+        # Monatsdaten archivierter Jahre werden mitgelesen
+        ingresos_source, ingresos_params = self._archived_source("t003_ingresos_brutos_mensuales", "id_empleado = %s", params)
+        deducciones_source, deducciones_params = self._archived_source("t004_deducciones_mensuales", "id_empleado = %s", params)
         # Mitarbeiterstammdaten
         employee_query = """
         SELECT id_empleado, nombre, apellido, ceco, categoria, activo, fecha_alta, declaracion, dni
         FROM t001_empleados 
         WHERE id_empleado = %s
         """
-        employees = self.execute_query(employee_query, (employee_id,))
-        if not employees:
-            return {}
-        employee = employees[0]
         # Gehaltsdaten
         salary_query = """
         SELECT anio, modalidad, antiguedad, salario_anual_bruto, salario_mensual_bruto, atrasos, salario_mensual_con_atrasos, fecha_modificacion
@@ -826,9 +1755,8 @@ class DatabaseManager(DatabaseManagerExportsMixin):
         WHERE id_empleado = %s 
         ORDER BY anio DESC
         """
-        salaries = self.execute_query(salary_query, (employee_id,))
         # Bruttoeinkünfte (jahresabhängig) - Aggregiere aus monatlichen Daten
-        ingresos_query = """
+        ingresos_query = f"""
         SELECT 
             anio,
             ROUND(AVG(ticket_restaurant), 2) as ticket_restaurant,
@@ -843,14 +1771,13 @@ class DatabaseManager(DatabaseManagerExportsMixin):
             ROUND(AVG(formacion), 2) as formacion,
             ROUND(AVG(tickets), 2) as tickets,
             MAX(fecha_modificacion) as fecha_modificacion
-        FROM t003_ingresos_brutos_mensuales 
+        FROM {ingresos_source} t 
         WHERE id_empleado = %s
         GROUP BY anio
         ORDER BY anio DESC
         """
-        ingresos_results = self.execute_query(ingresos_query, (employee_id,))
         # Abzüge (jahresabhängig) - Aggregiere aus monatlichen Daten
-        deducciones_query = """
+        deducciones_query = f"""
         SELECT 
             anio,
             ROUND(AVG(seguro_accidentes), 2) as seguro_accidentes,
@@ -861,46 +1788,156 @@ class DatabaseManager(DatabaseManagerExportsMixin):
             ROUND(AVG(seguro_medico), 2) as seguro_medico,
             ROUND(AVG(cotizacion_especie), 2) as cotizacion_especie,
             MAX(fecha_modificacion) as fecha_modificacion
-        FROM t004_deducciones_mensuales 
+        FROM {deducciones_source} t 
         WHERE id_empleado = %s
         GROUP BY anio
         ORDER BY anio DESC
         """
-        deducciones_results = self.execute_query(deducciones_query, (employee_id,))
         # Monatliche Bruttoeinkünfte
-        ingresos_mensuales_query = """
+        ingresos_mensuales_query = f"""
         SELECT anio, mes, ticket_restaurant, primas, 
                dietas_cotizables, horas_extras, dias_exentos, 
                dietas_exentas, seguro_pensiones, lavado_coche, beca_escolar, formacion, tickets, fecha_modificacion
-        FROM t003_ingresos_brutos_mensuales 
+        FROM {ingresos_source} t 
         WHERE id_empleado = %s
         ORDER BY anio DESC, mes ASC
         """
-        ingresos_mensuales_results = self.execute_query(ingresos_mensuales_query, (employee_id,))
         # Monatliche Abzüge
-        deducciones_mensuales_query = """
+        deducciones_mensuales_query = f"""
         SELECT anio, mes, seguro_accidentes, adelas, sanitas, 
                gasolina, ret_especie, seguro_medico, cotizacion_especie, fecha_modificacion
-        FROM t004_deducciones_mensuales 
+        FROM {deducciones_source} t 
         WHERE id_empleado = %s
         ORDER BY anio DESC, mes ASC
         """
-        deducciones_mensuales_results = self.execute_query(deducciones_mensuales_query, (employee_id,))
         fte_query = """
         SELECT anio, mes, porcentaje, fecha_modificacion
         FROM t008_empleado_fte
         WHERE id_empleado = %s
         ORDER BY anio DESC, mes DESC
         """
-        fte_results = self.execute_query(fte_query, (employee_id,))
+        # Alle Abfragen sind unabhängig voneinander und laufen parallel auf dem Pool
+        results = self.execute_queries_concurrently({
+            'employee': (employee_query, params),
+            'salaries': (salary_query, params),
+            'ingresos': (ingresos_query, ingresos_params + params),
+            'deducciones': (deducciones_query, deducciones_params + params),
+            'ingresos_mensuales': (ingresos_mensuales_query, ingresos_params + params),
+            'deducciones_mensuales': (deducciones_mensuales_query, deducciones_params + params),
+            'fte': (fte_query, params),
+        })
+        employees = results['employee']
+        if not employees:
+            return {}
+        return {
+            'employee': employees[0],
+            'salaries': results['salaries'],
+            'ingresos': results['ingresos'],
+            'deducciones': results['deducciones'],
+            'ingresos_mensuales': results['ingresos_mensuales'],
+            'deducciones_mensuales': results['deducciones_mensuales'],
+            'fte': results['fte'],
+        }
+
+    def get_employees_complete_info_batch(
+        self,
+        employee_ids: List[int],
+        include: Optional[List[str]] = None,
+        year: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """Detaildaten mehrerer Mitarbeiter mit einer IN-Abfrage pro Abschnitt.
+
+        include: Teilmenge von EMPLOYEE_BATCH_SECTIONS (Standard: alle); year beschränkt
+        die Abschnitte auf ein Jahr (carry_over: Anwendungsjahr). Die Zeilen haben dieselbe
+        Form wie in get_employee_complete_info.
+
+        Rückgabe: {"employees": [...] in Reihenfolge der IDs, "missing": [IDs ohne Stammdaten]}.
+        ValueError bei unbekannten Abschnitten oder mehr als EMPLOYEE_BATCH_MAX_IDS IDs.
+        """
+        ids = list(dict.fromkeys(int(emp_id) for emp_id in employee_ids))
+        if len(ids) > EMPLOYEE_BATCH_MAX_IDS:
+            raise ValueError(f"Höchstens {EMPLOYEE_BATCH_MAX_IDS} Mitarbeiter pro Abfrage")
+        sections = list(EMPLOYEE_BATCH_SECTIONS) if include is None else list(dict.fromkeys(include))
+        unknown = [section for section in sections if section not in EMPLOYEE_BATCH_SECTIONS]
+        if unknown:
+            raise ValueError(f"Unbekannte Abschnitte: {', '.join(map(str, unknown))}")
+        if not ids:
+            return {"employees": [], "missing": []}
+
+        in_list = f"id_empleado IN ({', '.join(['%s'] * len(ids))})"
+        id_params = tuple(ids)
+        year_filter = " AND anio = %s" if year is not None else ""
+        year_params = (int(year),) if year is not None else ()
+        where = in_list + year_filter
+        where_params = id_params + year_params
+
+        queries: Dict[str, Tuple[str, tuple]] = {
+            'employee': (f"""
+            SELECT id_empleado, nombre, apellido, ceco, categoria, activo, fecha_alta, declaracion, dni
+            FROM t001_empleados
+            WHERE {in_list}
+            """, id_params),
+        }
+        if 'salaries' in sections:
+            queries['salaries'] = (f"""
+            SELECT id_empleado, anio, modalidad, antiguedad, salario_anual_bruto, salario_mensual_bruto,
+                   atrasos, salario_mensual_con_atrasos, fecha_modificacion
+            FROM t002_salarios
+            WHERE {where}
+            ORDER BY id_empleado, anio DESC
+            """, where_params)
+        if 'ingresos_mensuales' in sections:
+            source, source_params = self._archived_source("t003_ingresos_brutos_mensuales", where, where_params)
+            queries['ingresos_mensuales'] = (f"""
+            SELECT id_empleado, anio, mes, ticket_restaurant, primas,
+                   dietas_cotizables, horas_extras, dias_exentos,
+                   dietas_exentas, seguro_pensiones, lavado_coche, beca_escolar, formacion, tickets, fecha_modificacion
+            FROM {source} t
+            WHERE {where}
+            ORDER BY id_empleado, anio DESC, mes ASC
+            """, source_params + where_params)
+        if 'deducciones_mensuales' in sections:
+            source, source_params = self._archived_source("t004_deducciones_mensuales", where, where_params)
+            queries['deducciones_mensuales'] = (f"""
+            SELECT id_empleado, anio, mes, seguro_accidentes, adelas, sanitas,
+                   gasolina, ret_especie, seguro_medico, cotizacion_especie, fecha_modificacion
+            FROM {source} t
+            WHERE {where}
+            ORDER BY id_empleado, anio DESC, mes ASC
+            """, source_params + where_params)
+        if 'fte' in sections:
+            queries['fte'] = (f"""
+            SELECT id_empleado, anio, mes, porcentaje, fecha_modificacion
+            FROM t008_empleado_fte
+            WHERE {where}
+            ORDER BY id_empleado, anio DESC, mes DESC
+            """, where_params)
+        if 'carry_over' in sections:
+            carry_filter = " AND apply_anio = %s" if year is not None else ""
+            queries['carry_over'] = (f"""
+            SELECT id_carry_over, id_empleado, source_anio, source_mes, apply_anio, apply_mes,
+                   concept, amount, created_at, updated_at
+            FROM t010_carry_over
+            WHERE {in_list}{carry_filter}
+            ORDER BY id_empleado, apply_anio DESC, apply_mes DESC, id_carry_over DESC
+            """, id_params + year_params)
+
+        results = self.execute_queries_concurrently(queries)
+        details: Dict[int, Dict[str, Any]] = {
+            row['id_empleado']: {'employee': row, **{section: [] for section in sections}}
+            for row in results['employee']
+        }
+        # Ein Durchlauf pro Abschnitt; id_empleado entfällt wie in der Einzelabfrage
+        for section in sections:
+            for row in results[section]:
+                entry = details.get(row['id_empleado'])
+                if entry is not None:
+                    if section != 'carry_over':
+                        row = {key: value for key, value in row.items() if key != 'id_empleado'}
+                    entry[section].append(row)
         return {
-            'employee': employee,
-            'salaries': salaries,
-            'ingresos': ingresos_results,
-            'deducciones': deducciones_results,
-            'ingresos_mensuales': ingresos_mensuales_results,
-            'deducciones_mensuales': deducciones_mensuales_results,
-            'fte': fte_results,
+            "employees": [details[emp_id] for emp_id in ids if emp_id in details],
+            "missing": [emp_id for emp_id in ids if emp_id not in details],
         }
 
     def get_employee_fte(self, employee_id: int) -> List[Dict[str, Any]]:
@@ -916,6 +1953,53 @@ class DatabaseManager(DatabaseManagerExportsMixin):
             self.logger.error(f"Fehler beim Abrufen FTE für Mitarbeiter {employee_id}: {e}")
             return []
 
+    @staticmethod
+    def _fte_month_key(year: int, month: int) -> int:
+        """Monatsindex für t011_empleado_fte_efectivo (desde/hasta)."""
+        return int(year) * 12 + int(month) - 1
+
+    def _rebuild_effective_fte(self, cursor, employee_id: int) -> None:
+        """Baut die FTE-Intervalle (t011) eines Mitarbeiters aus t008 neu auf (im Transaktionsblock des Aufrufers)."""
+        cursor.execute("DELETE FROM t011_empleado_fte_efectivo WHERE id_empleado = %s", (employee_id,))
+        cursor.execute(
+            f"""
+            INSERT INTO t011_empleado_fte_efectivo (id_empleado, desde, hasta, porcentaje)
+            SELECT
+                id_empleado,
+                anio * 12 + mes - 1,
+                COALESCE(LEAD(anio * 12 + mes - 1) OVER (ORDER BY anio, mes), {FTE_OPEN_END}),
+                porcentaje
+            FROM t008_empleado_fte
+            WHERE id_empleado = %s
+            """,
+            (employee_id,),
+        )
+
+    def get_effective_fte_for_month(self, year: int, month: int, employee_ids: Optional[List[int]] = None) -> Dict[int, float]:
+        """Effektiver FTE (in %) je Mitarbeiter für einen Monat; Mitarbeiter ohne Eintrag fehlen (= 100)."""
+        try:
+            key = self._fte_month_key(year, month)
+            query = """
+            SELECT id_empleado, porcentaje
+            FROM t011_empleado_fte_efectivo
+            WHERE desde <= %s AND hasta > %s
+            """
+            params: tuple = (key, key)
+            if employee_ids is not None:
+                employee_ids = [int(x) for x in employee_ids]
+                if not employee_ids:
+                    return {}
+                query += f" AND id_empleado IN ({', '.join(['%s'] * len(employee_ids))})"
+                params += tuple(employee_ids)
+            return {
+                int(r['id_empleado']): float(r['porcentaje'])
+                for r in self.execute_query(query, params)
+                if r.get('porcentaje') is not None
+            }
+        except Exception as e:
+            self.logger.error(f"Fehler beim Lesen effective FTE für {year}/{month}: {e}")
+            return {}
+
     def upsert_employee_fte(self, employee_id: int, year: int, month: int, porcentaje: float) -> bool:
         try:
             year = int(year)
@@ -933,7 +2017,14 @@ class DatabaseManager(DatabaseManagerExportsMixin):
             ON DUPLICATE KEY UPDATE
                 porcentaje = VALUES(porcentaje)
             """
-            return self.execute_update(query, (employee_id, year, month, porcentaje))
+            with self._transaction(("t008_empleado_fte", "t011_empleado_fte_efectivo")) as connection:
+                cursor = connection.cursor()
+                try:
+                    cursor.execute(query, (employee_id, year, month, porcentaje))
+                    self._rebuild_effective_fte(cursor, employee_id)
+                finally:
+                    cursor.close()
+            return True
         except Exception as e:
             self.logger.error(f"Fehler beim Upsert FTE für Mitarbeiter {employee_id}: {e}")
             return False
@@ -946,7 +2037,14 @@ class DatabaseManager(DatabaseManagerExportsMixin):
             DELETE FROM t008_empleado_fte
             WHERE id_empleado = %s AND anio = %s AND mes = %s
             """
-            return self.execute_update(query, (employee_id, year, month))
+            with self._transaction(("t008_empleado_fte", "t011_empleado_fte_efectivo")) as connection:
+                cursor = connection.cursor()
+                try:
+                    cursor.execute(query, (employee_id, year, month))
+                    self._rebuild_effective_fte(cursor, employee_id)
+                finally:
+                    cursor.close()
+            return True
         except Exception as e:
             self.logger.error(f"Fehler beim Löschen FTE für Mitarbeiter {employee_id}: {e}")
             return False
@@ -955,18 +2053,7 @@ class DatabaseManager(DatabaseManagerExportsMixin):
         try:
             year = int(year)
             month = int(month)
-            query = """
-            SELECT porcentaje
-            FROM t008_empleado_fte
-            WHERE id_empleado = %s
-              AND (anio < %s OR (anio = %s AND mes <= %s))
-            ORDER BY anio DESC, mes DESC
-            LIMIT 1
-            """
-            rows = self.execute_query(query, (employee_id, year, year, month))
-            if rows and rows[0].get('porcentaje') is not None:
-                return float(rows[0]['porcentaje'])
-            return 100.0
+            return self.get_effective_fte_for_month(year, month, [employee_id]).get(int(employee_id), 100.0)
         except Exception as e:
             self.logger.error(f"Fehler beim Lesen effective FTE für Mitarbeiter {employee_id}: {e}")
             return 100.0
@@ -1076,7 +2163,15 @@ class DatabaseManager(DatabaseManagerExportsMixin):
                 self._update_subsequent_years_atrasos(employee_id, year)
             return result
 
-    def search_employees(self, search_term: str) -> List[Dict]:
+    def search_employees(self, search_term: str, limit: int = SEARCH_RESULT_LIMIT) -> List[Dict]:
+        """Mitarbeitersuche über nombre, apellido, ceco, dni und exakte ID, gerankt und begrenzt.
+
+        Läuft über den Trigramm-Index (database_search); nach Schreibzugriffen in der
+        laufenden Unit of Work oder wenn der Index nicht aufgebaut werden kann, per LIKE
+        direkt in der Datenbank.
+        """
+        if not self.has_uncommitted_writes() and self._ensure_search_index():
+            return self.search_index.search(search_term, limit)
         query = """
         SELECT id_empleado, nombre, apellido, ceco, activo 
         FROM t001_empleados 
@@ -1084,10 +2179,42 @@ class DatabaseManager(DatabaseManagerExportsMixin):
            OR LOWER(nombre) LIKE LOWER(%s) 
            OR LOWER(apellido) LIKE LOWER(%s) 
            OR LOWER(ceco) LIKE LOWER(%s)
-        ORDER BY apellido, nombre
+           OR LOWER(dni) LIKE LOWER(%s)
+        ORDER BY activo DESC, apellido, nombre
+        LIMIT %s
         """
         search_pattern = f"%{search_term}%"
-        return self.execute_query(query, (search_term, search_pattern, search_pattern, search_pattern))
+        return self.execute_query(
+            query, (search_term, search_pattern, search_pattern, search_pattern, search_pattern, int(limit))
+        )
+
+    def _ensure_search_index(self) -> bool:
+        """Baut den Suchindex neu, wenn sich t001 seit dem letzten Aufbau geändert hat.
+
+        Eigene Schreibzugriffe erhöhen die Tabellen-Generation und wirken sofort. Den
+        Versionszähler von t001 (t013, erfasst auch andere Prozesse) fragt die Suche nur alle
+        SEARCH_VERSION_CHECK_SECONDS auf dem Primary ab, nicht bei jedem Tastendruck.
+        Aufgebaut wird ebenfalls auf dem Primary, nie auf einer nachlaufenden Replica.
+        """
+        checked_at, db_version = self._search_version_check
+        if time.monotonic() - checked_at >= SEARCH_VERSION_CHECK_SECONDS:
+            state = self._resource_version_rows("employees", primary=True)
+            if not state:
+                return False
+            db_version = state[0].get("version")
+            self._search_version_check = (time.monotonic(), db_version)
+        version = (db_version, self.read_cache.generations(("t001_empleados",)))
+        if self.search_index.is_current(version):
+            return True
+        rows = self.execute_query("SELECT id_empleado, nombre, apellido, ceco, activo, dni FROM t001_empleados",
+                                  primary=True)
+        if not rows:
+            # Fehler oder leere Tabelle: nicht als gültigen Stand merken
+            return False
+        started = time.perf_counter()
+        count = self.search_index.build(rows, version)
+        self.logger.debug(f"Suchindex mit {count} Mitarbeitern in {(time.perf_counter() - started) * 1000:.1f} ms aufgebaut")
+        return True
 
     def add_employee(self, employee_data: Dict[str, Any]) -> int:
         try:
@@ -1133,40 +2260,39 @@ class DatabaseManager(DatabaseManagerExportsMixin):
     def _create_monthly_default_records(self, employee_id: int, year: int):
         """Erstellt Standard-Monatsdatensätze für einen Mitarbeiter"""
         try:
-            # Monatliche Bruttoeinkünfte für alle 12 Monate erstellen
-            for month in range(1, 13):
-                ingresos_monthly_query = """
-                INSERT INTO t003_ingresos_brutos_mensuales (id_empleado, anio, mes, ticket_restaurant, 
-                                                           primas, dietas_cotizables, horas_extras, dias_exentos, 
-                                                           dietas_exentas, seguro_pensiones, lavado_coche, formacion, tickets) 
-                VALUES (%s, %s, %s, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0)
-                ON DUPLICATE KEY UPDATE
-                    ticket_restaurant = VALUES(ticket_restaurant),
-                    primas = VALUES(primas),
-                    dietas_cotizables = VALUES(dietas_cotizables),
-                    horas_extras = VALUES(horas_extras),
-                    dias_exentos = VALUES(dias_exentos),
-                    dietas_exentas = VALUES(dietas_exentas),
-                    seguro_pensiones = VALUES(seguro_pensiones),
-                    lavado_coche = VALUES(lavado_coche),
-                    formacion = VALUES(formacion),
-                    tickets = VALUES(tickets)
-                """
-                self.execute_update(ingresos_monthly_query, (employee_id, year, month))
-            # Monatliche Abzüge für alle 12 Monate erstellen
-            for month in range(1, 13):
-                deducciones_monthly_query = """
-                INSERT INTO t004_deducciones_mensuales (id_empleado, anio, mes, seguro_accidentes, 
-                                                        adelas, sanitas, gasolina, cotizacion_especie) 
-                VALUES (%s, %s, %s, 0, 0, 0, 0, 0)
-                ON DUPLICATE KEY UPDATE
-                    seguro_accidentes = VALUES(seguro_accidentes),
-                    adelas = VALUES(adelas),
-                    sanitas = VALUES(sanitas),
-                    gasolina = VALUES(gasolina),
-                    cotizacion_especie = VALUES(cotizacion_especie)
-                """
-                self.execute_update(deducciones_monthly_query, (employee_id, year, month))
+            months = [(employee_id, year, month) for month in range(1, 13)]
+            ingresos_monthly_query = """
+            INSERT INTO t003_ingresos_brutos_mensuales (id_empleado, anio, mes, ticket_restaurant, 
+                                                       primas, dietas_cotizables, horas_extras, dias_exentos, 
+                                                       dietas_exentas, seguro_pensiones, lavado_coche, formacion, tickets) 
+            VALUES (%s, %s, %s, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0)
+            ON DUPLICATE KEY UPDATE
+                ticket_restaurant = VALUES(ticket_restaurant),
+                primas = VALUES(primas),
+                dietas_cotizables = VALUES(dietas_cotizables),
+                horas_extras = VALUES(horas_extras),
+                dias_exentos = VALUES(dias_exentos),
+                dietas_exentas = VALUES(dietas_exentas),
+                seguro_pensiones = VALUES(seguro_pensiones),
+                lavado_coche = VALUES(lavado_coche),
+                formacion = VALUES(formacion),
+                tickets = VALUES(tickets)
+            """
+            deducciones_monthly_query = """
+            INSERT INTO t004_deducciones_mensuales (id_empleado, anio, mes, seguro_accidentes, 
+                                                    adelas, sanitas, gasolina, cotizacion_especie) 
+            VALUES (%s, %s, %s, 0, 0, 0, 0, 0)
+            ON DUPLICATE KEY UPDATE
+                seguro_accidentes = VALUES(seguro_accidentes),
+                adelas = VALUES(adelas),
+                sanitas = VALUES(sanitas),
+                gasolina = VALUES(gasolina),
+                cotizacion_especie = VALUES(cotizacion_especie)
+            """
+            # Alle 12 Monate je Tabelle als ein mehrzeiliges INSERT, beide auf einer Verbindung
+            with self.unit_of_work():
+                self.execute_batch(ingresos_monthly_query, months)
+                self.execute_batch(deducciones_monthly_query, months)
         except Exception as e:
             self.logger.error(f"Fehler beim Erstellen der monatlichen Standarddatensätze: {e}")
     def add_salary(self, employee_id: int, salary_data: Dict[str, Any]) -> bool:
@@ -1222,6 +2348,7 @@ class DatabaseManager(DatabaseManagerExportsMixin):
         except Exception as e:
             self.logger.error(f"Fehler beim Hinzufügen des Gehalts: {e}")
             return False
+    @cached_read("t002_salarios")
     def get_salary(self, employee_id: int, year: int) -> Dict[str, Any] | None:
         """Holt Gehaltsdaten für einen Mitarbeiter und Jahr"""
         try:
@@ -1362,27 +2489,35 @@ class DatabaseManager(DatabaseManagerExportsMixin):
         except Exception as e:
             self.logger.error(f"Fehler bei prozentualer Gehaltserhöhung für Mitarbeiter {employee_id}: {e}")
             return {"success": False, "message": f"Datenbankfehler: {str(e)}"}
-    def apply_percentage_salary_increase(self, target_year: int, percentage_increase: float = None, absolute_increase: float = None, excluded_employee_ids: List[int] = None) -> Dict[str, Any]:
+    def apply_percentage_salary_increase(self, target_year: int, percentage_increase: float = None, absolute_increase: float = None, excluded_employee_ids: List[int] = None, preview: bool = False) -> Dict[str, Any]:
         """
         Wendet eine Gehaltserhöhung auf alle aktiven Mitarbeiter an.
         Die Erhöhung wird erst im April des target_year wirksam.
+
+        Die Gehaltshistorie aller betroffenen Mitarbeiter wird mit einer Abfrage geladen,
+        Basisgehalt, neues Gehalt und atrasos werden vektorisiert berechnet
+        (_plan_salary_increase) und in einer Transaktion geschrieben.
         Args:
             target_year: Jahr in dem die Erhöhung wirksam wird
             percentage_increase: Prozentsatz der Erhöhung (z.B. 10.0 für 10%)
             absolute_increase: Absoluter Betrag der Erhöhung (z.B. 1000.0 für 1000€)
             excluded_employee_ids: Liste von Mitarbeiter-IDs, die von der Erhöhung ausgeschlossen werden sollen
+            preview: Nur berechnen, nichts schreiben
         Returns:
-            Dict mit Ergebnissen der Operation
+            Dict mit Ergebnissen der Operation (employees: Tabelle pro Mitarbeiter,
+            total_cost: Summe der jährlichen Mehrkosten, total_atrasos)
         """
         try:
             if excluded_employee_ids is None:
                 excluded_employee_ids = []
             if percentage_increase is None and absolute_increase is None:
                 return {"success": False, "message": "Se debe especificar percentage_increase o absolute_increase"}
-            # Hole alle aktiven Mitarbeiter
+            # Alle aktiven Mitarbeiter mit ihrer kompletten Gehaltshistorie
             query = """
-            SELECT e.id_empleado, e.nombre, e.apellido 
+            SELECT e.id_empleado, e.nombre, e.apellido,
+                   s.anio, s.salario_anual_bruto, s.modalidad
             FROM t001_empleados e
+            LEFT JOIN t002_salarios s ON s.id_empleado = e.id_empleado
             WHERE e.activo = TRUE
             """
             if excluded_employee_ids:
@@ -1392,129 +2527,158 @@ class DatabaseManager(DatabaseManagerExportsMixin):
                 params = tuple(excluded_employee_ids)
             else:
                 params = ()
-            employees = self.execute_query(query, params)
-            if not employees:
+            rows = self.execute_query(query, params)
+            if not rows:
                 return {"success": False, "message": "No se encontraron empleados"}
-            updated_employees = []
-            errors = []
-            for employee in employees:
-                try:
-                    employee_id = employee['id_empleado']
-                    # Für jeden Mitarbeiter prüfen ob bereits ein Gehalt für target_year existiert
-                    existing_salary_query = """
-                    SELECT salario_anual_bruto, modalidad
-                    FROM t002_salarios 
-                    WHERE id_empleado = %s AND anio = %s
-                    """
-                    existing_salary = self.execute_query(existing_salary_query, (employee_id, target_year))
-                    if existing_salary and existing_salary[0]['salario_anual_bruto'] is not None and float(existing_salary[0]['salario_anual_bruto']) > 0:
-                        # Gehalt für target_year existiert und ist > 0 - dieses als Grundlage nehmen
-                        current_salary = float(existing_salary[0]['salario_anual_bruto'])
-                        modalidad = int(existing_salary[0]['modalidad'])
-                        base_year = target_year
-                    else:
-                        # Kein gültiges Gehalt für target_year (NULL oder 0) - nehme Gehalt aus dem höchsten verfügbaren Jahr mit Gehalt > 0
-                        latest_salary_query = """
-                        SELECT COALESCE(s.salario_anual_bruto, 0) as salario_actual,
-                               COALESCE(s.modalidad, 12) as modalidad,
-                               COALESCE(s.anio, %s) as salary_year
-                        FROM t002_salarios s
-                        WHERE s.id_empleado = %s 
-                        ORDER BY s.anio DESC
-                        LIMIT 1
-                        """
-                        salary_data = self.execute_query(latest_salary_query, (target_year - 1, employee_id))
-                        if not salary_data:
-                            errors.append(f"Mitarbeiter {employee['nombre']} {employee['apellido']}: Kein Gehalt gefunden")
-                            continue
-                        current_salary = float(salary_data[0]['salario_actual'])
-                        modalidad = int(salary_data[0]['modalidad'])
-                        base_year = salary_data[0]['salary_year']
-                        # Wenn das gefundene Gehalt auch 0 ist, suche nach dem letzten Gehalt > 0
-                        if current_salary == 0:
-                            fallback_salary_query = """
-                            SELECT salario_anual_bruto, modalidad, anio
-                            FROM t002_salarios 
-                            WHERE id_empleado = %s AND salario_anual_bruto > 0
-                            ORDER BY anio DESC
-                            LIMIT 1
-                            """
-                            fallback_salary = self.execute_query(fallback_salary_query, (employee_id,))
-                            if fallback_salary:
-                                current_salary = float(fallback_salary[0]['salario_anual_bruto'])
-                                modalidad = int(fallback_salary[0]['modalidad'])
-                                base_year = fallback_salary[0]['anio']
-                    # Berechne neues Gehalt
-                    if percentage_increase is not None:
-                        # Prozentsuale Erhöhung
-                        new_salary = current_salary * (1 + percentage_increase / 100)
-                        increase_info = f"+{percentage_increase}%"
-                    else:
-                        # Absolute Betragserhöhung
-                        new_salary = current_salary + absolute_increase
-                        increase_info = f"+{absolute_increase}€"
-                    # Berechne atrasos korrekt für April-Wirksamkeit
-                    old_monthly = current_salary / modalidad
-                    new_monthly = new_salary / modalidad
-                    monthly_diff = new_monthly - old_monthly
-                    payout_month = self.get_payout_month()
-                    months_before_payout = max(0, payout_month - 1)
-                    atrasos = monthly_diff * months_before_payout
-                    # Füge oder aktualisiere Gehalt für target_year
-                    salary_data = {
-                        'anio': target_year,  # Jahr muss im salary_data enthalten sein
-                        'salario_anual_bruto': new_salary,
-                        'modalidad': modalidad,
-                        'antiguedad': 0
-                    }
-                    # Versuche zuerst zu aktualisieren, wenn nicht vorhanden dann hinzufügen
-                    result = self.update_salary(employee_id, target_year, salary_data)
-                    if not result:
-                        # Wenn kein Gehalt für dieses Jahr existiert, füge es hinzu
-                        result = self.add_salary(employee_id, salary_data)
-                    if result:
-                        # Manuelles Update der atrasos mit korrekter Berechnung
-                        update_atrasos_query = """
-                        UPDATE t002_salarios 
-                        SET atrasos = %s, 
-                            salario_mensual_con_atrasos = %s
-                        WHERE id_empleado = %s AND anio = %s
-                        """
-                        new_monthly_salary = new_salary / modalidad
-                        # Atrasos werden nur gespeichert, aber nicht zum regulären Monatsgehalt addiert
-                        # Sie werden nur einmalig im April gezahlt
-                        self.execute_update(update_atrasos_query, (
-                            atrasos,
-                            new_monthly_salary,  # Normales Monatsgehalt ohne atrasos
-                            employee_id,
-                            target_year
-                        ))
-                        updated_employees.append({
-                            'id': employee_id,
-                            'name': f"{employee['nombre']} {employee['apellido']}",
-                            'old_salary': current_salary,
-                            'new_salary': new_salary,
-                            'increase_percent': percentage_increase if percentage_increase is not None else None,
-                            'increase_absolute': absolute_increase if absolute_increase is not None else None,
-                            'increase_info': increase_info,
-                            'atrasos': atrasos,
-                            'base_year': base_year
-                        })
-                    else:
-                        errors.append(f"Fehler bei Aktualisierung von {employee['nombre']} {employee['apellido']}")
-                except Exception as e:
-                    errors.append(f"Mitarbeiter {employee['nombre']} {employee['apellido']}: {str(e)}")
+
+            months_before_payout = max(0, self.get_payout_month() - 1)
+            plan, errors = self._plan_salary_increase(
+                rows, target_year, percentage_increase, absolute_increase, months_before_payout
+            )
+            increase_info = f"+{percentage_increase}%" if percentage_increase is not None else f"+{absolute_increase}€"
+            employees = [
+                {
+                    'id': int(row.id_empleado),
+                    'name': f"{row.nombre} {row.apellido}",
+                    'old_salary': float(row.old_salary),
+                    'new_salary': float(row.new_salary),
+                    'increase_percent': percentage_increase if percentage_increase is not None else None,
+                    'increase_absolute': absolute_increase if absolute_increase is not None else None,
+                    'increase_info': increase_info,
+                    'atrasos': float(row.atrasos),
+                    'base_year': int(row.base_year),
+                    'modalidad': int(row.modalidad),
+                }
+                for row in plan.itertuples(index=False)
+            ]
+            totals = {
+                "total_cost": float((plan['new_salary'] - plan['old_salary']).sum()),
+                "total_atrasos": float(plan['atrasos'].sum()),
+            }
+            if preview:
+                return {
+                    "success": len(employees) > 0,
+                    "preview": True,
+                    "updated_count": 0,
+                    "employee_count": len(employees),
+                    "error_count": len(errors),
+                    "employees": employees,
+                    "errors": errors,
+                    **totals,
+                    "message": f"{len(employees)} Mitarbeiter würden aktualisiert"
+                }
+            if employees:
+                self._write_salary_increase(target_year, employees)
             return {
-                "success": len(updated_employees) > 0,
-                "updated_count": len(updated_employees),
+                "success": len(employees) > 0,
+                "updated_count": len(employees),
+                "employee_count": len(employees),
                 "error_count": len(errors),
-                "employees": updated_employees,
+                "employees": employees,
                 "errors": errors,
-                "message": f"{len(updated_employees)} Mitarbeiter erfolgreich aktualisiert"
+                **totals,
+                "message": f"{len(employees)} Mitarbeiter erfolgreich aktualisiert"
             }
         except Exception as e:
             self.logger.error(f"Fehler bei prozentualer Gehaltserhöhung: {e}")
             return {"success": False, "message": f"Datenbankfehler: {str(e)}"}
+
+    @staticmethod
+    def _plan_salary_increase(rows: List[Dict], target_year: int, percentage_increase: Optional[float],
+                              absolute_increase: Optional[float], months_before_payout: int):
+        """Berechnet Basisgehalt, neues Gehalt und atrasos für alle Mitarbeiter auf einmal.
+
+        Basis (wie bisher pro Mitarbeiter): Gehalt des target_year, wenn > 0; sonst das
+        neueste Jahr, und ist dieses 0, das neueste Jahr mit Gehalt > 0.
+        Returns:
+            (DataFrame mit id_empleado, nombre, apellido, base_year, modalidad, old_salary,
+            new_salary, atrasos – sortiert nach id_empleado; Fehlermeldungen)
+        """
+        df = pd.DataFrame(rows, columns=['id_empleado', 'nombre', 'apellido', 'anio', 'salario_anual_bruto', 'modalidad'])
+        df['salario_anual_bruto'] = pd.to_numeric(df['salario_anual_bruto'].astype(float), errors='coerce')
+        people = df.drop_duplicates('id_empleado').set_index('id_empleado')[['nombre', 'apellido']]
+        history = df[df['anio'].notna()].sort_values(['id_empleado', 'anio'], ascending=[True, False])
+        columns = ['anio', 'salario_anual_bruto', 'modalidad']
+
+        base = history.drop_duplicates('id_empleado').set_index('id_empleado')[columns]
+        positive = history[history['salario_anual_bruto'] > 0].drop_duplicates('id_empleado').set_index('id_empleado')[columns]
+        fallback = positive.reindex(base.index)
+        use_fallback = (base['salario_anual_bruto'].fillna(0) == 0) & fallback['salario_anual_bruto'].notna()
+        base.loc[use_fallback, columns] = fallback.loc[use_fallback, columns]
+        current = history[(history['anio'] == target_year) & (history['salario_anual_bruto'] > 0)]
+        current = current.drop_duplicates('id_empleado').set_index('id_empleado')[columns]
+        base.loc[current.index, columns] = current
+
+        errors = [
+            f"Mitarbeiter {people.at[emp_id, 'nombre']} {people.at[emp_id, 'apellido']}: Kein Gehalt gefunden"
+            for emp_id in people.index.difference(base.index)
+        ]
+        invalid = base['modalidad'].fillna(0) <= 0
+        errors.extend(
+            f"Mitarbeiter {people.at[emp_id, 'nombre']} {people.at[emp_id, 'apellido']}: Ungültige modalidad"
+            for emp_id in base.index[invalid]
+        )
+        base = base[~invalid]
+
+        old_salary = base['salario_anual_bruto'].fillna(0).astype(float)
+        modalidad = base['modalidad'].astype(int)
+        if percentage_increase is not None:
+            new_salary = old_salary * (1 + percentage_increase / 100)
+        else:
+            new_salary = old_salary + absolute_increase
+        # atrasos: Differenz der Monatsgehälter für die Monate vor dem Auszahlungsmonat
+        atrasos = (new_salary / modalidad - old_salary / modalidad) * months_before_payout
+
+        plan = pd.DataFrame({
+            'base_year': base['anio'].astype(int),
+            'modalidad': modalidad,
+            'old_salary': old_salary,
+            'new_salary': new_salary,
+            'atrasos': atrasos,
+        }).join(people).sort_index().reset_index()
+        return plan, errors
+
+    def _write_salary_increase(self, target_year: int, employees: List[Dict[str, Any]]) -> None:
+        """Schreibt die geplanten Gehälter des target_year in einer Transaktion (Upsert + Folgejahre)."""
+        upsert_query = """
+        INSERT INTO t002_salarios (id_empleado, anio, modalidad, antiguedad,
+                                   salario_anual_bruto, salario_mensual_bruto,
+                                   atrasos, salario_mensual_con_atrasos)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            modalidad = VALUES(modalidad),
+            antiguedad = VALUES(antiguedad),
+            salario_anual_bruto = VALUES(salario_anual_bruto),
+            salario_mensual_bruto = VALUES(salario_mensual_bruto),
+            atrasos = VALUES(atrasos),
+            salario_mensual_con_atrasos = VALUES(salario_mensual_con_atrasos)
+        """
+        # antiguedad = 0 wie bisher; atrasos werden nur einmalig gezahlt und nicht zum
+        # regulären Monatsgehalt addiert
+        rows = [
+            (
+                employee['id'],
+                target_year,
+                employee['modalidad'],
+                0,
+                employee['new_salary'],
+                employee['new_salary'] / employee['modalidad'],
+                employee['atrasos'],
+                employee['new_salary'] / employee['modalidad'],
+            )
+            for employee in employees
+        ]
+        with self._transaction(("t002_salarios",)) as connection:
+            cursor = connection.cursor(dictionary=True)
+            try:
+                self._executemany_chunked(cursor, upsert_query, rows, chunk_size=500)
+                self._update_subsequent_years_atrasos_bulk(cursor, [row[0] for row in rows], target_year)
+            finally:
+                try:
+                    cursor.close()
+                except Exception:
+                    pass
+
     def calculate_atrasos(self, employee_id: int, year: int, modalidad: int, current_salary: float) -> float:
         """
         Berechnet atrasos nach gleicher Logik wie die Datenbank-Trigger.
@@ -1559,70 +2723,15 @@ class DatabaseManager(DatabaseManagerExportsMixin):
     def _update_subsequent_years_atrasos(self, employee_id: int, base_year: int) -> None:
         """Aktualisiert atrasos für alle Folgejahre eines Mitarbeiters"""
         try:
-            # Finde alle Jahre größer als base_year für diesen Mitarbeiter
-            query = """
-            SELECT anio, modalidad, salario_anual_bruto 
-            FROM t002_salarios 
-            WHERE id_empleado = %s AND anio > %s 
-            ORDER BY anio ASC
-            """
-            subsequent_years = self.execute_query(query, (employee_id, base_year))
-            # Finde das Gehalt des base_year, um die ursprüngliche Gehaltserhöhung zu identifizieren
-            base_year_query = """
-            SELECT salario_anual_bruto 
-            FROM t002_salarios 
-            WHERE id_empleado = %s AND anio = %s
-            """
-            base_year_data = self.execute_query(base_year_query, (employee_id, base_year))
-            base_year_salary = base_year_data[0]['salario_anual_bruto'] if base_year_data else 0
-            for year_data in subsequent_years:
-                current_year = year_data['anio']
-                modalidad = year_data['modalidad']
-                current_salario = year_data['salario_anual_bruto']
-                # Finde das Gehalt des Vorjahres
-                prev_query = """
-                SELECT salario_anual_bruto 
-                FROM t002_salarios 
-                WHERE id_empleado = %s AND anio = %s
-                """
-                prev_year_data = self.execute_query(prev_query, (employee_id, current_year - 1))
-                if prev_year_data:
-                    prev_salario = prev_year_data[0]['salario_anual_bruto']
-                    # Berechne atrasos: Nur für das erste Jahr nach der Gehaltserhöhung, wenn sich das Gehalt wirklich geändert hat
-                    # Wenn das aktuelle Gehalt gleich dem Gehalt des base_year ist, gibt es keine neue Gehaltserhöhung
-                    # Wenn Vorjahresgehalt 0 ist, werden keine atrasos berechnet (wie kein Gehalt)
-                    if current_year == base_year + 1 and current_salario != prev_salario and float(prev_salario) > 0:
-                        # Erste Gehaltserhöhung - berechne atrasos für Januar-März
-                        if modalidad == 12:
-                            payout_month = self.get_payout_month()
-                            months_before_payout = max(0, payout_month - 1)
-                            new_atrasos = (current_salario - prev_salario) / 12 * months_before_payout
-                        elif modalidad == 14:
-                            payout_month = self.get_payout_month()
-                            months_before_payout = max(0, payout_month - 1)
-                            new_atrasos = (current_salario - prev_salario) / 14 * months_before_payout
-                        else:
-                            new_atrasos = 0
-                    else:
-                        # Folgejahre oder keine Gehaltsänderung - keine atrasos
-                        new_atrasos = 0
-                    # Berechne neues salario_mensual_bruto
-                    new_salario_mensual = current_salario / modalidad if modalidad in [12, 14] else current_salario / 12
-                    # Aktualisiere den Datensatz
-                    update_query = """
-                    UPDATE t002_salarios 
-                    SET atrasos = %s, 
-                        salario_mensual_con_atrasos = %s,
-                        salario_mensual_bruto = %s
-                    WHERE id_empleado = %s AND anio = %s
-                    """
-                    self.execute_update(update_query, (
-                        new_atrasos,
-                        new_salario_mensual,  # Normales Monatsgehalt ohne atrasos
-                        new_salario_mensual,
-                        employee_id,
-                        current_year
-                    ))
+            with self._transaction(("t002_salarios",)) as connection:
+                cursor = connection.cursor(dictionary=True)
+                try:
+                    self._update_subsequent_years_atrasos_bulk(cursor, [employee_id], base_year)
+                finally:
+                    try:
+                        cursor.close()
+                    except Exception:
+                        pass
         except Exception as e:
             self.logger.error(f"Fehler bei der Aktualisierung der Folgejahre: {e}")
     def update_ingresos(self, employee_id: int, year: int, data: Dict[str, Any]) -> bool:
@@ -1732,6 +2841,7 @@ class DatabaseManager(DatabaseManagerExportsMixin):
         except Exception as e:
             self.logger.error(f"Fehler beim Aktualisieren der Abzüge: {e}")
             return False
+    @cached_read("t001_empleados")
     def get_active_employee_ids(self) -> List[int]:
         try:
             query = "SELECT id_empleado FROM t001_empleados WHERE activo = TRUE ORDER BY id_empleado"
@@ -1742,6 +2852,7 @@ class DatabaseManager(DatabaseManagerExportsMixin):
         except Exception as e:
             self.logger.error(f"Fehler beim Laden aktiver Mitarbeiter-IDs: {e}")
             return []
+    @cached_read("t001_empleados")
     def get_active_employee_ids_filtered(self, categoria: Optional[str] = None) -> List[int]:
         try:
             category_norm = self._normalize_employee_category(categoria)
@@ -1885,54 +2996,43 @@ class DatabaseManager(DatabaseManagerExportsMixin):
         """Löscht einen Mitarbeiter und alle zugehörigen Daten"""
         last_error: Optional[Error] = None
         for attempt in range(2):
-            connection = None
-            cursor = None
             try:
-                connection = self._create_connection()
-                cursor = connection.cursor()
-                # Zuerst abhängige Daten löschen
-                delete_salaries = "DELETE FROM t002_salarios WHERE id_empleado = %s"
-                cursor.execute(delete_salaries, (employee_id,))
-                delete_ingresos_mensuales = "DELETE FROM t003_ingresos_brutos_mensuales WHERE id_empleado = %s"
-                cursor.execute(delete_ingresos_mensuales, (employee_id,))
-                delete_deducciones_mensuales = "DELETE FROM t004_deducciones_mensuales WHERE id_empleado = %s"
-                cursor.execute(delete_deducciones_mensuales, (employee_id,))
-                delete_employee_query = "DELETE FROM t001_empleados WHERE id_empleado = %s"
-                cursor.execute(delete_employee_query, (employee_id,))
-                connection.commit()
+                with self._transaction(("t001_empleados",)) as connection:
+                    cursor = connection.cursor()
+                    try:
+                        # Zuerst abhängige Daten löschen
+                        delete_salaries = "DELETE FROM t002_salarios WHERE id_empleado = %s"
+                        cursor.execute(delete_salaries, (employee_id,))
+                        delete_ingresos_mensuales = "DELETE FROM t003_ingresos_brutos_mensuales WHERE id_empleado = %s"
+                        cursor.execute(delete_ingresos_mensuales, (employee_id,))
+                        delete_deducciones_mensuales = "DELETE FROM t004_deducciones_mensuales WHERE id_empleado = %s"
+                        cursor.execute(delete_deducciones_mensuales, (employee_id,))
+                        if self._archive_enabled():
+                            # Partitionierte Tabellen haben keine Fremdschlüssel mehr (CASCADE / SET NULL);
+                            # ab Migration 11 übernehmen das zusätzlich Trigger, auch bei direktem SQL
+                            for table in ("t003_ingresos_brutos_mensuales", "t004_deducciones_mensuales"):
+                                cursor.execute(f"DELETE FROM {table}{ARCHIVE_SUFFIX} WHERE id_empleado = %s", (employee_id,))
+                            for table in ("t007_registro_procesamiento", "t007_registro_procesamiento" + ARCHIVE_SUFFIX):
+                                cursor.execute(f"UPDATE {table} SET id_empleado = NULL WHERE id_empleado = %s", (employee_id,))
+                        delete_employee_query = "DELETE FROM t001_empleados WHERE id_empleado = %s"
+                        cursor.execute(delete_employee_query, (employee_id,))
+                    finally:
+                        try:
+                            cursor.close()
+                        except Exception:
+                            pass
                 self.logger.info(f"Mitarbeiter {employee_id} und alle zugehörigen Daten wurden gelöscht")
                 return True
             except Error as e:
                 last_error = e
-                try:
-                    if connection is not None:
-                        connection.rollback()
-                except Exception:
-                    pass
-                if attempt == 0 and self._is_transient_connection_error(e):
+                if attempt == 0 and self._is_transient_connection_error(e) and not self.in_unit_of_work():
                     self.logger.warning(f"Datenbankverbindung verloren, Retry... ({e})")
                     continue
                 self.logger.error(f"Fehler beim Löschen des Mitarbeiters {employee_id}: {e}")
                 return False
             except Exception as e:
-                try:
-                    if connection is not None:
-                        connection.rollback()
-                except Exception:
-                    pass
                 self.logger.error(f"Fehler beim Löschen des Mitarbeiters {employee_id}: {e}")
                 return False
-            finally:
-                if cursor is not None:
-                    try:
-                        cursor.close()
-                    except Exception:
-                        pass
-                if connection is not None:
-                    try:
-                        connection.close()
-                    except Exception:
-                        pass
         if last_error is not None:
             self.logger.error(f"Fehler beim Löschen des Mitarbeiters {employee_id}: {last_error}")
         return False
@@ -1999,6 +3099,19 @@ class DatabaseManager(DatabaseManagerExportsMixin):
     ) -> bool:
         return DatabaseManagerExportsMixin.export_irpf_excel(self, year, month, output_path, extra=extra)
     
+    @cached_read("t005_usuarios")
+    def get_user_role(self, username: str) -> Optional[str]:
+        """Liefert die Rolle (rol) eines aktiven Benutzers"""
+        try:
+            query = "SELECT rol FROM t005_usuarios WHERE nombre_usuario = %s AND activo = TRUE"
+            users = self.execute_query(query, (username,))
+            if users:
+                return users[0].get('rol')
+            return None
+        except Exception as e:
+            self.logger.error(f"Fehler beim Holen der Benutzerrolle: {e}")
+            return None
+
     def get_user_email(self, username: str) -> Optional[str]:
         """Holt die Email-Adresse eines Benutzers (angenommen als nombre_usuario)"""
         try:
@@ -2243,17 +3356,23 @@ class DatabaseManager(DatabaseManagerExportsMixin):
         }
         
         try:
-            # Alle folgenden Monate bis zum Jahresende aktualisieren
-            for month in range(start_month + 1, 13):
-                update_query = """
-                INSERT INTO t004_deducciones_mensuales (id_empleado, anio, mes, cotizacion_especie)
-                VALUES (%s, %s, %s, %s)
-                ON DUPLICATE KEY UPDATE 
-                    cotizacion_especie = VALUES(cotizacion_especie),
-                    fecha_modificacion = CURRENT_TIMESTAMP
-                """
-                self.execute_update(update_query, (employee_id, year, month, cotizacion_especie_value))
-                result["months_updated"].append(month)
+            # Alle folgenden Monate bis zum Jahresende in einem Batch aktualisieren
+            months = list(range(start_month + 1, 13))
+            update_query = """
+            INSERT INTO t004_deducciones_mensuales (id_empleado, anio, mes, cotizacion_especie)
+            VALUES (%s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE 
+                cotizacion_especie = VALUES(cotizacion_especie),
+                fecha_modificacion = CURRENT_TIMESTAMP
+            """
+            batch = self.execute_batch(
+                update_query,
+                [(employee_id, year, month, cotizacion_especie_value) for month in months],
+            )
+            if not batch["success"]:
+                result["error"] = batch["error"]
+                return result
+            result["months_updated"].extend(months)
             
             if result["months_updated"]:
                 result["propagated"] = True
@@ -2301,6 +3420,17 @@ class DatabaseManager(DatabaseManagerExportsMixin):
             return float(s)
         except Exception:
             return 0.0
+    @cached_read("t001_empleados")
+    def _employee_name_map(self) -> Dict[str, int]:
+        """Lookup "apellido|nombre" (kleingeschrieben) -> id_empleado für die Importer."""
+        employees = self.execute_query("SELECT id_empleado, nombre, apellido FROM t001_empleados") or []
+        employee_map: Dict[str, int] = {}
+        for e in employees:
+            key = f"{str(e.get('apellido','')).strip().lower()}|{str(e.get('nombre','')).strip().lower()}"
+            if key and e.get('id_empleado') is not None:
+                employee_map[key] = int(e['id_empleado'])
+        return employee_map
+
     def _find_employee_id_by_name(self, apellido: str, nombre: str) -> Optional[int]:
         try:
             query = """
@@ -2336,12 +3466,7 @@ class DatabaseManager(DatabaseManagerExportsMixin):
             return {"success": False, "message": "Falta worksheet"}
         try:
             # Preload employee lookup map to avoid many DB queries
-            employees = self.execute_query("SELECT id_empleado, nombre, apellido FROM t001_empleados") or []
-            employee_map: Dict[str, int] = {}
-            for e in employees:
-                key = f"{str(e.get('apellido','')).strip().lower()}|{str(e.get('nombre','')).strip().lower()}"
-                if key and e.get('id_empleado') is not None:
-                    employee_map[key] = int(e['id_empleado'])
+            employee_map = self._employee_name_map()
             def get_employee_id(apellido: str, nombre: str) -> Optional[int]:
                 key = f"{apellido.strip().lower()}|{nombre.strip().lower()}"
                 if key in employee_map:
@@ -2500,12 +3625,7 @@ class DatabaseManager(DatabaseManagerExportsMixin):
         if worksheet is None:
             return {"success": False, "message": "Falta worksheet"}
         try:
-            employees = self.execute_query("SELECT id_empleado, nombre, apellido FROM t001_empleados") or []
-            employee_map: Dict[str, int] = {}
-            for e in employees:
-                key = f"{str(e.get('apellido','')).strip().lower()}|{str(e.get('nombre','')).strip().lower()}"
-                if key and e.get('id_empleado') is not None:
-                    employee_map[key] = int(e['id_empleado'])
+            employee_map = self._employee_name_map()
 
             def get_employee_id(apellido: str, nombre: str) -> Optional[int]:
                 key = f"{apellido.strip().lower()}|{nombre.strip().lower()}"
@@ -2682,12 +3802,7 @@ class DatabaseManager(DatabaseManagerExportsMixin):
             return {"success": False, "message": "Falta worksheet"}
 
         try:
-            employees = self.execute_query("SELECT id_empleado, nombre, apellido FROM t001_empleados") or []
-            employee_map: Dict[str, int] = {}
-            for e in employees:
-                key = f"{str(e.get('apellido','')).strip().lower()}|{str(e.get('nombre','')).strip().lower()}"
-                if key and e.get('id_empleado') is not None:
-                    employee_map[key] = int(e['id_empleado'])
+            employee_map = self._employee_name_map()
 
             def get_employee_id(apellido: str, nombre: str) -> Optional[int]:
                 key = f"{apellido.strip().lower()}|{nombre.strip().lower()}"
@@ -2809,8 +3924,14 @@ class DatabaseManager(DatabaseManagerExportsMixin):
         except Exception as e:
             self.logger.error(f"Fehler beim Import Cotizacion Especie Worksheet: {e}")
             return {"success": False, "message": f"Importación fallida: {str(e)}"}
-    def copy_salaries_to_new_year(self, target_year: int) -> Dict[str, Any]:
-        """Kopiert Gehälter aller aktiven Mitarbeiter vom Vorjahr ins Zieljahr"""
+    def copy_salaries_to_new_year(self, target_year: int, dry_run: bool = False) -> Dict[str, Any]:
+        """Kopiert Gehälter aller aktiven Mitarbeiter vom Vorjahr ins Zieljahr
+
+        Mengenbasiert in einer Transaktion: Kandidaten lesen, ein INSERT ... SELECT aus dem
+        Vorjahr (salario_mensual_bruto/atrasos im Statement), danach die Folgejahre der
+        kopierten Mitarbeiter über _update_subsequent_years_atrasos_bulk.
+        dry_run=True liefert nur die Kandidaten unter "employees", ohne zu schreiben.
+        """
         try:
             source_year = target_year - 1
             # Prüfen ob Zieljahr in der Zukunft liegt (nicht mehr als 20 Jahre voraus)
@@ -2823,76 +3944,87 @@ class DatabaseManager(DatabaseManagerExportsMixin):
                     "skipped_count": 0,
                     "errors": []
                 }
-            # Finde alle aktiven Mitarbeiter mit Gehalt im Vorjahr
-            # Für zukünftige Jahre kopiere alle aktiven Mitarbeiter, die Gehalt im Vorjahr haben
-            if target_year > datetime.now().year:
-                # Zukünftiges Jahr: kopiere alle aktiven Mitarbeiter mit Vorjahresgehalt
-                employees_with_salaries_query = """
-                SELECT DISTINCT e.id_empleado, e.nombre, e.apellido,
-                       s.modalidad, s.antiguedad, s.salario_anual_bruto
-                FROM t001_empleados e
-                INNER JOIN t002_salarios s ON e.id_empleado = s.id_empleado
-                WHERE e.activo = TRUE 
-                  AND s.anio = %s
-                  AND e.id_empleado NOT IN (
-                      SELECT id_empleado FROM t002_salarios WHERE anio = %s
-                  )
-                ORDER BY e.id_empleado
-                """
-            else:
-                # Vergangenheit/Gegenwart: nur fehlende Mitarbeiter kopieren
-                employees_with_salaries_query = """
-                SELECT DISTINCT e.id_empleado, e.nombre, e.apellido,
-                       s.modalidad, s.antiguedad, s.salario_anual_bruto
-                FROM t001_empleados e
-                INNER JOIN t002_salarios s ON e.id_empleado = s.id_empleado
-                WHERE e.activo = TRUE 
-                  AND s.anio = %s
-                  AND e.id_empleado NOT IN (
-                      SELECT id_empleado FROM t002_salarios WHERE anio = %s
-                  )
-                ORDER BY e.id_empleado
-                """
-            employees_to_copy = self.execute_query(employees_with_salaries_query, (source_year, target_year))
-            if not employees_to_copy:
+            # Aktive Mitarbeiter mit Vorjahresgehalt, denen das Zieljahr noch fehlt
+            candidates_query = """
+            SELECT e.id_empleado, e.nombre, e.apellido,
+                   s.modalidad, s.antiguedad, s.salario_anual_bruto
+            FROM t001_empleados e
+            INNER JOIN t002_salarios s ON e.id_empleado = s.id_empleado
+            WHERE e.activo = TRUE
+              AND s.anio = %s
+              AND NOT EXISTS (
+                  SELECT 1 FROM t002_salarios t WHERE t.id_empleado = e.id_empleado AND t.anio = %s
+              )
+            ORDER BY e.id_empleado
+            """
+            if dry_run:
+                employees_to_copy = self.execute_query(candidates_query, (source_year, target_year))
                 return {
                     "success": True,
-                    "message": f"No se encontraron empleados cuyo salario deba copiarse para {target_year}",
+                    "dry_run": True,
+                    "message": f"{len(employees_to_copy)} salarios se copiarían a {target_year}",
                     "copied_count": 0,
                     "skipped_count": 0,
+                    "employees": employees_to_copy,
                     "errors": []
                 }
-            copied_count = 0
-            skipped_count = 0
-            errors = []
-            for employee in employees_to_copy:
+
+            divisor = "CASE s.modalidad WHEN 14 THEN 14 ELSE 12 END"
+            # Das kopierte Gehalt ist das Vorjahresgehalt: keine Erhöhung, also keine atrasos
+            # (calculate_atrasos liefert hier immer 0)
+            insert_query = f"""
+            INSERT INTO t002_salarios (id_empleado, anio, modalidad, antiguedad,
+                                       salario_anual_bruto, salario_mensual_bruto,
+                                       atrasos, salario_mensual_con_atrasos)
+            SELECT s.id_empleado, %s, s.modalidad, s.antiguedad,
+                   s.salario_anual_bruto, s.salario_anual_bruto / {divisor},
+                   0, s.salario_anual_bruto / {divisor}
+            FROM t002_salarios s
+            INNER JOIN t001_empleados e ON e.id_empleado = s.id_empleado
+            WHERE e.activo = TRUE
+              AND s.anio = %s
+              AND s.id_empleado IN ({{ids}})
+              AND NOT EXISTS (
+                  SELECT 1 FROM t002_salarios t WHERE t.id_empleado = s.id_empleado AND t.anio = %s
+              )
+            """
+            with self._transaction(("t002_salarios",)) as connection:
+                cursor = connection.cursor(dictionary=True)
                 try:
-                    # Gehalt für neues Jahr einfügen
-                    salary_data = {
-                        'anio': target_year,
-                        'modalidad': employee['modalidad'],
-                        'antiguedad': employee['antiguedad'],
-                        'salario_anual_bruto': employee['salario_anual_bruto']
-                    }
-                    success = self.add_salary(employee['id_empleado'], salary_data)
-                    if success:
-                        copied_count += 1
-                        self.logger.info(f"Gehalt für Mitarbeiter {employee['id_empleado']} ({employee['nombre']} {employee['apellido']}) nach {target_year} kopiert")
-                    else:
-                        skipped_count += 1
-                        errors.append(f"Fehler beim Kopieren für Mitarbeiter {employee['id_empleado']} ({employee['nombre']} {employee['apellido']})")
-                except Exception as e:
-                    skipped_count += 1
-                    error_msg = f"Ausnahme beim Kopieren für Mitarbeiter {employee['id_empleado']}: {str(e)}"
-                    errors.append(error_msg)
-                    self.logger.error(error_msg)
+                    cursor.execute(candidates_query, (source_year, target_year))
+                    employees_to_copy = cursor.fetchall()
+                    if not employees_to_copy:
+                        return {
+                            "success": True,
+                            "message": f"No se encontraron empleados cuyo salario deba copiarse para {target_year}",
+                            "copied_count": 0,
+                            "skipped_count": 0,
+                            "errors": []
+                        }
+                    ids = [employee['id_empleado'] for employee in employees_to_copy]
+                    placeholders = ", ".join(["%s"] * len(ids))
+                    cursor.execute(
+                        insert_query.format(ids=placeholders),
+                        (target_year, source_year, *ids, target_year),
+                    )
+                    copied_count = max(0, cursor.rowcount or 0)
+                    if copied_count:
+                        self._update_subsequent_years_atrasos_bulk(cursor, ids, target_year)
+                finally:
+                    try:
+                        cursor.close()
+                    except Exception:
+                        pass
+            # Zwischen Lesen und Einfügen anderweitig angelegte Gehälter zählen als übersprungen
+            skipped_count = len(employees_to_copy) - copied_count
+            self.logger.info(f"Gehälter von {copied_count} Mitarbeitern nach {target_year} kopiert")
             result_message = f"Gehaltskopierung für {target_year} abgeschlossen: {copied_count} kopiert, {skipped_count} übersprungen"
             return {
                 "success": copied_count > 0,
                 "message": result_message,
                 "copied_count": copied_count,
                 "skipped_count": skipped_count,
-                "errors": errors
+                "errors": []
             }
         except Exception as e:
             self.logger.error(f"Fehler bei der Gehaltskopierung für Jahr {target_year}: {e}")
@@ -2903,33 +4035,75 @@ class DatabaseManager(DatabaseManagerExportsMixin):
                 "skipped_count": 0,
                 "errors": [str(e)]
             }
+
+    def _update_subsequent_years_atrasos_bulk(self, cursor, employee_ids: List[int], base_year: int) -> int:
+        """Aktualisiert atrasos und Monatsgehälter der Folgejahre mehrerer Mitarbeiter.
+
+        Läuft auf dem (dictionary) Cursor der aufrufenden Transaktion: eine Abfrage lädt die
+        Gehaltshistorie ab base_year, SalaryHistory berechnet die Kette im Speicher und nur
+        geänderte Jahre werden geschrieben. Liefert die Anzahl geschriebener Zeilen.
+        """
+        if not employee_ids:
+            return 0
+        placeholders = ", ".join(["%s"] * len(employee_ids))
+        cursor.execute(
+            f"""
+            SELECT {SALARY_HISTORY_COLUMNS}
+            FROM t002_salarios
+            WHERE id_empleado IN ({placeholders}) AND anio >= %s
+            ORDER BY id_empleado, anio
+            """,
+            (*employee_ids, base_year),
+        )
+        histories = SalaryHistory.from_rows(cursor.fetchall())
+        if not any(anio > base_year for history in histories.values() for anio in history.years):
+            return 0
+        months_before_payout = max(0, self.get_payout_month() - 1)
+        updates = [
+            update
+            for history in histories.values()
+            for update in history.subsequent_year_updates(base_year, months_before_payout)
+        ]
+        for start in range(0, len(updates), SALARY_UPDATE_CHUNK_SIZE):
+            cursor.execute(*salary_update_statement(updates[start:start + SALARY_UPDATE_CHUNK_SIZE]))
+        return len(updates)
+    @cached_read("t001_empleados", "t002_salarios")
     def get_missing_salary_years(self) -> List[Dict[str, Any]]:
-        """Gibt eine Liste der Jahre zurück, für die aktive Mitarbeiter keine Gehälter haben, aber nur wenn Vorjahresdaten existieren"""
+        """Gibt eine Liste der Jahre zurück, für die aktive Mitarbeiter keine Gehälter haben, aber nur wenn Vorjahresdaten existieren
+
+        Eine Abfrage für alle Jahre (Vorjahr bis +20): Jahre mit Vorjahresdaten aus
+        idx_t002_anio, dazu per Anti-Join die aktiven Mitarbeiter ohne Gehalt im Jahr.
+        Jahre ohne fehlende Mitarbeiter liefern eine Zeile mit id_empleado NULL.
+        """
         try:
             current_year = datetime.now().year
+            first_year, last_year = current_year - 1, current_year + 20
+            query = """
+            SELECT y.anio, e.id_empleado, e.nombre, e.apellido
+            FROM (
+                SELECT DISTINCT anio + 1 AS anio
+                FROM t002_salarios
+                WHERE anio BETWEEN %s AND %s
+            ) y
+            LEFT JOIN t001_empleados e
+              ON e.activo = TRUE
+             AND NOT EXISTS (
+                 SELECT 1 FROM t002_salarios s WHERE s.id_empleado = e.id_empleado AND s.anio = y.anio
+             )
+            ORDER BY y.anio, e.id_empleado
+            """
+            rows = self.execute_query(query, (first_year - 1, last_year - 1))
+            missing_by_year: Dict[int, List[Dict[str, Any]]] = {}
+            for row in rows:
+                employees = missing_by_year.setdefault(int(row['anio']), [])
+                if row['id_empleado'] is not None:
+                    employees.append({
+                        'id_empleado': row['id_empleado'],
+                        'nombre': row['nombre'],
+                        'apellido': row['apellido'],
+                    })
             missing_years = []
-            # Prüfe die letzten 2 Jahre und die nächsten 20 Jahre
-            for year in range(current_year - 1, current_year + 21):
-                # Prüfe zuerst ob es überhaupt Gehaltsdaten im Vorjahr gibt
-                prev_year_exists_query = """
-                SELECT COUNT(*) as count FROM t002_salarios 
-                WHERE anio = %s
-                """
-                prev_year_result = self.execute_query(prev_year_exists_query, (year - 1,))
-                # Wenn keine Vorjahresdaten existieren oder DB-Verbindung fehlt, überspringe dieses Jahr
-                if not prev_year_result or prev_year_result[0]['count'] == 0:
-                    continue
-                # Finde aktive Mitarbeiter ohne Gehalt für dieses Jahr
-                missing_query = """
-                SELECT e.id_empleado, e.nombre, e.apellido
-                FROM t001_empleados e
-                WHERE e.activo = TRUE
-                  AND e.id_empleado NOT IN (
-                      SELECT id_empleado FROM t002_salarios WHERE anio = %s
-                  )
-                ORDER BY e.id_empleado
-                """
-                missing_employees = self.execute_query(missing_query, (year,))
+            for year, missing_employees in sorted(missing_by_year.items()):
                 # Zeige Jahre an, wenn:
                 # 1. Mitarbeiter fehlen (für Vergangenheit/Gegenwart)
                 # 2. Für zukünftige Jahre immer anzeigen (wenn Vorjahresdaten existieren)
@@ -2945,23 +4119,53 @@ class DatabaseManager(DatabaseManagerExportsMixin):
         except Exception as e:
             self.logger.error(f"Fehler bei der Ermittlung fehlender Gehaltsjahre: {e}")
             return []
+
     def recalculate_all_atrasos_for_year(self, year: int) -> Dict[str, Any]:
         """
         Berechnet alle Atrasos für alle Mitarbeiter im angegebenen Jahr neu.
+
+        Mengenbasiert: ein UPDATE mit Self-Join auf das Vorjahr (Formel wie calculate_atrasos)
+        und ein SELECT für den Bericht in einer Transaktion – konstante Round Trips
+        unabhängig von der Mitarbeiterzahl.
         Args:
             year: Jahr für das die Atrasos neu berechnet werden sollen
         Returns:
             Dict mit Erfolgsmeldung und Statistik
         """
         try:
-            # Hole alle Gehälter für das angegebene Jahr
-            salaries_query = """
-            SELECT id_empleado, anio, modalidad, salario_anual_bruto
+            months_before_payout = max(0, self.get_payout_month() - 1)
+            divisor = "CASE s.modalidad WHEN 14 THEN 14 ELSE 12 END"
+            # Regel wie database_salary_history.atrasos_amount: kein oder nicht positives
+            # Vorjahresgehalt ergibt 0, Gehaltssenkungen ebenfalls (nie negativ)
+            atrasos_expr = (
+                f"GREATEST(0, CASE WHEN p.salario_anual_bruto > 0 "
+                f"THEN (s.salario_anual_bruto - p.salario_anual_bruto) / {divisor} * %s ELSE 0 END)"
+            )
+            update_query = f"""
+            UPDATE t002_salarios s
+            LEFT JOIN t002_salarios p ON p.id_empleado = s.id_empleado AND p.anio = s.anio - 1
+            SET s.atrasos = {atrasos_expr},
+                s.salario_mensual_con_atrasos = s.salario_anual_bruto / {divisor} + {atrasos_expr},
+                s.fecha_modificacion = CURRENT_TIMESTAMP
+            WHERE s.anio = %s
+            """
+            report_query = """
+            SELECT id_empleado, atrasos
             FROM t002_salarios
             WHERE anio = %s
             ORDER BY id_empleado
             """
-            salaries = self.execute_query(salaries_query, (year,))
+            with self._transaction(("t002_salarios",)) as connection:
+                cursor = connection.cursor(dictionary=True)
+                try:
+                    cursor.execute(update_query, (months_before_payout, months_before_payout, year))
+                    cursor.execute(report_query, (year,))
+                    salaries = cursor.fetchall()
+                finally:
+                    try:
+                        cursor.close()
+                    except Exception:
+                        pass
             if not salaries:
                 return {
                     "success": False,
@@ -2969,46 +4173,18 @@ class DatabaseManager(DatabaseManagerExportsMixin):
                     "updated_count": 0,
                     "errors": []
                 }
-            updated_count = 0
-            errors = []
             for salary in salaries:
-                try:
-                    employee_id = salary['id_empleado']
-                    modalidad = salary['modalidad']
-                    current_salary = float(salary['salario_anual_bruto'])
-                    # Berechne neue Atrasos
-                    new_atrasos = self.calculate_atrasos(employee_id, year, modalidad, current_salary)
-                    new_salary_con_atrasos = current_salary / (modalidad if modalidad in [12, 14] else 12) + new_atrasos
-                    # Update der Datenbank
-                    update_query = """
-                    UPDATE t002_salarios 
-                    SET atrasos = %s, 
-                        salario_mensual_con_atrasos = %s,
-                        fecha_modificacion = CURRENT_TIMESTAMP
-                    WHERE id_empleado = %s AND anio = %s
-                    """
-                    success = self.execute_update(update_query, (
-                        new_atrasos, 
-                        new_salary_con_atrasos, 
-                        employee_id, 
-                        year
-                    ))
-                    if success:
-                        updated_count += 1
-                        self.logger.info(f"Atrasos für Mitarbeiter {employee_id} in Jahr {year} neu berechnet: {new_atrasos}")
-                    else:
-                        errors.append(f"Fehler beim Update für Mitarbeiter {employee_id}")
-                except Exception as e:
-                    error_msg = f"Fehler bei der Neuberechnung für Mitarbeiter {salary['id_empleado']}: {str(e)}"
-                    errors.append(error_msg)
-                    self.logger.error(error_msg)
+                self.logger.debug(f"Atrasos für Mitarbeiter {salary['id_empleado']} in Jahr {year} neu berechnet: {salary['atrasos']}")
+            updated_count = len(salaries)
+            self.logger.info(f"Atrasos für {updated_count} Mitarbeiter in Jahr {year} neu berechnet")
             result_message = f"Neuberechnung der Atrasos für {year} abgeschlossen: {updated_count} Mitarbeiter aktualisiert"
             return {
-                "success": updated_count > 0,
+                "success": True,
                 "message": result_message,
                 "updated_count": updated_count,
                 "total_count": len(salaries),
-                "errors": errors
+                "employees": salaries,
+                "errors": []
             }
         except Exception as e:
             self.logger.error(f"Fehler bei der Neuberechnung der Atrasos für Jahr {year}: {e}")
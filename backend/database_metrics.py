@@ -0,0 +1,371 @@
+"""
+Query-Instrumentierung für den DatabaseManager
+
+Sammelt pro normalisiertem SQL-Statement und pro Flask-Endpunkt Latenz-Histogramme,
+Aufrufzahlen, gelieferte Zeilen, Retries aus dem Transient-Error-Pfad sowie die
+Wartezeit auf eine Pool-Verbindung. Die Ausgabe erfolgt im Prometheus-Textformat
+(siehe /metrics in app.py), ohne zusätzliche Abhängigkeit.
+
+Zusätzlich enthält das Modul ein optionales Slow-Query-Log (SlowQueryLog).
+"""
+
+import hashlib
+import re
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+NO_ENDPOINT = "none"
+OVERFLOW_STATEMENT = "other"
+
+_STRING_LITERAL_RE = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+_NUMBER_RE = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER_RE = re.compile(r"%s|%\(\w+\)s")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_VALUES_LIST_RE = re.compile(r"(VALUES\s*\([^()]*\))(?:\s*,\s*\([^()]*\))+", re.IGNORECASE)
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def normalize_statement(query: str, max_length: int = 300) -> str:
+    """Normalisiert SQL zu einer stabilen Label-Form.
+
+    Literale und Platzhalter werden zu ?, IN-/VALUES-Listen werden zusammengefasst,
+    Whitespace wird auf ein Leerzeichen reduziert.
+    """
+    if not query:
+        return ""
+    text = _STRING_LITERAL_RE.sub("?", str(query))
+    text = _PLACEHOLDER_RE.sub("?", text)
+    text = _NUMBER_RE.sub("?", text)
+    text = _WHITESPACE_RE.sub(" ", text).strip()
+    text = _IN_LIST_RE.sub("(?+)", text)
+    text = _VALUES_LIST_RE.sub(r"\1, ...", text)
+    if len(text) > max_length:
+        text = text[: max_length - 3] + "..."
+    return text
+
+
+def _escape_label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_float(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape_label(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Histogram:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self, bucket_count: int):
+        self.counts = [0] * bucket_count
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, buckets: Tuple[float, ...], value: float) -> None:
+        for i, bound in enumerate(buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.total += value
+        self.count += 1
+
+
+class QueryMetrics:
+    """Thread-sicherer In-Process-Collector für Datenbank-Metriken."""
+
+    def __init__(self, buckets: Optional[Tuple[float, ...]] = None, max_statements: int = 500):
+        self.buckets: Tuple[float, ...] = tuple(sorted(buckets or DEFAULT_BUCKETS))
+        self.max_statements = max(1, int(max_statements))
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._pool_stats_source: Optional[Callable[[], Dict[str, Any]]] = None
+        self.reset()
+
+    def set_pool_stats_source(self, source: Optional[Callable[[], Dict[str, Any]]]) -> None:
+        """Callable, das die aktuellen Pool-Kennzahlen liefert (siehe DatabaseManager.pool_stats)."""
+        self._pool_stats_source = source
+
+    def reset(self) -> None:
+        with self._lock:
+            self._statements: set = set()
+            self._durations: Dict[Tuple[str, str, str], _Histogram] = {}
+            self._calls: Dict[Tuple[str, str, str, str], int] = {}
+            self._rows: Dict[Tuple[str, str], int] = {}
+            self._retries: Dict[Tuple[str, str], int] = {}
+            self._pool_wait: Dict[str, _Histogram] = {}
+
+    # Endpunkt-Kontext (wird von app.py pro Request gesetzt)
+    def set_endpoint(self, endpoint: Optional[str]) -> None:
+        self._local.endpoint = endpoint or NO_ENDPOINT
+
+    def clear_endpoint(self) -> None:
+        self._local.endpoint = NO_ENDPOINT
+
+    def current_endpoint(self) -> str:
+        return getattr(self._local, "endpoint", NO_ENDPOINT) or NO_ENDPOINT
+
+    def _statement_label(self, query: str) -> str:
+        statement = normalize_statement(query)
+        if statement in self._statements:
+            return statement
+        if len(self._statements) >= self.max_statements:
+            return OVERFLOW_STATEMENT
+        self._statements.add(statement)
+        return statement
+
+    def observe_query(self, query: str, seconds: float, rows: int = 0, kind: str = "query", success: bool = True) -> None:
+        endpoint = self.current_endpoint()
+        status = "ok" if success else "error"
+        with self._lock:
+            statement = self._statement_label(query)
+            key = (endpoint, statement, kind)
+            hist = self._durations.get(key)
+            if hist is None:
+                hist = self._durations[key] = _Histogram(len(self.buckets))
+            hist.observe(self.buckets, max(0.0, float(seconds)))
+            call_key = (endpoint, statement, kind, status)
+            self._calls[call_key] = self._calls.get(call_key, 0) + 1
+            if rows:
+                row_key = (endpoint, statement)
+                self._rows[row_key] = self._rows.get(row_key, 0) + int(rows)
+
+    def record_retry(self, query: str) -> None:
+        endpoint = self.current_endpoint()
+        with self._lock:
+            key = (endpoint, self._statement_label(query))
+            self._retries[key] = self._retries.get(key, 0) + 1
+
+    def observe_pool_wait(self, seconds: float) -> None:
+        endpoint = self.current_endpoint()
+        with self._lock:
+            hist = self._pool_wait.get(endpoint)
+            if hist is None:
+                hist = self._pool_wait[endpoint] = _Histogram(len(self.buckets))
+            hist.observe(self.buckets, max(0.0, float(seconds)))
+
+    def _render_histogram(self, lines: List[str], name: str, label_names: Tuple[str, ...], series) -> None:
+        for label_values, hist in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets, hist.counts):
+                cumulative += count
+                labels = _format_labels(label_names, label_values, f'le="{_format_float(bound)}"')
+                lines.append(f"{name}_bucket{labels} {cumulative}")
+            labels = _format_labels(label_names, label_values, 'le="+Inf"')
+            lines.append(f"{name}_bucket{labels} {hist.count}")
+            lines.append(f"{name}_sum{_format_labels(label_names, label_values)} {_format_float(hist.total)}")
+            lines.append(f"{name}_count{_format_labels(label_names, label_values)} {hist.count}")
+
+    def render_prometheus(self) -> str:
+        """Liefert alle Metriken im Prometheus-Textformat (Version 0.0.4)."""
+        lines: List[str] = []
+        with self._lock:
+            lines.append("# HELP rrhh_db_query_duration_seconds Latenz von SQL-Statements")
+            lines.append("# TYPE rrhh_db_query_duration_seconds histogram")
+            self._render_histogram(
+                lines,
+                "rrhh_db_query_duration_seconds",
+                ("endpoint", "statement", "kind"),
+                sorted(self._durations.items()),
+            )
+
+            lines.append("# HELP rrhh_db_query_calls_total Anzahl ausgeführter SQL-Statements")
+            lines.append("# TYPE rrhh_db_query_calls_total counter")
+            for (endpoint, statement, kind, status), value in sorted(self._calls.items()):
+                labels = _format_labels(("endpoint", "statement", "kind", "status"), (endpoint, statement, kind, status))
+                lines.append(f"rrhh_db_query_calls_total{labels} {value}")
+
+            lines.append("# HELP rrhh_db_query_rows_total Von SELECT-Statements gelieferte Zeilen")
+            lines.append("# TYPE rrhh_db_query_rows_total counter")
+            for (endpoint, statement), value in sorted(self._rows.items()):
+                labels = _format_labels(("endpoint", "statement"), (endpoint, statement))
+                lines.append(f"rrhh_db_query_rows_total{labels} {value}")
+
+            lines.append("# HELP rrhh_db_query_retries_total Retries nach transienten Verbindungsfehlern")
+            lines.append("# TYPE rrhh_db_query_retries_total counter")
+            for (endpoint, statement), value in sorted(self._retries.items()):
+                labels = _format_labels(("endpoint", "statement"), (endpoint, statement))
+                lines.append(f"rrhh_db_query_retries_total{labels} {value}")
+
+            lines.append("# HELP rrhh_db_pool_wait_seconds Wartezeit auf eine Verbindung aus dem Pool")
+            lines.append("# TYPE rrhh_db_pool_wait_seconds histogram")
+            self._render_histogram(
+                lines,
+                "rrhh_db_pool_wait_seconds",
+                ("endpoint",),
+                [((endpoint,), hist) for endpoint, hist in sorted(self._pool_wait.items())],
+            )
+        self._render_pool_stats(lines)
+        return "\n".join(lines) + "\n"
+
+    _POOL_GAUGES = (
+        ("pool_size", "Konfigurierte Pool-Größe"),
+        ("max_overflow", "Maximale Overflow-Verbindungen"),
+        ("in_use", "Ausgecheckte Verbindungen"),
+        ("overflow_in_use", "Ausgecheckte Overflow-Verbindungen"),
+        ("waiting", "Auf eine Verbindung wartende Aufrufer"),
+    )
+    _POOL_COUNTERS = (
+        ("created", "Aufgebaute physische Verbindungen"),
+        ("checkouts", "Checkouts aus dem Pool"),
+        ("timeouts", "Checkouts, die am Timeout gescheitert sind"),
+    )
+
+    def _render_pool_stats(self, lines: List[str]) -> None:
+        if self._pool_stats_source is None:
+            return
+        try:
+            stats = self._pool_stats_source() or {}
+        except Exception:
+            return
+        for key, help_text in self._POOL_GAUGES:
+            if key in stats:
+                lines.append(f"# HELP rrhh_db_pool_{key} {help_text}")
+                lines.append(f"# TYPE rrhh_db_pool_{key} gauge")
+                lines.append(f"rrhh_db_pool_{key} {stats[key]}")
+        for key, help_text in self._POOL_COUNTERS:
+            if key in stats:
+                lines.append(f"# HELP rrhh_db_pool_{key}_total {help_text}")
+                lines.append(f"# TYPE rrhh_db_pool_{key}_total counter")
+                lines.append(f"rrhh_db_pool_{key}_total {stats[key]}")
+
+
+_EXPLAINABLE_RE = re.compile(r"^\s*(SELECT|INSERT|UPDATE|DELETE|REPLACE|WITH)\b", re.IGNORECASE)
+
+
+def fingerprint_params(params: Any) -> Optional[str]:
+    """Kurzer Hash der Parameter, damit keine Personen-/Gehaltsdaten im Log landen."""
+    if params is None:
+        return None
+    return hashlib.sha256(repr(params).encode("utf-8", errors="replace")).hexdigest()[:16]
+
+
+def find_full_scans(plan: Any) -> List[str]:
+    """Sucht in einem EXPLAIN FORMAT=JSON Plan nach Tabellen mit access_type ALL."""
+    tables: List[str] = []
+    if isinstance(plan, dict):
+        table = plan.get("table")
+        if isinstance(table, dict) and str(table.get("access_type", "")).upper() == "ALL":
+            tables.append(str(table.get("table_name", "")))
+        for value in plan.values():
+            tables.extend(find_full_scans(value))
+    elif isinstance(plan, list):
+        for value in plan:
+            tables.extend(find_full_scans(value))
+    return tables
+
+
+class SlowQueryLog:
+    """Opt-in Slow-Query-Log mit begrenztem Ringpuffer.
+
+    Statements über threshold_ms werden mit Dauer, Parameter-Fingerprint und (optional)
+    einem EXPLAIN FORMAT=JSON Plan festgehalten. Der Plan wird über explain_fn auf einer
+    separaten Verbindung ermittelt, standardmäßig in einem Hintergrund-Thread.
+    """
+
+    def __init__(
+        self,
+        threshold_ms: Optional[float] = None,
+        capacity: int = 100,
+        explain: bool = True,
+        explain_async: bool = True,
+        max_concurrent_explains: int = 2,
+    ):
+        self._lock = threading.Lock()
+        self._explain_slots = threading.BoundedSemaphore(max(1, int(max_concurrent_explains)))
+        self.explain_async = explain_async
+        self.configure(threshold_ms, capacity, explain)
+
+    def configure(self, threshold_ms: Optional[float], capacity: int = 100, explain: bool = True) -> None:
+        with self._lock:
+            self.threshold_ms = float(threshold_ms) if threshold_ms is not None else None
+            self.capacity = max(1, int(capacity))
+            self.explain = bool(explain)
+            old = list(getattr(self, "_entries", []))
+            self._entries: Deque[Dict[str, Any]] = deque(old, maxlen=self.capacity)
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold_ms is not None
+
+    def is_slow(self, seconds: float) -> bool:
+        return self.threshold_ms is not None and seconds * 1000.0 >= self.threshold_ms
+
+    def record(
+        self,
+        query: str,
+        params: Any,
+        seconds: float,
+        kind: str = "query",
+        endpoint: str = NO_ENDPOINT,
+        explain_fn: Optional[Callable[[str, Any], Any]] = None,
+    ) -> Dict[str, Any]:
+        entry: Dict[str, Any] = {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "endpoint": endpoint,
+            "kind": kind,
+            "statement": normalize_statement(query),
+            "duration_ms": round(seconds * 1000.0, 3),
+            "params_fingerprint": fingerprint_params(params),
+            "param_count": len(params) if isinstance(params, (list, tuple, dict)) else 0,
+            "explain": None,
+            "explain_error": None,
+            "full_scans": [],
+        }
+        with self._lock:
+            self._entries.append(entry)
+            explain_enabled = self.explain
+
+        if explain_enabled and explain_fn is not None and _EXPLAINABLE_RE.match(query or ""):
+            if self._explain_slots.acquire(blocking=False):
+                if self.explain_async:
+                    threading.Thread(
+                        target=self._capture_explain,
+                        args=(entry, explain_fn, query, params),
+                        name="slow-query-explain",
+                        daemon=True,
+                    ).start()
+                else:
+                    self._capture_explain(entry, explain_fn, query, params)
+            else:
+                entry["explain_error"] = "EXPLAIN übersprungen (bereits ausgelastet)"
+        return entry
+
+    def _capture_explain(self, entry: Dict[str, Any], explain_fn: Callable[[str, Any], Any], query: str, params: Any) -> None:
+        try:
+            plan = explain_fn(query, params)
+            with self._lock:
+                entry["explain"] = plan
+                entry["full_scans"] = find_full_scans(plan)
+        except Exception as e:
+            with self._lock:
+                entry["explain_error"] = str(e)
+        finally:
+            self._explain_slots.release()
+
+    def entries(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Einträge, neueste zuerst."""
+        with self._lock:
+            items = [dict(e) for e in reversed(self._entries)]
+        if limit is not None:
+            items = items[: max(0, int(limit))]
+        return items
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
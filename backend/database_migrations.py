@@ -0,0 +1,388 @@
+"""
+Versionierte Schema-Migrationen
+
+Statt bei jedem connect() INFORMATION_SCHEMA abzufragen und ggf. ALTER TABLE auszuführen,
+wird der Schema-Stand in t000_schema_version geführt. Die Migrationen sind nummerierte
+SQL-Skripte unter sql_statements/ und werden einmalig per
+
+    python database_migrations.py          (oder: python run.py migrate)
+
+eingespielt. Der Start eines Workers liest nur noch die höchste angewendete Version.
+
+Alle Skripte sind so geschrieben bzw. werden so ausgeführt, dass sie auf bestehenden
+Installationen (deren Stand bisher durch die _ensure_*-Methoden hergestellt wurde)
+gefahrlos laufen: "existiert bereits"-Fehler werden übersprungen.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import sys
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from mysql.connector import Error, errorcode
+
+SQL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sql_statements")
+SCHEMA_VERSION_TABLE = "t000_schema_version"
+MIGRATION_LOCK_NAME = "rrhh_schema_migration"
+MIGRATION_LOCK_TIMEOUT = 60
+
+# Jahrespartitionierte Tabellen und ihre Partitionsspalte. Abgeschlossene Jahre
+# werden per DatabaseManager.archive_year() in <Tabelle>_archivo verschoben.
+PARTITIONED_TABLES = {
+    "t003_ingresos_brutos_mensuales": "anio",
+    "t004_deducciones_mensuales": "anio",
+    "t007_registro_procesamiento": "fecha",
+}
+ARCHIVE_SUFFIX = "_archivo"
+ARCHIVE_YEARS_TABLE = "t012_anios_archivados"
+PARTITION_YEARS_AHEAD = 1
+
+
+def _partition_expression(column: str) -> str:
+    return column if column == "anio" else f"UNIX_TIMESTAMP({column})"
+
+
+def _partition_bound(column: str, year: int) -> str:
+    """Obere (exklusive) Grenze der Partition für year."""
+    if column == "anio":
+        return str(year + 1)
+    return f"UNIX_TIMESTAMP('{year + 1}-01-01 00:00:00')"
+
+
+def _partition_definitions(column: str, years: Sequence[int]) -> str:
+    parts = [f"PARTITION p{y} VALUES LESS THAN ({_partition_bound(column, y)})" for y in years]
+    parts.append("PARTITION pmax VALUES LESS THAN MAXVALUE")
+    return ", ".join(parts)
+
+
+def _drop_foreign_keys(cursor, table: str) -> None:
+    """Partitionierte InnoDB-Tabellen dürfen keine Fremdschlüssel haben."""
+    cursor.execute(
+        "SELECT CONSTRAINT_NAME FROM INFORMATION_SCHEMA.REFERENTIAL_CONSTRAINTS "
+        "WHERE CONSTRAINT_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+        (table,),
+    )
+    for (name,) in cursor.fetchall():
+        _execute_statement(cursor, f"ALTER TABLE {table} DROP FOREIGN KEY {name}")
+
+
+def _first_data_year(cursor, table: str, column: str) -> Optional[int]:
+    expr = column if column == "anio" else f"YEAR({column})"
+    cursor.execute(f"SELECT MIN({expr}) FROM {table}")
+    rows = cursor.fetchall()
+    if not rows or rows[0][0] is None:
+        return None
+    return int(rows[0][0])
+
+
+def migrate_year_partitions(cursor) -> None:
+    """Migration 10: Jahrespartitionen und komprimierte Archivtabellen anlegen.
+
+    Entfernt alle Fremdschlüssel von t003/t004/t007 (t003/t004 -> t001 ON DELETE CASCADE,
+    t007 -> t001 ON DELETE SET NULL, t007 -> t005 usuario_login) und setzt den
+    Primärschlüssel von t007 auf (id_registro, fecha). Die Fremdschlüssel ersetzen die
+    Trigger aus Migration 11 (011_partition_integrity.sql).
+    """
+    current = date.today().year
+    for table, column in PARTITIONED_TABLES.items():
+        _drop_foreign_keys(cursor, table)
+        if column != "anio":
+            # Die Partitionsspalte muss Teil jedes eindeutigen Schlüssels sein
+            _execute_statement(
+                cursor,
+                f"ALTER TABLE {table} MODIFY {column} TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP, "
+                f"DROP PRIMARY KEY, ADD PRIMARY KEY (id_registro, {column})",
+            )
+        archive = f"{table}{ARCHIVE_SUFFIX}"
+        _execute_statement(cursor, f"CREATE TABLE {archive} LIKE {table}")
+        _execute_statement(cursor, f"ALTER TABLE {archive} ROW_FORMAT=COMPRESSED")
+        first = min(_first_data_year(cursor, table, column) or current, current)
+        years = range(first, current + PARTITION_YEARS_AHEAD + 1)
+        _execute_statement(
+            cursor,
+            f"ALTER TABLE {table} PARTITION BY RANGE ({_partition_expression(column)}) "
+            f"({_partition_definitions(column, years)})",
+        )
+
+
+def ensure_year_partitions(cursor, years_ahead: int = PARTITION_YEARS_AHEAD) -> List[str]:
+    """Teilt pmax auf, bis Partitionen bis zum aktuellen Jahr + years_ahead existieren.
+
+    Läuft bei jedem migrate(); liefert die neu angelegten Partitionen als "tabelle.pJJJJ".
+    """
+    current = date.today().year
+    added: List[str] = []
+    for table, column in PARTITIONED_TABLES.items():
+        cursor.execute(
+            "SELECT PARTITION_NAME FROM INFORMATION_SCHEMA.PARTITIONS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL",
+            (table,),
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+        if "pmax" not in existing:
+            continue
+        existing_years = [int(name[1:]) for name in existing if name[1:].isdigit()]
+        last = max(existing_years) if existing_years else current - 1
+        missing = list(range(last + 1, current + years_ahead + 1))
+        if not missing:
+            continue
+        cursor.execute(
+            f"ALTER TABLE {table} REORGANIZE PARTITION pmax INTO ({_partition_definitions(column, missing)})"
+        )
+        added.extend(f"{table}.p{y}" for y in missing)
+    if added:
+        logger.info(f"Neue Jahrespartitionen angelegt: {', '.join(added)}")
+    return added
+
+
+# (Version, Name, Skript relativ zu sql_statements/ oder Funktion(cursor), bestehende Trigger ersetzen)
+MIGRATIONS = [
+    (1, "base_schema", "01_schema/01_schema.sql", False),
+    (2, "triggers", "02_triggers/01_triggers.sql", True),
+    (3, "employee_fecha_alta", "04_maintenance/003_employee_fecha_alta.sql", False),
+    (4, "employee_irpf", "04_maintenance/004_employee_irpf.sql", False),
+    (5, "deducciones_gasolina", "04_maintenance/005_deducciones_gasolina.sql", False),
+    (6, "carry_over", "04_maintenance/006_carry_over.sql", False),
+    (7, "payroll_values", "04_maintenance/007_payroll_values.sql", True),
+    (8, "effective_fte", "04_maintenance/008_effective_fte.sql", False),
+    (9, "archive_registry", "04_maintenance/009_archive_registry.sql", True),
+    (10, "year_partitions", migrate_year_partitions, False),
+    (11, "partition_integrity", "04_maintenance/011_partition_integrity.sql", True),
+    (12, "covering_indexes", "04_maintenance/012_covering_indexes.sql", False),
+    (13, "resource_versions", "04_maintenance/013_resource_versions.sql", True),
+    (14, "keyset_index", "04_maintenance/014_keyset_index.sql", False),
+]
+LATEST_VERSION = MIGRATIONS[-1][0]
+PARTITION_SCHEMA_VERSION = 10
+
+# Fehler, die bedeuten, dass der Zielzustand bereits erreicht ist
+IDEMPOTENT_ERRNOS = {
+    errorcode.ER_TABLE_EXISTS_ERROR,
+    errorcode.ER_DUP_FIELDNAME,
+    errorcode.ER_DUP_KEYNAME,
+    errorcode.ER_CANT_DROP_FIELD_OR_KEY,
+    errorcode.ER_TRG_ALREADY_EXISTS,
+}
+
+_DELIMITER_RE = re.compile(r"^\s*DELIMITER\s*(\S+)\s*$", re.IGNORECASE)
+_CREATE_TRIGGER_RE = re.compile(r"^\s*CREATE\s+TRIGGER\s+`?(\w+)`?", re.IGNORECASE)
+
+logger = logging.getLogger(__name__)
+
+
+def split_sql_script(text: str) -> List[str]:
+    """Zerlegt ein SQL-Skript in einzelne Statements.
+
+    Unterstützt DELIMITER-Wechsel (für Trigger-Körper), Zeilenkommentare und
+    Semikolons in String-Literalen.
+    """
+    statements: List[str] = []
+    delimiter = ";"
+    buffer: List[str] = []
+
+    for line in text.splitlines():
+        match = _DELIMITER_RE.match(line)
+        if match:
+            delimiter = match.group(1)
+            continue
+        if not buffer and (not line.strip() or line.strip().startswith("--")):
+            continue
+        buffer.append(line)
+        joined = "\n".join(buffer)
+        stmt = _strip_terminator(joined, delimiter)
+        if stmt is not None:
+            if stmt.strip():
+                statements.append(stmt.strip())
+            buffer = []
+
+    rest = "\n".join(buffer).strip()
+    if rest:
+        statements.append(rest)
+    return statements
+
+
+def _strip_terminator(text: str, delimiter: str) -> Optional[str]:
+    """Liefert text ohne Delimiter, wenn er außerhalb von Literalen und Kommentaren endet."""
+    quote = None
+    in_comment = False
+    end = None
+    i = 0
+    while i < len(text):
+        ch = text[i]
+        if in_comment:
+            if ch == "\n":
+                in_comment = False
+        elif quote:
+            if ch == "\\":
+                i += 1
+            elif ch == quote:
+                quote = None
+        elif ch in ("'", '"', "`"):
+            quote = ch
+        elif text.startswith("--", i):
+            in_comment = True
+        elif text.startswith(delimiter, i):
+            end = i
+            i += len(delimiter)
+            continue
+        elif not ch.isspace():
+            end = None
+        i += 1
+    if end is None:
+        return None
+    return text[:end]
+
+
+def load_migrations() -> List[Dict[str, Any]]:
+    """Liest die Migrationsskripte in Versionsreihenfolge ein.
+
+    Python-Schritte (z. B. Partitionierung, die vom Datenbestand abhängt) haben
+    keine Statements, sondern eine run(cursor)-Funktion.
+    """
+    migrations = []
+    for version, name, step, replace_triggers in MIGRATIONS:
+        run: Optional[Callable[[Any], None]] = None
+        if callable(step):
+            run = step
+            path = f"{step.__module__}.{step.__name__}"
+            script = path
+        else:
+            path = step
+            with open(os.path.join(SQL_DIR, path), encoding="utf-8") as f:
+                script = f.read()
+        migrations.append({
+            "version": version,
+            "name": name,
+            "path": path,
+            "checksum": hashlib.sha256(script.encode("utf-8")).hexdigest(),
+            "statements": split_sql_script(script) if run is None else [],
+            "run": run,
+            "replace_triggers": replace_triggers,
+        })
+    return migrations
+
+
+def read_schema_version(connection) -> int:
+    """Höchste angewendete Version; 0, wenn die Versionstabelle noch nicht existiert."""
+    cursor = connection.cursor(buffered=True)
+    try:
+        cursor.execute(f"SELECT version FROM {SCHEMA_VERSION_TABLE} ORDER BY version DESC LIMIT 1")
+        row = cursor.fetchone()
+    except Error as e:
+        if getattr(e, "errno", None) == errorcode.ER_NO_SUCH_TABLE:
+            return 0
+        raise
+    finally:
+        cursor.close()
+    if not row:
+        return 0
+    value = row.get("version") if isinstance(row, dict) else row[0]
+    return int(value)
+
+
+def _ensure_version_table(cursor) -> None:
+    cursor.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {SCHEMA_VERSION_TABLE} (
+            version INT PRIMARY KEY,
+            name VARCHAR(100) NOT NULL,
+            checksum CHAR(64) NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+
+
+def _execute_statement(cursor, statement: str) -> None:
+    try:
+        cursor.execute(statement)
+        if getattr(cursor, "with_rows", False):
+            cursor.fetchall()
+    except Error as e:
+        if getattr(e, "errno", None) in IDEMPOTENT_ERRNOS:
+            logger.info(f"Migration: bereits vorhanden, übersprungen ({e.errno}): {statement.splitlines()[0][:80]}")
+            return
+        raise
+
+
+def _apply_migration(cursor, migration: Dict[str, Any]) -> None:
+    for statement in migration["statements"]:
+        if migration["replace_triggers"]:
+            match = _CREATE_TRIGGER_RE.match(statement)
+            if match:
+                cursor.execute(f"DROP TRIGGER IF EXISTS {match.group(1)}")
+        _execute_statement(cursor, statement)
+    if migration.get("run") is not None:
+        migration["run"](cursor)
+    cursor.execute(
+        f"INSERT INTO {SCHEMA_VERSION_TABLE} (version, name, checksum) VALUES (%s, %s, %s)",
+        (migration["version"], migration["name"], migration["checksum"]),
+    )
+
+
+def apply_migrations(connection, target: Optional[int] = None) -> List[int]:
+    """Spielt alle ausstehenden Migrationen bis target (Standard: neueste) ein.
+
+    Ein benannter Lock verhindert, dass mehrere Prozesse gleichzeitig migrieren.
+    DDL committed in MySQL implizit, daher wird jede Version direkt nach ihrem
+    Skript eingetragen und committed. Ab der Partitionierung werden zusätzlich
+    die Jahrespartitionen für die kommenden Jahre angelegt.
+    """
+    target = LATEST_VERSION if target is None else int(target)
+    applied: List[int] = []
+    cursor = connection.cursor(buffered=True)
+    try:
+        cursor.execute("SELECT GET_LOCK(%s, %s)", (MIGRATION_LOCK_NAME, MIGRATION_LOCK_TIMEOUT))
+        row = cursor.fetchone()
+        if not row or not row[0]:
+            raise RuntimeError("Migrations-Lock konnte nicht erworben werden")
+        try:
+            _ensure_version_table(cursor)
+            current = read_schema_version(connection)
+            for migration in load_migrations():
+                if migration["version"] <= current or migration["version"] > target:
+                    continue
+                logger.info(f"Migration {migration['version']} ({migration['name']}) wird angewendet")
+                _apply_migration(cursor, migration)
+                connection.commit()
+                applied.append(migration["version"])
+            if max([current] + applied) >= PARTITION_SCHEMA_VERSION:
+                ensure_year_partitions(cursor)
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (MIGRATION_LOCK_NAME,))
+            cursor.fetchone()
+    finally:
+        cursor.close()
+    return applied
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Kommandozeile: migriert die per DB_* Umgebungsvariablen konfigurierte Datenbank."""
+    from database_manager import DatabaseManager
+
+    argv = list(sys.argv[1:] if argv is None else argv)
+    logging.basicConfig(level=logging.INFO)
+    target = int(argv[0]) if argv else None
+    ssl_raw = os.getenv("DB_SSL_DISABLED")
+    db_manager = DatabaseManager(
+        host=os.getenv("DB_HOST", "localhost"),
+        database=os.getenv("DB_NAME", "nomina"),
+        user=os.getenv("DB_USER", "root"),
+        password=os.getenv("DB_PASSWORD", ""),
+        port=int(os.getenv("DB_PORT", "3307")),
+        ssl_disabled=str(ssl_raw).strip().lower() in {"1", "true", "yes", "y", "on"} if ssl_raw is not None else False,
+    )
+    result = db_manager.migrate(target)
+    if not result["success"]:
+        print(f"✗ Migration fehlgeschlagen: {result['error']}")
+        return 1
+    print(f"✓ Schema-Version {result['from_version']} -> {result['to_version']} "
+          f"(angewendet: {result['applied'] or 'keine'})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
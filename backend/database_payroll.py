@@ -0,0 +1,484 @@
+"""
+Vorberechnete Monatswerte der Gehaltsabrechnung (t006_valores_calculados_mensuales)
+
+Pro (Mitarbeiter, Jahr, Monat) wird eine Zeile mit Monatsgehalt, den Eingangswerten
+aus t003/t004, den Carry-Over-Beträgen und den abgeleiteten Summen gespeichert.
+Exporte und UI lesen diese Zeilen mit einer Bereichsabfrage über (anio, mes).
+
+Invalidierung: Trigger auf t001/t002/t003/t004/t008/t010 (Migration 7) löschen nur die
+betroffenen t006-Zeilen und merken deren Schlüssel in PAYROLL_QUEUE_TABLE vor. Nach dem
+Commit des Schreibers (after-commit-Hook der Unit of Work) schreibt refresh_pending_payroll
+genau diese Zeilen neu. Zeilen, die bis dahin fehlen oder mit einem anderen Auszahlungsmonat
+berechnet wurden, berechnen die Lesepfade (get_payroll_month, Exporte) im Speicher nach,
+ohne t006 zu schreiben.
+
+Geschrieben wird t006 nur über refresh_payroll_month: Eingangswerte werden dort mit FOR SHARE
+gelesen und in derselben Transaktion geschrieben, so dass eine parallele Änderung erst nach
+dem Upsert greift und dessen Zeile wieder per Trigger löscht (und erneut vormerkt).
+"""
+
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+PAYROLL_TABLE = "t006_valores_calculados_mensuales"
+PAYROLL_QUEUE_TABLE = "t006_valores_calculados_mensuales_pendientes"
+
+# Schreibzugriffe auf diese Tabellen löschen t006-Zeilen per Trigger (Migration 7)
+PAYROLL_INPUT_TABLES = frozenset({
+    "t001_empleados",
+    "t002_salarios",
+    "t003_ingresos_brutos_mensuales",
+    "t004_deducciones_mensuales",
+    "t008_empleado_fte",
+    "t010_carry_over",
+})
+
+# Eingangswerte aus t003/t004, die unverändert übernommen werden
+PAYROLL_INPUT_COLUMNS = [
+    "ticket_restaurant",
+    "cotizacion_especie",
+    "primas",
+    "beca_escolar",
+    "lavado_coche",
+    "dietas_cotizables",
+    "horas_extras",
+    "seguro_pensiones",
+    "seguro_accidentes",
+    "dietas_exentas",
+    "formacion",
+    "adelas",
+    "sanitas",
+    "gasolina",
+    "dias_exentos",
+]
+
+# Carry-Over concept -> Spalte in t006
+CARRY_OVER_COLUMNS = {
+    "salary": "carry_salary",
+    "primas": "carry_primas",
+    "horas_extras": "carry_horas_extras",
+    "dietas_cotizables": "carry_dietas_cotizables",
+    "dietas_exentas": "carry_dietas_exentas",
+    "anticipos": "carry_anticipos",
+    "cotizacion_especie": "carry_cotizacion_especie",
+}
+
+PAYROLL_VALUE_COLUMNS = (
+    ["modalidad", "payout_month", "salario_mes"]
+    + PAYROLL_INPUT_COLUMNS
+    + list(CARRY_OVER_COLUMNS.values())
+    + [
+        "seguro_medico",
+        "total",
+        "anticipos",
+        "total_especie",
+        "base_imponible",
+        "dietas_cotizables_total",
+        "dietas_exentas_total",
+        "tickets_total",
+    ]
+)
+
+
+class DatabaseManagerPayrollMixin:
+    PAYROLL_REFRESH_CHUNK = 500
+
+    def _prorate_salary_for_hire_month(
+        self,
+        year: int,
+        month: int,
+        fecha_alta: Any,
+        salario_mes: float,
+    ) -> float:
+        try:
+            if not fecha_alta:
+                return float(salario_mes or 0)
+
+            if isinstance(fecha_alta, str):
+                try:
+                    fecha_alta_date = date.fromisoformat(fecha_alta[:10])
+                except Exception:
+                    return float(salario_mes or 0)
+            elif isinstance(fecha_alta, date):
+                fecha_alta_date = fecha_alta
+            else:
+                return float(salario_mes or 0)
+
+            target_year = int(year)
+            target_month = int(month)
+            hire_year = int(fecha_alta_date.year)
+            hire_month = int(fecha_alta_date.month)
+
+            if (target_year, target_month) < (hire_year, hire_month):
+                return 0.0
+
+            if (target_year, target_month) != (hire_year, hire_month):
+                return float(salario_mes or 0)
+
+            day = int(fecha_alta_date.day)
+            employed_days = max(0, 30 - (day - 1))
+            return (float(salario_mes or 0) / 30.0) * float(employed_days)
+        except Exception:
+            return float(salario_mes or 0)
+
+    def _calculate_salario_mes_for_export(
+        self,
+        month: int,
+        payout_month: int,
+        salario_mensual_bruto: float,
+        atrasos: float,
+        salario_mensual_bruto_prev: float,
+        antiguedad: float,
+        fte_porcentaje: float = 100.0,
+    ) -> float:
+        salario_mensual_bruto = float(salario_mensual_bruto or 0)
+        atrasos = float(atrasos or 0)
+        salario_mensual_bruto_prev = float(salario_mensual_bruto_prev or 0)
+        antiguedad = float(antiguedad or 0)
+        fte_porcentaje = float(fte_porcentaje or 100.0)
+
+        months_before_payout = max(0, int(payout_month) - 1)
+        fte_factor = fte_porcentaje / 100.0
+
+        if months_before_payout > 0 and 1 <= int(month) <= months_before_payout:
+            # Vorjahresgehalt, nur Basis mit FTE, antiguedad voll
+            # Wenn Vorjahresgehalt 0 oder nicht vorhanden, verwendet aktuelles Gehalt
+            prev_salary = float(salario_mensual_bruto_prev or 0)
+            if prev_salary <= 0:
+                # Kein Vorjahresgehalt - verwendet aktuelles Gehalt
+                return (salario_mensual_bruto + antiguedad) * fte_factor
+            else:
+                return (prev_salary + antiguedad) * fte_factor
+        elif int(month) == int(payout_month):
+            # Neues Gehalt (reduzierte Basis) + monatsscharfe Atrasos + antiguedad
+            base_salary = (salario_mensual_bruto + antiguedad) * fte_factor
+            # Atrasos = Summe (new - old) * fte(k) für k=1..months_before_payout
+            # Nur berechnen wenn Vorjahresgehalt > 0
+            prev_salary = float(salario_mensual_bruto_prev or 0)
+            if prev_salary > 0 and months_before_payout > 0:
+                diff = salario_mensual_bruto - prev_salary
+                atrasos_total = 0.0
+                # Simulate month-specific FTE like frontend:
+                # January: 100% (no FTE reduction yet)
+                # February/March: current FTE (50%)
+                for k in range(1, months_before_payout + 1):
+                    if k == 1:  # January
+                        month_fte = 1.0
+                    else:  # February, March
+                        month_fte = fte_factor
+                    atrasos_total += diff * month_fte
+                return base_salary + atrasos_total
+            else:
+                # Keine Atrasos wenn kein Vorjahresgehalt
+                return base_salary
+        else:
+            # Normale Monate ab payoutMonth+1: neues Gehalt mit FTE, antiguedad voll
+            return (salario_mensual_bruto + antiguedad) * fte_factor
+
+    def _payroll_carry_over_map(self, year: int, month: int, employee_ids: List[int],
+                                lock_inputs: bool = False) -> Dict[int, Dict[str, float]]:
+        carry_map: Dict[int, Dict[str, float]] = {}
+        for r in self.get_carry_over_sums_for_apply(year, month, employee_ids, lock_rows=lock_inputs) or []:
+            try:
+                emp_id = int(r.get('id_empleado'))
+            except Exception:
+                continue
+            concept = str(r.get('concept', '')).strip().lower()
+            try:
+                amt = float(r.get('amount') or 0)
+            except Exception:
+                amt = 0.0
+            carry_map.setdefault(emp_id, {})
+            carry_map[emp_id][concept] = carry_map[emp_id].get(concept, 0.0) + amt
+        return carry_map
+
+    def calculate_payroll_rows(
+        self,
+        year: int,
+        month: int,
+        employee_ids: Optional[List[int]] = None,
+        payout_month: Optional[int] = None,
+        lock_inputs: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """Berechnet die t006-Werte eines Monats aus t001/t002/t003/t004/t010 und den FTE-Intervallen (t011).
+
+        Ohne employee_ids werden alle aktiven Mitarbeiter berechnet. lock_inputs=True liest die
+        Eingangszeilen mit FOR SHARE (nur innerhalb einer Transaktion sinnvoll, siehe refresh_payroll_month);
+        Datenbankfehler wie Lock-Timeouts werden dann weitergereicht statt als leeres Ergebnis geliefert.
+        """
+        year = int(year)
+        month = int(month)
+        if payout_month is None:
+            payout_month = self.get_payout_month()
+
+        employee_filter = ""
+        employee_params: tuple = ()
+        if employee_ids is not None:
+            employee_ids = [int(x) for x in employee_ids]
+            if not employee_ids:
+                return []
+            employee_filter = f"AND e.id_empleado IN ({', '.join(['%s'] * len(employee_ids))})"
+            employee_params = tuple(employee_ids)
+
+        # Archivierte Jahre liegen in t003/t004_archivo und werden mitgelesen. Das äußere
+        # FOR SHARE erreicht die UNION-Zweige nicht, sie sperren selbst (nur die gefilterten Zeilen)
+        month_where = "anio = %s AND mes = %s"
+        month_params: tuple = (year, month)
+        if employee_ids is not None:
+            month_where += f" AND id_empleado IN ({', '.join(['%s'] * len(employee_ids))})"
+            month_params += employee_params
+        locking = "FOR SHARE" if lock_inputs else ""
+        ingresos_source, ingresos_params = self._archived_source(
+            "t003_ingresos_brutos_mensuales", month_where, month_params, locking=locking)
+        deducciones_source, deducciones_params = self._archived_source(
+            "t004_deducciones_mensuales", month_where, month_params, locking=locking)
+
+        query = f"""
+        SELECT
+            e.id_empleado,
+            e.fecha_alta,
+            COALESCE(s.modalidad, 0) as modalidad,
+            COALESCE(s.salario_mensual_bruto, 0) as salario_mensual_bruto,
+            COALESCE(s.atrasos, 0) as atrasos,
+            COALESCE(s.antiguedad, 0) as antiguedad,
+            COALESCE(sp.salario_mensual_bruto, 0) as salario_mensual_bruto_prev,
+            COALESCE(fe.porcentaje, 100) as fte_porcentaje,
+            COALESCE(i.ticket_restaurant, 0) as ticket_restaurant,
+            COALESCE(d.cotizacion_especie, 0) as cotizacion_especie,
+            COALESCE(i.primas, 0) as primas,
+            COALESCE(i.beca_escolar, 0) as beca_escolar,
+            COALESCE(i.lavado_coche, 0) as lavado_coche,
+            COALESCE(i.dietas_cotizables, 0) as dietas_cotizables,
+            COALESCE(i.horas_extras, 0) as horas_extras,
+            COALESCE(i.seguro_pensiones, 0) as seguro_pensiones,
+            COALESCE(d.seguro_accidentes, 0) as seguro_accidentes,
+            COALESCE(i.dietas_exentas, 0) as dietas_exentas,
+            COALESCE(i.formacion, 0) as formacion,
+            COALESCE(d.adelas, 0) as adelas,
+            COALESCE(d.sanitas, 0) as sanitas,
+            COALESCE(d.gasolina, 0) as gasolina,
+            COALESCE(i.dias_exentos, 0) as dias_exentos
+        FROM t001_empleados e
+        LEFT JOIN t002_salarios s ON e.id_empleado = s.id_empleado AND s.anio = %s
+        LEFT JOIN t002_salarios sp ON e.id_empleado = sp.id_empleado AND sp.anio = %s
+        LEFT JOIN t011_empleado_fte_efectivo fe
+            ON fe.id_empleado = e.id_empleado AND fe.desde <= %s AND fe.hasta > %s
+        LEFT JOIN {ingresos_source} i ON e.id_empleado = i.id_empleado AND i.anio = %s AND i.mes = %s
+        LEFT JOIN {deducciones_source} d ON e.id_empleado = d.id_empleado AND d.anio = %s AND d.mes = %s
+        WHERE e.activo = TRUE
+        {employee_filter}
+        {locking}
+        """
+        fte_key = self._fte_month_key(year, month)
+        params = ((year, year - 1, fte_key, fte_key) + ingresos_params + (year, month)
+                  + deducciones_params + (year, month) + employee_params)
+        source_rows = self.execute_query(query, params, primary=True, raise_errors=lock_inputs)
+        if not source_rows:
+            return []
+
+        carry_map = self._payroll_carry_over_map(year, month, [int(r['id_empleado']) for r in source_rows],
+                                                 lock_inputs=lock_inputs)
+
+        rows: List[Dict[str, Any]] = []
+        for r in source_rows:
+            emp_id = int(r['id_empleado'])
+            salario_mes = self._calculate_salario_mes_for_export(
+                month=month,
+                payout_month=payout_month,
+                salario_mensual_bruto=r.get('salario_mensual_bruto', 0),
+                atrasos=r.get('atrasos', 0),
+                salario_mensual_bruto_prev=r.get('salario_mensual_bruto_prev', 0),
+                antiguedad=r.get('antiguedad', 0),
+                fte_porcentaje=r.get('fte_porcentaje', 100),
+            )
+            salario_mes = self._prorate_salary_for_hire_month(year, month, r.get('fecha_alta'), salario_mes)
+
+            row: Dict[str, Any] = {
+                'id_empleado': emp_id,
+                'anio': year,
+                'mes': month,
+                'modalidad': int(r.get('modalidad') or 0),
+                'payout_month': int(payout_month),
+                'salario_mes': float(salario_mes),
+            }
+            for col in PAYROLL_INPUT_COLUMNS:
+                row[col] = float(r.get(col) or 0)
+            carry = carry_map.get(emp_id, {})
+            for concept, col in CARRY_OVER_COLUMNS.items():
+                row[col] = float(carry.get(concept, 0.0))
+
+            # Abgeleitete Werte wie im Nómina-Export (inkl. Carry Over, beca_escolar, lavado_coche im Januar)
+            salario_total = row['salario_mes'] + row['carry_salary']
+            primas_total = row['primas'] + row['carry_primas'] + row['beca_escolar']
+            if month == 1:
+                primas_total += row['lavado_coche']
+            horas_total = row['horas_extras'] + row['carry_horas_extras']
+            cotizacion_total = row['cotizacion_especie'] + row['carry_cotizacion_especie']
+            row['dietas_cotizables_total'] = row['dietas_cotizables'] + row['carry_dietas_cotizables']
+            row['dietas_exentas_total'] = row['dietas_exentas'] + row['carry_dietas_exentas']
+            row['tickets_total'] = row['ticket_restaurant']
+            row['seguro_medico'] = row['adelas'] + row['sanitas']
+            row['total'] = (
+                salario_total
+                + row['ticket_restaurant']
+                + cotizacion_total
+                + primas_total
+                + row['dietas_cotizables_total']
+                + horas_total
+                + row['seguro_pensiones']
+                + row['seguro_accidentes']
+                + row['dietas_exentas_total']
+            )
+            row['anticipos'] = (
+                row['ticket_restaurant'] + row['dietas_cotizables_total'] + row['dietas_exentas_total'] + row['carry_anticipos']
+            )
+            row['total_especie'] = cotizacion_total + row['seguro_pensiones'] + row['seguro_accidentes']
+            row['base_imponible'] = salario_total + primas_total + horas_total
+
+            for col in PAYROLL_VALUE_COLUMNS:
+                if isinstance(row[col], float):
+                    row[col] = round(row[col], 2)
+            rows.append(row)
+        return rows
+
+    def refresh_payroll_month(
+        self,
+        year: int,
+        month: int,
+        employee_ids: Optional[List[int]] = None,
+    ) -> Dict[str, Any]:
+        """Berechnet t006 für einen Monat (optional nur für employee_ids) und schreibt per Upsert.
+
+        Lesen und Upsert laufen in einer Unit of Work (bzw. der laufenden): die Eingangszeilen
+        sind bis zum Commit mit FOR SHARE gesperrt, eine parallele Änderung wartet also und
+        löscht die geschriebene Zeile danach per Trigger, statt von veralteten Werten
+        überschrieben zu werden. Die vorgemerkten Schlüssel des Monats werden mit entfernt.
+        """
+        result: Dict[str, Any] = {"success": False, "rows": 0, "error": None}
+        try:
+            with self.unit_of_work():
+                rows = self.calculate_payroll_rows(year, month, employee_ids, lock_inputs=True)
+                dequeue = f"DELETE FROM {PAYROLL_QUEUE_TABLE} WHERE anio = %s AND mes = %s"
+                dequeue_params: tuple = (int(year), int(month))
+                if employee_ids is not None:
+                    dequeue += f" AND id_empleado IN ({', '.join(['%s'] * len(employee_ids))})"
+                    dequeue_params += tuple(int(x) for x in employee_ids)
+                if not self.execute_update(dequeue, dequeue_params):
+                    raise RuntimeError("Vorgemerkte Monatswerte konnten nicht entfernt werden")
+                if not rows:
+                    result["success"] = True
+                    return result
+
+                columns = ["id_empleado", "anio", "mes"] + PAYROLL_VALUE_COLUMNS
+                query = f"""
+                INSERT INTO {PAYROLL_TABLE} ({', '.join(columns)})
+                VALUES ({', '.join(['%s'] * len(columns))})
+                ON DUPLICATE KEY UPDATE {', '.join(f'{c} = VALUES({c})' for c in PAYROLL_VALUE_COLUMNS)}
+                """
+                batch = self.execute_batch(query, [tuple(r[c] for c in columns) for r in rows], chunk_size=self.PAYROLL_REFRESH_CHUNK)
+                if not batch.get("success"):
+                    raise RuntimeError(batch.get("error") or "Upsert fehlgeschlagen")
+            result["success"] = True
+            result["rows"] = len(rows)
+            return result
+        except Exception as e:
+            self.logger.error(f"Fehler beim Berechnen der Monatswerte {year}/{month}: {e}")
+            result["error"] = str(e)
+            return result
+
+    def refresh_pending_payroll(self) -> Dict[str, Any]:
+        """Schreibt die von den Triggern gelöschten und vorgemerkten t006-Zeilen neu.
+
+        Läuft als after-commit-Hook nach Schreibzugriffen auf PAYROLL_INPUT_TABLES. Schlägt ein
+        Monat fehl, bleiben seine Schlüssel vorgemerkt und werden beim nächsten Aufruf erneut
+        berechnet; bis dahin rechnen die Lesepfade im Speicher nach.
+        """
+        result: Dict[str, Any] = {"success": True, "rows": 0, "error": None}
+        pending = self.execute_query(
+            f"SELECT anio, mes, id_empleado FROM {PAYROLL_QUEUE_TABLE} ORDER BY anio, mes, id_empleado",
+            primary=True,
+        )
+        by_month: Dict[tuple, List[int]] = {}
+        for r in pending:
+            by_month.setdefault((int(r['anio']), int(r['mes'])), []).append(int(r['id_empleado']))
+        for (year, month), employee_ids in by_month.items():
+            for start in range(0, len(employee_ids), self.PAYROLL_REFRESH_CHUNK):
+                chunk = employee_ids[start:start + self.PAYROLL_REFRESH_CHUNK]
+                month_result = self.refresh_payroll_month(year, month, chunk)
+                result["rows"] += month_result["rows"]
+                if not month_result["success"]:
+                    result["success"] = False
+                    result["error"] = month_result["error"]
+        return result
+
+    def recalculate_payroll(self, year: int, month: Optional[int] = None) -> Dict[str, Any]:
+        """Berechnet t006 für alle aktiven Mitarbeiter eines Monats oder des ganzen Jahres neu."""
+        months = [int(month)] if month else list(range(1, 13))
+        result: Dict[str, Any] = {"success": True, "rows": 0, "months": {}, "error": None}
+        for m in months:
+            month_result = self.refresh_payroll_month(year, m)
+            result["months"][m] = month_result["rows"]
+            result["rows"] += month_result["rows"]
+            if not month_result["success"]:
+                result["success"] = False
+                result["error"] = month_result["error"]
+        return result
+
+    def _payroll_read_query(self, year: int, month: int, payout_month: int, extra: bool = False) -> (str, tuple):
+        """Eine Abfrage für alle aktiven Mitarbeiter: t001 in Indexreihenfolge (idx_t001_orden_nombre), t006 per Primärschlüssel.
+
+        Fehlende oder veraltete Zeilen erscheinen mit calc_id = NULL.
+        """
+        extra_where = "AND (c.id_empleado IS NULL OR c.modalidad = 14)" if extra else ""
+        value_columns = ",\n            ".join(f"c.{col}" for col in PAYROLL_VALUE_COLUMNS)
+        query = f"""
+        SELECT
+            e.id_empleado,
+            e.nombre,
+            e.apellido,
+            CONCAT(e.apellido, ', ', e.nombre) as nombre_completo,
+            e.ceco,
+            e.declaracion,
+            e.dni,
+            c.id_empleado as calc_id,
+            {value_columns}
+        FROM t001_empleados e
+        LEFT JOIN {PAYROLL_TABLE} c
+            ON c.id_empleado = e.id_empleado AND c.anio = %s AND c.mes = %s AND c.payout_month = %s
+        WHERE e.activo = TRUE
+        {extra_where}
+        ORDER BY e.apellido, e.nombre
+        """
+        return query, (int(year), int(month), int(payout_month))
+
+    def _calculate_missing_payroll_rows(self, year: int, month: int, employee_ids: List[int],
+                                        payout_month: int) -> Dict[int, Dict[str, Any]]:
+        """Berechnet fehlende t006-Zeilen im Speicher (ohne zu schreiben), nach id_empleado."""
+        computed = {
+            int(r['id_empleado']): r
+            for r in self.calculate_payroll_rows(year, month, employee_ids, payout_month=payout_month)
+        }
+        if set(employee_ids) - set(computed):
+            raise RuntimeError(f"Monatswerte {year}/{month} konnten nicht berechnet werden")
+        return computed
+
+    def get_payroll_month(self, year: int, month: int, extra: bool = False) -> List[Dict[str, Any]]:
+        """Liefert die vorberechneten Monatswerte; fehlende Zeilen werden im Speicher ergänzt (t006 bleibt unverändert)."""
+        try:
+            payout_month = self.get_payout_month()
+            query, params = self._payroll_read_query(year, month, payout_month, extra)
+            rows = self.execute_query(query, params)
+            missing = [int(r['id_empleado']) for r in rows if r.get('calc_id') is None]
+            if missing:
+                computed = self._calculate_missing_payroll_rows(year, month, missing, payout_month)
+                for r in rows:
+                    if r.get('calc_id') is None:
+                        r.update({col: computed[int(r['id_empleado'])][col] for col in PAYROLL_VALUE_COLUMNS})
+                if extra:
+                    rows = [r for r in rows if r.get('modalidad') == 14]
+            for r in rows:
+                r.pop('calc_id', None)
+            return rows
+        except Exception as e:
+            self.logger.error(f"Fehler beim Lesen der Monatswerte {year}/{month}: {e}")
+            return []
@@ -0,0 +1,141 @@
+"""
+Connection-Pool mit fairer Warteschlange und Overflow
+
+mysql.connector.pooling.MySQLConnectionPool wirft sofort PoolError, wenn alle Verbindungen
+vergeben sind. QueuedConnectionPool legt eine FIFO-Warteschlange mit Timeout davor und
+erlaubt zusätzliche Overflow-Verbindungen außerhalb des Pools. Tote Verbindungen erkennt
+bereits MySQLConnectionPool.get_connection (is_connected() pingt, danach reconnect; schlägt
+der fehl, legt es die Verbindung selbst in den Pool zurück) – ein eigener Ping wäre ein
+zweiter Round Trip pro Checkout.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+import mysql.connector
+from mysql.connector import pooling
+from mysql.connector.errors import PoolError
+
+# Obergrenze von mysql.connector für pool_size
+MAX_POOL_SIZE = pooling.CNX_POOL_MAXSIZE
+
+
+class PooledConnection:
+    """Proxy um eine ausgecheckte Verbindung; close() gibt sie an den QueuedConnectionPool zurück."""
+
+    def __init__(self, pool: "QueuedConnectionPool", cnx, overflow: bool):
+        self._queued_pool = pool
+        self._cnx = cnx
+        self._overflow = overflow
+        self._closed = False
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._queued_pool._release(self._cnx, self._overflow)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._cnx, name)
+
+
+class QueuedConnectionPool:
+    def __init__(
+        self,
+        pool_name: str,
+        pool_size: int = 10,
+        max_overflow: int = 0,
+        timeout: float = 10.0,
+        **connect_kwargs: Any,
+    ):
+        self.pool_size = max(1, min(int(pool_size), MAX_POOL_SIZE))
+        self.max_overflow = max(0, int(max_overflow))
+        self.timeout = max(0.0, float(timeout))
+        self._connect_kwargs = dict(connect_kwargs)
+        self._cond = threading.Condition()
+        self._waiters: deque = deque()
+        self._in_use = 0
+        self._overflow_in_use = 0
+        self._stats = {"created": 0, "checkouts": 0, "timeouts": 0}
+        self._pool = pooling.MySQLConnectionPool(
+            pool_name=pool_name,
+            pool_size=self.pool_size,
+            pool_reset_session=True,
+            **connect_kwargs,
+        )
+        self._stats["created"] += self.pool_size
+
+    @property
+    def capacity(self) -> int:
+        return self.pool_size + self.max_overflow
+
+    def get_connection(self, timeout: Optional[float] = None) -> PooledConnection:
+        """Checkt eine Verbindung aus; wartet in FIFO-Reihenfolge höchstens timeout Sekunden."""
+        wait = self.timeout if timeout is None else max(0.0, float(timeout))
+        deadline = time.monotonic() + wait
+        ticket = object()
+        with self._cond:
+            self._waiters.append(ticket)
+            try:
+                while self._waiters[0] is not ticket or self._in_use >= self.capacity:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        raise PoolError(
+                            f"Keine freie Datenbankverbindung innerhalb von {wait:.1f}s "
+                            f"(in Benutzung: {self._in_use}, wartend: {len(self._waiters)})"
+                        )
+                    self._cond.wait(remaining)
+                self._in_use += 1
+                self._stats["checkouts"] += 1
+            finally:
+                self._waiters.remove(ticket)
+                # Der nächste Wartende prüft erneut, ob er an der Reihe ist
+                self._cond.notify_all()
+
+        try:
+            cnx, overflow = self._checkout()
+        except BaseException:
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify_all()
+            raise
+        return PooledConnection(self, cnx, overflow)
+
+    def _checkout(self):
+        try:
+            cnx = self._pool.get_connection()
+        except PoolError:
+            # Pool-Slots sind vergeben, die Kapazität erlaubt aber Overflow
+            cnx = mysql.connector.connect(**self._connect_kwargs)
+            with self._cond:
+                self._overflow_in_use += 1
+                self._stats["created"] += 1
+            return cnx, True
+        return cnx, False
+
+    def _release(self, cnx, overflow: bool) -> None:
+        try:
+            cnx.close()
+        finally:
+            with self._cond:
+                self._in_use -= 1
+                if overflow:
+                    self._overflow_in_use -= 1
+                self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "pool_size": self.pool_size,
+                "max_overflow": self.max_overflow,
+                "timeout": self.timeout,
+                "in_use": self._in_use,
+                "overflow_in_use": self._overflow_in_use,
+                "waiting": len(self._waiters),
+                "created": self._stats["created"],
+                "checkouts": self._stats["checkouts"],
+                "timeouts": self._stats["timeouts"],
+            }
@@ -0,0 +1,123 @@
+"""
+Gehaltshistorie pro Mitarbeiter für die atrasos-Kette der Folgejahre
+
+Nach einer Änderung am Gehalt eines Jahres (add_salary, update_salary, Gehaltskopie,
+Gehaltserhöhungen) werden atrasos und Monatsgehälter aller späteren Jahre
+neu bestimmt. Die Historie wird dafür mit einer Abfrage geladen (SALARY_HISTORY_COLUMNS, nach
+Jahr sortiert), die Kette im Speicher berechnet und nur geänderte Zeilen werden mit
+einem UPDATE ... JOIN pro Chunk (salary_update_statement) zurückgeschrieben.
+"""
+
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+SALARY_HISTORY_COLUMNS = (
+    "id_empleado, anio, modalidad, salario_anual_bruto, salario_mensual_bruto, "
+    "atrasos, salario_mensual_con_atrasos"
+)
+SALARY_UPDATE_CHUNK_SIZE = 500
+
+_CENT = Decimal("0.01")
+
+
+def _money(value: Any) -> Optional[Decimal]:
+    if value is None:
+        return None
+    return Decimal(str(value)).quantize(_CENT, rounding=ROUND_HALF_UP)
+
+
+def atrasos_amount(salary: Decimal, previous_salary: Decimal, divisor: int, months_before_payout: int) -> Decimal:
+    """Nachzahlung (atrasos) eines Jahres gegenüber seinem Vorjahr.
+
+    Regel: (Jahresgehalt - Vorjahresgehalt) / divisor * Monate vor der Auszahlung, nie
+    negativ (eine Gehaltssenkung ergibt 0); ein nicht positives Vorjahresgehalt ergibt 0.
+    recalculate_all_atrasos_for_year wendet dieselbe Regel per GREATEST(0, ...) in SQL an.
+    """
+    if previous_salary <= 0:
+        return Decimal(0)
+    return max(Decimal(0), (salary - previous_salary) / divisor * months_before_payout)
+
+
+class SalaryYear:
+    """Eine Zeile aus t002_salarios (nur die Felder der atrasos-Kette)."""
+
+    __slots__ = ("anio", "modalidad", "salario_anual_bruto", "salario_mensual_bruto",
+                 "atrasos", "salario_mensual_con_atrasos")
+
+    def __init__(self, anio: int, modalidad: int, salario_anual_bruto: Any,
+                 salario_mensual_bruto: Any = None, atrasos: Any = None,
+                 salario_mensual_con_atrasos: Any = None):
+        self.anio = int(anio)
+        self.modalidad = int(modalidad)
+        self.salario_anual_bruto = Decimal(str(salario_anual_bruto or 0))
+        self.salario_mensual_bruto = _money(salario_mensual_bruto)
+        self.atrasos = _money(atrasos)
+        self.salario_mensual_con_atrasos = _money(salario_mensual_con_atrasos)
+
+    @property
+    def monthly_salary(self) -> Decimal:
+        return self.salario_anual_bruto / (self.modalidad if self.modalidad in (12, 14) else 12)
+
+
+class SalaryHistory:
+    """Nach Jahr sortierte Gehaltsjahre eines Mitarbeiters."""
+
+    __slots__ = ("employee_id", "years")
+
+    def __init__(self, employee_id: int, years: Iterable[SalaryYear] = ()):
+        self.employee_id = employee_id
+        self.years: Dict[int, SalaryYear] = {y.anio: y for y in sorted(years, key=lambda y: y.anio)}
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict[str, Any]]) -> Dict[int, "SalaryHistory"]:
+        """Gruppiert Zeilen mit SALARY_HISTORY_COLUMNS nach id_empleado."""
+        grouped: Dict[int, List[SalaryYear]] = {}
+        for row in rows:
+            grouped.setdefault(row["id_empleado"], []).append(SalaryYear(
+                row["anio"], row["modalidad"], row["salario_anual_bruto"],
+                row.get("salario_mensual_bruto"), row.get("atrasos"), row.get("salario_mensual_con_atrasos"),
+            ))
+        return {employee_id: cls(employee_id, years) for employee_id, years in grouped.items()}
+
+    def subsequent_year_updates(self, base_year: int, months_before_payout: int) -> List[Tuple]:
+        """(id_empleado, anio, atrasos, Monatsgehalt) für alle Jahre nach base_year, deren Werte sich ändern.
+
+        Jahre ohne Vorjahreszeile werden übersprungen und bleiben unverändert. Nur das Jahr
+        base_year + 1 erhält atrasos (atrasos_amount, bei modalidad 12 oder 14), spätere
+        Jahre erhalten 0. salario_mensual_con_atrasos ist das Monatsgehalt ohne atrasos.
+        """
+        updates: List[Tuple] = []
+        for anio, current in self.years.items():
+            if anio <= base_year:
+                continue
+            previous = self.years.get(anio - 1)
+            if previous is None:
+                continue
+            atrasos = Decimal(0)
+            if anio == base_year + 1 and current.modalidad in (12, 14):
+                atrasos = atrasos_amount(current.salario_anual_bruto, previous.salario_anual_bruto,
+                                         current.modalidad, months_before_payout)
+            atrasos = _money(atrasos)
+            monthly = _money(current.monthly_salary)
+            if (atrasos, monthly, monthly) == (current.atrasos, current.salario_mensual_con_atrasos,
+                                               current.salario_mensual_bruto):
+                continue
+            current.atrasos = atrasos
+            current.salario_mensual_con_atrasos = monthly
+            current.salario_mensual_bruto = monthly
+            updates.append((self.employee_id, anio, atrasos, monthly))
+        return updates
+
+
+def salary_update_statement(updates: List[Tuple]) -> Tuple[str, Tuple]:
+    """Ein UPDATE ... JOIN für die Zeilen aus subsequent_year_updates (höchstens SALARY_UPDATE_CHUNK_SIZE)."""
+    first = "SELECT %s AS id_empleado, %s AS anio, %s AS atrasos, %s AS mensual"
+    rows = " UNION ALL ".join([first] + ["SELECT %s, %s, %s, %s"] * (len(updates) - 1))
+    query = f"""
+    UPDATE t002_salarios s
+    INNER JOIN ({rows}) u ON u.id_empleado = s.id_empleado AND u.anio = s.anio
+    SET s.atrasos = u.atrasos,
+        s.salario_mensual_con_atrasos = u.mensual,
+        s.salario_mensual_bruto = u.mensual
+    """
+    return query, tuple(value for row in updates for value in row)
@@ -0,0 +1,148 @@
+"""
+Suchindex für die Mitarbeitersuche
+
+Trigramm-Postings über nombre, apellido, ceco und dni, akzent- und
+großschreibungsneutral (NFKD ohne Kombinationszeichen, casefold). Der Index liegt im
+Prozess und wird nach Änderungen an t001_empleados beim nächsten Suchaufruf neu
+aufgebaut (DatabaseManager._ensure_search_index): eigene Schreibzugriffe sofort über die
+Tabellen-Generation des Lese-Caches, Schreibzugriffe anderer Prozesse über den
+Versionszähler in t013_versiones_empleado, der höchstens alle
+SEARCH_VERSION_CHECK_SECONDS abgefragt wird. max_age_seconds begrenzt zusätzlich das
+Alter des Index.
+"""
+
+import threading
+import time
+import unicodedata
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+# Durchsuchte Felder in Ranking-Reihenfolge bei gleicher Punktzahl
+SEARCH_FIELDS = ("apellido", "nombre", "ceco", "dni")
+# Felder eines Treffers (wie bisher die SQL-Suche)
+RESULT_FIELDS = ("id_empleado", "nombre", "apellido", "ceco", "activo")
+SEARCH_RESULT_LIMIT = 50
+# Abstand der Abfragen des t001-Versionszählers (Änderungen anderer Prozesse)
+SEARCH_VERSION_CHECK_SECONDS = 5.0
+
+
+def fold(text: Any) -> str:
+    """Kleinschreibung ohne Akzente: 'Núñez' -> 'nunez'."""
+    if text is None:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", str(text))
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).casefold().strip()
+
+
+def trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class _Document:
+    __slots__ = ("row", "fields", "words", "sort_key")
+
+    def __init__(self, row: Dict[str, Any]):
+        self.row = {field: row.get(field) for field in RESULT_FIELDS}
+        self.fields = tuple(fold(row.get(field)) for field in SEARCH_FIELDS)
+        self.words = tuple(tuple(value.split()) for value in self.fields)
+        self.sort_key = (not row.get("activo"), self.fields[0], self.fields[1], row["id_empleado"])
+
+    def score(self, token: str) -> int:
+        """3 = ganzes Feld, 2 = Wortanfang, 1 = Teilstring, 0 = kein Treffer."""
+        best = 0
+        for value, words in zip(self.fields, self.words):
+            if token not in value:
+                continue
+            if value == token:
+                return 3
+            if any(word.startswith(token) for word in words):
+                best = 2
+            else:
+                best = max(best, 1)
+        return best
+
+
+class EmployeeSearchIndex:
+    """Thread-sicherer Trigramm-Index; build() ersetzt den Stand atomar."""
+
+    def __init__(self, max_age_seconds: float = 300.0):
+        self.max_age_seconds = float(max_age_seconds)
+        self._lock = threading.Lock()
+        self._state: Optional[Tuple[Any, float, Dict[int, _Document], Dict[str, Set[int]]]] = None
+
+    def is_current(self, version: Any) -> bool:
+        """Index vorhanden, zu dieser Version gebaut und nicht älter als max_age_seconds."""
+        state = self._state
+        if state is None or state[0] != version:
+            return False
+        return time.monotonic() - state[1] < self.max_age_seconds
+
+    def build(self, rows: Iterable[Dict[str, Any]], version: Any) -> int:
+        documents: Dict[int, _Document] = {}
+        postings: Dict[str, Set[int]] = {}
+        for row in rows:
+            document = _Document(row)
+            emp_id = row["id_empleado"]
+            documents[emp_id] = document
+            for value in document.fields:
+                for gram in trigrams(value):
+                    postings.setdefault(gram, set()).add(emp_id)
+        with self._lock:
+            self._state = (version, time.monotonic(), documents, postings)
+        return len(documents)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._state = None
+
+    def _candidates(self, token: str, documents: Dict[int, _Document],
+                    postings: Dict[str, Set[int]]) -> Iterable[int]:
+        grams = trigrams(token)
+        if not grams:
+            # Ein/zwei Zeichen: keine Trigramme, Prüfung gegen alle Dokumente
+            return documents.keys()
+        sets = sorted((postings.get(gram, set()) for gram in grams), key=len)
+        result = set(sets[0])
+        for other in sets[1:]:
+            result &= other
+            if not result:
+                break
+        return result
+
+    def search(self, term: str, limit: int = SEARCH_RESULT_LIMIT) -> List[Dict[str, Any]]:
+        """Alle Wörter des Suchbegriffs müssen in einem der Felder vorkommen.
+
+        Ranking: exakte ID, dann Summe der Wort-Punkte (ganzes Feld > Wortanfang >
+        Teilstring), danach aktive Mitarbeiter vor inaktiven, apellido, nombre.
+        """
+        state = self._state
+        if state is None:
+            return []
+        _, _, documents, postings = state
+        tokens = fold(term).split()
+        if not tokens:
+            return []
+
+        scored: Dict[int, int] = {}
+        raw = str(term).strip()
+        if raw.isdigit() and int(raw) in documents:
+            scored[int(raw)] = 100
+
+        candidates: Optional[Set[int]] = None
+        for token in sorted(tokens, key=len, reverse=True):
+            found = set(self._candidates(token, documents, postings))
+            candidates = found if candidates is None else candidates & found
+            if not candidates:
+                break
+        for emp_id in candidates or ():
+            document = documents[emp_id]
+            total = 0
+            for token in tokens:
+                points = document.score(token)
+                if not points:
+                    break
+                total += points
+            else:
+                scored[emp_id] = scored.get(emp_id, 0) + total
+
+        ranked = sorted(scored, key=lambda emp_id: (-scored[emp_id], documents[emp_id].sort_key))
+        return [dict(documents[emp_id].row) for emp_id in ranked[:max(1, int(limit))]]
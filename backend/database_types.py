@@ -0,0 +1,97 @@
+"""
+Typ-Konvertierung auf Cursor-Ebene und passender Flask JSON Provider
+
+Der Converter wird dem Connection-Pool als converter_class übergeben, so dass DECIMAL- und
+DATE/DATETIME-Spalten genau einmal beim Lesen in den gewünschten Python-Typ umgewandelt
+werden (statt später in Exporten, JSON-Encodern und create_change_details erneut).
+
+Modi:
+  decimal_mode: "decimal" (Standard, decimal.Decimal) oder "float"
+  date_mode:    "date" (Standard, date/datetime) oder "iso" (ISO-8601-Strings)
+
+Integer-Cent wird bewusst nicht poolweit angeboten: sämtliche Berechnungen im
+DatabaseManager arbeiten in Euro und würden Cent-Werte still falsch vergleichen.
+"""
+
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, Optional, Type
+
+from flask.json.provider import DefaultJSONProvider
+from mysql.connector.conversion import MySQLConverter
+from werkzeug.http import http_date
+
+DECIMAL_MODES = ("decimal", "float")
+DATE_MODES = ("date", "iso")
+
+
+def _validate_mode(value: Optional[str], allowed: tuple, name: str) -> str:
+    mode = (value or allowed[0]).strip().lower()
+    if mode not in allowed:
+        raise ValueError(f"Ungültiger Wert für {name}: {value!r} (erlaubt: {', '.join(allowed)})")
+    return mode
+
+
+def make_converter_class(decimal_mode: str = "decimal", date_mode: str = "date") -> Optional[Type[MySQLConverter]]:
+    """Liefert eine MySQLConverter-Unterklasse für die Modi, oder None für das Standardverhalten."""
+    decimal_mode = _validate_mode(decimal_mode, DECIMAL_MODES, "decimal_mode")
+    date_mode = _validate_mode(date_mode, DATE_MODES, "date_mode")
+    if decimal_mode == "decimal" and date_mode == "date":
+        return None
+
+    attrs: Dict[str, Any] = {"decimal_mode": decimal_mode, "date_mode": date_mode}
+
+    if decimal_mode == "float":
+        def _decimal_to_python(self, value, desc=None):
+            return float(value)
+        attrs["_decimal_to_python"] = _decimal_to_python
+        attrs["_newdecimal_to_python"] = _decimal_to_python
+
+    if date_mode == "iso":
+        def _date_to_python(self, value, desc=None):
+            # MySQL liefert DATE bereits als YYYY-MM-DD
+            return value.decode(self.charset) if isinstance(value, (bytes, bytearray)) else str(value)
+
+        def _datetime_to_python(self, value, desc=None):
+            text = value.decode(self.charset) if isinstance(value, (bytes, bytearray)) else str(value)
+            return text.replace(" ", "T", 1)
+
+        attrs["_date_to_python"] = _date_to_python
+        attrs["_newdate_to_python"] = _date_to_python
+        attrs["_datetime_to_python"] = _datetime_to_python
+        attrs["_timestamp_to_python"] = _datetime_to_python
+
+    return type(f"RrhhConverter_{decimal_mode}_{date_mode}", (MySQLConverter,), attrs)
+
+
+class NativeJSONProvider(DefaultJSONProvider):
+    """JSON Provider mit Typ-Tabelle statt isinstance-Kette.
+
+    Werte, die der Converter bereits als float/str liefert, werden ohne default()-Aufruf
+    serialisiert. Verbleibende Decimal/date-Objekte werden per exaktem Typ nachgeschlagen;
+    ohne Konfiguration entspricht die Ausgabe dem Flask-Standard (Decimal als String,
+    Datum im HTTP-Format).
+    """
+
+    def __init__(self, app, decimal_mode: str = "decimal", date_mode: str = "date"):
+        super().__init__(app)
+        self.configure(decimal_mode, date_mode)
+
+    def configure(self, decimal_mode: str = "decimal", date_mode: str = "date") -> None:
+        decimal_mode = _validate_mode(decimal_mode, DECIMAL_MODES, "decimal_mode")
+        date_mode = _validate_mode(date_mode, DATE_MODES, "date_mode")
+        decimal_fn: Callable[[Any], Any] = float if decimal_mode == "float" else str
+        date_fn: Callable[[Any], Any] = (lambda o: o.isoformat()) if date_mode == "iso" else http_date
+        self._dispatch: Dict[type, Callable[[Any], Any]] = {
+            Decimal: decimal_fn,
+            date: date_fn,
+            datetime: date_fn,
+            uuid.UUID: str,
+        }
+
+    def default(self, o: Any) -> Any:
+        fn = self._dispatch.get(type(o))
+        if fn is not None:
+            return fn(o)
+        return super().default(o)
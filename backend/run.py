@@ -7,6 +7,11 @@ import os
 import sys
 
 def main():
+    # "python run.py migrate [version]" spielt nur die Schema-Migrationen ein
+    if len(sys.argv) > 1 and sys.argv[1] == "migrate":
+        from database_migrations import main as migrate_main
+        sys.exit(migrate_main(sys.argv[2:]))
+
     # Überprüfen ob die erforderlichen Pakete installiert sind
     try:
         import flask
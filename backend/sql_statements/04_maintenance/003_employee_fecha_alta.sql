@@ -0,0 +1,5 @@
+-- ============================================================================
+-- MIGRATION 3: Eintrittsdatum der Mitarbeiter
+-- Ältere Installationen haben t001_empleados ohne fecha_alta
+-- ============================================================================
+ALTER TABLE t001_empleados ADD COLUMN fecha_alta DATE NULL;
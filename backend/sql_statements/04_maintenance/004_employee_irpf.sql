@@ -0,0 +1,6 @@
+-- ============================================================================
+-- MIGRATION 4: IRPF-Stammdaten der Mitarbeiter
+-- declaracion und dni für den IRPF-Export
+-- ============================================================================
+ALTER TABLE t001_empleados ADD COLUMN declaracion VARCHAR(20) NULL;
+ALTER TABLE t001_empleados ADD COLUMN dni VARCHAR(50) NULL;
@@ -0,0 +1,6 @@
+-- ============================================================================
+-- MIGRATION 5: Eine gasolina Spalte statt gasolina_arval / gasolina_ald
+-- ============================================================================
+ALTER TABLE t004_deducciones_mensuales ADD COLUMN gasolina DECIMAL(10,2) DEFAULT 0.00;
+ALTER TABLE t004_deducciones_mensuales DROP COLUMN gasolina_arval;
+ALTER TABLE t004_deducciones_mensuales DROP COLUMN gasolina_ald;
@@ -0,0 +1,19 @@
+-- ============================================================================
+-- MIGRATION 6: Carry-Over (Nachzahlungen aus Vormonaten)
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS t010_carry_over (
+    id_carry_over INT AUTO_INCREMENT PRIMARY KEY,
+    id_empleado INT NOT NULL,
+    source_anio INT NOT NULL,
+    source_mes INT NOT NULL,
+    apply_anio INT NOT NULL,
+    apply_mes INT NOT NULL,
+    concept VARCHAR(50) NOT NULL,
+    amount DECIMAL(12,2) NOT NULL DEFAULT 0.00,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    INDEX idx_t010_apply (apply_anio, apply_mes),
+    INDEX idx_t010_source (source_anio, source_mes),
+    INDEX idx_t010_empleado (id_empleado),
+    FOREIGN KEY (id_empleado) REFERENCES t001_empleados(id_empleado) ON DELETE CASCADE
+);
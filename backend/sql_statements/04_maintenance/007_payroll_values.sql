@@ -0,0 +1,155 @@
+-- ============================================================================
+-- MIGRATION 7: Vorberechnete Monatswerte (t006_valores_calculados_mensuales)
+-- t006 enthält alle Werte, die die Exporte bisher in pandas aus fünf Tabellen
+-- berechnet haben. Trigger auf den Eingangstabellen löschen nur die betroffenen
+-- Zeilen und merken deren Schlüssel in t006_valores_calculados_mensuales_pendientes
+-- vor; der DatabaseManager schreibt sie nach dem Commit des Schreibers neu.
+-- ============================================================================
+ALTER TABLE t006_valores_calculados_mensuales
+    ADD COLUMN modalidad INT DEFAULT 0,
+    ADD COLUMN payout_month INT NOT NULL DEFAULT 0,
+    ADD COLUMN salario_mes DECIMAL(12,2) DEFAULT 0.00,
+    ADD COLUMN ticket_restaurant DECIMAL(10,2) DEFAULT 0.00,
+    ADD COLUMN cotizacion_especie DECIMAL(10,2) DEFAULT 0.00,
+    ADD COLUMN primas DECIMAL(10,2) DEFAULT 0.00,
+    ADD COLUMN beca_escolar DECIMAL(10,2) DEFAULT 0.00,
+    ADD COLUMN lavado_coche DECIMAL(10,2) DEFAULT 0.00,
+    ADD COLUMN dietas_cotizables DECIMAL(10,2) DEFAULT 0.00,
+    ADD COLUMN horas_extras DECIMAL(10,2) DEFAULT 0.00,
+    ADD COLUMN seguro_pensiones DECIMAL(10,2) DEFAULT 0.00,
+    ADD COLUMN seguro_accidentes DECIMAL(10,2) DEFAULT 0.00,
+    ADD COLUMN dietas_exentas DECIMAL(10,2) DEFAULT 0.00,
+    ADD COLUMN formacion DECIMAL(10,2) DEFAULT 0.00,
+    ADD COLUMN adelas DECIMAL(10,2) DEFAULT 0.00,
+    ADD COLUMN sanitas DECIMAL(10,2) DEFAULT 0.00,
+    ADD COLUMN gasolina DECIMAL(10,2) DEFAULT 0.00,
+    ADD COLUMN seguro_medico DECIMAL(10,2) DEFAULT 0.00,
+    ADD COLUMN carry_salary DECIMAL(12,2) DEFAULT 0.00,
+    ADD COLUMN carry_primas DECIMAL(12,2) DEFAULT 0.00,
+    ADD COLUMN carry_horas_extras DECIMAL(12,2) DEFAULT 0.00,
+    ADD COLUMN carry_dietas_cotizables DECIMAL(12,2) DEFAULT 0.00,
+    ADD COLUMN carry_dietas_exentas DECIMAL(12,2) DEFAULT 0.00,
+    ADD COLUMN carry_anticipos DECIMAL(12,2) DEFAULT 0.00,
+    ADD COLUMN carry_cotizacion_especie DECIMAL(12,2) DEFAULT 0.00,
+    ADD INDEX idx_t006_anio_mes (anio, mes);
+
+-- Schlüssel gelöschter Zeilen bis zur Neuberechnung (refresh_pending_payroll)
+CREATE TABLE IF NOT EXISTS t006_valores_calculados_mensuales_pendientes (
+    id_empleado INT NOT NULL,
+    anio INT NOT NULL,
+    mes INT NOT NULL,
+    PRIMARY KEY (anio, mes, id_empleado),
+    FOREIGN KEY (id_empleado) REFERENCES t001_empleados(id_empleado) ON DELETE CASCADE
+);
+
+CREATE TRIGGER trg_t006_pendientes_del
+AFTER DELETE ON t006_valores_calculados_mensuales
+FOR EACH ROW
+INSERT IGNORE INTO t006_valores_calculados_mensuales_pendientes (id_empleado, anio, mes)
+VALUES (OLD.id_empleado, OLD.anio, OLD.mes);
+
+-- Gehalt (anio): betrifft das Jahr selbst und das Folgejahr (Vorjahresgehalt vor dem Auszahlungsmonat)
+CREATE TRIGGER trg_t006_salarios_ins
+AFTER INSERT ON t002_salarios
+FOR EACH ROW
+DELETE FROM t006_valores_calculados_mensuales
+WHERE id_empleado = NEW.id_empleado AND anio IN (NEW.anio, NEW.anio + 1);
+
+CREATE TRIGGER trg_t006_salarios_upd
+AFTER UPDATE ON t002_salarios
+FOR EACH ROW
+DELETE FROM t006_valores_calculados_mensuales
+WHERE (id_empleado = NEW.id_empleado AND anio IN (NEW.anio, NEW.anio + 1))
+   OR (id_empleado = OLD.id_empleado AND anio IN (OLD.anio, OLD.anio + 1));
+
+CREATE TRIGGER trg_t006_salarios_del
+AFTER DELETE ON t002_salarios
+FOR EACH ROW
+DELETE FROM t006_valores_calculados_mensuales
+WHERE id_empleado = OLD.id_empleado AND anio IN (OLD.anio, OLD.anio + 1);
+
+-- Monatliche Ingresos/Deducciones: genau ein Monat
+CREATE TRIGGER trg_t006_ingresos_ins
+AFTER INSERT ON t003_ingresos_brutos_mensuales
+FOR EACH ROW
+DELETE FROM t006_valores_calculados_mensuales
+WHERE id_empleado = NEW.id_empleado AND anio = NEW.anio AND mes = NEW.mes;
+
+CREATE TRIGGER trg_t006_ingresos_upd
+AFTER UPDATE ON t003_ingresos_brutos_mensuales
+FOR EACH ROW
+DELETE FROM t006_valores_calculados_mensuales
+WHERE (id_empleado = NEW.id_empleado AND anio = NEW.anio AND mes = NEW.mes)
+   OR (id_empleado = OLD.id_empleado AND anio = OLD.anio AND mes = OLD.mes);
+
+CREATE TRIGGER trg_t006_ingresos_del
+AFTER DELETE ON t003_ingresos_brutos_mensuales
+FOR EACH ROW
+DELETE FROM t006_valores_calculados_mensuales
+WHERE id_empleado = OLD.id_empleado AND anio = OLD.anio AND mes = OLD.mes;
+
+CREATE TRIGGER trg_t006_deducciones_ins
+AFTER INSERT ON t004_deducciones_mensuales
+FOR EACH ROW
+DELETE FROM t006_valores_calculados_mensuales
+WHERE id_empleado = NEW.id_empleado AND anio = NEW.anio AND mes = NEW.mes;
+
+CREATE TRIGGER trg_t006_deducciones_upd
+AFTER UPDATE ON t004_deducciones_mensuales
+FOR EACH ROW
+DELETE FROM t006_valores_calculados_mensuales
+WHERE (id_empleado = NEW.id_empleado AND anio = NEW.anio AND mes = NEW.mes)
+   OR (id_empleado = OLD.id_empleado AND anio = OLD.anio AND mes = OLD.mes);
+
+CREATE TRIGGER trg_t006_deducciones_del
+AFTER DELETE ON t004_deducciones_mensuales
+FOR EACH ROW
+DELETE FROM t006_valores_calculados_mensuales
+WHERE id_empleado = OLD.id_empleado AND anio = OLD.anio AND mes = OLD.mes;
+
+-- FTE gilt ab (anio, mes) bis zum nächsten Eintrag: alle späteren Monate
+CREATE TRIGGER trg_t006_fte_ins
+AFTER INSERT ON t008_empleado_fte
+FOR EACH ROW
+DELETE FROM t006_valores_calculados_mensuales
+WHERE id_empleado = NEW.id_empleado AND (anio > NEW.anio OR (anio = NEW.anio AND mes >= NEW.mes));
+
+CREATE TRIGGER trg_t006_fte_upd
+AFTER UPDATE ON t008_empleado_fte
+FOR EACH ROW
+DELETE FROM t006_valores_calculados_mensuales
+WHERE (id_empleado = NEW.id_empleado AND (anio > NEW.anio OR (anio = NEW.anio AND mes >= NEW.mes)))
+   OR (id_empleado = OLD.id_empleado AND (anio > OLD.anio OR (anio = OLD.anio AND mes >= OLD.mes)));
+
+CREATE TRIGGER trg_t006_fte_del
+AFTER DELETE ON t008_empleado_fte
+FOR EACH ROW
+DELETE FROM t006_valores_calculados_mensuales
+WHERE id_empleado = OLD.id_empleado AND (anio > OLD.anio OR (anio = OLD.anio AND mes >= OLD.mes));
+
+-- Carry-Over: Monat, in dem der Betrag angewendet wird
+CREATE TRIGGER trg_t006_carry_over_ins
+AFTER INSERT ON t010_carry_over
+FOR EACH ROW
+DELETE FROM t006_valores_calculados_mensuales
+WHERE id_empleado = NEW.id_empleado AND anio = NEW.apply_anio AND mes = NEW.apply_mes;
+
+CREATE TRIGGER trg_t006_carry_over_upd
+AFTER UPDATE ON t010_carry_over
+FOR EACH ROW
+DELETE FROM t006_valores_calculados_mensuales
+WHERE (id_empleado = NEW.id_empleado AND anio = NEW.apply_anio AND mes = NEW.apply_mes)
+   OR (id_empleado = OLD.id_empleado AND anio = OLD.apply_anio AND mes = OLD.apply_mes);
+
+CREATE TRIGGER trg_t006_carry_over_del
+AFTER DELETE ON t010_carry_over
+FOR EACH ROW
+DELETE FROM t006_valores_calculados_mensuales
+WHERE id_empleado = OLD.id_empleado AND anio = OLD.apply_anio AND mes = OLD.apply_mes;
+
+-- Eintrittsdatum: Anteilsberechnung im Eintrittsmonat
+CREATE TRIGGER trg_t006_empleados_upd
+AFTER UPDATE ON t001_empleados
+FOR EACH ROW
+DELETE FROM t006_valores_calculados_mensuales
+WHERE id_empleado = NEW.id_empleado AND NOT (OLD.fecha_alta <=> NEW.fecha_alta);
@@ -0,0 +1,24 @@
+-- ============================================================================
+-- MIGRATION 8: Effektiver FTE pro Mitarbeiter als Intervalle
+-- Ein FTE-Eintrag in t008 gilt ab (anio, mes) bis zum nächsten Eintrag.
+-- desde/hasta sind Monatsindizes (anio * 12 + mes - 1), hasta exklusiv;
+-- 2147483647 = offenes Ende. Gepflegt von upsert_employee_fte/delete_employee_fte.
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS t011_empleado_fte_efectivo (
+    id_empleado INT NOT NULL,
+    desde INT NOT NULL,
+    hasta INT NOT NULL,
+    porcentaje DECIMAL(5,2) NOT NULL,
+    PRIMARY KEY (id_empleado, desde),
+    FOREIGN KEY (id_empleado) REFERENCES t001_empleados(id_empleado) ON DELETE CASCADE
+);
+
+DELETE FROM t011_empleado_fte_efectivo;
+
+INSERT INTO t011_empleado_fte_efectivo (id_empleado, desde, hasta, porcentaje)
+SELECT
+    id_empleado,
+    anio * 12 + mes - 1,
+    COALESCE(LEAD(anio * 12 + mes - 1) OVER (PARTITION BY id_empleado ORDER BY anio, mes), 2147483647),
+    porcentaje
+FROM t008_empleado_fte;
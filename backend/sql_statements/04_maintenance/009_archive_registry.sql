@@ -0,0 +1,32 @@
+-- ============================================================================
+-- MIGRATION 9: Register archivierter Jahre
+-- DatabaseManager.archive_year() verschiebt abgeschlossene Jahre aus t003/t004/t007
+-- in die komprimierten *_archivo-Tabellen (angelegt von Migration 10) und trägt
+-- das Jahr hier ein. Archivierte Jahre sind schreibgeschützt.
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS t012_anios_archivados (
+    anio INT PRIMARY KEY,
+    archivado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+DELIMITER $$
+
+CREATE TRIGGER trg_t003_anio_archivado
+BEFORE INSERT ON t003_ingresos_brutos_mensuales
+FOR EACH ROW
+BEGIN
+    IF EXISTS (SELECT 1 FROM t012_anios_archivados WHERE anio = NEW.anio) THEN
+        SIGNAL SQLSTATE '45000' SET MESSAGE_TEXT = 'Jahr ist archiviert';
+    END IF;
+END$$
+
+CREATE TRIGGER trg_t004_anio_archivado
+BEFORE INSERT ON t004_deducciones_mensuales
+FOR EACH ROW
+BEGIN
+    IF EXISTS (SELECT 1 FROM t012_anios_archivados WHERE anio = NEW.anio) THEN
+        SIGNAL SQLSTATE '45000' SET MESSAGE_TEXT = 'Jahr ist archiviert';
+    END IF;
+END$$
+
+DELIMITER ;
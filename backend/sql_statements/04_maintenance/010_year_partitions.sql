@@ -0,0 +1,16 @@
+-- ============================================================================
+-- MIGRATION 10: Jahrespartitionen und Archivtabellen (nur Platzhalter)
+--
+-- Diese Version hat kein SQL-Skript: die Partitionsgrenzen hängen vom
+-- Datenbestand ab, deshalb läuft sie als Python-Schritt
+-- database_migrations.migrate_year_partitions (siehe MIGRATIONS).
+--
+-- Partitionierte InnoDB-Tabellen dürfen keine Fremdschlüssel haben. Die
+-- Migration entfernt daher alle Fremdschlüssel von t003/t004/t007
+-- (t003/t004 -> t001 ON DELETE CASCADE, t007 -> t001 ON DELETE SET NULL,
+-- t007 -> t005 usuario_login) und setzt den Primärschlüssel von t007 auf
+-- (id_registro, fecha). Ersatz-Trigger für diese Fremdschlüssel legt
+-- Migration 11 (011_partition_integrity.sql) an.
+--
+-- Die Datei wird von load_migrations nicht gelesen.
+-- ============================================================================
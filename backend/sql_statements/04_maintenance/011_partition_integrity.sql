@@ -0,0 +1,150 @@
+-- ============================================================================
+-- MIGRATION 11: Referentielle Integrität der partitionierten Tabellen
+--
+-- Migration 10 hat die Fremdschlüssel von t003/t004/t007 entfernt (partitionierte
+-- InnoDB-Tabellen erlauben keine). Diese Trigger ersetzen sie, einschließlich der
+-- Archivtabellen *_archivo:
+--   t003/t004.id_empleado -> t001  ON DELETE CASCADE
+--   t007.id_empleado      -> t001  ON DELETE SET NULL
+--   t007.usuario_login    -> t005  (RESTRICT)
+-- Verstöße melden SQLSTATE 23000 wie ein Fremdschlüssel (IntegrityError).
+-- ============================================================================
+
+-- Verwaiste Zeilen aus der Zeit ohne Fremdschlüssel (Version 10) bereinigen,
+-- wie es CASCADE bzw. SET NULL getan hätte
+DELETE c FROM t003_ingresos_brutos_mensuales c
+LEFT JOIN t001_empleados e ON e.id_empleado = c.id_empleado WHERE e.id_empleado IS NULL;
+DELETE c FROM t003_ingresos_brutos_mensuales_archivo c
+LEFT JOIN t001_empleados e ON e.id_empleado = c.id_empleado WHERE e.id_empleado IS NULL;
+DELETE c FROM t004_deducciones_mensuales c
+LEFT JOIN t001_empleados e ON e.id_empleado = c.id_empleado WHERE e.id_empleado IS NULL;
+DELETE c FROM t004_deducciones_mensuales_archivo c
+LEFT JOIN t001_empleados e ON e.id_empleado = c.id_empleado WHERE e.id_empleado IS NULL;
+UPDATE t007_registro_procesamiento r
+LEFT JOIN t001_empleados e ON e.id_empleado = r.id_empleado
+SET r.id_empleado = NULL WHERE r.id_empleado IS NOT NULL AND e.id_empleado IS NULL;
+UPDATE t007_registro_procesamiento_archivo r
+LEFT JOIN t001_empleados e ON e.id_empleado = r.id_empleado
+SET r.id_empleado = NULL WHERE r.id_empleado IS NOT NULL AND e.id_empleado IS NULL;
+
+DELIMITER $$
+
+-- Elterntabelle t001: Kaskade bzw. SET NULL, Schlüsseländerung nur ohne Kindzeilen
+CREATE TRIGGER trg_t001_partitioned_refs_del
+BEFORE DELETE ON t001_empleados
+FOR EACH ROW
+BEGIN
+    DELETE FROM t003_ingresos_brutos_mensuales WHERE id_empleado = OLD.id_empleado;
+    DELETE FROM t003_ingresos_brutos_mensuales_archivo WHERE id_empleado = OLD.id_empleado;
+    DELETE FROM t004_deducciones_mensuales WHERE id_empleado = OLD.id_empleado;
+    DELETE FROM t004_deducciones_mensuales_archivo WHERE id_empleado = OLD.id_empleado;
+    UPDATE t007_registro_procesamiento SET id_empleado = NULL WHERE id_empleado = OLD.id_empleado;
+    UPDATE t007_registro_procesamiento_archivo SET id_empleado = NULL WHERE id_empleado = OLD.id_empleado;
+END$$
+
+CREATE TRIGGER trg_t001_partitioned_refs_upd
+BEFORE UPDATE ON t001_empleados
+FOR EACH ROW
+BEGIN
+    IF NEW.id_empleado <> OLD.id_empleado AND (
+        EXISTS (SELECT 1 FROM t003_ingresos_brutos_mensuales WHERE id_empleado = OLD.id_empleado)
+        OR EXISTS (SELECT 1 FROM t003_ingresos_brutos_mensuales_archivo WHERE id_empleado = OLD.id_empleado)
+        OR EXISTS (SELECT 1 FROM t004_deducciones_mensuales WHERE id_empleado = OLD.id_empleado)
+        OR EXISTS (SELECT 1 FROM t004_deducciones_mensuales_archivo WHERE id_empleado = OLD.id_empleado)
+        OR EXISTS (SELECT 1 FROM t007_registro_procesamiento WHERE id_empleado = OLD.id_empleado)
+        OR EXISTS (SELECT 1 FROM t007_registro_procesamiento_archivo WHERE id_empleado = OLD.id_empleado)
+    ) THEN
+        SIGNAL SQLSTATE '23000' SET MESSAGE_TEXT = 'id_empleado wird von t003/t004/t007 referenziert';
+    END IF;
+END$$
+
+-- Kindtabellen: Mitarbeiter muss existieren
+CREATE TRIGGER trg_t003_empleado_ins
+BEFORE INSERT ON t003_ingresos_brutos_mensuales
+FOR EACH ROW
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM t001_empleados WHERE id_empleado = NEW.id_empleado) THEN
+        SIGNAL SQLSTATE '23000' SET MESSAGE_TEXT = 'Mitarbeiter existiert nicht (t003)';
+    END IF;
+END$$
+
+CREATE TRIGGER trg_t003_empleado_upd
+BEFORE UPDATE ON t003_ingresos_brutos_mensuales
+FOR EACH ROW
+BEGIN
+    IF NEW.id_empleado <> OLD.id_empleado
+       AND NOT EXISTS (SELECT 1 FROM t001_empleados WHERE id_empleado = NEW.id_empleado) THEN
+        SIGNAL SQLSTATE '23000' SET MESSAGE_TEXT = 'Mitarbeiter existiert nicht (t003)';
+    END IF;
+END$$
+
+CREATE TRIGGER trg_t004_empleado_ins
+BEFORE INSERT ON t004_deducciones_mensuales
+FOR EACH ROW
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM t001_empleados WHERE id_empleado = NEW.id_empleado) THEN
+        SIGNAL SQLSTATE '23000' SET MESSAGE_TEXT = 'Mitarbeiter existiert nicht (t004)';
+    END IF;
+END$$
+
+CREATE TRIGGER trg_t004_empleado_upd
+BEFORE UPDATE ON t004_deducciones_mensuales
+FOR EACH ROW
+BEGIN
+    IF NEW.id_empleado <> OLD.id_empleado
+       AND NOT EXISTS (SELECT 1 FROM t001_empleados WHERE id_empleado = NEW.id_empleado) THEN
+        SIGNAL SQLSTATE '23000' SET MESSAGE_TEXT = 'Mitarbeiter existiert nicht (t004)';
+    END IF;
+END$$
+
+CREATE TRIGGER trg_t007_refs_ins
+BEFORE INSERT ON t007_registro_procesamiento
+FOR EACH ROW
+BEGIN
+    IF NEW.id_empleado IS NOT NULL
+       AND NOT EXISTS (SELECT 1 FROM t001_empleados WHERE id_empleado = NEW.id_empleado) THEN
+        SIGNAL SQLSTATE '23000' SET MESSAGE_TEXT = 'Mitarbeiter existiert nicht (t007)';
+    END IF;
+    IF NOT EXISTS (SELECT 1 FROM t005_usuarios WHERE nombre_usuario = NEW.usuario_login) THEN
+        SIGNAL SQLSTATE '23000' SET MESSAGE_TEXT = 'Benutzer existiert nicht (t007)';
+    END IF;
+END$$
+
+CREATE TRIGGER trg_t007_refs_upd
+BEFORE UPDATE ON t007_registro_procesamiento
+FOR EACH ROW
+BEGIN
+    IF NEW.id_empleado IS NOT NULL AND NOT (NEW.id_empleado <=> OLD.id_empleado)
+       AND NOT EXISTS (SELECT 1 FROM t001_empleados WHERE id_empleado = NEW.id_empleado) THEN
+        SIGNAL SQLSTATE '23000' SET MESSAGE_TEXT = 'Mitarbeiter existiert nicht (t007)';
+    END IF;
+    IF NEW.usuario_login <> OLD.usuario_login
+       AND NOT EXISTS (SELECT 1 FROM t005_usuarios WHERE nombre_usuario = NEW.usuario_login) THEN
+        SIGNAL SQLSTATE '23000' SET MESSAGE_TEXT = 'Benutzer existiert nicht (t007)';
+    END IF;
+END$$
+
+-- Elterntabelle t005: Benutzer mit Protokolleinträgen bleiben bestehen (RESTRICT)
+CREATE TRIGGER trg_t005_registro_refs_del
+BEFORE DELETE ON t005_usuarios
+FOR EACH ROW
+BEGIN
+    IF EXISTS (SELECT 1 FROM t007_registro_procesamiento WHERE usuario_login = OLD.nombre_usuario)
+       OR EXISTS (SELECT 1 FROM t007_registro_procesamiento_archivo WHERE usuario_login = OLD.nombre_usuario) THEN
+        SIGNAL SQLSTATE '23000' SET MESSAGE_TEXT = 'Benutzer wird von t007 referenziert';
+    END IF;
+END$$
+
+CREATE TRIGGER trg_t005_registro_refs_upd
+BEFORE UPDATE ON t005_usuarios
+FOR EACH ROW
+BEGIN
+    IF NEW.nombre_usuario <> OLD.nombre_usuario AND (
+        EXISTS (SELECT 1 FROM t007_registro_procesamiento WHERE usuario_login = OLD.nombre_usuario)
+        OR EXISTS (SELECT 1 FROM t007_registro_procesamiento_archivo WHERE usuario_login = OLD.nombre_usuario)
+    ) THEN
+        SIGNAL SQLSTATE '23000' SET MESSAGE_TEXT = 'Benutzer wird von t007 referenziert';
+    END IF;
+END$$
+
+DELIMITER ;
@@ -0,0 +1,25 @@
+-- ============================================================================
+-- MIGRATION 12: Deckende Indizes für Export- und Listenabfragen
+--
+-- idx_t001_orden_nombre: Exporte/Monatswerte (_payroll_read_query: WHERE activo = TRUE
+--   ORDER BY apellido, nombre) und get_all_employees_with_salaries lesen t001 in
+--   Indexreihenfolge ohne Filesort und ohne Zugriff auf die Tabellenzeilen.
+-- idx_t001_activo_categoria: get_active_employee_ids(_filtered); id_empleado ist als
+--   Primärschlüssel implizit im Index, ORDER BY id_empleado braucht keinen Sort.
+-- idx_t002_anio: copy_salaries_to_new_year filtert nach anio (Quelle und NOT IN auf
+--   das Zieljahr) und liest modalidad/antiguedad/salario_anual_bruto aus dem Index.
+--   Die beiden t002-Joins pro Zeile in den Exporten laufen über den Primärschlüssel
+--   (id_empleado, anio) und sind als Clustered Index bereits deckend.
+-- idx_t008_empleado_fecha dupliziert den Primärschlüssel (id_empleado, anio, mes).
+-- ============================================================================
+ALTER TABLE t001_empleados
+    ADD INDEX idx_t001_orden_nombre (apellido, nombre, activo, ceco, categoria, fecha_alta, declaracion, dni);
+
+ALTER TABLE t001_empleados
+    ADD INDEX idx_t001_activo_categoria (activo, categoria);
+
+ALTER TABLE t002_salarios
+    ADD INDEX idx_t002_anio (anio, modalidad, antiguedad, salario_anual_bruto);
+
+ALTER TABLE t008_empleado_fte
+    DROP INDEX idx_t008_empleado_fecha;
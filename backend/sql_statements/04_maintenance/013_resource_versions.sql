@@ -0,0 +1,182 @@
+-- ============================================================================
+-- MIGRATION 13: Versionszähler für bedingte GETs (ETag)
+--
+-- t013_versiones_empleado zählt pro Mitarbeiter und Quelltabelle jede eingefügte,
+-- geänderte oder gelöschte Zeile. get_resource_version bildet das ETag aus diesen
+-- Zählern (Summe über alle Mitarbeiter für die Listen); anders als
+-- fecha_modificacion (Sekundenauflösung) ändert jeder Schreibzugriff den Wert.
+-- Zeilen werden nie gelöscht (auch nicht mit dem Mitarbeiter), damit die Summen
+-- monoton steigen. Die Zähler werden in der Transaktion des Schreibers erhöht und
+-- sind damit genau dann sichtbar, wenn die geänderten Daten es sind.
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS t013_versiones_empleado (
+    id_empleado INT NOT NULL,
+    tabla VARCHAR(64) NOT NULL,
+    version BIGINT UNSIGNED NOT NULL DEFAULT 0,
+    PRIMARY KEY (id_empleado, tabla),
+    INDEX idx_t013_tabla (tabla, version)
+);
+
+DELIMITER $$
+
+CREATE TRIGGER trg_t001_version_ins
+AFTER INSERT ON t001_empleados
+FOR EACH ROW
+BEGIN
+    INSERT INTO t013_versiones_empleado (id_empleado, tabla, version)
+    VALUES (NEW.id_empleado, 't001_empleados', 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER trg_t001_version_upd
+AFTER UPDATE ON t001_empleados
+FOR EACH ROW
+BEGIN
+    INSERT INTO t013_versiones_empleado (id_empleado, tabla, version)
+    VALUES (NEW.id_empleado, 't001_empleados', 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+    IF NOT (OLD.id_empleado <=> NEW.id_empleado) THEN
+        INSERT INTO t013_versiones_empleado (id_empleado, tabla, version)
+        VALUES (OLD.id_empleado, 't001_empleados', 1)
+        ON DUPLICATE KEY UPDATE version = version + 1;
+    END IF;
+END$$
+
+CREATE TRIGGER trg_t001_version_del
+AFTER DELETE ON t001_empleados
+FOR EACH ROW
+BEGIN
+    INSERT INTO t013_versiones_empleado (id_empleado, tabla, version)
+    VALUES (OLD.id_empleado, 't001_empleados', 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER trg_t002_version_ins
+AFTER INSERT ON t002_salarios
+FOR EACH ROW
+BEGIN
+    INSERT INTO t013_versiones_empleado (id_empleado, tabla, version)
+    VALUES (NEW.id_empleado, 't002_salarios', 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER trg_t002_version_upd
+AFTER UPDATE ON t002_salarios
+FOR EACH ROW
+BEGIN
+    INSERT INTO t013_versiones_empleado (id_empleado, tabla, version)
+    VALUES (NEW.id_empleado, 't002_salarios', 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+    IF NOT (OLD.id_empleado <=> NEW.id_empleado) THEN
+        INSERT INTO t013_versiones_empleado (id_empleado, tabla, version)
+        VALUES (OLD.id_empleado, 't002_salarios', 1)
+        ON DUPLICATE KEY UPDATE version = version + 1;
+    END IF;
+END$$
+
+CREATE TRIGGER trg_t002_version_del
+AFTER DELETE ON t002_salarios
+FOR EACH ROW
+BEGIN
+    INSERT INTO t013_versiones_empleado (id_empleado, tabla, version)
+    VALUES (OLD.id_empleado, 't002_salarios', 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER trg_t003_version_ins
+AFTER INSERT ON t003_ingresos_brutos_mensuales
+FOR EACH ROW
+BEGIN
+    INSERT INTO t013_versiones_empleado (id_empleado, tabla, version)
+    VALUES (NEW.id_empleado, 't003_ingresos_brutos_mensuales', 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER trg_t003_version_upd
+AFTER UPDATE ON t003_ingresos_brutos_mensuales
+FOR EACH ROW
+BEGIN
+    INSERT INTO t013_versiones_empleado (id_empleado, tabla, version)
+    VALUES (NEW.id_empleado, 't003_ingresos_brutos_mensuales', 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+    IF NOT (OLD.id_empleado <=> NEW.id_empleado) THEN
+        INSERT INTO t013_versiones_empleado (id_empleado, tabla, version)
+        VALUES (OLD.id_empleado, 't003_ingresos_brutos_mensuales', 1)
+        ON DUPLICATE KEY UPDATE version = version + 1;
+    END IF;
+END$$
+
+CREATE TRIGGER trg_t003_version_del
+AFTER DELETE ON t003_ingresos_brutos_mensuales
+FOR EACH ROW
+BEGIN
+    INSERT INTO t013_versiones_empleado (id_empleado, tabla, version)
+    VALUES (OLD.id_empleado, 't003_ingresos_brutos_mensuales', 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER trg_t004_version_ins
+AFTER INSERT ON t004_deducciones_mensuales
+FOR EACH ROW
+BEGIN
+    INSERT INTO t013_versiones_empleado (id_empleado, tabla, version)
+    VALUES (NEW.id_empleado, 't004_deducciones_mensuales', 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER trg_t004_version_upd
+AFTER UPDATE ON t004_deducciones_mensuales
+FOR EACH ROW
+BEGIN
+    INSERT INTO t013_versiones_empleado (id_empleado, tabla, version)
+    VALUES (NEW.id_empleado, 't004_deducciones_mensuales', 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+    IF NOT (OLD.id_empleado <=> NEW.id_empleado) THEN
+        INSERT INTO t013_versiones_empleado (id_empleado, tabla, version)
+        VALUES (OLD.id_empleado, 't004_deducciones_mensuales', 1)
+        ON DUPLICATE KEY UPDATE version = version + 1;
+    END IF;
+END$$
+
+CREATE TRIGGER trg_t004_version_del
+AFTER DELETE ON t004_deducciones_mensuales
+FOR EACH ROW
+BEGIN
+    INSERT INTO t013_versiones_empleado (id_empleado, tabla, version)
+    VALUES (OLD.id_empleado, 't004_deducciones_mensuales', 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER trg_t008_version_ins
+AFTER INSERT ON t008_empleado_fte
+FOR EACH ROW
+BEGIN
+    INSERT INTO t013_versiones_empleado (id_empleado, tabla, version)
+    VALUES (NEW.id_empleado, 't008_empleado_fte', 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER trg_t008_version_upd
+AFTER UPDATE ON t008_empleado_fte
+FOR EACH ROW
+BEGIN
+    INSERT INTO t013_versiones_empleado (id_empleado, tabla, version)
+    VALUES (NEW.id_empleado, 't008_empleado_fte', 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+    IF NOT (OLD.id_empleado <=> NEW.id_empleado) THEN
+        INSERT INTO t013_versiones_empleado (id_empleado, tabla, version)
+        VALUES (OLD.id_empleado, 't008_empleado_fte', 1)
+        ON DUPLICATE KEY UPDATE version = version + 1;
+    END IF;
+END$$
+
+CREATE TRIGGER trg_t008_version_del
+AFTER DELETE ON t008_empleado_fte
+FOR EACH ROW
+BEGIN
+    INSERT INTO t013_versiones_empleado (id_empleado, tabla, version)
+    VALUES (OLD.id_empleado, 't008_empleado_fte', 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+DELIMITER ;
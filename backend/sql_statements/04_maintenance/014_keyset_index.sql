@@ -0,0 +1,13 @@
+-- ============================================================================
+-- MIGRATION 14: Keyset-Index für die seitenweise Mitarbeiterliste
+--
+-- get_employees_with_salaries_page blättert über (apellido, nombre, id_empleado).
+-- In idx_t001_orden_nombre steht der Primärschlüssel bisher implizit am Ende, nach
+-- den deckenden Spalten; damit kann MySQL die Sortierung nach id_empleado bei
+-- gleichem Namen nicht aus dem Index lesen. id_empleado rückt direkt hinter nombre,
+-- die Seite wird als Bereichsscan mit LIMIT gelesen und bleibt deckend für die
+-- Exportabfragen (WHERE activo = TRUE ORDER BY apellido, nombre).
+-- ============================================================================
+ALTER TABLE t001_empleados
+    DROP INDEX idx_t001_orden_nombre,
+    ADD INDEX idx_t001_orden_nombre (apellido, nombre, id_empleado, activo, ceco, categoria, fecha_alta, declaracion, dni);
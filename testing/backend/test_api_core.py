@@ -206,6 +206,15 @@ class TestFlaskAPICore:
         response = client.get('/employees/999', headers=auth_headers)
         assert response.status_code == 404
 
+    @patch('app.db_manager')
+    def test_get_employee_pool_exhausted(self, mock_db_manager, client, auth_headers):
+        """Test erschöpfter Connection-Pool liefert 500 statt 404"""
+        from mysql.connector.errors import PoolError
+        mock_db_manager.get_employee_complete_info.side_effect = PoolError("Keine freie Datenbankverbindung")
+
+        response = client.get('/employees/1', headers=auth_headers)
+        assert response.status_code == 500
+
 
 
     @patch('app.db_manager')
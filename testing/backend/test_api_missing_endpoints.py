@@ -245,6 +245,17 @@ class TestFlaskAPIMissingEndpoints:
         assert response.status_code == 200
         data = json.loads(response.data)
         assert data['success'] is True
+        mock_db_manager.copy_salaries_to_new_year.assert_called_once_with(2026, dry_run=False)
+
+    @patch('app.db_manager')
+    def test_copy_salaries_to_year_dry_run(self, mock_db_manager, client, auth_headers):
+        """Test POST /salaries/copy-to-year/{year}?dry_run=true reicht dry_run durch"""
+        mock_db_manager.copy_salaries_to_new_year.return_value = {'success': True, 'employees': []}
+
+        response = client.post('/salaries/copy-to-year/2026?dry_run=true', headers=auth_headers)
+
+        assert response.status_code == 200
+        mock_db_manager.copy_salaries_to_new_year.assert_called_once_with(2026, dry_run=True)
 
     def test_all_endpoints_require_authentication(self, client):
         """Test dass alle geschützten Endpunkte Authentifizierung benötigen"""
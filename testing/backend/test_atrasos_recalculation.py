@@ -0,0 +1,68 @@
+import pytest
+import sys
+import os
+from decimal import Decimal
+from unittest.mock import Mock, patch
+
+# Backend-Verzeichnis zum Pfad hinzufügen
+backend_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'backend'))
+sys.path.insert(0, backend_path)
+
+from mysql.connector import Error
+
+from database_manager import DatabaseManager
+
+
+class TestRecalculateAllAtrasos:
+    """Tests für die mengenbasierte Neuberechnung der Atrasos eines Jahres"""
+
+    @pytest.fixture
+    def db_manager(self):
+        manager = DatabaseManager('localhost', 'test_db', 'test_user', 'test_password', 3307)
+        # Nachberechnung von t006 nach dem Commit hat eigene Tests (test_payroll_values.py)
+        manager.refresh_pending_payroll = Mock()
+        return manager
+
+    @pytest.fixture
+    def mock_connection(self):
+        connection = Mock()
+        connection.cursor.return_value = Mock()
+        return connection
+
+    def test_constant_round_trips(self, db_manager, mock_connection):
+        cursor = mock_connection.cursor.return_value
+        cursor.fetchall.return_value = [{'id_empleado': i, 'atrasos': Decimal('150.00')} for i in range(1, 301)]
+        with patch.object(DatabaseManager, '_create_connection', return_value=mock_connection), \
+                patch.object(db_manager, 'get_payout_month', return_value=4), \
+                patch.object(db_manager, 'execute_query') as mock_query:
+            result = db_manager.recalculate_all_atrasos_for_year(2025)
+
+        assert cursor.execute.call_count == 2
+        update_query, update_params = cursor.execute.call_args_list[0].args
+        assert "LEFT JOIN t002_salarios p ON p.id_empleado = s.id_empleado AND p.anio = s.anio - 1" in update_query
+        assert update_query.count("%s") == len(update_params)
+        assert update_params == (3, 3, 2025)
+        mock_connection.commit.assert_called_once()
+        mock_query.assert_not_called()
+
+        assert result['success'] is True
+        assert result['updated_count'] == result['total_count'] == 300
+        assert result['employees'][0] == {'id_empleado': 1, 'atrasos': Decimal('150.00')}
+        assert result['errors'] == []
+
+    def test_no_salaries(self, db_manager, mock_connection):
+        mock_connection.cursor.return_value.fetchall.return_value = []
+        with patch.object(DatabaseManager, '_create_connection', return_value=mock_connection):
+            result = db_manager.recalculate_all_atrasos_for_year(2019)
+        assert result['success'] is False
+        assert result['updated_count'] == 0
+        assert "2019" in result['message']
+
+    def test_failure_rolls_back(self, db_manager, mock_connection):
+        mock_connection.cursor.return_value.execute.side_effect = Error("Lock wait timeout")
+        with patch.object(DatabaseManager, '_create_connection', return_value=mock_connection):
+            result = db_manager.recalculate_all_atrasos_for_year(2025)
+        assert result['success'] is False
+        assert result['errors'] == ["Lock wait timeout"]
+        mock_connection.rollback.assert_called_once()
+        mock_connection.commit.assert_not_called()
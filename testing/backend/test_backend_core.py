@@ -304,46 +304,39 @@ class TestDatabaseManagerCore:
         except ImportError:
             pytest.skip('openpyxl nicht verfügbar')
 
-        rows = [
-            {
-                'nombre_completo': 'Test, User',
-                'ceco': '1001',
-                'modalidad': 14,
-                'salario_mensual_bruto': 2000,
-                'atrasos': 0,
-                'antiguedad': 0,
-                'salario_mensual_bruto_prev': 1900,
-                'ticket_restaurant': 0,
-                'cotizacion_especie': 0,
-                'primas': 0,
-                'dietas_cotizables': 0,
-                'horas_extras': 0,
-                'seguro_pensiones': 0,
-                'seguro_accidentes': 0,
-                'dietas_exentas': 0,
-                'formacion': 0,
-                'adelas': 0,
-                'sanitas': 0,
-                'gasolina': 0,
-                'dias_exentos': 0,
-            }
-        ]
+        from database_payroll import PAYROLL_VALUE_COLUMNS
+
+        row = {
+            'id_empleado': 1,
+            'nombre': 'User',
+            'apellido': 'Test',
+            'nombre_completo': 'Test, User',
+            'ceco': '1001',
+            'declaracion': None,
+            'dni': None,
+            'calc_id': 1,
+        }
+        row.update({col: 0 for col in PAYROLL_VALUE_COLUMNS})
+        row.update({'modalidad': 14, 'payout_month': 4, 'salario_mes': 2000})
+        rows = [row]
 
         captured_query = {'query': None}
 
-        def fake_execute_query(query, params=None):
+        def fake_execute_query_batches(query, params=None, batch_size=1000, primary=False):
             captured_query['query'] = query
-            return rows
+            columns = list(rows[0].keys())
+            return iter([(columns, [tuple(r[c] for c in columns) for r in rows])])
 
         with tempfile.NamedTemporaryFile(suffix='.xlsx', delete=False) as tmp:
             output_path = tmp.name
 
         try:
-            with patch.object(db_manager, 'execute_query', side_effect=fake_execute_query):
+            with patch.object(db_manager, 'execute_query_batches', side_effect=fake_execute_query_batches):
                 ok = db_manager.export_nomina_excel(2025, output_path, 6, extra=True)
                 assert ok is True
                 assert captured_query['query'] is not None
-                assert 's.modalidad = 14' in captured_query['query']
+                assert 'c.modalidad = 14' in captured_query['query']
+                assert 't006_valores_calculados_mensuales' in captured_query['query']
 
             wb = load_workbook(output_path)
             ws = wb['Sheet1']
@@ -616,7 +609,7 @@ class TestDatabaseManagerCore:
         mock_create_connection.return_value = mock_connection
         mock_connection.cursor.return_value = mock_cursor
         
-        # Simuliere Mitarbeiter mit Gehaltsdaten
+        # Simuliere Mitarbeiterseite und Gehaltsdaten (zwei Abfragen)
         mock_cursor.fetchall.side_effect = [
             [
                 {
@@ -626,6 +619,11 @@ class TestDatabaseManagerCore:
                     'ceco': '1001',
                     'categoria': None,
                     'activo': True,
+                }
+            ],
+            [
+                {
+                    'id_empleado': 1,
                     'anio': 2024,
                     'salario_anual_bruto': 36000.0,
                     'salario_mensual_bruto': 3500.0,
@@ -633,9 +631,7 @@ class TestDatabaseManagerCore:
                     'atrasos': 0,
                     'antiguedad': 200.0
                 }
-            ],
-            [{'porcentaje': 100.0}],
-            [{'ingresos_mensuales': 100.0, 'deducciones_mensuales': 20.0}]
+            ]
         ]
         
         result = db_manager.get_all_employees_with_salaries()
@@ -700,7 +696,7 @@ class TestDatabaseManagerCore:
         mock_create_connection.return_value = mock_connection
         mock_connection.cursor.return_value = mock_cursor
         
-        mock_cursor.fetchall.return_value = [
+        mock_cursor.fetchmany.side_effect = [[
             {
                 'id_registro': 1,
                 'fecha': '2024-01-01 10:00:00',
@@ -713,7 +709,7 @@ class TestDatabaseManagerCore:
                 'objeto': 'backup',
                 'detalles': '{"status": "completed"}'
             }
-        ]
+        ], []]
         
         result = db_manager.get_global_registro_procesamiento(50)
         assert len(result) == 1
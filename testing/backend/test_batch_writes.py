@@ -0,0 +1,126 @@
+import pytest
+import sys
+import os
+from unittest.mock import Mock, patch
+from mysql.connector import Error
+
+# Backend-Verzeichnis zum Pfad hinzufügen
+backend_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'backend'))
+sys.path.insert(0, backend_path)
+
+from database_manager import DatabaseManager
+
+
+class TestExecuteBatch:
+    """Tests für execute_batch und die darauf umgestellten Mehrzeilen-Schreibpfade"""
+
+    @pytest.fixture
+    def db_manager(self):
+        manager = DatabaseManager('localhost', 'test_db', 'test_user', 'test_password', 3307)
+        # Nachberechnung von t006 nach dem Commit hat eigene Tests (test_payroll_values.py)
+        manager.refresh_pending_payroll = Mock()
+        return manager
+
+    @pytest.fixture
+    def mock_connection(self):
+        connection = Mock()
+        cursor = Mock()
+        cursor.rowcount = 1
+        connection.cursor.return_value = cursor
+        return connection
+
+    def test_execute_batch_chunks_and_rowcounts(self, db_manager, mock_connection):
+        """Zeilen werden in Chunks per executemany geschrieben, ein Commit für alle"""
+        cursor = mock_connection.cursor.return_value
+        rowcounts = iter([2, 2, 1])
+
+        def executemany(query, chunk):
+            cursor.rowcount = next(rowcounts)
+
+        cursor.executemany.side_effect = executemany
+        rows = [(1, 2025, m) for m in range(1, 6)]
+        with patch.object(DatabaseManager, '_create_connection', return_value=mock_connection) as mock_create:
+            result = db_manager.execute_batch("INSERT INTO t (a, b, c) VALUES (%s, %s, %s)", rows, chunk_size=2)
+
+        assert result["success"] is True
+        assert result["chunk_rowcounts"] == [2, 2, 1]
+        assert result["rowcount"] == 5
+        assert cursor.executemany.call_count == 3
+        assert cursor.executemany.call_args_list[0].args[1] == [(1, 2025, 1), (1, 2025, 2)]
+        mock_create.assert_called_once()
+        mock_connection.commit.assert_called_once()
+        mock_connection.close.assert_called_once()
+
+    def test_execute_batch_empty_rows(self, db_manager):
+        """Leere Zeilenliste: kein Round Trip"""
+        with patch.object(DatabaseManager, '_create_connection') as mock_create:
+            result = db_manager.execute_batch("INSERT INTO t (a) VALUES (%s)", [])
+        assert result["success"] is True
+        assert result["rowcount"] == 0
+        mock_create.assert_not_called()
+
+    def test_execute_batch_failure_rolls_back_all_chunks(self, db_manager, mock_connection):
+        """Fehler in einem Chunk rollt die gesamte Batch-Transaktion zurück"""
+        cursor = mock_connection.cursor.return_value
+        cursor.executemany.side_effect = [None, Error("Duplicate entry")]
+        with patch.object(DatabaseManager, '_create_connection', return_value=mock_connection):
+            result = db_manager.execute_batch("INSERT INTO t (a) VALUES (%s)", [(1,), (2,), (3,)], chunk_size=2)
+
+        assert result["success"] is False
+        assert "Duplicate entry" in result["error"]
+        mock_connection.rollback.assert_called_once()
+        mock_connection.commit.assert_not_called()
+
+    def test_execute_batch_retries_transient_error(self, db_manager, mock_connection):
+        """Verbindungsabbruch außerhalb einer Unit of Work wird einmal wiederholt"""
+        dead = Mock()
+        dead.cursor.return_value.executemany.side_effect = Error("Lost connection to MySQL server", errno=2013)
+        with patch.object(DatabaseManager, '_create_connection', side_effect=[dead, mock_connection]):
+            result = db_manager.execute_batch("INSERT INTO t (a) VALUES (%s)", [(1,)])
+        assert result["success"] is True
+        mock_connection.commit.assert_called_once()
+
+    def test_monthly_default_records_two_round_trips(self, db_manager, mock_connection):
+        """Onboarding: 12 Monate je Tabelle als je ein executemany auf einer Verbindung"""
+        cursor = mock_connection.cursor.return_value
+        with patch.object(DatabaseManager, '_create_connection', return_value=mock_connection) as mock_create:
+            db_manager._create_monthly_default_records(5, 2025)
+
+        assert cursor.executemany.call_count == 2
+        ingresos_call, deducciones_call = cursor.executemany.call_args_list
+        assert "t003_ingresos_brutos_mensuales" in ingresos_call.args[0]
+        assert "t004_deducciones_mensuales" in deducciones_call.args[0]
+        assert ingresos_call.args[1] == [(5, 2025, m) for m in range(1, 13)]
+        mock_create.assert_called_once()
+        mock_connection.commit.assert_called_once()
+
+    def test_propagate_cotizacion_especie_batch(self, db_manager):
+        """Übernahme in Folgemonate als ein Batch"""
+        with patch.object(db_manager, 'execute_batch', return_value={"success": True, "rowcount": 8, "chunk_rowcounts": [8], "error": None}) as mock_batch:
+            result = db_manager._propagate_cotizacion_especie(1, 2025, 8, 12.5)
+
+        mock_batch.assert_called_once()
+        assert mock_batch.call_args.args[1] == [(1, 2025, m, 12.5) for m in range(9, 13)]
+        assert result["propagated"] is True
+        assert result["months_updated"] == [9, 10, 11, 12]
+
+    def test_propagate_cotizacion_especie_batch_failure(self, db_manager):
+        """Schlägt der Batch fehl, werden keine Monate als übernommen gemeldet"""
+        with patch.object(db_manager, 'execute_batch', return_value={"success": False, "rowcount": 0, "chunk_rowcounts": [], "error": "boom"}):
+            result = db_manager._propagate_cotizacion_especie(1, 2025, 8, 12.5)
+
+        assert result["propagated"] is False
+        assert result["months_updated"] == []
+        assert result["error"] == "boom"
+
+    def test_carry_over_inserts_use_executemany(self, db_manager, mock_connection):
+        """Carry-Over-Einträge werden nach dem DELETE in einem executemany geschrieben"""
+        cursor = mock_connection.cursor.return_value
+        items = [{'concept': 'salary', 'amount': 10}, {'concept': 'primas', 'amount': 5}, {'concept': 'horas_extras', 'amount': 0}]
+        with patch.object(DatabaseManager, '_create_connection', return_value=mock_connection):
+            assert db_manager.create_carry_over_batch(1, 2025, 12, items, []) is True
+
+        cursor.executemany.assert_called_once()
+        rows = cursor.executemany.call_args.args[1]
+        assert rows == [(1, 2025, 12, 2026, 1, 'salary', 10.0), (1, 2025, 12, 2026, 1, 'primas', 5.0)]
+        mock_connection.commit.assert_called_once()
@@ -0,0 +1,95 @@
+import pytest
+import sys
+import os
+import threading
+from unittest.mock import Mock, patch
+
+from mysql.connector.errors import PoolError
+
+# Backend-Verzeichnis zum Pfad hinzufügen
+backend_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'backend'))
+sys.path.insert(0, backend_path)
+
+from database_manager import DatabaseManager
+
+
+class TestConcurrentFanOut:
+    """Tests für die parallelen Lesezugriffe in get_employee_complete_info"""
+
+    @pytest.fixture
+    def db_manager(self):
+        return DatabaseManager('localhost', 'test_db', 'test_user', 'test_password', 3307)
+
+    def _fake_query(self, seen_threads):
+        def fake(query, params=None, primary=False):
+            seen_threads.add(threading.current_thread().name)
+            if 'FROM t001_empleados' in query:
+                return [{'id_empleado': params[0], 'nombre': 'Juan'}]
+            if 'FROM t008_empleado_fte' in query:
+                return [{'anio': 2025, 'mes': 1, 'porcentaje': 80}]
+            return []
+        return fake
+
+    def test_same_response_shape_from_worker_threads(self, db_manager):
+        seen = set()
+        with patch.object(db_manager, 'execute_query', side_effect=self._fake_query(seen)) as mock_query:
+            result = db_manager.get_employee_complete_info(7)
+
+        assert mock_query.call_count == 7
+        assert set(result) == {'employee', 'salaries', 'ingresos', 'deducciones', 'ingresos_mensuales', 'deducciones_mensuales', 'fte'}
+        assert result['employee']['id_empleado'] == 7
+        assert result['fte'] == [{'anio': 2025, 'mes': 1, 'porcentaje': 80}]
+        assert all(name.startswith('db-fanout') for name in seen)
+
+    def test_unknown_employee_returns_empty(self, db_manager):
+        with patch.object(db_manager, 'execute_query', return_value=[]):
+            assert db_manager.get_employee_complete_info(99) == {}
+
+    def test_sequential_after_writes_in_unit_of_work(self, db_manager):
+        seen = set()
+        connection = Mock()
+        with patch.object(DatabaseManager, '_create_connection', return_value=connection):
+            with db_manager.unit_of_work():
+                db_manager.execute_update("UPDATE t001_empleados SET activo = TRUE")
+                with patch.object(db_manager, 'execute_query', side_effect=self._fake_query(seen)):
+                    db_manager.get_employee_complete_info(7)
+        assert not any(name.startswith('db-fanout') for name in seen)
+
+    def test_sequential_on_pinned_connection_without_writes(self, db_manager):
+        seen = set()
+        connection = Mock()
+        connection.cursor.return_value.fetchall.return_value = [{'1': 1}]
+        with patch.object(DatabaseManager, '_create_connection', return_value=connection) as mock_create:
+            with db_manager.unit_of_work():
+                # Pinnt die Verbindung wie get_resource_version zu Beginn eines Requests
+                db_manager.execute_query("SELECT 1")
+                with patch.object(db_manager, 'execute_query', side_effect=self._fake_query(seen)):
+                    db_manager.get_employee_complete_info(7)
+        assert seen and not any(name.startswith('db-fanout') for name in seen)
+        assert mock_create.call_count == 1
+
+    def test_pool_exhaustion_is_not_an_empty_result(self, db_manager):
+        with patch.object(DatabaseManager, '_create_connection', side_effect=PoolError("Keine freie Datenbankverbindung")):
+            with pytest.raises(PoolError):
+                db_manager.execute_query("SELECT 1")
+            with pytest.raises(PoolError):
+                db_manager.get_employee_complete_info(7)
+
+    def test_primary_hint_propagated_to_workers(self, db_manager):
+        calls = []
+
+        def fake(query, params=None, primary=False):
+            calls.append(primary)
+            return [{'id_empleado': 1}]
+
+        with patch.object(db_manager, 'execute_query', side_effect=fake):
+            with db_manager.read_primary():
+                db_manager.get_employee_complete_info(1)
+        assert calls and all(calls)
+
+    def test_fanout_disabled(self):
+        manager = DatabaseManager('localhost', 'test_db', 'test_user', 'test_password', 3307, fanout_workers=0)
+        seen = set()
+        with patch.object(manager, 'execute_query', side_effect=self._fake_query(seen)):
+            assert manager.get_employee_complete_info(3)['employee']['id_empleado'] == 3
+        assert manager._fanout_executor is None
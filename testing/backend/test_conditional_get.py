@@ -0,0 +1,74 @@
+import pytest
+import json
+from unittest.mock import patch
+from datetime import datetime, timezone
+import sys
+import os
+
+# Backend-Verzeichnis zum Pfad hinzufügen
+backend_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'backend'))
+sys.path.insert(0, backend_path)
+
+from app import app, create_access_token
+
+VERSION = {"etag": "abc123", "last_modified": datetime(2025, 1, 1, tzinfo=timezone.utc)}
+
+
+class TestConditionalGet:
+    """ETag / If-None-Match für Mitarbeiterlisten und -details"""
+
+    @pytest.fixture
+    def client(self):
+        """Flask Test Client"""
+        app.config['TESTING'] = True
+        with app.test_client() as client:
+            with app.app_context():
+                yield client
+
+    @pytest.fixture
+    def auth_headers(self):
+        token = create_access_token({"sub": "testuser"})
+        return {'Authorization': f'Bearer {token}'}
+
+    @patch('app.db_manager')
+    def test_full_response_carries_etag(self, mock_db_manager, client, auth_headers):
+        mock_db_manager.get_resource_version.return_value = VERSION
+        mock_db_manager.get_all_employees.return_value = [{'id_empleado': 1}]
+
+        response = client.get('/employees', headers=auth_headers)
+
+        assert response.status_code == 200
+        assert response.headers['ETag'] == '"abc123"'
+        assert 'Last-Modified' in response.headers
+        assert 'no-store' not in response.headers['Cache-Control']
+        assert json.loads(response.data) == [{'id_empleado': 1}]
+
+    @patch('app.db_manager')
+    def test_matching_etag_skips_heavy_query(self, mock_db_manager, client, auth_headers):
+        mock_db_manager.get_resource_version.return_value = VERSION
+
+        response = client.get('/employees/with-salaries', headers={**auth_headers, 'If-None-Match': '"abc123"'})
+
+        assert response.status_code == 304
+        assert response.data == b''
+        mock_db_manager.get_all_employees_with_salaries.assert_not_called()
+
+    @patch('app.db_manager')
+    def test_detail_uses_employee_version(self, mock_db_manager, client, auth_headers):
+        mock_db_manager.get_resource_version.return_value = VERSION
+
+        response = client.get('/employees/7', headers={**auth_headers, 'If-None-Match': '"abc123"'})
+
+        assert response.status_code == 304
+        mock_db_manager.get_resource_version.assert_called_once_with("employee", 7)
+        mock_db_manager.get_employee_complete_info.assert_not_called()
+
+    @patch('app.db_manager')
+    def test_stale_etag_returns_data(self, mock_db_manager, client, auth_headers):
+        mock_db_manager.get_resource_version.return_value = VERSION
+        mock_db_manager.get_employee_complete_info.return_value = {'employee': {'id_empleado': 7}}
+
+        response = client.get('/employees/7', headers={**auth_headers, 'If-None-Match': '"old"'})
+
+        assert response.status_code == 200
+        assert response.headers['ETag'] == '"abc123"'
@@ -0,0 +1,149 @@
+import pytest
+import sys
+import os
+import threading
+import time
+from unittest.mock import Mock, patch
+from mysql.connector import Error
+from mysql.connector.errors import PoolError
+
+# Backend-Verzeichnis zum Pfad hinzufügen
+backend_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'backend'))
+sys.path.insert(0, backend_path)
+
+from database_manager import DatabaseManager
+from database_pool import QueuedConnectionPool
+
+
+class FakeMySQLPool:
+    """Ersatz für MySQLConnectionPool: wirft PoolError bei Erschöpfung wie das Original"""
+
+    def __init__(self, pool_size, **kwargs):
+        self.free = [Mock(name=f"cnx{i}") for i in range(pool_size)]
+        for cnx in self.free:
+            cnx.close.side_effect = lambda c=cnx: self.free.append(c)
+
+    def get_connection(self):
+        if not self.free:
+            raise PoolError("Failed getting connection; pool exhausted")
+        return self.free.pop(0)
+
+
+@pytest.fixture
+def fake_pool():
+    with patch('database_pool.pooling.MySQLConnectionPool', side_effect=lambda **kw: FakeMySQLPool(**kw)):
+        yield
+
+
+class TestQueuedConnectionPool:
+    """Tests für Warteschlange, Overflow und Statistik"""
+
+    def test_waits_instead_of_failing(self, fake_pool):
+        pool = QueuedConnectionPool("test_pool", pool_size=1, timeout=2.0)
+        first = pool.get_connection()
+        got = []
+
+        def worker():
+            got.append(pool.get_connection())
+
+        t = threading.Thread(target=worker)
+        t.start()
+        time.sleep(0.05)
+        assert pool.stats()["waiting"] == 1
+        first.close()
+        t.join(timeout=2)
+        assert len(got) == 1
+        assert pool.stats()["in_use"] == 1
+
+    def test_timeout_raises_pool_error(self, fake_pool):
+        pool = QueuedConnectionPool("test_pool", pool_size=1, timeout=0.05)
+        pool.get_connection()
+        with pytest.raises(PoolError):
+            pool.get_connection()
+        assert pool.stats()["timeouts"] == 1
+        assert pool.stats()["waiting"] == 0
+
+    def test_fifo_order(self, fake_pool):
+        pool = QueuedConnectionPool("test_pool", pool_size=1, timeout=2.0)
+        holder = pool.get_connection()
+        order = []
+
+        def worker(n):
+            conn = pool.get_connection()
+            order.append(n)
+            conn.close()
+
+        threads = []
+        for n in range(3):
+            t = threading.Thread(target=worker, args=(n,))
+            t.start()
+            threads.append(t)
+            time.sleep(0.05)
+        holder.close()
+        for t in threads:
+            t.join(timeout=2)
+        assert order == [0, 1, 2]
+
+    def test_overflow_connection(self, fake_pool):
+        pool = QueuedConnectionPool("test_pool", pool_size=1, max_overflow=1, timeout=0.05)
+        pool.get_connection()
+        overflow_cnx = Mock()
+        with patch('database_pool.mysql.connector.connect', return_value=overflow_cnx):
+            conn = pool.get_connection()
+        assert pool.stats()["overflow_in_use"] == 1
+        assert pool.stats()["created"] == 2
+        conn.close()
+        overflow_cnx.close.assert_called_once()
+        assert pool.stats()["overflow_in_use"] == 0
+        with pytest.raises(PoolError):
+            pool.get_connection()
+            pool.get_connection()
+
+    def test_no_extra_ping_on_checkout(self, fake_pool):
+        pool = QueuedConnectionPool("test_pool", pool_size=1)
+        pool.get_connection().close()
+        cnx = pool._pool.free[0]
+        pool.get_connection()
+        # MySQLConnectionPool prüft die Verbindung bereits selbst (is_connected)
+        cnx.ping.assert_not_called()
+        cnx.reconnect.assert_not_called()
+
+    def test_failed_reconnect_keeps_pool_slot(self, fake_pool):
+        pool = QueuedConnectionPool("test_pool", pool_size=1, max_overflow=1)
+        inner = pool._pool
+        cnx = inner.free[0]
+
+        def dead_server():
+            # Wie MySQLConnectionPool: Verbindung zurücklegen, dann den Fehler weiterreichen
+            raise Error("Can't connect to MySQL server", errno=2003)
+
+        with patch.object(inner, 'get_connection', side_effect=dead_server), \
+                patch('database_pool.mysql.connector.connect') as mock_connect:
+            with pytest.raises(Error):
+                pool.get_connection()
+        mock_connect.assert_not_called()
+        assert pool.stats()["in_use"] == 0
+        # Nach dem Neustart der Datenbank kommt die Verbindung wieder aus dem Pool
+        assert pool.get_connection()._cnx is cnx
+        assert pool.stats()["overflow_in_use"] == 0
+
+    def test_close_is_idempotent(self, fake_pool):
+        pool = QueuedConnectionPool("test_pool", pool_size=2)
+        conn = pool.get_connection()
+        conn.close()
+        conn.close()
+        assert pool.stats()["in_use"] == 0
+
+    def test_database_manager_exposes_stats(self, fake_pool):
+        manager = DatabaseManager('localhost', 'test_db', 'test_user', 'test_password', 3307, pool_size=3, max_overflow=2)
+        assert manager.pool_stats() == {}
+        conn = manager._create_connection()
+        stats = manager.pool_stats()
+        assert stats["pool_size"] == 3
+        assert stats["max_overflow"] == 2
+        assert stats["in_use"] == 1
+        text = manager.metrics.render_prometheus()
+        assert "rrhh_db_pool_in_use 1" in text
+        assert "rrhh_db_pool_created_total 3" in text
+        conn.close()
+        assert manager.pool_stats()["in_use"] == 0
@@ -0,0 +1,79 @@
+import pytest
+import sys
+import os
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from unittest.mock import patch
+
+# Backend-Verzeichnis zum Pfad hinzufügen
+backend_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'backend'))
+sys.path.insert(0, backend_path)
+
+from flask import Flask
+from mysql.connector.constants import FieldType
+from database_manager import DatabaseManager
+from database_types import NativeJSONProvider, make_converter_class
+
+
+def _desc(field_type):
+    return ('col', field_type, None, None, 10, 2, True, 0, 63)
+
+
+class TestConverter:
+    """Tests für die Typ-Konvertierung auf Cursor-Ebene"""
+
+    def test_default_keeps_connector_behaviour(self):
+        assert make_converter_class() is None
+
+    def test_invalid_mode(self):
+        with pytest.raises(ValueError):
+            make_converter_class(decimal_mode="cents")
+
+    def test_decimal_as_float(self):
+        converter = make_converter_class(decimal_mode="float")()
+        value = converter.to_python(_desc(FieldType.NEWDECIMAL), b"2150.75")
+        assert value == 2150.75
+        assert isinstance(value, float)
+        assert converter.to_python(_desc(FieldType.NEWDECIMAL), None) is None
+
+    def test_dates_as_iso(self):
+        converter = make_converter_class(date_mode="iso")()
+        assert converter.to_python(_desc(FieldType.DATE), b"2024-03-01") == "2024-03-01"
+        assert converter.to_python(_desc(FieldType.DATETIME), b"2024-03-01 10:15:00") == "2024-03-01T10:15:00"
+        # Andere Typen bleiben unverändert
+        assert converter.to_python(_desc(FieldType.LONG), b"42") == 42
+
+    def test_pool_receives_converter_class(self):
+        manager = DatabaseManager('localhost', 'test_db', 'test_user', 'test_password', 3307, decimal_mode="float")
+        with patch('database_manager.QueuedConnectionPool') as mock_pool:
+            manager._create_connection()
+        assert mock_pool.call_args.kwargs["converter_class"] is manager.converter_class
+
+    def test_pool_without_converter_by_default(self):
+        manager = DatabaseManager('localhost', 'test_db', 'test_user', 'test_password', 3307)
+        with patch('database_manager.QueuedConnectionPool') as mock_pool:
+            manager._create_connection()
+        assert "converter_class" not in mock_pool.call_args.kwargs
+
+
+class TestNativeJSONProvider:
+    """Tests für den Flask JSON Provider"""
+
+    def test_default_matches_flask_format(self):
+        app = Flask(__name__)
+        provider = NativeJSONProvider(app)
+        data = json.loads(provider.dumps({"a": Decimal("10.50"), "d": date(2024, 3, 1)}))
+        assert data == {"a": "10.50", "d": "Fri, 01 Mar 2024 00:00:00 GMT"}
+
+    def test_native_modes(self):
+        app = Flask(__name__)
+        provider = NativeJSONProvider(app, decimal_mode="float", date_mode="iso")
+        data = json.loads(provider.dumps({"a": Decimal("10.50"), "d": date(2024, 3, 1), "t": datetime(2024, 3, 1, 10, 15)}))
+        assert data == {"a": 10.5, "d": "2024-03-01", "t": "2024-03-01T10:15:00"}
+
+    def test_unknown_type_raises(self):
+        app = Flask(__name__)
+        provider = NativeJSONProvider(app)
+        with pytest.raises(TypeError):
+            provider.dumps({"x": object()})
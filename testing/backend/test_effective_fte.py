@@ -0,0 +1,95 @@
+import pytest
+import sys
+import os
+from unittest.mock import Mock, patch
+
+# Backend-Verzeichnis zum Pfad hinzufügen
+backend_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'backend'))
+sys.path.insert(0, backend_path)
+
+from database_manager import DatabaseManager, FTE_OPEN_END
+
+
+class TestEffectiveFte:
+    """Tests für die FTE-Intervalle (t011_empleado_fte_efectivo)"""
+
+    @pytest.fixture
+    def db_manager(self):
+        manager = DatabaseManager('localhost', 'test_db', 'test_user', 'test_password', 3307)
+        # Nachberechnung von t006 nach dem Commit hat eigene Tests (test_payroll_values.py)
+        manager.refresh_pending_payroll = Mock()
+        return manager
+
+    @pytest.fixture
+    def mock_connection(self):
+        connection = Mock()
+        connection.cursor.return_value = Mock()
+        return connection
+
+    def test_month_key(self):
+        assert DatabaseManager._fte_month_key(2025, 1) == 2025 * 12
+        assert DatabaseManager._fte_month_key(2025, 12) + 1 == DatabaseManager._fte_month_key(2026, 1)
+
+    def test_upsert_rebuilds_intervals_in_same_transaction(self, db_manager, mock_connection):
+        with patch.object(DatabaseManager, '_create_connection', return_value=mock_connection):
+            assert db_manager.upsert_employee_fte(7, 2025, 3, 50) is True
+
+        executed = [c.args[0] for c in mock_connection.cursor.return_value.execute.call_args_list]
+        assert "INSERT INTO t008_empleado_fte" in executed[0]
+        assert "DELETE FROM t011_empleado_fte_efectivo" in executed[1]
+        assert "INSERT INTO t011_empleado_fte_efectivo" in executed[2]
+        assert "LEAD(" in executed[2] and str(FTE_OPEN_END) in executed[2]
+        mock_connection.commit.assert_called_once()
+
+    def test_delete_rebuilds_intervals(self, db_manager, mock_connection):
+        with patch.object(DatabaseManager, '_create_connection', return_value=mock_connection):
+            assert db_manager.delete_employee_fte(7, 2025, 3) is True
+
+        executed = [c.args[0] for c in mock_connection.cursor.return_value.execute.call_args_list]
+        assert "DELETE FROM t008_empleado_fte" in executed[0]
+        assert "t011_empleado_fte_efectivo" in executed[1]
+        mock_connection.commit.assert_called_once()
+
+    def test_failed_rebuild_rolls_back_fte_write(self, db_manager, mock_connection):
+        from mysql.connector import Error
+        mock_connection.cursor.return_value.execute.side_effect = [None, Error("Lock wait timeout")]
+        with patch.object(DatabaseManager, '_create_connection', return_value=mock_connection):
+            assert db_manager.upsert_employee_fte(7, 2025, 3, 50) is False
+        mock_connection.rollback.assert_called_once()
+        mock_connection.commit.assert_not_called()
+
+    def test_invalid_values_skip_database(self, db_manager):
+        with patch.object(DatabaseManager, '_create_connection') as mock_create:
+            assert db_manager.upsert_employee_fte(7, 2025, 13, 50) is False
+            assert db_manager.upsert_employee_fte(7, 2025, 3, 150) is False
+        mock_create.assert_not_called()
+
+    def test_effective_percent_is_interval_lookup(self, db_manager):
+        with patch.object(db_manager, 'execute_query', return_value=[{'id_empleado': 7, 'porcentaje': 50}]) as mock_query:
+            assert db_manager.get_employee_fte_effective_percent(7, 2025, 6) == 50.0
+
+        query, params = mock_query.call_args.args
+        assert "t011_empleado_fte_efectivo" in query
+        assert "ORDER BY" not in query
+        key = DatabaseManager._fte_month_key(2025, 6)
+        assert params == (key, key, 7)
+
+    def test_effective_percent_defaults_to_full_time(self, db_manager):
+        with patch.object(db_manager, 'execute_query', return_value=[]):
+            assert db_manager.get_employee_fte_effective_percent(7, 2025, 6) == 100.0
+
+    def test_bulk_lookup(self, db_manager):
+        rows = [{'id_empleado': 1, 'porcentaje': 80}, {'id_empleado': 2, 'porcentaje': 50}]
+        with patch.object(db_manager, 'execute_query', return_value=rows) as mock_query:
+            assert db_manager.get_effective_fte_for_month(2025, 6) == {1: 80.0, 2: 50.0}
+        assert "IN (" not in mock_query.call_args.args[0]
+
+    def test_payroll_query_joins_intervals(self, db_manager):
+        with patch.object(db_manager, 'execute_query', return_value=[]) as mock_query:
+            db_manager.calculate_payroll_rows(2025, 6, payout_month=4)
+        query, params = mock_query.call_args.args
+        assert "LEFT JOIN t011_empleado_fte_efectivo fe" in query
+        assert "t008_empleado_fte" not in query
+        assert "LIMIT 1" not in query
+        key = DatabaseManager._fte_month_key(2025, 6)
+        assert params[2:4] == (key, key)
@@ -0,0 +1,63 @@
+import pytest
+import sys
+import os
+from unittest.mock import patch
+
+# Backend-Verzeichnis zum Pfad hinzufügen
+backend_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'backend'))
+sys.path.insert(0, backend_path)
+
+from database_manager import DatabaseManager, EMPLOYEE_BATCH_MAX_IDS
+from database_migrations import PARTITION_SCHEMA_VERSION
+
+
+class TestEmployeesCompleteInfoBatch:
+    """Tests für get_employees_complete_info_batch"""
+
+    @pytest.fixture
+    def db_manager(self):
+        return DatabaseManager('localhost', 'test_db', 'test_user', 'test_password', 3307)
+
+    def test_one_query_per_section_grouped_by_employee(self, db_manager):
+        results = {
+            'employee': [{'id_empleado': 2, 'nombre': 'Ana'}, {'id_empleado': 1, 'nombre': 'Luis'}],
+            'salaries': [{'id_empleado': 1, 'anio': 2025}, {'id_empleado': 2, 'anio': 2025},
+                         {'id_empleado': 2, 'anio': 2024}],
+            'fte': [{'id_empleado': 2, 'anio': 2025, 'mes': 3, 'porcentaje': 50}],
+        }
+        with patch.object(db_manager, 'execute_queries_concurrently', return_value=results) as mock_concurrent:
+            result = db_manager.get_employees_complete_info_batch([1, 2, 3, 2], include=['salaries', 'fte'])
+
+        queries = mock_concurrent.call_args.args[0]
+        assert set(queries) == {'employee', 'salaries', 'fte'}
+        assert queries['salaries'][1] == (1, 2, 3)
+        assert "id_empleado IN (%s, %s, %s)" in queries['fte'][0]
+
+        assert [e['employee']['id_empleado'] for e in result['employees']] == [1, 2]
+        assert result['missing'] == [3]
+        ana = result['employees'][1]
+        assert ana['salaries'] == [{'anio': 2025}, {'anio': 2024}]
+        assert ana['fte'] == [{'anio': 2025, 'mes': 3, 'porcentaje': 50}]
+
+    def test_year_filter_and_archive(self, db_manager):
+        db_manager.schema_version = PARTITION_SCHEMA_VERSION
+        with patch.object(db_manager, 'execute_queries_concurrently',
+                          return_value={'employee': [], 'ingresos_mensuales': [], 'carry_over': []}) as mock_concurrent:
+            db_manager.get_employees_complete_info_batch([5], include=['ingresos_mensuales', 'carry_over'], year=2024)
+
+        queries = mock_concurrent.call_args.args[0]
+        query, params = queries['ingresos_mensuales']
+        assert "t003_ingresos_brutos_mensuales_archivo" in query
+        assert query.count("%s") == len(params) == 6
+        assert params == (5, 2024, 5, 2024, 5, 2024)
+        assert queries['carry_over'][1] == (5, 2024)
+        assert "apply_anio = %s" in queries['carry_over'][0]
+
+    def test_validation(self, db_manager):
+        with pytest.raises(ValueError):
+            db_manager.get_employees_complete_info_batch([1], include=['ingresos'])
+        with pytest.raises(ValueError):
+            db_manager.get_employees_complete_info_batch(range(EMPLOYEE_BATCH_MAX_IDS + 1))
+        with patch.object(db_manager, 'execute_queries_concurrently') as mock_concurrent:
+            assert db_manager.get_employees_complete_info_batch([]) == {'employees': [], 'missing': []}
+        mock_concurrent.assert_not_called()
@@ -0,0 +1,92 @@
+import pytest
+import sys
+import os
+from unittest.mock import patch
+
+# Backend-Verzeichnis zum Pfad hinzufügen
+backend_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'backend'))
+sys.path.insert(0, backend_path)
+
+from database_manager import DatabaseManager, EMPLOYEE_PAGE_MAX_SIZE
+
+
+def _employee(emp_id, apellido, nombre='Ana'):
+    return {'id_empleado': emp_id, 'nombre': nombre, 'apellido': apellido, 'ceco': '1001',
+            'categoria': 'Office', 'activo': True, 'fecha_alta': None}
+
+
+def _salary(emp_id, anio):
+    return {'id_empleado': emp_id, 'anio': anio, 'salario_anual_bruto': 30000.0,
+            'salario_mensual_bruto': 2500.0, 'modalidad': 12, 'atrasos': 0, 'antiguedad': 0}
+
+
+class TestEmployeesWithSalariesPage:
+    """Tests für die Keyset-Paginierung der Mitarbeiterliste"""
+
+    @pytest.fixture
+    def db_manager(self):
+        return DatabaseManager('localhost', 'test_db', 'test_user', 'test_password', 3307)
+
+    def test_cursor_roundtrip(self, db_manager):
+        cursor = db_manager.encode_employee_cursor(_employee(7, 'Pérez', 'José'))
+        assert db_manager.decode_employee_cursor(cursor) == ('Pérez', 'José', 7)
+        with pytest.raises(ValueError):
+            db_manager.decode_employee_cursor('kein-cursor')
+
+    def test_first_page_reads_one_extra_row(self, db_manager):
+        employees = [_employee(1, 'A'), _employee(2, 'B'), _employee(3, 'C')]
+        with patch.object(db_manager, 'execute_query',
+                          side_effect=[employees, [_salary(2, 2025), _salary(1, 2025), _salary(1, 2024)]]) as mock_query:
+            page = db_manager.get_employees_with_salaries_page(limit=2)
+
+        employee_query, employee_params = mock_query.call_args_list[0].args
+        assert "ORDER BY apellido, nombre, id_empleado" in employee_query
+        assert employee_params == (3,)
+        salary_query, salary_params = mock_query.call_args_list[1].args
+        assert "id_empleado IN (%s, %s)" in salary_query
+        assert salary_params == (1, 2)
+
+        assert [e['id_empleado'] for e in page['items']] == [1, 2]
+        assert [s['anio'] for s in page['items'][0]['salaries']] == [2025, 2024]
+        assert db_manager.decode_employee_cursor(page['next_cursor']) == ('B', 'Ana', 2)
+
+    def test_last_page_has_no_cursor(self, db_manager):
+        with patch.object(db_manager, 'execute_query', side_effect=[[_employee(1, 'A')], []]):
+            page = db_manager.get_employees_with_salaries_page(limit=2)
+        assert page['next_cursor'] is None
+        assert page['items'][0]['salaries'] == []
+
+    def test_cursor_and_filters_become_keyset_predicate(self, db_manager):
+        cursor = db_manager.encode_employee_cursor(_employee(5, 'García', 'Luis'))
+        with patch.object(db_manager, 'execute_query', side_effect=[[_employee(6, 'Gómez')], []]) as mock_query:
+            db_manager.get_employees_with_salaries_page(cursor=cursor, limit=10, activo=True,
+                                                        categoria='Office', ceco='1001')
+
+        query, params = mock_query.call_args_list[0].args
+        assert "apellido > %s OR (apellido = %s AND (nombre > %s OR (nombre = %s AND id_empleado > %s)))" in query
+        assert params == (True, 'Office', '1001', 'García', 'García', 'Luis', 'Luis', 5, 11)
+
+    def test_year_range_and_latest_years_filter_salaries(self, db_manager):
+        with patch.object(db_manager, 'execute_query', side_effect=[[_employee(1, 'A')], []]) as mock_query:
+            db_manager.get_employees_with_salaries_page(year_from=2020, year_to=2025, latest_years=2)
+
+        query, params = mock_query.call_args_list[1].args
+        assert "ROW_NUMBER() OVER (PARTITION BY id_empleado ORDER BY anio DESC)" in query
+        assert "anio >= %s AND anio <= %s" in query
+        assert params == (1, 2020, 2025, 2)
+
+    def test_limit_is_capped(self, db_manager):
+        with patch.object(db_manager, 'execute_query', side_effect=[[], []]) as mock_query:
+            db_manager.get_employees_with_salaries_page(limit=100000)
+        assert mock_query.call_args_list[0].args[1] == (EMPLOYEE_PAGE_MAX_SIZE + 1,)
+        # Leere Seite: keine Gehaltsabfrage
+        assert mock_query.call_count == 1
+
+    def test_compatibility_wrapper_reads_everything(self, db_manager):
+        with patch.object(db_manager, 'execute_query',
+                          side_effect=[[_employee(1, 'A'), _employee(2, 'B')], [_salary(2, 2025)]]) as mock_query:
+            result = db_manager.get_all_employees_with_salaries()
+
+        assert "LIMIT" not in mock_query.call_args_list[0].args[0]
+        assert "IN (" not in mock_query.call_args_list[1].args[0]
+        assert [len(e['salaries']) for e in result] == [0, 1]
@@ -0,0 +1,158 @@
+import pytest
+import sys
+import os
+from unittest.mock import Mock, patch
+
+# Backend-Verzeichnis zum Pfad hinzufügen
+backend_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'backend'))
+sys.path.insert(0, backend_path)
+
+from database_manager import DatabaseManager
+from database_search import SEARCH_VERSION_CHECK_SECONDS, EmployeeSearchIndex, fold
+
+EMPLOYEES = [
+    {'id_empleado': 1, 'nombre': 'José', 'apellido': 'Núñez García', 'ceco': '1001', 'activo': True, 'dni': '12345678Z'},
+    {'id_empleado': 2, 'nombre': 'Ana', 'apellido': 'Garcés', 'ceco': '2002', 'activo': True, 'dni': None},
+    {'id_empleado': 3, 'nombre': 'Garcia', 'apellido': 'Ortiz', 'ceco': '1001', 'activo': False, 'dni': None},
+    {'id_empleado': 12, 'nombre': 'Luis', 'apellido': 'Pérez', 'ceco': '3003', 'activo': True, 'dni': None},
+]
+
+
+class TestEmployeeSearchIndex:
+    """Tests für Faltung, Trigramm-Kandidaten und Ranking"""
+
+    @pytest.fixture
+    def index(self):
+        index = EmployeeSearchIndex()
+        index.build(EMPLOYEES, (0,))
+        return index
+
+    def test_fold_removes_accents_and_case(self):
+        assert fold('Núñez GARCÍA') == 'nunez garcia'
+        assert fold(None) == ''
+
+    def test_accent_insensitive_substring(self, index):
+        assert [r['id_empleado'] for r in index.search('NUNEZ')] == [1]
+        assert [r['id_empleado'] for r in index.search('unez')] == [1]
+
+    def test_ranking_prefers_word_start_and_active(self, index):
+        # 'garcia': ganzes Feld nombre (3, inaktiv) vor Wortanfang in apellido (1); sonst aktiv vor inaktiv, dann apellido
+        assert [r['id_empleado'] for r in index.search('garcia')] == [3, 1]
+        assert [r['id_empleado'] for r in index.search('garc')] == [2, 1, 3]
+
+    def test_all_words_must_match(self, index):
+        assert [r['id_empleado'] for r in index.search('jose garcia')] == [1]
+        assert index.search('jose ortiz') == []
+
+    def test_id_dni_and_short_terms(self, index):
+        assert index.search('12')[0]['id_empleado'] == 12
+        assert [r['id_empleado'] for r in index.search('5678z')] == [1]
+        assert {r['id_empleado'] for r in index.search('10')} == {1, 3}
+
+    def test_limit_and_result_shape(self, index):
+        results = index.search('a', limit=2)
+        assert len(results) == 2
+        assert set(results[0]) == {'id_empleado', 'nombre', 'apellido', 'ceco', 'activo'}
+
+    def test_is_current_tracks_version_and_age(self, index):
+        assert index.is_current((0,)) is True
+        assert index.is_current((1,)) is False
+        with patch('database_search.time.monotonic', return_value=10 ** 9):
+            assert index.is_current((0,)) is False
+
+
+class TestSearchEmployees:
+    """DatabaseManager.search_employees über den Index"""
+
+    @pytest.fixture
+    def db_manager(self):
+        manager = DatabaseManager('localhost', 'test_db', 'test_user', 'test_password', 3307)
+        # Nachberechnung von t006 nach dem Commit hat eigene Tests (test_payroll_values.py)
+        manager.refresh_pending_payroll = Mock()
+        return manager
+
+    @staticmethod
+    def _database(version):
+        """execute_query-Ersatz: Versionsabfrage liefert version[0], Indexaufbau die Mitarbeiter."""
+        def query(sql, params=None, primary=False):
+            if "t013_versiones_empleado" in sql:
+                return [dict(version[0])]
+            return list(EMPLOYEES)
+        return Mock(side_effect=query)
+
+    def _index_builds(self, mock_query):
+        return [c for c in mock_query.call_args_list if c.args[0].endswith("dni FROM t001_empleados")]
+
+    def test_index_is_built_once_and_rebuilt_after_write(self, db_manager):
+        version = [{'tabla': 't001_empleados', 'version': 7, 'modificado': 1735689600}]
+        mock_query = self._database(version)
+        with patch.object(db_manager, 'execute_query', mock_query), \
+                patch.object(DatabaseManager, '_create_connection', return_value=Mock()):
+            assert db_manager.search_employees('perez')[0]['id_empleado'] == 12
+            db_manager.search_employees('ana')
+            assert len(self._index_builds(mock_query)) == 1
+
+            db_manager.execute_update("UPDATE t001_empleados SET nombre = %s WHERE id_empleado = %s", ('Eva', 2))
+            db_manager.search_employees('ana')
+            assert len(self._index_builds(mock_query)) == 2
+
+    def _version_checks(self, mock_query):
+        return [c for c in mock_query.call_args_list if "t013_versiones_empleado" in c.args[0]]
+
+    def test_version_check_is_throttled(self, db_manager):
+        version = [{'tabla': 't001_empleados', 'version': 7, 'modificado': 1735689600}]
+        mock_query = self._database(version)
+        with patch.object(db_manager, 'execute_query', mock_query), \
+                patch('database_manager.time.monotonic', return_value=1000.0):
+            for term in ('a', 'an', 'ana'):
+                db_manager.search_employees(term)
+        # Ein Tastendruck nach dem anderen: nur die erste Suche fragt die Datenbank
+        assert mock_query.call_count == 2
+        assert len(self._version_checks(mock_query)) == 1
+
+    def test_write_by_another_process_rebuilds_index(self, db_manager):
+        version = [{'tabla': 't001_empleados', 'version': 7, 'modificado': 1735689600}]
+        mock_query = self._database(version)
+        with patch.object(db_manager, 'execute_query', mock_query), \
+                patch('database_manager.time.monotonic', return_value=1000.0) as clock:
+            db_manager.search_employees('ana')
+            # Keine lokale Invalidierung, nur der Zähler ändert sich (auch in derselben Sekunde)
+            version[0] = dict(version[0], version=8)
+            db_manager.search_employees('ana')
+            assert len(self._index_builds(mock_query)) == 1
+            clock.return_value = 1000.0 + SEARCH_VERSION_CHECK_SECONDS
+            db_manager.search_employees('ana')
+        assert len(self._version_checks(mock_query)) == 2
+        assert len(self._index_builds(mock_query)) == 2
+
+    def test_version_and_build_read_the_primary(self, db_manager):
+        version = [{'tabla': 't001_empleados', 'version': 7, 'modificado': 1735689600}]
+        mock_query = self._database(version)
+        with patch.object(db_manager, 'execute_query', mock_query):
+            db_manager.search_employees('ana')
+        assert mock_query.call_count == 2
+        assert all(c.kwargs.get('primary') is True for c in mock_query.call_args_list)
+
+    def test_falls_back_to_sql_without_rows(self, db_manager):
+        with patch.object(db_manager, 'execute_query', return_value=[]) as mock_query:
+            assert db_manager.search_employees('x') == []
+        query = mock_query.call_args.args[0]
+        assert "LIKE" in query and "LIMIT %s" in query
+
+    def test_unit_of_work_uses_sql_after_write(self, db_manager):
+        version = [{'tabla': 't001_empleados', 'version': 7, 'modificado': 1735689600}]
+        mock_query = self._database(version)
+        with patch.object(db_manager, 'execute_query', mock_query), \
+                patch.object(DatabaseManager, '_create_connection', return_value=Mock()):
+            db_manager.begin_unit_of_work()
+            try:
+                # Lesende Requests (Unit of Work ohne Schreibzugriff) nutzen den Index
+                db_manager.search_employees('ana')
+                db_manager.search_employees('luis')
+                assert len(self._index_builds(mock_query)) == 1
+                db_manager.execute_update("UPDATE t001_empleados SET activo = 0 WHERE id_empleado = %s", (2,))
+                db_manager.search_employees('ana')
+            finally:
+                db_manager.end_unit_of_work()
+        assert len(self._index_builds(mock_query)) == 1
+        assert "LIKE" in mock_query.call_args.args[0]
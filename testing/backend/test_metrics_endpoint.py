@@ -0,0 +1,58 @@
+import pytest
+from unittest.mock import patch
+import sys
+import os
+
+# Backend-Verzeichnis zum Pfad hinzufügen
+backend_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'backend'))
+sys.path.insert(0, backend_path)
+
+from app import app, create_access_token
+
+
+class TestMetricsEndpoint:
+    """/metrics nur mit Scraper-Token oder Admin-JWT"""
+
+    @pytest.fixture
+    def client(self):
+        """Flask Test Client"""
+        app.config['TESTING'] = True
+        with app.test_client() as client:
+            with app.app_context():
+                yield client
+
+    @pytest.fixture
+    def auth_headers(self):
+        token = create_access_token({"sub": "testuser"})
+        return {'Authorization': f'Bearer {token}'}
+
+    def test_requires_token(self, client):
+        response = client.get('/metrics')
+        assert response.status_code == 401
+
+    @patch('app.db_manager')
+    def test_non_admin_is_rejected(self, mock_db_manager, client, auth_headers):
+        mock_db_manager.get_user_role.return_value = 'user'
+        response = client.get('/metrics', headers=auth_headers)
+        assert response.status_code == 403
+        mock_db_manager.metrics.render_prometheus.assert_not_called()
+
+    @patch('app.db_manager')
+    def test_admin_gets_metrics(self, mock_db_manager, client, auth_headers):
+        mock_db_manager.get_user_role.return_value = 'admin'
+        mock_db_manager.metrics.render_prometheus.return_value = "db_queries_total 1\n"
+        mock_db_manager.read_cache.render_prometheus.return_value = ""
+        response = client.get('/metrics', headers=auth_headers)
+        assert response.status_code == 200
+        assert response.data == b"db_queries_total 1\n"
+
+    @patch('app.db_manager')
+    def test_scraper_token(self, mock_db_manager, client):
+        mock_db_manager.metrics.render_prometheus.return_value = "db_queries_total 1\n"
+        mock_db_manager.read_cache.render_prometheus.return_value = ""
+        with patch('app.METRICS_TOKEN', 'scrape-secret'):
+            response = client.get('/metrics', headers={'Authorization': 'Bearer scrape-secret'})
+            assert response.status_code == 200
+            response = client.get('/metrics', headers={'Authorization': 'Bearer falsch'})
+            assert response.status_code == 401
+        mock_db_manager.get_user_role.assert_not_called()
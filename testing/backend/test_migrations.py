@@ -0,0 +1,207 @@
+import pytest
+import sys
+import os
+from unittest.mock import Mock, patch
+from mysql.connector import Error, errorcode
+
+# Backend-Verzeichnis zum Pfad hinzufügen
+backend_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'backend'))
+sys.path.insert(0, backend_path)
+
+from database_manager import DatabaseManager
+import database_migrations
+from database_migrations import (
+    LATEST_VERSION,
+    apply_migrations,
+    load_migrations,
+    read_schema_version,
+    split_sql_script,
+)
+
+
+def _connection(version_row=None, execute_side_effect=None):
+    connection = Mock()
+    cursor = Mock()
+    cursor.with_rows = False
+    cursor.fetchall.return_value = []
+    # GET_LOCK, Versionszeile, RELEASE_LOCK
+    cursor.fetchone.side_effect = [(1,), version_row, (1,)]
+    if execute_side_effect is not None:
+        cursor.execute.side_effect = execute_side_effect
+    connection.cursor.return_value = cursor
+    return connection, cursor
+
+
+class TestSplitSqlScript:
+    """Tests für das Zerlegen der SQL-Skripte"""
+
+    def test_delimiter_blocks_and_comments(self):
+        script = """
+-- Kommentar; mit Semikolon
+CREATE TABLE a (id INT); -- nachgestellter Kommentar
+INSERT INTO a VALUES ('x;y');
+
+DELIMITER $$
+CREATE TRIGGER trg BEFORE INSERT ON a
+FOR EACH ROW
+BEGIN
+    SET NEW.id = 1;
+END$$
+DELIMITER;
+CREATE INDEX idx_a ON a(id);
+"""
+        statements = split_sql_script(script)
+        assert statements[0] == "CREATE TABLE a (id INT)"
+        assert statements[1] == "INSERT INTO a VALUES ('x;y')"
+        assert statements[2].startswith("CREATE TRIGGER trg")
+        assert statements[2].rstrip().endswith("END")
+        assert "SET NEW.id = 1;" in statements[2]
+        assert statements[3] == "CREATE INDEX idx_a ON a(id)"
+        assert len(statements) == 4
+
+    def test_repository_scripts_load_in_order(self):
+        migrations = load_migrations()
+        versions = [m['version'] for m in migrations]
+        assert versions == sorted(versions)
+        assert versions[-1] == LATEST_VERSION
+        assert all(m['statements'] or m['run'] for m in migrations)
+        # Trigger-Skripte enthalten keine DELIMITER-Zeilen mehr
+        assert not any('DELIMITER' in s for m in migrations for s in m['statements'])
+
+
+class TestSchemaVersion:
+    """Tests für Versionsabfrage und Anwenden der Migrationen"""
+
+    def test_read_version_single_row(self):
+        connection, cursor = _connection()
+        cursor.fetchone.side_effect = None
+        cursor.fetchone.return_value = (4,)
+        assert read_schema_version(connection) == 4
+        cursor.execute.assert_called_once()
+        assert "LIMIT 1" in cursor.execute.call_args.args[0]
+
+    def test_read_version_missing_table(self):
+        connection, cursor = _connection()
+        cursor.execute.side_effect = Error("Table doesn't exist", errno=errorcode.ER_NO_SUCH_TABLE)
+        assert read_schema_version(connection) == 0
+
+    def test_applies_only_pending_versions(self):
+        connection, cursor = _connection(version_row=(LATEST_VERSION - 1,))
+        applied = apply_migrations(connection)
+
+        assert applied == [LATEST_VERSION]
+        connection.commit.assert_called_once()
+        inserts = [c for c in cursor.execute.call_args_list if "INSERT INTO t000_schema_version" in c.args[0]]
+        assert len(inserts) == 1
+        assert inserts[0].args[1][0] == LATEST_VERSION
+        assert "RELEASE_LOCK" in cursor.execute.call_args_list[-1].args[0]
+
+    def test_existing_objects_are_skipped(self):
+        """Bestehende Installationen: 'existiert bereits' bricht die Migration nicht ab"""
+        def execute(query, params=None):
+            if query.startswith("ALTER TABLE"):
+                raise Error("Duplicate column name", errno=errorcode.ER_DUP_FIELDNAME)
+
+        connection, cursor = _connection(version_row=(2,), execute_side_effect=execute)
+        applied = apply_migrations(connection)
+        assert applied == list(range(3, LATEST_VERSION + 1))
+
+    def test_failure_stops_and_releases_lock(self):
+        def execute(query, params=None):
+            if query.startswith("ALTER TABLE"):
+                raise Error("Lock wait timeout exceeded", errno=errorcode.ER_LOCK_WAIT_TIMEOUT)
+
+        connection, cursor = _connection(version_row=(2,), execute_side_effect=execute)
+        with pytest.raises(Error):
+            apply_migrations(connection)
+        connection.commit.assert_not_called()
+        assert "RELEASE_LOCK" in cursor.execute.call_args_list[-1].args[0]
+
+    def test_trigger_scripts_replace_existing_triggers(self):
+        connection, cursor = _connection(version_row=(1,))
+        apply_migrations(connection, target=2)
+        executed = [c.args[0] for c in cursor.execute.call_args_list]
+        drop_idx = executed.index("DROP TRIGGER IF EXISTS trg_before_insert_t002_salarios")
+        assert executed[drop_idx + 1].startswith("CREATE TRIGGER trg_before_insert_t002_salarios")
+
+
+class TestDatabaseManagerSchemaCheck:
+    """connect() liest nur die Versionszeile und führt kein DDL aus"""
+
+    @pytest.fixture
+    def db_manager(self):
+        return DatabaseManager('localhost', 'test_db', 'test_user', 'test_password', 3307)
+
+    def test_connect_reads_version_once(self, db_manager):
+        connection = Mock()
+        connection.is_connected.return_value = True
+        cursor = connection.cursor.return_value
+        cursor.fetchone.return_value = (LATEST_VERSION,)
+
+        with patch.object(DatabaseManager, '_create_connection', return_value=connection):
+            assert db_manager.connect() is True
+            assert db_manager.connect() is True
+
+        executed = [c.args[0] for c in cursor.execute.call_args_list]
+        assert len(executed) == 1
+        assert "t000_schema_version" in executed[0]
+        assert not any("INFORMATION_SCHEMA" in q or "ALTER TABLE" in q for q in executed)
+        assert db_manager.schema_version == LATEST_VERSION
+
+    def test_outdated_schema_only_warns(self, db_manager):
+        connection = Mock()
+        connection.is_connected.return_value = True
+        connection.cursor.return_value.fetchone.return_value = (1,)
+
+        with patch.object(DatabaseManager, '_create_connection', return_value=connection), \
+                patch.object(DatabaseManager, 'migrate') as mock_migrate:
+            assert db_manager.connect() is True
+        mock_migrate.assert_not_called()
+        assert db_manager.schema_version == 1
+
+    def test_auto_migrate(self):
+        db_manager = DatabaseManager('localhost', 'test_db', 'test_user', 'test_password', 3307, auto_migrate=True)
+        connection = Mock()
+        connection.is_connected.return_value = True
+        connection.cursor.return_value.fetchone.return_value = (0,)
+
+        with patch.object(DatabaseManager, '_create_connection', return_value=connection), \
+                patch.object(DatabaseManager, 'migrate') as mock_migrate:
+            assert db_manager.connect() is True
+        mock_migrate.assert_called_once()
+
+    def test_migrate_reports_result(self, db_manager):
+        connection = Mock()
+        with patch.object(DatabaseManager, '_create_connection', return_value=connection), \
+                patch('database_manager.read_schema_version', side_effect=[2, LATEST_VERSION]), \
+                patch('database_manager.apply_migrations', return_value=[3, 4, 5, 6]) as mock_apply:
+            result = db_manager.migrate()
+
+        assert result['success'] is True
+        assert result['from_version'] == 2
+        assert result['to_version'] == LATEST_VERSION
+        mock_apply.assert_called_once_with(connection, None)
+        connection.close.assert_called_once()
+
+    def test_migrate_failure(self, db_manager):
+        with patch.object(DatabaseManager, '_create_connection', side_effect=Error("Connection failed")):
+            result = db_manager.migrate()
+        assert result['success'] is False
+        assert "Connection failed" in result['error']
+
+
+class TestCoveringIndexes:
+    """Migration 12 ist auf die tatsächlichen Export-/Listenabfragen zugeschnitten"""
+
+    def test_export_index_covers_payroll_read(self):
+        migration = next(m for m in load_migrations() if m['name'] == 'covering_indexes')
+        index_stmt = next(s for s in migration['statements'] if 'idx_t001_orden_nombre' in s)
+        columns = index_stmt[index_stmt.index('(') + 1:index_stmt.rindex(')')].replace(' ', '').split(',')
+        assert columns[:2] == ['apellido', 'nombre']
+        query, _ = DatabaseManager('localhost', 'test_db', 'test_user', 'test_password')._payroll_read_query(2025, 6, 4)
+        for column in ('activo', 'ceco', 'declaracion', 'dni'):
+            assert column in columns and f"e.{column}" in query
+
+    def test_redundant_fte_index_is_dropped(self):
+        migration = next(m for m in load_migrations() if m['name'] == 'covering_indexes')
+        assert any(s.endswith("DROP INDEX idx_t008_empleado_fecha") for s in migration['statements'])
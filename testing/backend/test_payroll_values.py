@@ -0,0 +1,356 @@
+import pytest
+import sys
+import os
+from unittest.mock import Mock, patch
+
+from mysql.connector import Error
+
+import pandas as pd
+
+# Backend-Verzeichnis zum Pfad hinzufügen
+backend_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'backend'))
+sys.path.insert(0, backend_path)
+
+from database_manager import DatabaseManager
+from database_migrations import PARTITION_SCHEMA_VERSION, load_migrations
+from database_payroll import PAYROLL_VALUE_COLUMNS
+
+
+def _source_row(**overrides):
+    row = {
+        'id_empleado': 1,
+        'fecha_alta': None,
+        'modalidad': 14,
+        'salario_mensual_bruto': 2000,
+        'atrasos': 0,
+        'antiguedad': 100,
+        'salario_mensual_bruto_prev': 1900,
+        'fte_porcentaje': 100,
+        'ticket_restaurant': 50,
+        'cotizacion_especie': 10,
+        'primas': 200,
+        'beca_escolar': 30,
+        'lavado_coche': 20,
+        'dietas_cotizables': 5,
+        'horas_extras': 40,
+        'seguro_pensiones': 15,
+        'seguro_accidentes': 3,
+        'dietas_exentas': 7,
+        'formacion': 0,
+        'adelas': 11,
+        'sanitas': 12,
+        'gasolina': 60,
+        'dias_exentos': 0,
+    }
+    row.update(overrides)
+    return row
+
+
+def _stored_row(emp_id, calc_id=True):
+    row = {
+        'id_empleado': emp_id,
+        'nombre': 'User',
+        'apellido': f'Test{emp_id}',
+        'nombre_completo': f'Test{emp_id}, User',
+        'ceco': '1001',
+        'declaracion': None,
+        'dni': None,
+        'calc_id': emp_id if calc_id else None,
+    }
+    row.update({col: (0 if calc_id else None) for col in PAYROLL_VALUE_COLUMNS})
+    return row
+
+
+class TestPayrollCalculation:
+    """Tests für die Berechnung der t006-Werte"""
+
+    @pytest.fixture
+    def db_manager(self):
+        return DatabaseManager('localhost', 'test_db', 'test_user', 'test_password', 3307)
+
+    def test_calculates_values_like_export(self, db_manager):
+        carry = [
+            {'id_empleado': 1, 'concept': 'salary', 'amount': 100},
+            {'id_empleado': 1, 'concept': 'primas', 'amount': 25},
+            {'id_empleado': 1, 'concept': 'anticipos', 'amount': 8},
+        ]
+        with patch.object(db_manager, 'execute_query', return_value=[_source_row()]) as mock_query, \
+                patch.object(db_manager, 'get_carry_over_sums_for_apply', return_value=carry):
+            rows = db_manager.calculate_payroll_rows(2025, 6, payout_month=4)
+
+        assert mock_query.call_args.kwargs.get('primary') is True
+        row = rows[0]
+        assert row['salario_mes'] == 2100.0
+        assert row['carry_salary'] == 100.0
+        assert row['carry_primas'] == 25.0
+        assert row['seguro_medico'] == 23.0
+        # salario 2200 + ticket 50 + especie 10 + primas (200 + 25 + 30) + dietas 5 + horas 40 + 15 + 3 + 7
+        assert row['total'] == 2585.0
+        assert row['anticipos'] == 70.0
+        assert row['total_especie'] == 28.0
+        assert row['base_imponible'] == 2495.0
+        assert row['payout_month'] == 4
+        assert set(PAYROLL_VALUE_COLUMNS) <= set(row)
+
+    def test_january_adds_lavado_coche_and_uses_previous_salary(self, db_manager):
+        with patch.object(db_manager, 'execute_query', return_value=[_source_row()]), \
+                patch.object(db_manager, 'get_carry_over_sums_for_apply', return_value=[]):
+            row = db_manager.calculate_payroll_rows(2025, 1, payout_month=4)[0]
+
+        assert row['salario_mes'] == 2000.0
+        assert row['base_imponible'] == 2000.0 + 200 + 30 + 20 + 40
+
+    def test_employee_filter(self, db_manager):
+        with patch.object(db_manager, 'execute_query', return_value=[]) as mock_query:
+            assert db_manager.calculate_payroll_rows(2025, 6, employee_ids=[3, 5], payout_month=4) == []
+        query, params = mock_query.call_args.args
+        assert "e.id_empleado IN (%s, %s)" in query
+        assert params[-2:] == (3, 5)
+
+    def test_refresh_upserts_rows(self, db_manager):
+        rows = [dict(id_empleado=1, anio=2025, mes=6, **{c: 0 for c in PAYROLL_VALUE_COLUMNS})]
+        with patch.object(db_manager, 'calculate_payroll_rows', return_value=rows), \
+                patch.object(db_manager, 'execute_update', return_value=True) as mock_update, \
+                patch.object(db_manager, 'execute_batch', return_value={'success': True, 'rowcount': 1, 'error': None}) as mock_batch:
+            result = db_manager.refresh_payroll_month(2025, 6, [1])
+
+        assert result == {'success': True, 'rows': 1, 'error': None}
+        query, batch_rows = mock_batch.call_args.args[:2]
+        assert "INSERT INTO t006_valores_calculados_mensuales" in query
+        assert "ON DUPLICATE KEY UPDATE" in query
+        assert batch_rows[0][:3] == (1, 2025, 6)
+        dequeue, params = mock_update.call_args.args
+        assert dequeue.startswith("DELETE FROM t006_valores_calculados_mensuales_pendientes")
+        assert params == (2025, 6, 1)
+
+    def test_refresh_locks_inputs_in_one_transaction(self, db_manager):
+        connection = Mock()
+        cursor = connection.cursor.return_value
+        cursor.fetchall.side_effect = [[_source_row()], []]
+        cursor.rowcount = 1
+        with patch.object(DatabaseManager, '_create_connection', return_value=connection) as mock_create, \
+                patch.object(db_manager, 'get_payout_month', return_value=4):
+            result = db_manager.refresh_payroll_month(2025, 6, [1])
+
+        assert result['success'] is True
+        mock_create.assert_called_once()
+        queries = [c.args[0] for c in cursor.execute.call_args_list]
+        assert "FOR SHARE" in queries[0] and "FROM t001_empleados e" in queries[0]
+        assert "FOR SHARE" in queries[1] and "FROM t010_carry_over" in queries[1]
+        assert "INSERT INTO t006_valores_calculados_mensuales" in cursor.executemany.call_args.args[0]
+        connection.commit.assert_called_once()
+
+    def test_lock_reaches_archive_union_branches(self, db_manager):
+        db_manager.schema_version = PARTITION_SCHEMA_VERSION
+        with patch.object(db_manager, 'execute_query', return_value=[]) as mock_query:
+            db_manager.calculate_payroll_rows(2025, 6, employee_ids=[3], payout_month=4, lock_inputs=True)
+
+        query, params = mock_query.call_args.args
+        # Äußeres FOR SHARE plus je ein FOR SHARE in den Live- und Archivzweigen von t003/t004
+        assert query.count("FOR SHARE") == 5
+        assert "FROM t003_ingresos_brutos_mensuales WHERE anio = %s AND mes = %s AND id_empleado IN (%s) FOR SHARE" in query
+        assert "FROM t004_deducciones_mensuales_archivo WHERE anio = %s AND mes = %s AND id_empleado IN (%s) FOR SHARE" in query
+        assert query.count("%s") == len(params)
+
+    @pytest.mark.parametrize('failing_query', [0, 1])
+    def test_refresh_fails_on_lock_wait_timeout(self, db_manager, failing_query):
+        connection = Mock()
+        cursor = connection.cursor.return_value
+        timeout = Error(msg="Lock wait timeout exceeded", errno=1205)
+        # 0: Eingangszeilen (t001/t003/t004), 1: Carry Over (t010)
+        cursor.execute.side_effect = [timeout] if failing_query == 0 else [None, timeout]
+        cursor.fetchall.return_value = [_source_row()]
+        with patch.object(DatabaseManager, '_create_connection', return_value=connection), \
+                patch.object(db_manager, 'get_payout_month', return_value=4):
+            result = db_manager.refresh_payroll_month(2025, 6, [1])
+
+        assert result['success'] is False
+        assert "Lock wait timeout" in result['error']
+        cursor.executemany.assert_not_called()
+        connection.commit.assert_not_called()
+        connection.rollback.assert_called_once()
+
+    def test_refresh_rolls_back_when_upsert_fails(self, db_manager):
+        rows = [dict(id_empleado=1, anio=2025, mes=6, **{c: 0 for c in PAYROLL_VALUE_COLUMNS})]
+        connection = Mock()
+        with patch.object(DatabaseManager, '_create_connection', return_value=connection), \
+                patch.object(db_manager, 'calculate_payroll_rows', return_value=rows), \
+                patch.object(db_manager, 'execute_batch', return_value={'success': False, 'rowcount': 0, 'error': 'Deadlock'}):
+            result = db_manager.refresh_payroll_month(2025, 6, [1])
+
+        assert result == {'success': False, 'rows': 0, 'error': 'Deadlock'}
+
+
+class TestPayrollReads:
+    """Exporte und UI lesen vorberechnete Zeilen"""
+
+    @pytest.fixture
+    def db_manager(self):
+        return DatabaseManager('localhost', 'test_db', 'test_user', 'test_password', 3307)
+
+    def test_missing_rows_are_computed_without_writing(self, db_manager):
+        rows = [_stored_row(1), _stored_row(2, calc_id=False)]
+        computed = [dict(id_empleado=2, anio=2025, mes=6, **{c: 7 for c in PAYROLL_VALUE_COLUMNS})]
+        with patch.object(db_manager, 'get_payout_month', return_value=4), \
+                patch.object(db_manager, 'execute_query', return_value=rows) as mock_query, \
+                patch.object(db_manager, 'calculate_payroll_rows', return_value=computed) as mock_calc, \
+                patch.object(db_manager, 'refresh_payroll_month') as mock_refresh, \
+                patch.object(db_manager, 'execute_batch') as mock_batch:
+            result = db_manager.get_payroll_month(2025, 6)
+
+        mock_refresh.assert_not_called()
+        mock_batch.assert_not_called()
+        mock_query.assert_called_once()
+        mock_calc.assert_called_once_with(2025, 6, [2], payout_month=4)
+        assert result[1]['total'] == 7
+        assert all('calc_id' not in r for r in result)
+
+    def test_export_computes_missing_rows_in_memory(self, db_manager):
+        df = pd.DataFrame([_stored_row(1), _stored_row(2, calc_id=False)])
+        computed = [dict(id_empleado=2, anio=2025, mes=6, **{c: 7 for c in PAYROLL_VALUE_COLUMNS})]
+        with patch.object(db_manager, 'get_payout_month', return_value=4), \
+                patch.object(db_manager, '_query_dataframe', return_value=df) as mock_df, \
+                patch.object(db_manager, 'calculate_payroll_rows', return_value=computed), \
+                patch.object(db_manager, 'refresh_payroll_month') as mock_refresh:
+            result = db_manager._payroll_dataframe(2025, 6)
+
+        mock_df.assert_called_once()
+        mock_refresh.assert_not_called()
+        assert result['total'].tolist() == [0.0, 7.0]
+        assert result['salario_mes'].dtype == 'float64'
+
+    def test_export_fails_when_rows_cannot_be_computed(self, db_manager):
+        df = pd.DataFrame([_stored_row(2, calc_id=False)])
+        with patch.object(db_manager, 'get_payout_month', return_value=4), \
+                patch.object(db_manager, '_query_dataframe', return_value=df), \
+                patch.object(db_manager, 'calculate_payroll_rows', return_value=[]):
+            with pytest.raises(RuntimeError):
+                db_manager._payroll_dataframe(2025, 6)
+
+    def test_export_reads_single_range_query_when_fresh(self, db_manager):
+        df = pd.DataFrame([_stored_row(1), _stored_row(2)])
+        with patch.object(db_manager, 'get_payout_month', return_value=4), \
+                patch.object(db_manager, '_query_dataframe', return_value=df) as mock_df, \
+                patch.object(db_manager, 'refresh_payroll_month') as mock_refresh:
+            result = db_manager._payroll_dataframe(2025, 6)
+
+        mock_df.assert_called_once()
+        mock_refresh.assert_not_called()
+        query, params = mock_df.call_args.args
+        assert "FROM t001_empleados e" in query
+        assert "LEFT JOIN t006_valores_calculados_mensuales c" in query
+        assert "t002_salarios" not in query
+        assert params == (2025, 6, 4)
+        assert result['salario_mes'].dtype == 'float64'
+
+    def test_stale_payout_month_counts_as_missing(self, db_manager):
+        query, params = db_manager._payroll_read_query(2025, 6, 5)
+        assert "c.payout_month = %s" in query
+        assert params == (2025, 6, 5)
+
+
+class TestPayrollInvalidation:
+    """Trigger der Migration 7 löschen nur betroffene Zeilen und merken sie vor"""
+
+    def test_triggers_cover_all_input_tables(self):
+        migration = next(m for m in load_migrations() if m['name'] == 'payroll_values')
+        assert migration['replace_triggers'] is True
+        triggers = [s for s in migration['statements'] if s.startswith('CREATE TRIGGER')]
+        input_triggers = [t for t in triggers if " ON t006_valores_calculados_mensuales" not in t]
+        for table in ('t002_salarios', 't003_ingresos_brutos_mensuales', 't004_deducciones_mensuales',
+                      't008_empleado_fte', 't010_carry_over'):
+            events = {t.split('\n')[1].split()[1] for t in input_triggers if f" ON {table}" in t}
+            assert events == {'INSERT', 'UPDATE', 'DELETE'}, table
+        assert any(" ON t001_empleados" in t and "fecha_alta" in t for t in input_triggers)
+        assert all("DELETE FROM t006_valores_calculados_mensuales" in t for t in input_triggers)
+
+    def test_deleted_rows_are_queued(self):
+        migration = next(m for m in load_migrations() if m['name'] == 'payroll_values')
+        queue_trigger = next(s for s in migration['statements']
+                             if s.startswith('CREATE TRIGGER') and "AFTER DELETE ON t006_valores_calculados_mensuales" in s)
+        assert "INSERT IGNORE INTO t006_valores_calculados_mensuales_pendientes" in queue_trigger
+        assert any(s.startswith("CREATE TABLE IF NOT EXISTS t006_valores_calculados_mensuales_pendientes")
+                   for s in migration['statements'])
+
+
+class TestPayrollAfterCommit:
+    """Vorgemerkte t006-Zeilen werden nach dem Commit des Schreibers neu berechnet"""
+
+    @pytest.fixture
+    def db_manager(self):
+        return DatabaseManager('localhost', 'test_db', 'test_user', 'test_password', 3307)
+
+    @pytest.fixture
+    def mock_connection(self):
+        connection = Mock()
+        cursor = connection.cursor.return_value
+        cursor.with_rows = True
+        cursor.fetchall.return_value = []
+        return connection
+
+    def test_input_write_refreshes_once_after_commit(self, db_manager, mock_connection):
+        with patch.object(DatabaseManager, '_create_connection', return_value=mock_connection), \
+                patch.object(db_manager, 'refresh_pending_payroll') as mock_refresh:
+            with db_manager.unit_of_work():
+                db_manager.execute_update("UPDATE t003_ingresos_brutos_mensuales SET primas = 1 WHERE mes = %s", (5,))
+                db_manager.execute_update("UPDATE t002_salarios SET atrasos = 0 WHERE anio = %s", (2025,))
+                mock_refresh.assert_not_called()
+                mock_connection.commit.assert_not_called()
+
+        mock_refresh.assert_called_once()
+        mock_connection.commit.assert_called_once()
+
+    def test_rollback_skips_refresh(self, db_manager, mock_connection):
+        with patch.object(DatabaseManager, '_create_connection', return_value=mock_connection), \
+                patch.object(db_manager, 'refresh_pending_payroll') as mock_refresh:
+            with pytest.raises(ValueError):
+                with db_manager.unit_of_work():
+                    db_manager.execute_update("UPDATE t010_carry_over SET amount = 0")
+                    raise ValueError("boom")
+
+        mock_refresh.assert_not_called()
+
+    def test_payroll_writes_do_not_schedule_refresh(self, db_manager, mock_connection):
+        with patch.object(DatabaseManager, '_create_connection', return_value=mock_connection), \
+                patch.object(db_manager, 'refresh_pending_payroll') as mock_refresh:
+            with db_manager.unit_of_work():
+                db_manager.execute_update("DELETE FROM t006_valores_calculados_mensuales_pendientes WHERE anio = %s", (2025,))
+
+        mock_refresh.assert_not_called()
+
+    def test_refresh_reuses_committed_connection(self, db_manager, mock_connection):
+        with patch.object(DatabaseManager, '_create_connection', return_value=mock_connection) as mock_create:
+            with db_manager.unit_of_work():
+                db_manager.execute_update("UPDATE t008_empleado_fte SET porcentaje = 50 WHERE id_empleado = %s", (1,))
+
+        mock_create.assert_called_once()
+        executed = [c.args[0] for c in mock_connection.cursor.return_value.execute.call_args_list]
+        assert "FROM t006_valores_calculados_mensuales_pendientes" in executed[-1]
+        assert mock_connection.commit.call_count == 2
+        mock_connection.close.assert_called_once()
+        assert db_manager.in_unit_of_work() is False
+
+    def test_pending_keys_refreshed_per_month(self, db_manager):
+        pending = [
+            {'anio': 2025, 'mes': 5, 'id_empleado': 1},
+            {'anio': 2025, 'mes': 5, 'id_empleado': 2},
+            {'anio': 2025, 'mes': 6, 'id_empleado': 1},
+        ]
+        month_result = {'success': True, 'rows': 1, 'error': None}
+        with patch.object(db_manager, 'execute_query', return_value=pending) as mock_query, \
+                patch.object(db_manager, 'refresh_payroll_month', return_value=month_result) as mock_refresh:
+            result = db_manager.refresh_pending_payroll()
+
+        assert mock_query.call_args.kwargs.get('primary') is True
+        assert [c.args for c in mock_refresh.call_args_list] == [(2025, 5, [1, 2]), (2025, 6, [1])]
+        assert result == {'success': True, 'rows': 2, 'error': None}
+
+    def test_failed_month_is_reported(self, db_manager):
+        pending = [{'anio': 2025, 'mes': 5, 'id_empleado': 1}]
+        with patch.object(db_manager, 'execute_query', return_value=pending), \
+                patch.object(db_manager, 'refresh_payroll_month',
+                             return_value={'success': False, 'rows': 0, 'error': 'Lock wait timeout'}):
+            result = db_manager.refresh_pending_payroll()
+
+        assert result['success'] is False
+        assert result['error'] == 'Lock wait timeout'
@@ -0,0 +1,150 @@
+import pytest
+import sys
+import os
+from unittest.mock import Mock, patch
+from mysql.connector import Error
+
+# Backend-Verzeichnis zum Pfad hinzufügen
+backend_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'backend'))
+sys.path.insert(0, backend_path)
+
+from database_manager import DatabaseManager
+
+
+class TestExecuteQueryIter:
+    """Tests für den Streaming-Iterator execute_query_iter"""
+
+    @pytest.fixture
+    def db_manager(self):
+        manager = DatabaseManager('localhost', 'test_db', 'test_user', 'test_password', 3307)
+        # Nachberechnung von t006 nach dem Commit hat eigene Tests (test_payroll_values.py)
+        manager.refresh_pending_payroll = Mock()
+        return manager
+
+    @pytest.fixture
+    def mock_connection(self):
+        connection = Mock()
+        cursor = Mock()
+        cursor.with_rows = True
+        cursor.fetchmany.side_effect = [
+            [{'id_empleado': 1}, {'id_empleado': 2}],
+            [{'id_empleado': 3}],
+            [],
+        ]
+        connection.cursor.return_value = cursor
+        return connection
+
+    def test_streams_batches_with_unbuffered_cursor(self, db_manager, mock_connection):
+        """fetchmany in Batches, ungepufferter Cursor, Verbindung nach der Iteration zurückgegeben"""
+        with patch.object(DatabaseManager, '_create_connection', return_value=mock_connection):
+            rows = db_manager.execute_query_iter("SELECT id_empleado FROM t001_empleados", batch_size=2)
+            assert next(rows) == {'id_empleado': 1}
+            mock_connection.close.assert_not_called()
+            assert list(rows) == [{'id_empleado': 2}, {'id_empleado': 3}]
+
+        mock_connection.cursor.assert_called_once_with(dictionary=True, buffered=False)
+        mock_connection.cursor.return_value.fetchmany.assert_called_with(2)
+        mock_connection.cursor.return_value.fetchall.assert_not_called()
+        mock_connection.consume_results.assert_not_called()
+        mock_connection.close.assert_called_once()
+
+    def test_early_exit_discards_unread_rows(self, db_manager, mock_connection):
+        """Abbruch der Iteration verwirft ungelesene Zeilen vor der Rückgabe an den Pool"""
+        with patch.object(DatabaseManager, '_create_connection', return_value=mock_connection):
+            rows = db_manager.execute_query_iter("SELECT id_empleado FROM t001_empleados", batch_size=2)
+            next(rows)
+            rows.close()
+
+        mock_connection.consume_results.assert_called_once()
+        mock_connection.close.assert_called_once()
+
+    def test_error_is_raised(self, db_manager, mock_connection):
+        """Fehler mitten im Stream werden nicht als leeres Ergebnis verschluckt"""
+        mock_connection.cursor.return_value.fetchmany.side_effect = [[{'id_empleado': 1}], Error("Lost connection")]
+        with patch.object(DatabaseManager, '_create_connection', return_value=mock_connection):
+            rows = db_manager.execute_query_iter("SELECT id_empleado FROM t001_empleados")
+            assert next(rows) == {'id_empleado': 1}
+            with pytest.raises(Error):
+                next(rows)
+        mock_connection.close.assert_called_once()
+
+    def test_uses_side_connection_without_pending_writes(self, db_manager, mock_connection):
+        """Lesende Unit of Work: eigene Verbindung, andere Statements laufen parallel weiter"""
+        uow_connection = Mock()
+        uow_connection.cursor.return_value.with_rows = True
+        uow_connection.cursor.return_value.fetchall.return_value = []
+        with patch.object(DatabaseManager, '_create_connection', side_effect=[mock_connection, uow_connection]):
+            with db_manager.unit_of_work():
+                for _ in db_manager.execute_query_iter("SELECT id_empleado FROM t001_empleados"):
+                    db_manager.execute_query("SELECT 1 FROM t008_empleado_fte")
+
+        mock_connection.close.assert_called_once()
+        uow_connection.commit.assert_called_once()
+
+    def test_uses_pinned_connection_after_writes(self, db_manager, mock_connection):
+        """Nach Schreibzugriffen in der Unit of Work wird deren Verbindung (gepuffert) genutzt"""
+        with patch.object(DatabaseManager, '_create_connection', return_value=mock_connection) as mock_create:
+            with db_manager.unit_of_work():
+                db_manager.execute_update("UPDATE t001_empleados SET activo = TRUE")
+                assert len(list(db_manager.execute_query_iter("SELECT id_empleado FROM t001_empleados"))) == 3
+                mock_connection.close.assert_not_called()
+
+        mock_create.assert_called_once()
+        mock_connection.cursor.assert_called_with(dictionary=True, buffered=True)
+
+
+
+class TestColumnarResults:
+    """Tests für Tupel-/Spaltenmodus ohne dict pro Zeile"""
+
+    @pytest.fixture
+    def db_manager(self):
+        return DatabaseManager('localhost', 'test_db', 'test_user', 'test_password', 3307)
+
+    @pytest.fixture
+    def mock_connection(self):
+        connection = Mock()
+        cursor = Mock()
+        cursor.with_rows = True
+        cursor.column_names = ('id_empleado', 'salario_mensual_bruto')
+        cursor.fetchmany.side_effect = [
+            [(1, 2000.0), (2, 2100.0)],
+            [(3, 2200.0)],
+            [],
+        ]
+        connection.cursor.return_value = cursor
+        return connection
+
+    def test_batches_are_tuples_with_column_names(self, db_manager, mock_connection):
+        with patch.object(DatabaseManager, '_create_connection', return_value=mock_connection):
+            batches = list(db_manager.execute_query_batches("SELECT id_empleado, salario_mensual_bruto FROM t002_salarios", batch_size=2))
+
+        mock_connection.cursor.assert_called_once_with(dictionary=False, buffered=False)
+        assert batches[0] == (['id_empleado', 'salario_mensual_bruto'], [(1, 2000.0), (2, 2100.0)])
+        assert len(batches) == 2
+
+    def test_execute_query_columns(self, db_manager, mock_connection):
+        with patch.object(DatabaseManager, '_create_connection', return_value=mock_connection):
+            result = db_manager.execute_query_columns("SELECT id_empleado, salario_mensual_bruto FROM t002_salarios", batch_size=2)
+
+        assert result["success"] is True
+        assert result["columns"] == ['id_empleado', 'salario_mensual_bruto']
+        assert result["data"] == {'id_empleado': [1, 2, 3], 'salario_mensual_bruto': [2000.0, 2100.0, 2200.0]}
+        assert result["rowcount"] == 3
+
+    def test_execute_query_columns_error(self, db_manager, mock_connection):
+        mock_connection.cursor.return_value.fetchmany.side_effect = [[(1, 2000.0)], Error("Lost connection")]
+        with patch.object(DatabaseManager, '_create_connection', return_value=mock_connection):
+            result = db_manager.execute_query_columns("SELECT id_empleado, salario_mensual_bruto FROM t002_salarios")
+
+        assert result["success"] is False
+        assert result["data"] == {}
+        assert result["rowcount"] == 0
+
+    def test_query_dataframe_concatenates_batches(self, db_manager, mock_connection):
+        """Exporte bauen den DataFrame batchweise aus Tupeln auf"""
+        with patch.object(DatabaseManager, '_create_connection', return_value=mock_connection):
+            df = db_manager._query_dataframe("SELECT id_empleado, salario_mensual_bruto FROM t002_salarios", batch_size=2)
+        assert df['id_empleado'].tolist() == [1, 2, 3]
+        assert df['salario_mensual_bruto'].tolist() == [2000.0, 2100.0, 2200.0]
+        assert list(df.index) == [0, 1, 2]
@@ -0,0 +1,186 @@
+import pytest
+import sys
+import os
+import json
+from unittest.mock import Mock, patch
+from mysql.connector import Error
+
+# Backend-Verzeichnis zum Pfad hinzufügen
+backend_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'backend'))
+sys.path.insert(0, backend_path)
+
+from database_manager import DatabaseManager
+from database_metrics import QueryMetrics, SlowQueryLog, find_full_scans, normalize_statement
+
+
+class TestNormalizeStatement:
+    """Tests für die Normalisierung von SQL-Statements zu Metrik-Labels"""
+
+    def test_literals_and_placeholders(self):
+        query = "SELECT *  FROM t001_empleados\n WHERE id_empleado = %s AND nombre = 'Ana' AND anio = 2025"
+        assert normalize_statement(query) == "SELECT * FROM t001_empleados WHERE id_empleado = ? AND nombre = ? AND anio = ?"
+
+    def test_in_list_collapsed(self):
+        a = normalize_statement("SELECT 1 FROM t010_carry_over WHERE id_empleado IN (%s, %s)")
+        b = normalize_statement("SELECT 1 FROM t010_carry_over WHERE id_empleado IN (%s, %s, %s, %s)")
+        assert a == b
+        assert "IN (?+)" in a
+
+    def test_table_names_untouched(self):
+        assert "t003_ingresos_brutos_mensuales" in normalize_statement("UPDATE t003_ingresos_brutos_mensuales SET primas = 0")
+
+
+class TestQueryMetrics:
+    """Tests für den Collector und dessen Prometheus-Ausgabe"""
+
+    def test_histogram_and_counters(self):
+        metrics = QueryMetrics(buckets=(0.01, 0.1))
+        metrics.set_endpoint("get_employees")
+        metrics.observe_query("SELECT 1 FROM t001_empleados WHERE id_empleado = %s", 0.005, rows=3)
+        metrics.observe_query("SELECT 1 FROM t001_empleados WHERE id_empleado = 7", 0.05, rows=1)
+        metrics.observe_query("SELECT 1 FROM t001_empleados WHERE id_empleado = %s", 0.5, success=False)
+        metrics.record_retry("SELECT 1 FROM t001_empleados WHERE id_empleado = %s")
+        metrics.observe_pool_wait(0.002)
+
+        text = metrics.render_prometheus()
+        labels = 'endpoint="get_employees",statement="SELECT ? FROM t001_empleados WHERE id_empleado = ?"'
+        assert f'rrhh_db_query_duration_seconds_bucket{{{labels},kind="query",le="0.01"}} 1' in text
+        assert f'rrhh_db_query_duration_seconds_bucket{{{labels},kind="query",le="0.1"}} 2' in text
+        assert f'rrhh_db_query_duration_seconds_bucket{{{labels},kind="query",le="+Inf"}} 3' in text
+        assert f'rrhh_db_query_duration_seconds_count{{{labels},kind="query"}} 3' in text
+        assert f'rrhh_db_query_calls_total{{{labels},kind="query",status="ok"}} 2' in text
+        assert f'rrhh_db_query_calls_total{{{labels},kind="query",status="error"}} 1' in text
+        assert f'rrhh_db_query_rows_total{{{labels}}} 4' in text
+        assert f'rrhh_db_query_retries_total{{{labels}}} 1' in text
+        assert 'rrhh_db_pool_wait_seconds_count{endpoint="get_employees"} 1' in text
+
+    def test_statement_cardinality_is_bounded(self):
+        metrics = QueryMetrics(max_statements=2)
+        for table in ("a", "b", "c", "d"):
+            metrics.observe_query(f"SELECT x FROM {table}", 0.001)
+        text = metrics.render_prometheus()
+        assert 'statement="other"' in text
+        assert 'statement="SELECT x FROM c"' not in text
+
+    def test_default_endpoint(self):
+        metrics = QueryMetrics()
+        metrics.observe_query("SELECT 1", 0.001)
+        assert 'endpoint="none"' in metrics.render_prometheus()
+
+
+class TestDatabaseManagerInstrumentation:
+    """execute_query/execute_update melden Latenz, Zeilen und Retries"""
+
+    @pytest.fixture
+    def db_manager(self):
+        return DatabaseManager('localhost', 'test_db', 'test_user', 'test_password', 3307)
+
+    def test_query_rows_and_update_recorded(self, db_manager):
+        connection = Mock()
+        cursor = Mock()
+        cursor.with_rows = True
+        cursor.fetchall.return_value = [{'id_empleado': 1}, {'id_empleado': 2}]
+        connection.cursor.return_value = cursor
+        with patch.object(DatabaseManager, '_create_connection', return_value=connection):
+            db_manager.execute_query("SELECT id_empleado FROM t001_empleados")
+            db_manager.execute_update("UPDATE t001_empleados SET activo = %s", (True,))
+
+        text = db_manager.metrics.render_prometheus()
+        assert 'rrhh_db_query_rows_total{endpoint="none",statement="SELECT id_empleado FROM t001_empleados"} 2' in text
+        assert 'statement="UPDATE t001_empleados SET activo = ?",kind="update",status="ok"} 1' in text
+
+    def test_transient_retry_recorded(self, db_manager):
+        dead = Mock()
+        dead.cursor.return_value.execute.side_effect = Error("Lost connection to MySQL server", errno=2013)
+        alive = Mock()
+        alive.cursor.return_value.with_rows = True
+        alive.cursor.return_value.fetchall.return_value = []
+        with patch.object(DatabaseManager, '_create_connection', side_effect=[dead, alive]):
+            db_manager.execute_query("SELECT 1 FROM t001_empleados")
+
+        text = db_manager.metrics.render_prometheus()
+        assert 'rrhh_db_query_retries_total{endpoint="none",statement="SELECT ? FROM t001_empleados"} 1' in text
+        assert 'kind="query",status="error"} 1' in text
+
+    def test_pool_wait_recorded(self, db_manager):
+        db_manager._pool = Mock()
+        db_manager._pool.get_connection.return_value = Mock()
+        db_manager._create_connection()
+        assert 'rrhh_db_pool_wait_seconds_count{endpoint="none"} 1' in db_manager.metrics.render_prometheus()
+
+
+class TestSlowQueryLog:
+    """Tests für das optionale Slow-Query-Log mit EXPLAIN-Erfassung"""
+
+    PLAN = {
+        "query_block": {
+            "select_id": 1,
+            "nested_loop": [
+                {"table": {"table_name": "e", "access_type": "ALL"}},
+                {"table": {"table_name": "f", "access_type": "ref"}},
+            ],
+        }
+    }
+
+    @pytest.fixture
+    def db_manager(self):
+        manager = DatabaseManager('localhost', 'test_db', 'test_user', 'test_password', 3307)
+        manager.slow_query_log.explain_async = False
+        return manager
+
+    def test_disabled_by_default(self, db_manager):
+        assert db_manager.slow_query_log.enabled is False
+        assert db_manager.slow_query_log.is_slow(100.0) is False
+
+    def test_find_full_scans(self):
+        assert find_full_scans(self.PLAN) == ["e"]
+
+    def test_ring_buffer_bounded_newest_first(self):
+        log = SlowQueryLog(threshold_ms=1, capacity=2, explain=False)
+        for i in range(3):
+            log.record(f"SELECT {i}", None, 0.5)
+        entries = log.entries()
+        assert len(entries) == 2
+        assert entries[0]["duration_ms"] == 500.0
+        log.clear()
+        assert log.entries() == []
+
+    def test_slow_statement_logged_with_explain(self, db_manager):
+        db_manager.configure_slow_query_log(threshold_ms=0)
+        connection = Mock()
+        cursor = Mock()
+        cursor.with_rows = True
+        cursor.fetchall.return_value = []
+        connection.cursor.return_value = cursor
+        side = Mock()
+        side.cursor.return_value.fetchone.return_value = (json.dumps(self.PLAN),)
+
+        query = "SELECT * FROM t001_empleados e WHERE LOWER(e.nombre) LIKE LOWER(%s)"
+        with patch.object(DatabaseManager, '_create_connection', side_effect=[connection, side]):
+            db_manager.execute_query(query, ('%ana%',))
+
+        entries = db_manager.slow_query_log.entries()
+        assert len(entries) == 1
+        entry = entries[0]
+        assert entry["statement"] == "SELECT * FROM t001_empleados e WHERE LOWER(e.nombre) LIKE LOWER(?)"
+        assert entry["params_fingerprint"] is not None
+        assert "%ana%" not in json.dumps(entry)
+        assert entry["full_scans"] == ["e"]
+        side.cursor.return_value.execute.assert_called_once_with(f"EXPLAIN FORMAT=JSON {query}", ('%ana%',))
+        side.close.assert_called_once()
+
+    def test_explain_failure_is_recorded(self, db_manager):
+        db_manager.configure_slow_query_log(threshold_ms=0)
+        connection = Mock()
+        connection.cursor.return_value.with_rows = True
+        connection.cursor.return_value.fetchall.return_value = []
+        with patch.object(DatabaseManager, '_create_connection', side_effect=[connection, Error("pool exhausted")]):
+            assert db_manager.execute_query("SELECT 1 FROM t001_empleados") == []
+
+        assert "pool exhausted" in db_manager.slow_query_log.entries()[0]["explain_error"]
+
+    def test_non_explainable_statement_skipped(self):
+        explain_fn = Mock()
+        log = SlowQueryLog(threshold_ms=0, explain_async=False)
+        log.record("SAVEPOINT uow_sp_1", None, 1.0, explain_fn=explain_fn)
+        explain_fn.assert_not_called()
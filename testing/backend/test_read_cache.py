@@ -0,0 +1,204 @@
+import pytest
+import sys
+import os
+from unittest.mock import Mock, patch
+
+# Backend-Verzeichnis zum Pfad hinzufügen
+backend_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'backend'))
+sys.path.insert(0, backend_path)
+
+from database_cache import ReadCache, tables_in_statement
+from database_manager import DatabaseManager
+
+
+class TestReadCache:
+    """Tests für TTL, LRU und Tabellen-Tags"""
+
+    def test_hit_miss_and_ttl(self):
+        cache = ReadCache(max_entries=10, ttl_seconds=5)
+        assert cache.get('k', 'm') == (False, None)
+        cache.put('k', [1], ('t001_empleados',), cache.generations(('t001_empleados',)))
+        assert cache.get('k', 'm') == (True, [1])
+
+        with patch('database_cache.time.monotonic', return_value=10 ** 9):
+            assert cache.get('k', 'm') == (False, None)
+        stats = cache.stats()
+        assert stats['methods']['m'] == {'hits': 1, 'misses': 2}
+        assert stats['entries'] == 0
+
+    def test_lru_bound(self):
+        cache = ReadCache(max_entries=2, ttl_seconds=60)
+        for key in ('a', 'b'):
+            cache.put(key, key, ('t001_empleados',), cache.generations(('t001_empleados',)))
+        cache.get('a', 'm')
+        cache.put('c', 'c', ('t001_empleados',), cache.generations(('t001_empleados',)))
+        assert cache.get('b', 'm')[0] is False
+        assert cache.get('a', 'm')[0] is True
+        assert cache.stats()['evictions'] == 1
+
+    def test_invalidate_only_tagged_entries(self):
+        cache = ReadCache(ttl_seconds=60)
+        cache.put('emp', 1, ('t001_empleados',), cache.generations(('t001_empleados',)))
+        cache.put('sal', 2, ('t002_salarios',), cache.generations(('t002_salarios',)))
+        assert cache.invalidate({'t002_salarios'}) == 1
+        assert cache.get('emp', 'm')[0] is True
+        assert cache.get('sal', 'm')[0] is False
+
+    def test_write_during_read_is_not_cached(self):
+        cache = ReadCache(ttl_seconds=60)
+        generations = cache.generations(('t001_empleados',))
+        cache.invalidate({'t001_empleados'})
+        assert cache.put('emp', 1, ('t001_empleados',), generations) is False
+
+    def test_recently_written_window(self):
+        cache = ReadCache(ttl_seconds=60, replica_lag_seconds=5)
+        assert cache.recently_written(('t001_empleados',)) is False
+        with patch('database_cache.time.monotonic', return_value=1000.0):
+            cache.invalidate({'t001_empleados'})
+        with patch('database_cache.time.monotonic', return_value=1004.0):
+            assert cache.recently_written(('t001_empleados',)) is True
+            assert cache.recently_written(('t002_salarios',)) is False
+        with patch('database_cache.time.monotonic', return_value=1006.0):
+            assert cache.recently_written(('t001_empleados',)) is False
+        assert ReadCache(replica_lag_seconds=0).recently_written(('t001_empleados',)) is False
+
+    def test_statement_tables_include_trigger_and_archive_tables(self):
+        tables = tables_in_statement("UPDATE t002_salarios SET atrasos = %s WHERE id_empleado = %s")
+        assert tables == {'t002_salarios', 't006_valores_calculados_mensuales'}
+        archive = tables_in_statement("DELETE FROM t003_ingresos_brutos_mensuales_archivo WHERE id_empleado = %s")
+        assert 't003_ingresos_brutos_mensuales' in archive
+        assert tables_in_statement("SAVEPOINT uow_sp_1") == set()
+
+
+class TestDatabaseManagerCache:
+    """Memoisierte Lesemethoden und Invalidierung durch Schreibzugriffe"""
+
+    @pytest.fixture
+    def db_manager(self):
+        manager = DatabaseManager('localhost', 'test_db', 'test_user', 'test_password', 3307)
+        # Nachberechnung von t006 nach dem Commit hat eigene Tests (test_payroll_values.py)
+        manager.refresh_pending_payroll = Mock()
+        return manager
+
+    def test_get_employee_is_memoized(self, db_manager):
+        row = {'id_empleado': 1, 'nombre': 'Ana'}
+        with patch.object(db_manager, 'execute_query', return_value=[row]) as mock_query:
+            first = db_manager.get_employee(1)
+            first['nombre'] = 'geändert'
+            second = db_manager.get_employee(1)
+
+        mock_query.assert_called_once()
+        assert second['nombre'] == 'Ana'
+        assert db_manager.read_cache.stats()['methods']['get_employee'] == {'hits': 1, 'misses': 1}
+
+    def test_update_invalidates_tagged_reads(self, db_manager):
+        connection = Mock()
+        with patch.object(db_manager, 'execute_query', return_value=[{'id_empleado': 1}]) as mock_query, \
+                patch.object(DatabaseManager, '_create_connection', return_value=connection):
+            db_manager.get_employee(1)
+            db_manager.get_salary(1, 2025)
+            assert db_manager.execute_update("UPDATE t002_salarios SET atrasos = 0 WHERE id_empleado = %s", (1,))
+            db_manager.get_employee(1)
+            db_manager.get_salary(1, 2025)
+
+        called = [c.args[0] for c in mock_query.call_args_list]
+        assert sum('FROM t001_empleados' in q for q in called) == 1
+        assert sum('FROM t002_salarios' in q for q in called) == 2
+
+    def test_transaction_invalidates_declared_tables(self, db_manager):
+        connection = Mock()
+        with patch.object(db_manager, 'execute_query', return_value=[{'id_empleado': 1}]) as mock_query, \
+                patch.object(DatabaseManager, '_create_connection', return_value=connection):
+            db_manager.get_employee(1)
+            assert db_manager.delete_employee(1) is True
+            db_manager.get_employee(1)
+        assert mock_query.call_count == 2
+
+    def test_unit_of_work_bypasses_cache_after_write(self, db_manager):
+        connection = Mock()
+        with patch.object(db_manager, 'execute_query', return_value=[{'id_empleado': 1}]) as mock_query, \
+                patch.object(DatabaseManager, '_create_connection', return_value=connection):
+            db_manager.begin_unit_of_work()
+            try:
+                # Lesende Requests laufen ebenfalls in einer Unit of Work und nutzen den Cache
+                db_manager.get_employee(1)
+                db_manager.get_employee(1)
+                assert mock_query.call_count == 1
+                db_manager.execute_update("UPDATE t005_usuarios SET activo = 1 WHERE id = %s", (1,))
+                db_manager.get_employee(1)
+                db_manager.get_employee(1)
+            finally:
+                db_manager.end_unit_of_work()
+        assert mock_query.call_count == 3
+
+    def test_read_on_open_snapshot_is_not_cached(self, db_manager):
+        connection = Mock()
+        with patch.object(db_manager, 'execute_query', return_value=[{'id_empleado': 1}]) as mock_query, \
+                patch.object(DatabaseManager, '_create_connection', return_value=connection):
+            db_manager.get_employee(1)
+            db_manager.begin_unit_of_work()
+            try:
+                # Wie get_resource_version: die erste Abfrage pinnt die Verbindung (Snapshot)
+                db_manager._acquire_connection()
+                # Vorhandene Einträge dürfen weiter geliefert werden
+                db_manager.get_employee(1)
+                assert mock_query.call_count == 1
+                # Ein anderer Request bestätigt eine Änderung
+                db_manager.read_cache.invalidate({'t001_empleados'})
+                db_manager.get_employee(1)
+                db_manager.get_employee(1)
+                assert mock_query.call_count == 3
+                assert db_manager.read_cache.stats()['entries'] == 0
+            finally:
+                db_manager.end_unit_of_work()
+            db_manager.get_employee(1)
+            db_manager.get_employee(1)
+        assert mock_query.call_count == 4
+
+    def test_empty_results_are_not_cached(self, db_manager):
+        with patch.object(db_manager, 'execute_query', return_value=[]) as mock_query:
+            assert db_manager.get_employee(99) is None
+            assert db_manager.get_employee(99) is None
+        assert mock_query.call_count == 2
+
+    def test_disabled_with_zero_ttl(self):
+        db_manager = DatabaseManager('localhost', 'test_db', 'test_user', 'test_password', 3307, read_cache_ttl=0)
+        with patch.object(db_manager, 'execute_query', return_value=[{'id_empleado': 1}]) as mock_query:
+            db_manager.get_employee(1)
+            db_manager.get_employee(1)
+        assert mock_query.call_count == 2
+
+    def test_prometheus_output(self, db_manager):
+        with patch.object(db_manager, 'execute_query', return_value=[{'id_empleado': 1}]):
+            db_manager.get_employee(1)
+        text = db_manager.read_cache.render_prometheus()
+        assert 'rrhh_db_cache_misses_total{method="get_employee"} 1' in text
+
+    def test_reads_primary_without_caching_after_write_with_replicas(self):
+        db_manager = DatabaseManager('localhost', 'test_db', 'test_user', 'test_password', 3307,
+                                     read_hosts='replica1')
+        routed = []
+
+        def query(*args, **kwargs):
+            routed.append(bool(getattr(db_manager._routing_local, 'read_primary', False)))
+            return [{'id_empleado': 1}]
+
+        with patch.object(db_manager, 'execute_query', side_effect=query):
+            db_manager.get_employee(1)
+            db_manager.read_cache.invalidate({'t001_empleados'})
+            db_manager.get_employee(1)
+            db_manager.get_employee(1)
+            assert routed == [False, True, True]
+            assert db_manager.read_cache.stats()['entries'] == 0
+
+            with patch('database_cache.time.monotonic', return_value=10 ** 9):
+                db_manager.get_employee(1)
+                db_manager.get_employee(1)
+        assert routed == [False, True, True, False]
+
+    def test_without_replicas_caches_right_after_write(self, db_manager):
+        with patch.object(db_manager, 'execute_query', return_value=[{'id_empleado': 1}]) as mock_query:
+            db_manager.read_cache.invalidate({'t001_empleados'})
+            db_manager.get_employee(1)
+            db_manager.get_employee(1)
+        mock_query.assert_called_once()
@@ -0,0 +1,105 @@
+import pytest
+import sys
+import os
+from unittest.mock import Mock, patch
+from mysql.connector import Error
+
+# Backend-Verzeichnis zum Pfad hinzufügen
+backend_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'backend'))
+sys.path.insert(0, backend_path)
+
+from database_manager import DatabaseManager
+
+
+class StandInPool:
+    """Stand-in für QueuedConnectionPool: eine Mock-Verbindung pro Host, Aufrufe werden protokolliert"""
+
+    instances = {}
+
+    def __init__(self, pool_name, host, port, **kwargs):
+        self.host = f"{host}:{port}"
+        self.connection = Mock(name=self.host)
+        cursor = Mock()
+        cursor.with_rows = True
+        cursor.fetchall.return_value = [{'host': self.host}]
+        cursor.column_names = ('host',)
+        cursor.fetchmany.side_effect = lambda size: []
+        self.connection.cursor.return_value = cursor
+        self.checkouts = 0
+        StandInPool.instances[self.host] = self
+
+    def get_connection(self):
+        self.checkouts += 1
+        return self.connection
+
+    def stats(self):
+        return {"in_use": 0, "checkouts": self.checkouts}
+
+
+class TestReadReplicaRouting:
+    """Tests für das Routing von SELECTs auf Read-Replicas"""
+
+    @pytest.fixture(autouse=True)
+    def stand_in_pools(self):
+        StandInPool.instances = {}
+        with patch('database_manager.QueuedConnectionPool', StandInPool):
+            yield
+
+    @pytest.fixture
+    def db_manager(self):
+        manager = DatabaseManager('primary', 'test_db', 'test_user', 'test_password', 3307, read_hosts="replica1, replica2:3310")
+        # Nachberechnung von t006 nach dem Commit hat eigene Tests (test_payroll_values.py)
+        manager.refresh_pending_payroll = Mock()
+        return manager
+
+    def test_parse_read_hosts(self, db_manager):
+        assert db_manager.read_hosts == [('replica1', 3307), ('replica2', 3310)]
+
+    def test_select_goes_to_replicas_round_robin(self, db_manager):
+        first = db_manager.execute_query("SELECT 1 FROM t001_empleados")
+        second = db_manager.execute_query("SELECT 1 FROM t001_empleados")
+        assert {first[0]['host'], second[0]['host']} == {'replica1:3307', 'replica2:3310'}
+        assert 'primary:3307' not in StandInPool.instances
+
+    def test_writes_go_to_primary(self, db_manager):
+        assert db_manager.execute_update("UPDATE t001_empleados SET activo = TRUE") is True
+        assert StandInPool.instances['primary:3307'].checkouts == 1
+
+    def test_primary_hint_per_call(self, db_manager):
+        assert db_manager.execute_query("SELECT 1", primary=True)[0]['host'] == 'primary:3307'
+
+    def test_primary_hint_per_request(self, db_manager):
+        with db_manager.read_primary():
+            assert db_manager.execute_query("SELECT 1")[0]['host'] == 'primary:3307'
+        assert db_manager.execute_query("SELECT 1")[0]['host'] != 'primary:3307'
+
+    def test_read_your_own_writes_in_unit_of_work(self, db_manager):
+        with db_manager.unit_of_work():
+            assert db_manager.execute_query("SELECT 1")[0]['host'] != 'primary:3307'
+            db_manager.execute_update("UPDATE t002_salarios SET salario_anual_bruto = 1")
+            assert db_manager.execute_query("SELECT 1")[0]['host'] == 'primary:3307'
+
+    def test_locking_reads_stay_on_primary(self, db_manager):
+        result = db_manager.execute_query("SELECT id_empleado FROM t001_empleados WHERE id_empleado = %s FOR UPDATE", (1,))
+        assert result[0]['host'] == 'primary:3307'
+
+    def test_streaming_reads_use_replica(self, db_manager):
+        list(db_manager.execute_query_batches("SELECT host FROM t001_empleados"))
+        assert sum(p.checkouts for h, p in StandInPool.instances.items() if h != 'primary:3307') == 1
+        assert 'primary:3307' not in StandInPool.instances
+
+    def test_fallback_to_primary_when_replicas_fail(self, db_manager):
+        db_manager._get_read_pools()
+        for host in ('replica1:3307', 'replica2:3310'):
+            StandInPool.instances[host].get_connection = Mock(side_effect=Error("Can't connect"))
+        assert db_manager.execute_query("SELECT 1")[0]['host'] == 'primary:3307'
+
+    def test_without_read_hosts_everything_on_primary(self):
+        manager = DatabaseManager('primary', 'test_db', 'test_user', 'test_password', 3307)
+        assert manager.execute_query("SELECT 1")[0]['host'] == 'primary:3307'
+
+    def test_pool_stats_include_replicas(self, db_manager):
+        db_manager.execute_query("SELECT 1")
+        db_manager.execute_update("UPDATE t001_empleados SET activo = TRUE")
+        assert len(db_manager.pool_stats()["replicas"]) == 2
+
@@ -162,7 +162,7 @@ class TestRegistroProcesamiento:
             }
         ]
         
-        with patch.object(db_manager, 'execute_query', return_value=mock_logs):
+        with patch.object(db_manager, 'execute_query_iter', return_value=iter(mock_logs)):
             result = db_manager.get_global_registro_procesamiento(limit=100)
             assert len(result) == 1
             assert result[0]['usuario_login'] == 'testuser'
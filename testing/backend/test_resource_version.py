@@ -0,0 +1,102 @@
+import pytest
+import sys
+import os
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+# Backend-Verzeichnis zum Pfad hinzufügen
+backend_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'backend'))
+sys.path.insert(0, backend_path)
+
+from database_manager import RESOURCE_VERSION_TABLES, DatabaseManager
+from database_migrations import load_migrations
+
+
+def _rows(modified=1735689600, version=3):
+    return [
+        {'tabla': 't001_empleados', 'version': version, 'modificado': modified},
+        {'tabla': 't002_salarios', 'version': 5, 'modificado': None},
+    ]
+
+
+class TestResourceVersion:
+    """Tests für die Versionskennung (ETag) der Mitarbeiter-Ressourcen"""
+
+    @pytest.fixture
+    def db_manager(self):
+        return DatabaseManager('localhost', 'test_db', 'test_user', 'test_password', 3307)
+
+    def test_single_aggregate_query_per_resource(self, db_manager):
+        with patch.object(db_manager, 'execute_query', return_value=_rows()) as mock_query:
+            version = db_manager.get_resource_version("employee", 7)
+
+        query, params = mock_query.call_args.args
+        assert query.count("UNION ALL") == 4
+        assert query.count("FROM t013_versiones_empleado v") == 5
+        assert "MAX(fecha_modificacion)" in query
+        assert "COUNT(*)" not in query
+        assert params == (7,) * 10
+        assert version['last_modified'] == datetime.fromtimestamp(1735689600, timezone.utc)
+        assert len(version['etag']) == 32
+
+    def test_etag_is_stable_until_data_changes(self, db_manager):
+        with patch.object(db_manager, 'execute_query', return_value=_rows()) as mock_query:
+            first = db_manager.get_resource_version("employees_with_salaries")
+            second = db_manager.get_resource_version("employees_with_salaries")
+        assert first == second
+        # Nicht gecacht: jeder Aufruf fragt den Datenbankstand ab
+        assert mock_query.call_count == 2
+
+        with patch.object(db_manager, 'execute_query', return_value=_rows(version=4)):
+            changed = db_manager.get_resource_version("employees_with_salaries")
+        assert changed['etag'] != first['etag']
+
+    def test_write_in_same_second_changes_etag(self, db_manager):
+        with patch.object(db_manager, 'execute_query', return_value=_rows()):
+            before = db_manager.get_resource_version("employees")
+        # Zweite Änderung in derselben Sekunde: fecha_modificacion gleich, Zähler nicht
+        with patch.object(db_manager, 'execute_query', return_value=_rows(version=4)):
+            after = db_manager.get_resource_version("employees")
+        assert before['last_modified'] == after['last_modified']
+        assert before['etag'] != after['etag']
+
+    def test_etag_depends_only_on_version_counters(self, db_manager):
+        with patch.object(db_manager, 'execute_query', return_value=_rows()):
+            before = db_manager.get_resource_version("employees")
+            # Prozesslokale Cache-Generationen fließen nicht ein
+            db_manager._invalidate_tables({'t001_empleados'})
+            after = db_manager.get_resource_version("employees")
+            other = DatabaseManager('localhost', 'test_db', 'test_user', 'test_password', 3307)
+            with patch.object(other, 'execute_query', return_value=_rows()):
+                from_other_process = other.get_resource_version("employees")
+        assert before == after == from_other_process
+
+    def test_error_returns_none(self, db_manager):
+        with patch.object(db_manager, 'execute_query', side_effect=Exception("Connection failed")):
+            assert db_manager.get_resource_version("employees") is None
+
+
+class TestResourceVersionMigration:
+    """Migration 13: Versionszähler per Trigger"""
+
+    @pytest.fixture
+    def statements(self):
+        migration = next(m for m in load_migrations() if m['name'] == 'resource_versions')
+        assert migration['replace_triggers'] is True
+        return migration['statements']
+
+    def test_every_write_bumps_the_counter(self, statements):
+        assert statements[0].startswith("CREATE TABLE IF NOT EXISTS t013_versiones_empleado")
+        triggers = [s for s in statements if s.startswith('CREATE TRIGGER')]
+        assert len(triggers) == 15
+        for table in RESOURCE_VERSION_TABLES['employee']:
+            for event, ref in (('INSERT', 'NEW'), ('UPDATE', 'NEW'), ('DELETE', 'OLD')):
+                matches = [t for t in triggers if f"AFTER {event} ON {table}\n" in t]
+                assert len(matches) == 1, (event, table)
+                assert f"VALUES ({ref}.id_empleado, '{table}', 1)" in matches[0]
+                assert "ON DUPLICATE KEY UPDATE version = version + 1" in matches[0]
+
+    def test_moved_rows_bump_both_employees(self, statements):
+        trigger = next(s for s in statements if "AFTER UPDATE ON t002_salarios\n" in s)
+        assert "IF NOT (OLD.id_empleado <=> NEW.id_empleado) THEN" in trigger
+        assert "VALUES (OLD.id_empleado, 't002_salarios', 1)" in trigger
@@ -0,0 +1,161 @@
+import pytest
+import sys
+import os
+from datetime import datetime
+from decimal import Decimal
+from unittest.mock import Mock, patch
+
+# Backend-Verzeichnis zum Pfad hinzufügen
+backend_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'backend'))
+sys.path.insert(0, backend_path)
+
+from mysql.connector import Error
+
+from database_manager import DatabaseManager
+
+CANDIDATES = [
+    {'id_empleado': 1, 'nombre': 'Ana', 'apellido': 'García', 'modalidad': 14, 'antiguedad': 0, 'salario_anual_bruto': 28000},
+    {'id_empleado': 4, 'nombre': 'Luis', 'apellido': 'Pérez', 'modalidad': 12, 'antiguedad': 100, 'salario_anual_bruto': 36000},
+]
+
+
+class TestCopySalariesToNewYear:
+    """Tests für die mengenbasierte Gehaltskopierung ins Folgejahr"""
+
+    @pytest.fixture
+    def db_manager(self):
+        manager = DatabaseManager('localhost', 'test_db', 'test_user', 'test_password', 3307)
+        # Nachberechnung von t006 nach dem Commit hat eigene Tests (test_payroll_values.py)
+        manager.refresh_pending_payroll = Mock()
+        return manager
+
+    @pytest.fixture
+    def mock_connection(self):
+        connection = Mock()
+        cursor = Mock()
+        cursor.fetchall.return_value = list(CANDIDATES)
+        connection.cursor.return_value = cursor
+        return connection
+
+    def test_single_insert_select_in_one_transaction(self, db_manager, mock_connection):
+        cursor = mock_connection.cursor.return_value
+        cursor.rowcount = 2
+        history = [
+            {'id_empleado': 1, 'anio': 2025, 'modalidad': 14, 'salario_anual_bruto': Decimal('28000.00'),
+             'salario_mensual_bruto': Decimal('2000.00'), 'atrasos': Decimal('0.00'),
+             'salario_mensual_con_atrasos': Decimal('2000.00')},
+            {'id_empleado': 1, 'anio': 2026, 'modalidad': 14, 'salario_anual_bruto': Decimal('30000.00'),
+             'salario_mensual_bruto': Decimal('2142.86'), 'atrasos': Decimal('0.00'),
+             'salario_mensual_con_atrasos': Decimal('2142.86')},
+            {'id_empleado': 4, 'anio': 2025, 'modalidad': 12, 'salario_anual_bruto': Decimal('36000.00'),
+             'salario_mensual_bruto': Decimal('3000.00'), 'atrasos': Decimal('0.00'),
+             'salario_mensual_con_atrasos': Decimal('3000.00')},
+        ]
+        cursor.fetchall.side_effect = [list(CANDIDATES), history]
+        with patch.object(DatabaseManager, '_create_connection', return_value=mock_connection), \
+                patch.object(db_manager, 'get_payout_month', return_value=4), \
+                patch.object(db_manager, 'add_salary') as mock_add:
+            result = db_manager.copy_salaries_to_new_year(2025)
+
+        mock_add.assert_not_called()
+        executed = cursor.execute.call_args_list
+        assert len(executed) == 4
+        insert_query, insert_params = executed[1].args
+        assert insert_query.lstrip().startswith("INSERT INTO t002_salarios")
+        assert "SELECT s.id_empleado, %s, s.modalidad" in insert_query
+        assert insert_query.count("%s") == len(insert_params)
+        assert insert_params == (2025, 2024, 1, 4, 2025)
+        history_query, history_params = executed[2].args
+        assert "anio >= %s" in history_query
+        assert history_params == (1, 4, 2025)
+        # Nur 2026 von Mitarbeiter 1 ändert sich (atrasos für die Erhöhung gegenüber 2025)
+        update_query, update_params = executed[3].args
+        assert "INNER JOIN (SELECT %s AS id_empleado" in update_query
+        assert update_params == (1, 2026, Decimal('428.57'), Decimal('2142.86'))
+        mock_connection.commit.assert_called_once()
+
+        assert result['success'] is True
+        assert result['copied_count'] == 2
+        assert result['skipped_count'] == 0
+
+    def test_concurrently_inserted_rows_are_skipped(self, db_manager, mock_connection):
+        cursor = mock_connection.cursor.return_value
+        cursor.rowcount = 1
+        cursor.fetchall.side_effect = [list(CANDIDATES), []]
+        with patch.object(DatabaseManager, '_create_connection', return_value=mock_connection), \
+                patch.object(db_manager, 'get_payout_month', return_value=4):
+            result = db_manager.copy_salaries_to_new_year(2025)
+        assert result['copied_count'] == 1
+        assert result['skipped_count'] == 1
+
+    def test_nothing_to_copy(self, db_manager, mock_connection):
+        cursor = mock_connection.cursor.return_value
+        cursor.fetchall.return_value = []
+        with patch.object(DatabaseManager, '_create_connection', return_value=mock_connection):
+            result = db_manager.copy_salaries_to_new_year(2025)
+        assert result['success'] is True
+        assert result['copied_count'] == 0
+        assert cursor.execute.call_count == 1
+
+    def test_dry_run_does_not_write(self, db_manager):
+        with patch.object(db_manager, 'execute_query', return_value=list(CANDIDATES)) as mock_query, \
+                patch.object(DatabaseManager, '_create_connection') as mock_create:
+            result = db_manager.copy_salaries_to_new_year(2025, dry_run=True)
+
+        mock_create.assert_not_called()
+        assert mock_query.call_args.args[1] == (2024, 2025)
+        assert result['dry_run'] is True
+        assert result['copied_count'] == 0
+        assert [e['id_empleado'] for e in result['employees']] == [1, 4]
+
+    def test_failure_rolls_back(self, db_manager, mock_connection):
+        mock_connection.cursor.return_value.execute.side_effect = [None, Error("Duplicate entry")]
+        with patch.object(DatabaseManager, '_create_connection', return_value=mock_connection):
+            result = db_manager.copy_salaries_to_new_year(2025)
+        assert result['success'] is False
+        assert result['copied_count'] == 0
+        mock_connection.rollback.assert_called_once()
+
+    def test_target_year_too_far(self, db_manager):
+        result = db_manager.copy_salaries_to_new_year(3000)
+        assert result['success'] is False
+
+
+class TestMissingSalaryYears:
+    """Tests für get_missing_salary_years (eine Abfrage, gecacht)"""
+
+    @pytest.fixture
+    def db_manager(self):
+        manager = DatabaseManager('localhost', 'test_db', 'test_user', 'test_password', 3307)
+        # Nachberechnung von t006 nach dem Commit hat eigene Tests (test_payroll_values.py)
+        manager.refresh_pending_payroll = Mock()
+        return manager
+
+    def test_single_query_grouped_by_year(self, db_manager):
+        current = datetime.now().year
+        rows = [
+            {'anio': current, 'id_empleado': 4, 'nombre': 'Luis', 'apellido': 'Pérez'},
+            {'anio': current + 1, 'id_empleado': None, 'nombre': None, 'apellido': None},
+            {'anio': current - 1, 'id_empleado': None, 'nombre': None, 'apellido': None},
+        ]
+        with patch.object(db_manager, 'execute_query', return_value=rows) as mock_query:
+            result = db_manager.get_missing_salary_years()
+
+        mock_query.assert_called_once()
+        assert mock_query.call_args.args[1] == (current - 2, current + 19)
+        # Vergangene Jahre ohne fehlende Mitarbeiter entfallen, zukünftige bleiben
+        assert [y['year'] for y in result] == [current, current + 1]
+        assert result[0]['employees'] == [{'id_empleado': 4, 'nombre': 'Luis', 'apellido': 'Pérez'}]
+        assert result[1]['missing_count'] == 0
+        assert result[1]['is_future_year'] is True
+
+    def test_cached_until_salary_write(self, db_manager):
+        rows = [{'anio': datetime.now().year + 1, 'id_empleado': None, 'nombre': None, 'apellido': None}]
+        with patch.object(db_manager, 'execute_query', return_value=rows) as mock_query, \
+                patch.object(DatabaseManager, '_create_connection', return_value=Mock()):
+            db_manager.get_missing_salary_years()
+            db_manager.get_missing_salary_years()
+            assert mock_query.call_count == 1
+            db_manager.execute_update("DELETE FROM t002_salarios WHERE id_empleado = %s AND anio = %s", (1, 2025))
+            db_manager.get_missing_salary_years()
+        assert mock_query.call_count == 2
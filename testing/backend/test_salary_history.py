@@ -0,0 +1,117 @@
+import pytest
+import sys
+import os
+from decimal import Decimal
+from unittest.mock import Mock, patch
+
+# Backend-Verzeichnis zum Pfad hinzufügen
+backend_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'backend'))
+sys.path.insert(0, backend_path)
+
+from database_manager import DatabaseManager
+from database_salary_history import SalaryHistory, SalaryYear, atrasos_amount, salary_update_statement
+
+
+def _row(emp_id, anio, salary, modalidad=12, atrasos='0.00', mensual=None):
+    mensual = mensual if mensual is not None else Decimal(salary) / modalidad
+    return {'id_empleado': emp_id, 'anio': anio, 'modalidad': modalidad,
+            'salario_anual_bruto': Decimal(salary), 'salario_mensual_bruto': mensual,
+            'atrasos': Decimal(atrasos), 'salario_mensual_con_atrasos': mensual}
+
+
+class TestSalaryHistory:
+    """Tests für die atrasos-Kette im Speicher"""
+
+    def test_from_rows_groups_and_orders_by_year(self):
+        histories = SalaryHistory.from_rows([_row(2, 2025, '24000'), _row(1, 2026, '30000'), _row(1, 2024, '28000')])
+        assert sorted(histories) == [1, 2]
+        assert list(histories[1].years) == [2024, 2026]
+        assert isinstance(histories[1].years[2024], SalaryYear)
+        assert not hasattr(histories[1].years[2024], '__dict__')
+
+    def test_only_first_following_year_gets_atrasos(self):
+        history = SalaryHistory.from_rows([
+            _row(1, 2024, '24000', atrasos='0.00', mensual=Decimal('2000.00')),
+            _row(1, 2025, '26400', atrasos='50.00', mensual=Decimal('2000.00')),
+            _row(1, 2026, '26400', atrasos='600.00'),
+            _row(1, 2027, '30000', modalidad=14),
+        ])[1]
+
+        updates = history.subsequent_year_updates(2024, 3)
+
+        assert updates == [
+            (1, 2025, Decimal('600.00'), Decimal('2200.00')),
+            (1, 2026, Decimal('0.00'), Decimal('2200.00')),
+        ]
+        # Unveränderte Jahre werden nicht geschrieben, das Modell ist danach aktuell
+        assert history.subsequent_year_updates(2024, 3) == []
+
+    def test_year_without_previous_year_is_skipped(self):
+        history = SalaryHistory.from_rows([_row(1, 2024, '24000'), _row(1, 2026, '30000', atrasos='300.00')])[1]
+        assert history.subsequent_year_updates(2024, 3) == []
+        assert history.years[2026].atrasos == Decimal('300.00')
+
+    def test_salary_cut_has_no_negative_atrasos(self):
+        history = SalaryHistory.from_rows([_row(1, 2024, '26400'), _row(1, 2025, '24000', atrasos='-600.00')])[1]
+        assert history.subsequent_year_updates(2024, 3) == [(1, 2025, Decimal('0.00'), Decimal('2000.00'))]
+        assert atrasos_amount(Decimal('24000'), Decimal('26400'), 12, 3) == 0
+        assert atrasos_amount(Decimal('26400'), Decimal('0'), 12, 3) == 0
+
+    def test_no_atrasos_after_zero_salary_or_unknown_modalidad(self):
+        history = SalaryHistory.from_rows([_row(1, 2024, '0', atrasos='0.00'), _row(1, 2025, '24000', atrasos='10.00')])[1]
+        assert history.subsequent_year_updates(2024, 3)[0][2] == Decimal('0.00')
+        history = SalaryHistory.from_rows([_row(1, 2024, '24000'), _row(1, 2025, '26400', modalidad=13, atrasos='10.00')])[1]
+        assert history.subsequent_year_updates(2024, 3)[0][2:] == (Decimal('0.00'), Decimal('2200.00'))
+
+    def test_update_statement(self):
+        query, params = salary_update_statement([(1, 2025, Decimal('600.00'), Decimal('2200.00')),
+                                                 (2, 2025, Decimal('0.00'), Decimal('1000.00'))])
+        assert query.count("UNION ALL") == 1
+        assert query.count("%s") == len(params) == 8
+        assert params[:4] == (1, 2025, Decimal('600.00'), Decimal('2200.00'))
+
+
+class TestUpdateSubsequentYearsAtrasos:
+    """_update_subsequent_years_atrasos: eine Abfrage, ein UPDATE, eine Transaktion"""
+
+    @pytest.fixture
+    def db_manager(self):
+        manager = DatabaseManager('localhost', 'test_db', 'test_user', 'test_password', 3307)
+        # Nachberechnung von t006 nach dem Commit hat eigene Tests (test_payroll_values.py)
+        manager.refresh_pending_payroll = Mock()
+        manager.get_payout_month = Mock(return_value=4)
+        return manager
+
+    @pytest.fixture
+    def mock_connection(self):
+        connection = Mock()
+        connection.cursor.return_value = Mock()
+        return connection
+
+    def test_single_query_and_batched_update(self, db_manager, mock_connection):
+        cursor = mock_connection.cursor.return_value
+        cursor.fetchall.return_value = [
+            _row(1, 2024, '24000'), _row(1, 2025, '26400', mensual=Decimal('2000.00')),
+            _row(1, 2026, '26400', atrasos='600.00'), _row(1, 2027, '26400'),
+        ]
+        with patch.object(DatabaseManager, '_create_connection', return_value=mock_connection), \
+                patch.object(db_manager, 'execute_query') as mock_query:
+            db_manager._update_subsequent_years_atrasos(1, 2024)
+
+        mock_query.assert_not_called()
+        db_manager.get_payout_month.assert_called_once()
+        assert cursor.execute.call_count == 2
+        assert cursor.execute.call_args_list[0].args[1] == (1, 2024)
+        update_query, update_params = cursor.execute.call_args_list[1].args
+        assert update_query.lstrip().startswith("UPDATE t002_salarios s")
+        assert update_params == (1, 2025, Decimal('600.00'), Decimal('2200.00'),
+                                 1, 2026, Decimal('0.00'), Decimal('2200.00'))
+        mock_connection.commit.assert_called_once()
+
+    def test_without_following_years_nothing_is_written(self, db_manager, mock_connection):
+        cursor = mock_connection.cursor.return_value
+        cursor.fetchall.return_value = [_row(1, 2024, '24000')]
+        with patch.object(DatabaseManager, '_create_connection', return_value=mock_connection):
+            db_manager._update_subsequent_years_atrasos(1, 2024)
+        assert cursor.execute.call_count == 1
+        db_manager.get_payout_month.assert_not_called()
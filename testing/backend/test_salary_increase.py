@@ -0,0 +1,109 @@
+import pytest
+import sys
+import os
+from decimal import Decimal
+from unittest.mock import Mock, patch
+
+# Backend-Verzeichnis zum Pfad hinzufügen
+backend_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'backend'))
+sys.path.insert(0, backend_path)
+
+from database_manager import DatabaseManager
+
+
+def _row(emp_id, anio=None, salary=None, modalidad=None, nombre='Ana', apellido='García'):
+    return {'id_empleado': emp_id, 'nombre': nombre, 'apellido': apellido,
+            'anio': anio, 'salario_anual_bruto': salary, 'modalidad': modalidad}
+
+
+HISTORY = [
+    # 1: Gehalt im Zieljahr vorhanden -> Basis Zieljahr
+    _row(1, 2025, Decimal('30000.00'), 14), _row(1, 2024, Decimal('28000.00'), 14),
+    # 2: nur Vorjahr -> Basis Vorjahr
+    _row(2, 2024, Decimal('24000.00'), 12),
+    # 3: Zieljahr mit 0 ist das neueste Jahr -> letztes Jahr mit Gehalt > 0
+    _row(3, 2025, Decimal('0.00'), 12), _row(3, 2023, Decimal('12000.00'), 12),
+    # 4: ohne Gehalt -> Fehler
+    _row(4, nombre='Luis', apellido='Pérez'),
+]
+
+
+class TestSalaryIncreasePlan:
+    """Tests für die vektorisierte Berechnung der Gehaltserhöhung"""
+
+    def test_base_salary_selection_and_atrasos(self):
+        plan, errors = DatabaseManager._plan_salary_increase(HISTORY, 2025, 10.0, None, 3)
+
+        assert list(plan['id_empleado']) == [1, 2, 3]
+        assert list(plan['base_year']) == [2025, 2024, 2023]
+        assert list(plan['old_salary']) == [30000.0, 24000.0, 12000.0]
+        assert plan['new_salary'].round(2).tolist() == [33000.0, 26400.0, 13200.0]
+        # (neu - alt) / modalidad * Monate vor Auszahlung
+        assert plan['atrasos'].round(2).tolist() == [round(3000 / 14 * 3, 2), 600.0, 300.0]
+        assert errors == ["Mitarbeiter Luis Pérez: Kein Gehalt gefunden"]
+
+    def test_absolute_increase(self):
+        plan, _ = DatabaseManager._plan_salary_increase(HISTORY[:2], 2025, None, 1400.0, 3)
+        assert plan['new_salary'].tolist() == [31400.0]
+        assert plan['atrasos'].tolist() == [300.0]
+
+
+class TestApplyPercentageSalaryIncrease:
+    """Vorschau und Anwendung mit konstanter Anzahl Round Trips"""
+
+    @pytest.fixture
+    def db_manager(self):
+        manager = DatabaseManager('localhost', 'test_db', 'test_user', 'test_password', 3307)
+        manager.get_payout_month = Mock(return_value=4)
+        return manager
+
+    def test_preview_does_not_write(self, db_manager):
+        with patch.object(db_manager, 'execute_query', return_value=list(HISTORY)) as mock_query, \
+                patch.object(DatabaseManager, '_create_connection') as mock_create:
+            result = db_manager.apply_percentage_salary_increase(2025, 10.0, excluded_employee_ids=[9], preview=True)
+
+        mock_create.assert_not_called()
+        assert mock_query.call_count == 1
+        assert mock_query.call_args.args[1] == (9,)
+        assert result['preview'] is True
+        assert result['updated_count'] == 0
+        assert result['employee_count'] == 3
+        assert result['total_cost'] == pytest.approx(3000 + 2400 + 1200)
+        assert result['employees'][1] == {
+            'id': 2, 'name': 'Ana García', 'old_salary': 24000.0, 'new_salary': pytest.approx(26400.0),
+            'increase_percent': 10.0, 'increase_absolute': None, 'increase_info': '+10.0%',
+            'atrasos': pytest.approx(600.0), 'base_year': 2024, 'modalidad': 12,
+        }
+        assert result['error_count'] == 1
+
+    def test_apply_writes_in_one_transaction(self, db_manager):
+        connection = Mock()
+        cursor = Mock(rowcount=3)
+        cursor.fetchall.return_value = []
+        connection.cursor.return_value = cursor
+        with patch.object(db_manager, 'execute_query', return_value=list(HISTORY)), \
+                patch.object(DatabaseManager, '_create_connection', return_value=connection), \
+                patch.object(db_manager, 'update_salary') as mock_update, \
+                patch.object(db_manager, 'add_salary') as mock_add:
+            result = db_manager.apply_percentage_salary_increase(2025, 10.0)
+
+        mock_update.assert_not_called()
+        mock_add.assert_not_called()
+        upsert_query, upsert_rows = cursor.executemany.call_args.args
+        assert "ON DUPLICATE KEY UPDATE" in upsert_query
+        assert [row[0] for row in upsert_rows] == [1, 2, 3]
+        assert upsert_rows[1] == (2, 2025, 12, 0, pytest.approx(26400.0), pytest.approx(2200.0),
+                                  pytest.approx(600.0), pytest.approx(2200.0))
+        assert all(isinstance(value, (int, float)) for row in upsert_rows for value in row)
+        # Folgejahre: eine Abfrage der Historie, ohne spätere Jahre kein UPDATE
+        history_query, history_params = cursor.execute.call_args.args
+        assert "anio >= %s" in history_query
+        assert history_params == (1, 2, 3, 2025)
+        assert cursor.execute.call_count == 1
+        connection.commit.assert_called_once()
+        assert result['success'] is True
+        assert result['updated_count'] == 3
+
+    def test_requires_an_increase(self, db_manager):
+        result = db_manager.apply_percentage_salary_increase(2025)
+        assert result['success'] is False
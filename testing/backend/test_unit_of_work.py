@@ -0,0 +1,185 @@
+import pytest
+import sys
+import os
+from unittest.mock import Mock, patch
+from mysql.connector import Error
+
+# Backend-Verzeichnis zum Pfad hinzufügen
+backend_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'backend'))
+sys.path.insert(0, backend_path)
+
+from database_manager import DatabaseManager
+
+
+class TestUnitOfWork:
+    """Tests für die Request-/Batch-gebundene Unit of Work im DatabaseManager"""
+
+    @pytest.fixture
+    def db_manager(self):
+        manager = DatabaseManager('localhost', 'test_db', 'test_user', 'test_password', 3307)
+        # Nachberechnung von t006 nach dem Commit hat eigene Tests (test_payroll_values.py)
+        manager.refresh_pending_payroll = Mock()
+        return manager
+
+    @pytest.fixture
+    def mock_connection(self):
+        connection = Mock()
+        cursor = Mock()
+        cursor.with_rows = True
+        cursor.fetchall.return_value = [{'id_empleado': 1}]
+        connection.cursor.return_value = cursor
+        return connection
+
+    def test_single_checkout_and_single_commit(self, db_manager, mock_connection):
+        """Alle Statements im Block teilen sich eine Verbindung, commit genau einmal"""
+        with patch.object(DatabaseManager, '_create_connection', return_value=mock_connection) as mock_create:
+            with db_manager.unit_of_work():
+                for month in range(1, 13):
+                    db_manager.execute_query("SELECT 1 FROM t003_ingresos_brutos_mensuales WHERE mes = %s", (month,))
+                    assert db_manager.execute_update("UPDATE t003_ingresos_brutos_mensuales SET primas = 0 WHERE mes = %s", (month,))
+                mock_connection.commit.assert_not_called()
+                mock_connection.close.assert_not_called()
+
+        mock_create.assert_called_once()
+        mock_connection.commit.assert_called_once()
+        mock_connection.close.assert_called_once()
+        assert db_manager.in_unit_of_work() is False
+
+    def test_lazy_checkout(self, db_manager):
+        """Ohne Statement wird keine Verbindung ausgecheckt"""
+        with patch.object(DatabaseManager, '_create_connection') as mock_create:
+            with db_manager.unit_of_work():
+                pass
+        mock_create.assert_not_called()
+
+    def test_nested_unit_of_work_joins_outer(self, db_manager, mock_connection):
+        """Verschachtelte Unit of Work nutzt die äußere Verbindung und committed nicht selbst"""
+        with patch.object(DatabaseManager, '_create_connection', return_value=mock_connection) as mock_create:
+            with db_manager.unit_of_work():
+                db_manager.execute_update("UPDATE t001_empleados SET activo = TRUE")
+                with db_manager.unit_of_work():
+                    db_manager.execute_update("UPDATE t001_empleados SET activo = FALSE")
+                mock_connection.commit.assert_not_called()
+
+        mock_create.assert_called_once()
+        mock_connection.commit.assert_called_once()
+
+    def test_exception_rolls_back(self, db_manager, mock_connection):
+        """Eine Exception im Block führt zu Rollback statt Commit"""
+        with patch.object(DatabaseManager, '_create_connection', return_value=mock_connection):
+            with pytest.raises(ValueError):
+                with db_manager.unit_of_work():
+                    db_manager.execute_update("UPDATE t001_empleados SET activo = TRUE")
+                    raise ValueError("boom")
+
+        mock_connection.rollback.assert_called_once()
+        mock_connection.commit.assert_not_called()
+        mock_connection.close.assert_called_once()
+
+    def test_failed_statement_keeps_transaction(self, db_manager, mock_connection):
+        """Ein fehlgeschlagenes Statement rollt nicht die ganze Unit of Work zurück"""
+        cursor = mock_connection.cursor.return_value
+        cursor.execute.side_effect = [None, Error("Duplicate entry"), None]
+        with patch.object(DatabaseManager, '_create_connection', return_value=mock_connection):
+            with db_manager.unit_of_work():
+                assert db_manager.execute_update("INSERT INTO t010_carry_over VALUES (1)") is True
+                assert db_manager.execute_update("INSERT INTO t010_carry_over VALUES (1)") is False
+                assert db_manager.execute_update("INSERT INTO t010_carry_over VALUES (2)") is True
+
+        mock_connection.rollback.assert_not_called()
+        mock_connection.commit.assert_called_once()
+
+    def test_lost_connection_before_writes_is_retried(self, db_manager):
+        """Verbindungsabbruch vor dem ersten Schreibzugriff: Retry auf frischer Verbindung"""
+        dead = Mock()
+        dead_cursor = Mock()
+        dead_cursor.execute.side_effect = Error("Lost connection to MySQL server", errno=2013)
+        dead.cursor.return_value = dead_cursor
+
+        alive = Mock()
+        alive_cursor = Mock()
+        alive_cursor.with_rows = True
+        alive_cursor.fetchall.return_value = [{'id_empleado': 7}]
+        alive.cursor.return_value = alive_cursor
+
+        with patch.object(DatabaseManager, '_create_connection', side_effect=[dead, alive]):
+            with db_manager.unit_of_work():
+                assert db_manager.execute_query("SELECT id_empleado FROM t001_empleados") == [{'id_empleado': 7}]
+                assert db_manager.execute_update("UPDATE t001_empleados SET activo = TRUE")
+
+        dead.close.assert_called_once()
+        alive.commit.assert_called_once()
+
+    def test_lost_connection_after_writes_marks_failed(self, db_manager):
+        """Verbindungsabbruch nach Schreibzugriffen: Unit of Work wird als fehlgeschlagen gemeldet"""
+        first = Mock()
+        first_cursor = Mock()
+        first_cursor.execute.side_effect = [None, Error("Lost connection to MySQL server", errno=2013)]
+        first.cursor.return_value = first_cursor
+        second = Mock()
+        second.cursor.return_value = Mock()
+
+        with patch.object(DatabaseManager, '_create_connection', side_effect=[first, second]):
+            db_manager.begin_unit_of_work()
+            assert db_manager.execute_update("UPDATE t001_empleados SET activo = TRUE") is True
+            assert db_manager.execute_update("UPDATE t001_empleados SET activo = FALSE") is False
+            assert db_manager.execute_update("UPDATE t001_empleados SET activo = TRUE") is True
+            assert db_manager.end_unit_of_work() is False
+
+        first.commit.assert_not_called()
+        second.commit.assert_not_called()
+        second.rollback.assert_called_once()
+
+    def test_carry_over_batch_uses_savepoint_inside_unit_of_work(self, db_manager, mock_connection):
+        """Mehr-Statement-Methoden nutzen innerhalb der Unit of Work einen SAVEPOINT"""
+        cursor = mock_connection.cursor.return_value
+        with patch.object(DatabaseManager, '_create_connection', return_value=mock_connection):
+            with db_manager.unit_of_work():
+                ok = db_manager.create_carry_over_batch(1, 2025, 3, [{'concept': 'salary', 'amount': 10}], [])
+                assert ok is True
+                mock_connection.commit.assert_not_called()
+
+        executed = [c.args[0].strip() for c in cursor.execute.call_args_list]
+        assert executed[0].startswith("SAVEPOINT")
+        assert any(q.startswith("DELETE FROM t010_carry_over") for q in executed)
+        mock_connection.commit.assert_called_once()
+
+    def test_carry_over_batch_failure_rolls_back_to_savepoint(self, db_manager, mock_connection):
+        """Fehler im Block: ROLLBACK TO SAVEPOINT, die übrige Unit of Work wird committed"""
+        cursor = mock_connection.cursor.return_value
+        cursor.executemany.side_effect = Error("Data too long")
+        with patch.object(DatabaseManager, '_create_connection', return_value=mock_connection):
+            with db_manager.unit_of_work():
+                ok = db_manager.create_carry_over_batch(1, 2025, 3, [{'concept': 'salary', 'amount': 10}], [])
+                assert ok is False
+
+        executed = [c.args[0].strip() for c in cursor.execute.call_args_list]
+        assert executed[-1].startswith("ROLLBACK TO SAVEPOINT")
+        mock_connection.rollback.assert_not_called()
+        mock_connection.commit.assert_called_once()
+
+    def test_without_unit_of_work_behaviour_unchanged(self, db_manager, mock_connection):
+        """Ohne Unit of Work: eigene Verbindung und eigener Commit pro Statement"""
+        with patch.object(DatabaseManager, '_create_connection', return_value=mock_connection) as mock_create:
+            db_manager.execute_update("UPDATE t001_empleados SET activo = TRUE")
+            db_manager.execute_update("UPDATE t001_empleados SET activo = FALSE")
+
+        assert mock_create.call_count == 2
+        assert mock_connection.commit.call_count == 2
+        assert mock_connection.close.call_count == 2
+
+    def test_after_commit_runs_once_after_commit(self, db_manager, mock_connection):
+        """after-commit-Callbacks laufen einmal nach dem Commit, außerhalb sofort"""
+        callback = Mock()
+        with patch.object(DatabaseManager, '_create_connection', return_value=mock_connection):
+            with db_manager.unit_of_work():
+                db_manager.execute_update("UPDATE t005_usuarios SET activo = TRUE")
+                db_manager._after_commit(callback)
+                db_manager._after_commit(callback)
+                callback.assert_not_called()
+            callback.assert_called_once()
+
+            db_manager._after_commit(callback)
+        assert callback.call_count == 2
+        mock_connection.commit.assert_called_once()
+        mock_connection.close.assert_called_once()
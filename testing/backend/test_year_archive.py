@@ -0,0 +1,220 @@
+import pytest
+import sys
+import os
+from datetime import date
+from unittest.mock import Mock, patch
+
+# Backend-Verzeichnis zum Pfad hinzufügen
+backend_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'backend'))
+sys.path.insert(0, backend_path)
+
+from database_manager import DatabaseManager
+from database_migrations import (
+    PARTITION_SCHEMA_VERSION,
+    ensure_year_partitions,
+    load_migrations,
+    migrate_year_partitions,
+)
+
+
+class TestYearPartitions:
+    """Tests für Migration 10 und die Pflege der Jahrespartitionen"""
+
+    def test_migration_partitions_and_creates_archives(self):
+        cursor = Mock(with_rows=False)
+        cursor.fetchall.return_value = []
+        migrate_year_partitions(cursor)
+
+        executed = [c.args[0] for c in cursor.execute.call_args_list]
+        current = date.today().year
+        partition_stmts = [q for q in executed if "PARTITION BY RANGE" in q]
+        assert len(partition_stmts) == 3
+        assert "t003_ingresos_brutos_mensuales PARTITION BY RANGE (anio)" in partition_stmts[0]
+        assert f"PARTITION p{current + 1} VALUES LESS THAN ({current + 2})" in partition_stmts[0]
+        assert "RANGE (UNIX_TIMESTAMP(fecha))" in partition_stmts[2]
+        assert any("ADD PRIMARY KEY (id_registro, fecha)" in q for q in executed)
+        assert "CREATE TABLE t004_deducciones_mensuales_archivo LIKE t004_deducciones_mensuales" in executed
+        # Archivtabellen werden vor der Partitionierung angelegt (LIKE übernimmt sonst die Partitionen)
+        archive_idx = executed.index("ALTER TABLE t003_ingresos_brutos_mensuales_archivo ROW_FORMAT=COMPRESSED")
+        assert archive_idx < executed.index(partition_stmts[0])
+
+    def test_foreign_keys_are_dropped(self):
+        cursor = Mock(with_rows=False)
+        cursor.fetchall.side_effect = [[('t003_ibfk_1',)], [(2019,)]] + [[]] * 4
+        migrate_year_partitions(cursor)
+
+        executed = [c.args[0] for c in cursor.execute.call_args_list]
+        assert "ALTER TABLE t003_ingresos_brutos_mensuales DROP FOREIGN KEY t003_ibfk_1" in executed
+        partition_stmt = next(q for q in executed if "PARTITION BY RANGE" in q)
+        assert "PARTITION p2019 VALUES LESS THAN (2020)" in partition_stmt
+
+    def test_ensure_splits_pmax_for_missing_years(self):
+        current = date.today().year
+        cursor = Mock(with_rows=False)
+        cursor.fetchall.side_effect = [
+            [(f"p{current - 1}",), ("pmax",)],
+            [(f"p{current}",), (f"p{current + 1}",), ("pmax",)],
+            [],
+        ]
+        added = ensure_year_partitions(cursor)
+
+        assert added == [f"t003_ingresos_brutos_mensuales.p{current}",
+                         f"t003_ingresos_brutos_mensuales.p{current + 1}"]
+        reorganize = [c.args[0] for c in cursor.execute.call_args_list if "REORGANIZE" in c.args[0]]
+        assert len(reorganize) == 1
+        assert "REORGANIZE PARTITION pmax INTO" in reorganize[0]
+        assert "PARTITION pmax VALUES LESS THAN MAXVALUE" in reorganize[0]
+
+    def test_archive_guard_triggers(self):
+        migration = next(m for m in load_migrations() if m['name'] == 'archive_registry')
+        triggers = [s for s in migration['statements'] if s.startswith('CREATE TRIGGER')]
+        assert len(triggers) == 2
+        assert all("SIGNAL SQLSTATE '45000'" in t for t in triggers)
+
+
+class TestArchiveYear:
+    """Tests für DatabaseManager.archive_year und archivbewusste Lesezugriffe"""
+
+    @pytest.fixture
+    def db_manager(self):
+        manager = DatabaseManager('localhost', 'test_db', 'test_user', 'test_password', 3307)
+        # Nachberechnung von t006 nach dem Commit hat eigene Tests (test_payroll_values.py)
+        manager.refresh_pending_payroll = Mock()
+        manager.schema_version = PARTITION_SCHEMA_VERSION
+        return manager
+
+    @pytest.fixture
+    def mock_connection(self):
+        connection = Mock()
+        connection.cursor.return_value = Mock()
+        return connection
+
+    def test_moves_closed_year_in_one_transaction(self, db_manager, mock_connection):
+        year = date.today().year - 2
+        with patch.object(DatabaseManager, '_create_connection', return_value=mock_connection):
+            result = db_manager.archive_year(year)
+
+        assert result['success'] is True
+        calls = mock_connection.cursor.return_value.execute.call_args_list
+        executed = [c.args[0] for c in calls]
+        assert "REPLACE INTO t003_ingresos_brutos_mensuales_archivo SELECT * FROM t003_ingresos_brutos_mensuales WHERE anio = %s" in executed
+        assert "DELETE FROM t004_deducciones_mensuales WHERE anio = %s" in executed
+        t007_delete = next(c for c in calls if c.args[0].startswith("DELETE FROM t007_registro_procesamiento"))
+        assert t007_delete.args[1] == (f"{year}-01-01 00:00:00", f"{year + 1}-01-01 00:00:00")
+        assert "t012_anios_archivados" in executed[-1]
+        mock_connection.commit.assert_called_once()
+
+    def test_open_year_is_rejected(self, db_manager):
+        with patch.object(DatabaseManager, '_create_connection') as mock_create:
+            result = db_manager.archive_year(date.today().year - 1)
+        assert result['success'] is False
+        mock_create.assert_not_called()
+
+    def test_requires_partition_schema(self, db_manager):
+        db_manager.schema_version = PARTITION_SCHEMA_VERSION - 1
+        result = db_manager.archive_year(2000)
+        assert result['success'] is False
+        assert str(PARTITION_SCHEMA_VERSION) in result['error']
+
+    def test_failure_rolls_back(self, db_manager, mock_connection):
+        from mysql.connector import Error
+        mock_connection.cursor.return_value.execute.side_effect = [None, Error("Lock wait timeout")]
+        with patch.object(DatabaseManager, '_create_connection', return_value=mock_connection):
+            result = db_manager.archive_year(2000)
+        assert result['success'] is False
+        mock_connection.rollback.assert_called_once()
+        mock_connection.commit.assert_not_called()
+
+    def test_complete_info_reads_archive(self, db_manager):
+        with patch.object(db_manager, 'execute_queries_concurrently', return_value={
+                'employee': [{'id_empleado': 1}], 'salaries': [], 'ingresos': [], 'deducciones': [],
+                'ingresos_mensuales': [], 'deducciones_mensuales': [], 'fte': []}) as mock_concurrent:
+            db_manager.get_employee_complete_info(1)
+
+        queries = mock_concurrent.call_args.args[0]
+        query, params = queries['ingresos_mensuales']
+        assert "UNION ALL" in query and "t003_ingresos_brutos_mensuales_archivo" in query
+        assert query.count("%s") == len(params) == 3
+        assert "UNION ALL" not in queries['salaries'][0]
+
+    def test_payroll_reads_archive(self, db_manager):
+        with patch.object(db_manager, 'execute_query', return_value=[]) as mock_query:
+            db_manager.calculate_payroll_rows(2020, 6, payout_month=4)
+        query, params = mock_query.call_args.args
+        assert "t004_deducciones_mensuales_archivo" in query
+        assert query.count("%s") == len(params)
+
+    def test_registro_pushes_limit_into_both_branches(self, db_manager):
+        with patch.object(db_manager, 'execute_query', return_value=[]) as mock_query:
+            db_manager.get_registro_procesamiento(1, 2020, limit=50)
+        query, params = mock_query.call_args.args
+        assert "t007_registro_procesamiento_archivo" in query
+        assert query.count("LIMIT %s") == 3
+        assert query.count("%s") == len(params)
+        assert params == (1, 2020, 50, 1, 2020, 50, 1, 2020, 50)
+
+    def test_without_archive_queries_are_unchanged(self, db_manager):
+        db_manager.schema_version = PARTITION_SCHEMA_VERSION - 1
+        with patch.object(db_manager, 'execute_query', return_value=[]) as mock_query:
+            db_manager.get_registro_procesamiento(1)
+        query, params = mock_query.call_args.args
+        assert "UNION ALL" not in query
+        assert params == (1, 200)
+
+
+class TestPartitionIntegrity:
+    """Migration 11 ersetzt die von Migration 10 entfernten Fremdschlüssel"""
+
+    @pytest.fixture
+    def statements(self):
+        migration = next(m for m in load_migrations() if m['name'] == 'partition_integrity')
+        assert migration['replace_triggers'] is True
+        return migration['statements']
+
+    def _trigger(self, statements, timing_event, table):
+        matches = [s for s in statements if s.startswith('CREATE TRIGGER') and f"{timing_event} ON {table}\n" in s]
+        assert len(matches) == 1, (timing_event, table)
+        return matches[0]
+
+    def test_employee_delete_cascades_into_partitioned_and_archive_tables(self, statements):
+        trigger = self._trigger(statements, 'BEFORE DELETE', 't001_empleados')
+        for table in ('t003_ingresos_brutos_mensuales', 't004_deducciones_mensuales'):
+            assert f"DELETE FROM {table} WHERE id_empleado = OLD.id_empleado" in trigger
+            assert f"DELETE FROM {table}_archivo WHERE id_empleado = OLD.id_empleado" in trigger
+        for table in ('t007_registro_procesamiento', 't007_registro_procesamiento_archivo'):
+            assert f"UPDATE {table} SET id_empleado = NULL WHERE id_empleado = OLD.id_empleado" in trigger
+
+    def test_child_rows_require_existing_parents(self, statements):
+        for table in ('t003_ingresos_brutos_mensuales', 't004_deducciones_mensuales', 't007_registro_procesamiento'):
+            for event in ('BEFORE INSERT', 'BEFORE UPDATE'):
+                trigger = self._trigger(statements, event, table)
+                assert "NOT EXISTS (SELECT 1 FROM t001_empleados WHERE id_empleado = NEW.id_empleado)" in trigger
+                assert "SIGNAL SQLSTATE '23000'" in trigger
+        assert "FROM t005_usuarios WHERE nombre_usuario = NEW.usuario_login" in \
+            self._trigger(statements, 'BEFORE INSERT', 't007_registro_procesamiento')
+
+    def test_referenced_parents_are_restricted(self, statements):
+        for event in ('BEFORE DELETE', 'BEFORE UPDATE'):
+            trigger = self._trigger(statements, event, 't005_usuarios')
+            assert "t007_registro_procesamiento_archivo WHERE usuario_login = OLD.nombre_usuario" in trigger
+        assert "NEW.id_empleado <> OLD.id_empleado" in self._trigger(statements, 'BEFORE UPDATE', 't001_empleados')
+
+    def test_existing_orphans_are_cleaned_up(self, statements):
+        cleanup = [s for s in statements if not s.startswith('CREATE TRIGGER')]
+        assert len(cleanup) == 6
+        assert all("LEFT JOIN t001_empleados e" in s and "e.id_empleado IS NULL" in s for s in cleanup)
+
+    def test_delete_employee_cleans_partitioned_tables(self):
+        manager = DatabaseManager('localhost', 'test_db', 'test_user', 'test_password', 3307)
+        # Nachberechnung von t006 nach dem Commit hat eigene Tests (test_payroll_values.py)
+        manager.refresh_pending_payroll = Mock()
+        manager.schema_version = PARTITION_SCHEMA_VERSION
+        connection = Mock()
+        with patch.object(DatabaseManager, '_create_connection', return_value=connection):
+            assert manager.delete_employee(5) is True
+
+        executed = [c.args[0] for c in connection.cursor.return_value.execute.call_args_list]
+        assert "DELETE FROM t003_ingresos_brutos_mensuales_archivo WHERE id_empleado = %s" in executed
+        assert "UPDATE t007_registro_procesamiento SET id_empleado = NULL WHERE id_empleado = %s" in executed
+        assert executed[-1] == "DELETE FROM t001_empleados WHERE id_empleado = %s"
+        connection.commit.assert_called_once()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Export- und Listenabfragen vor/nach Migration 12 (deckende Indizes)
+
+Legt eine temporäre Datenbank auf dem per DB_* Umgebungsvariablen konfigurierten
+MySQL-Server an, migriert sie bis Version 10, füllt synthetische Daten ein und misst
+für jede Abfrage EXPLAIN (Zugriffsart, Index, Extra) und die beste Laufzeit.
+Danach wird Migration 12 eingespielt und erneut gemessen.
+
+Aufruf:  python testing/benchmarks/bench_covering_indexes.py --employees 5000 --years 6
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+import mysql.connector
+
+backend_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'backend'))
+sys.path.insert(0, backend_path)
+
+from database_manager import DatabaseManager  # noqa: E402
+from database_migrations import apply_migrations  # noqa: E402
+
+BEFORE_VERSION = 11
+AFTER_VERSION = 12
+
+
+def statements(year: int):
+    """Die gemessenen Abfragen, wie sie die DatabaseManager-Methoden absetzen."""
+    manager = DatabaseManager('localhost', 'bench', 'bench', 'bench')
+    payroll_query, payroll_params = manager._payroll_read_query(year, 6, 4)
+    extra_query, extra_params = manager._payroll_read_query(year, 6, 4, extra=True)
+    return [
+        ("export (_payroll_read_query)", payroll_query, payroll_params),
+        ("export extra", extra_query, extra_params),
+        ("get_all_employees_with_salaries", """
+        SELECT e.id_empleado, e.nombre, e.apellido, e.ceco, e.categoria, e.activo, e.fecha_alta,
+               s.anio, s.salario_anual_bruto, s.salario_mensual_bruto,
+               s.modalidad, s.atrasos, s.antiguedad
+        FROM t001_empleados e
+        LEFT JOIN t002_salarios s ON e.id_empleado = s.id_empleado
+        ORDER BY e.apellido, e.nombre, s.anio DESC
+        """, ()),
+        ("get_active_employee_ids_filtered", """
+        SELECT id_empleado
+        FROM t001_empleados
+        WHERE activo = TRUE AND categoria = %s
+        ORDER BY id_empleado
+        """, ("Tecnico",)),
+        ("copy_salaries_to_new_year", """
+        SELECT e.id_empleado, e.nombre, e.apellido,
+               s.modalidad, s.antiguedad, s.salario_anual_bruto
+        FROM t001_empleados e
+        INNER JOIN t002_salarios s ON e.id_empleado = s.id_empleado
+        WHERE e.activo = TRUE
+          AND s.anio = %s
+          AND NOT EXISTS (
+              SELECT 1 FROM t002_salarios t WHERE t.id_empleado = e.id_empleado AND t.anio = %s
+          )
+        ORDER BY e.id_empleado
+        """, (year, year + 1)),
+    ]
+
+
+def populate(connection, employees: int, years: int, year: int) -> None:
+    rnd = random.Random(42)
+    cursor = connection.cursor()
+    employee_rows = [
+        (f"Nombre{i}", f"Apellido{rnd.randint(1, employees)}", str(1000 + i % 50),
+         rnd.choice(["Tecnico", "Oficina"]), f"{year - 10 + i % 10}-01-15", rnd.random() > 0.1)
+        for i in range(1, employees + 1)
+    ]
+    cursor.executemany(
+        "INSERT INTO t001_empleados (nombre, apellido, ceco, categoria, fecha_alta, activo) "
+        "VALUES (%s, %s, %s, %s, %s, %s)",
+        employee_rows,
+    )
+    salary_rows = [
+        (emp_id, y, rnd.choice([12, 14]), round(rnd.uniform(20000, 80000), 2), round(rnd.uniform(1500, 6000), 2))
+        for emp_id in range(1, employees + 1)
+        for y in range(year - years + 1, year + 1)
+    ]
+    cursor.executemany(
+        "INSERT INTO t002_salarios (id_empleado, anio, modalidad, salario_anual_bruto, salario_mensual_bruto) "
+        "VALUES (%s, %s, %s, %s, %s)",
+        salary_rows,
+    )
+    connection.commit()
+    for table in ("t001_empleados", "t002_salarios", "t006_valores_calculados_mensuales", "t008_empleado_fte"):
+        cursor.execute(f"ANALYZE TABLE {table}")
+        cursor.fetchall()
+    cursor.close()
+
+
+def explain(connection, query, params):
+    cursor = connection.cursor(dictionary=True)
+    cursor.execute("EXPLAIN " + query, params)
+    rows = cursor.fetchall()
+    cursor.close()
+    return [f"{r['table']}:{r['type']}/{r['key'] or '-'}" + (f" [{r['Extra']}]" if r.get('Extra') else "")
+            for r in rows]
+
+
+def latency(connection, query, params, repeat: int) -> float:
+    cursor = connection.cursor()
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        cursor.execute(query, params)
+        cursor.fetchall()
+        best = min(best, time.perf_counter() - started)
+    cursor.close()
+    return best
+
+
+def measure(connection, year: int, repeat: int):
+    return {
+        name: (explain(connection, query, params), latency(connection, query, params, repeat))
+        for name, query, params in statements(year)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deckende Indizes (Migration 12) vorher/nachher")
+    parser.add_argument("--employees", type=int, default=5000)
+    parser.add_argument("--years", type=int, default=6)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--database", default="rrhh_bench_indexes")
+    parser.add_argument("--keep", action="store_true", help="Benchmark-Datenbank nicht löschen")
+    args = parser.parse_args()
+
+    connection = mysql.connector.connect(
+        host=os.getenv("DB_HOST", "localhost"),
+        port=int(os.getenv("DB_PORT", "3307")),
+        user=os.getenv("DB_USER", "root"),
+        password=os.getenv("DB_PASSWORD", ""),
+    )
+    cursor = connection.cursor()
+    cursor.execute(f"DROP DATABASE IF EXISTS {args.database}")
+    cursor.execute(f"CREATE DATABASE {args.database}")
+    cursor.execute(f"USE {args.database}")
+    cursor.close()
+    year = time.localtime().tm_year
+    try:
+        apply_migrations(connection, target=BEFORE_VERSION)
+        populate(connection, args.employees, args.years, year)
+        print(f"{args.employees} Mitarbeiter, {args.years} Gehaltsjahre, bestes von {args.repeat}")
+
+        before = measure(connection, year, args.repeat)
+        apply_migrations(connection, target=AFTER_VERSION)
+        after = measure(connection, year, args.repeat)
+
+        for name in before:
+            plan_before, ms_before = before[name]
+            plan_after, ms_after = after[name]
+            print(f"\n{name}: {ms_before * 1000:8.1f} ms -> {ms_after * 1000:8.1f} ms")
+            print(f"  vorher:  {'; '.join(plan_before)}")
+            print(f"  nachher: {'; '.join(plan_after)}")
+    finally:
+        if not args.keep:
+            cursor = connection.cursor()
+            cursor.execute(f"DROP DATABASE IF EXISTS {args.database}")
+            cursor.close()
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark: dict-Zeilen vs. Tupel-Batches für den export_nomina_excel DataFrame
+
+Simuliert das Ergebnis der export_nomina_excel-Abfrage für N Mitarbeiter (synthetische Daten)
+und vergleicht den clientseitigen Aufwand:
+  - dict:  ein dict pro Zeile (wie cursor(dictionary=True)) + pd.DataFrame(liste)
+  - tuple: Tupel-Batches mit Spaltennamen (execute_query_batches) + DataFrame.from_records
+
+Aufruf:  python testing/benchmarks/bench_result_modes.py --employees 10000
+"""
+
+import argparse
+import random
+import time
+import tracemalloc
+from datetime import date
+from decimal import Decimal
+
+import pandas as pd
+
+COLUMNS = [
+    'id_empleado', 'nombre_completo', 'ceco', 'fecha_alta', 'modalidad',
+    'salario_mensual_bruto', 'atrasos', 'antiguedad', 'salario_mensual_bruto_prev', 'fte_porcentaje',
+    'ticket_restaurant', 'cotizacion_especie', 'primas', 'lavado_coche', 'beca_escolar',
+    'dietas_cotizables', 'horas_extras', 'seguro_pensiones', 'seguro_accidentes', 'dietas_exentas',
+    'formacion', 'adelas', 'sanitas', 'gasolina', 'dias_exentos',
+]
+
+
+def synthetic_rows(employees: int):
+    rnd = random.Random(42)
+    rows = []
+    for emp_id in range(1, employees + 1):
+        money = [Decimal(f"{rnd.uniform(0, 500):.2f}") for _ in range(15)]
+        rows.append((
+            emp_id,
+            f"Apellido{emp_id}, Nombre{emp_id}",
+            str(1000 + emp_id % 50),
+            date(2020, 1 + emp_id % 12, 1),
+            rnd.choice([12, 14]),
+            Decimal(f"{rnd.uniform(1500, 6000):.2f}"),
+            Decimal("0.00"),
+            Decimal(f"{rnd.uniform(0, 300):.2f}"),
+            Decimal(f"{rnd.uniform(1500, 6000):.2f}"),
+            Decimal("100.00"),
+            *money,
+        ))
+    return rows
+
+
+def build_dict(rows, batch_size):
+    data = [dict(zip(COLUMNS, row)) for row in rows]
+    return pd.DataFrame(data)
+
+
+def build_tuple(rows, batch_size):
+    frames = [
+        pd.DataFrame.from_records(rows[i:i + batch_size], columns=COLUMNS)
+        for i in range(0, len(rows), batch_size)
+    ]
+    return pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+
+
+def measure(fn, rows, batch_size, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(rows, batch_size)
+        best = min(best, time.perf_counter() - started)
+    tracemalloc.start()
+    fn(rows, batch_size)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="dict- vs. Tupel-Ergebnismodus für Exporte")
+    parser.add_argument("--employees", type=int, default=10000)
+    parser.add_argument("--batch-size", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = synthetic_rows(args.employees)
+    print(f"{args.employees} Mitarbeiter, {len(COLUMNS)} Spalten, Batchgröße {args.batch_size}")
+    for name, fn in (("dict", build_dict), ("tuple", build_tuple)):
+        seconds, peak = measure(fn, rows, args.batch_size, args.repeat)
+        print(f"{name:>6}: {seconds * 1000:8.1f} ms  Peak {peak / (1024 * 1024):7.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()